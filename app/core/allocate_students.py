@@ -2,26 +2,37 @@
 
 from __future__ import annotations
 
+import os
+import pickle
 import warnings
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
 from numbers import Number
 from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 from pandas.api import types as pd_types
 
-from .canonical_frames import canonicalize_pool_frame, canonicalize_students_frame
+from .canonical_frames import (
+    canonicalize_pool_frame,
+    canonicalize_students_frame,
+    compact_frame_dtypes,
+)
 from .center_manager import resolve_center_manager_config, validate_center_config
 from .common.column_normalizer import normalize_input_columns
 from .common.columns import (
     CANON_EN_TO_FA,
     CANON_FA_TO_EN,
+    CanonicalFrameView,
+    canonical_header,
     canonicalize_headers,
     coerce_semantics,
     dedupe_columns,
     enrich_school_columns_en,
     ensure_series,
     enforce_join_key_types,
+    header_rename_map,
     resolve_aliases,
 )
 from .common.filters import (
@@ -30,8 +41,15 @@ from .common.filters import (
     resolve_student_school_code,
 )
 from .common.ids import build_mentor_id_map, inject_mentor_id, natural_key
+from .common.join_index import JoinKeyIndex
+from .common.mentor_state import MentorStateStore
 from .common.normalization import normalize_fa, to_numlike_str
-from .common.ranking import apply_ranking_policy, build_mentor_state, consume_capacity
+from .common.ranking import (
+    MentorRankingQueue,
+    apply_ranking_policy,
+    build_mentor_state,
+    consume_capacity,
+)
 from .common.reasons import ReasonCode, build_reason
 from .common.rules import (
     CenterPriorityRule,
@@ -46,6 +64,7 @@ from .common.trace import (
     TraceStagePlan,
     build_allocation_trace,
     build_trace_plan,
+    evaluate_allocation_stages,
     find_allocation_policy_violations,
     build_unallocated_summary,
     summarize_trace_outcome,
@@ -62,6 +81,9 @@ from .common.types import (
 from .counter import normalize_digits, strip_hidden_chars
 from .policy_loader import PolicyConfig, load_policy
 from .reason.selection_reason import build_selection_reason_rows as _build_selection_reason_rows
+from .allocation.accumulators import ColumnAccumulator
+from .allocation.digest import DecisionDigest
+from .allocation.profiler import NULL_PROFILER, StageProfiler, profiler_from_env
 from .allocation.trace import attach_allocation_channel
 
 ProgressFn = Callable[[int, str], None]
@@ -1152,10 +1174,28 @@ def allocate_student(
     trace_plan: Sequence[TraceStagePlan] | None = None,
     stage_rules: Mapping[TraceStageLiteral, Rule] | None = None,
     state: Dict[object, Dict[str, int]] | None = None,
-    pool_state_view: pd.DataFrame | None = None,
+    pool_state_view: pd.DataFrame | CanonicalFrameView | None = None,
     alert_progress: ProgressFn | None = None,
+    join_index: JoinKeyIndex | None = None,
+    ranking_queue: MentorRankingQueue | None = None,
+    profiler: StageProfiler | None = None,
 ) -> AllocationResult:
-    """تخصیص تک‌دانش‌آموز با حفظ Trace و لاگ کامل."""
+    """تخصیص تک‌دانش‌آموز با حفظ Trace و لاگ کامل.
+
+    در صورت ارسال ``join_index``، فیلترهای join و تریس ۸ مرحله‌ای در یک ارزیابی
+    مشترک از سطل‌های هش ایندکس خوانده می‌شوند و ``candidate_pool`` دیگر برای هر
+    دانش‌آموز پیمایش نمی‌شود؛ در این حالت ``candidate_pool`` باید خود
+    ``join_index.frame`` (قاب مرجع) باشد و محدودیت استخر (مثلاً منتورهای مدیر مرکز)
+    فقط از موقعیت‌های ``join_index`` خوانده می‌شود. ``pool_state_view``
+    می‌تواند یک :class:`CanonicalFrameView` ازپیش‌ساخته باشد تا کاننیکال‌سازی
+    هدرها و کپی استخر در مسیر هر دانش‌آموز تکرار نشود. با ``ranking_queue``
+    (ساخته‌شده روی قاب مرجع همان ``join_index`` و همان ``state``) کاندید برتر از
+    صف اولویت خوانده می‌شود و رتبه‌بندی کامل فقط روی همان یک سطر اجرا می‌شود.
+    ``profiler`` (در صورت فعال بودن) زمان مراحل prefilter، trace_build،
+    capacity_gate، ranking و consume را ثبت می‌کند.
+    """
+    prof = profiler if profiler is not None else NULL_PROFILER
+    lap_started = prof.start()
     if policy is None:
         policy = load_policy()
     resolved_capacity_column = _resolve_capacity_column(policy, capacity_column)
@@ -1165,6 +1205,8 @@ def allocate_student(
         stage_rules = default_stage_rule_map()
     if alert_progress is None:
         alert_progress = progress
+    if join_index is not None and candidate_pool is not join_index.frame:
+        raise ValueError("candidate_pool must be join_index.frame when join_index is given")
 
     center_info = _resolve_student_center_info(student, policy)
     center_fallback = None
@@ -1186,22 +1228,45 @@ def allocate_student(
     def _record_stage(stage: str, count: int) -> None:
         stage_candidate_counts[stage] = int(count)
 
-    eligible = apply_join_filters(
-        candidate_pool,
-        student,
-        policy=policy,
-        student_join_map=join_map,
-        tracker=_record_stage,
-    )
-    stage_candidate_counts.setdefault("capacity_gate", 0)
-    trace = build_allocation_trace(
-        student,
-        candidate_pool,
-        policy=policy,
-        stage_plan=trace_plan,
-        capacity_column=resolved_capacity_column,
-        stage_rules=stage_rules,
+    row_store = (
+        state if isinstance(state, MentorStateStore) and state.rows_bound else None
     )
+    if join_index is not None:
+        evaluation = evaluate_allocation_stages(
+            student,
+            join_index,
+            policy=policy,
+            stage_plan=trace_plan,
+            capacity_column=resolved_capacity_column,
+            stage_rules=stage_rules,
+            student_join_map=join_map,
+            tracker=_record_stage,
+            capacity_values=row_store.trace_capacity if row_store is not None else None,
+        )
+        eligible = evaluation.eligible
+        eligible_positions = evaluation.positions
+        trace = evaluation.trace
+        stage_candidate_counts.setdefault("capacity_gate", 0)
+        lap_started = prof.lap("prefilter", lap_started)
+    else:
+        eligible_positions = None
+        eligible = apply_join_filters(
+            candidate_pool,
+            student,
+            policy=policy,
+            student_join_map=join_map,
+            tracker=_record_stage,
+        )
+        stage_candidate_counts.setdefault("capacity_gate", 0)
+        lap_started = prof.lap("prefilter", lap_started)
+        trace = build_allocation_trace(
+            student,
+            candidate_pool,
+            policy=policy,
+            stage_plan=trace_plan,
+            capacity_column=resolved_capacity_column,
+            stage_rules=stage_rules,
+        )
     rule_reason_code, rule_reason_text, rule_details = _derive_rule_reason(trace)
 
     try:
@@ -1275,6 +1340,7 @@ def allocate_student(
     if center_alert_payload is not None and not center_alert_payload.get("student_id"):
         center_alert_payload["student_id"] = log.get("student_id")
     _append_invalid_center_alert(log, center_alert_payload, center_fallback)
+    lap_started = prof.lap("trace_build", lap_started)
 
     if eligible.empty:
         return _fail_allocation(
@@ -1284,18 +1350,21 @@ def allocate_student(
         )
 
     progress(30, "capacity")
-    state_frame = pool_state_view if pool_state_view is not None else candidate_pool
-    state_view_en = dedupe_columns(
-        canonicalize_headers(state_frame, header_mode="en")
-    )
+    if isinstance(pool_state_view, CanonicalFrameView) and pool_state_view.header_mode == "en":
+        state_view_en = pool_state_view.frame
+    else:
+        state_frame = pool_state_view if pool_state_view is not None else candidate_pool
+        if isinstance(state_frame, CanonicalFrameView):
+            state_frame = state_frame.frame
+        state_view_en = dedupe_columns(
+            canonicalize_headers(state_frame, header_mode="en")
+        )
 
     capacity_candidates: list[str] = []
     if "remaining_capacity" in state_view_en.columns:
         capacity_candidates.append("remaining_capacity")
     capacity_candidates.append(resolved_capacity_column)
-    derived_name = canonicalize_headers(
-        pd.DataFrame(columns=[resolved_capacity_column]), header_mode="en"
-    ).columns[0]
+    derived_name = canonical_header(resolved_capacity_column, "en")
     if derived_name not in capacity_candidates:
         capacity_candidates.append(derived_name)
 
@@ -1309,12 +1378,22 @@ def allocate_student(
             f"Capacity column '{resolved_capacity_column}' not found after canonicalization"
         )
 
-    capacity_series = ensure_series(state_view_en.loc[eligible.index, capacity_column_name])
-    capacity_numeric = pd.to_numeric(capacity_series, errors="coerce").fillna(0).astype(int)
+    if row_store is not None and eligible_positions is not None:
+        capacity_numeric = pd.Series(
+            row_store.gate_capacity(eligible_positions).astype(int), index=eligible.index
+        )
+    else:
+        capacity_series = ensure_series(
+            state_view_en.loc[eligible.index, capacity_column_name]
+        )
+        capacity_numeric = (
+            pd.to_numeric(capacity_series, errors="coerce").fillna(0).astype(int)
+        )
     capacity_mask = capacity_numeric > 0
     capacity_filtered = eligible.loc[capacity_mask.values]
     stage_candidate_counts["capacity_gate"] = int(capacity_mask.sum())
     log["stage_candidate_counts"] = dict(stage_candidate_counts)
+    lap_started = prof.lap("capacity_gate", lap_started)
 
     if capacity_filtered.empty:
         return _fail_allocation(
@@ -1324,8 +1403,16 @@ def allocate_student(
         )
 
     progress(60, "ranking")
-    ranking_input = capacity_filtered.copy()
-    ranking_input["__candidate_index__"] = capacity_filtered.index
+    ranking_input = capacity_filtered
+    if ranking_queue is not None and eligible_positions is not None and state is not None:
+        chosen_position = ranking_queue.select(
+            eligible_positions, capacity_mask.to_numpy(dtype=bool)
+        )
+        if chosen_position is not None:
+            offset = int(np.searchsorted(eligible_positions, chosen_position))
+            ranking_input = eligible.iloc[[offset]]
+    ranking_input = ranking_input.copy()
+    ranking_input["__candidate_index__"] = ranking_input.index
 
     active_state = (
         state
@@ -1400,6 +1487,7 @@ def allocate_student(
                 "بررسی canonicalize_headers",
             ],
         )
+    lap_started = prof.lap("ranking", lap_started)
 
     mentor_identifier = chosen_row.get("mentor_id_en", chosen_en.get("mentor_id"))
     snapshot_entry = _snapshot_state_entry(
@@ -1494,9 +1582,425 @@ def allocate_student(
             "stage_candidate_counts": dict(stage_candidate_counts),
         }
     )
+    prof.lap("consume", lap_started)
     return AllocationResult(capacity_filtered.loc[chosen_index], trace, log)
 
 
+@dataclass
+class _BatchContext:
+    """وضعیت مشترک حلقهٔ دانش‌آموزان در ``allocate_batch`` (قابل ارسال به worker)."""
+
+    policy: PolicyConfig
+    capacity_column: str
+    trace_plan: Sequence[TraceStagePlan]
+    stage_rules: Mapping[TraceStageLiteral, Rule]
+    mentor_state: MentorStateStore
+    pool_state_view: CanonicalFrameView
+    pool_join_index: JoinKeyIndex
+    center_manager_index: Mapping[int, pd.Index]
+    center_column_name: str
+    row_labels: pd.Index
+    row_mentor_keys: List[object] | None = None
+    ranking_queue: MentorRankingQueue | None = None
+    center_join_indexes: Dict[int, JoinKeyIndex] = field(default_factory=dict)
+    profiler: StageProfiler = NULL_PROFILER
+
+    def view_for(
+        self, student: Mapping[str, object], *, enforce_center_manager: bool
+    ) -> tuple[JoinKeyIndex, object, bool]:
+        """نمای ایندکس مناسب دانش‌آموز (محدود به مدیر مرکز در فاز مرکزی)."""
+
+        student_center, center_is_valid = _extract_and_validate_center(
+            student, self.policy
+        )
+        view = self.pool_join_index
+        if enforce_center_manager and student_center is not None:
+            center_key = int(student_center)
+            manager_index = self.center_manager_index.get(center_key)
+            if manager_index is not None and len(manager_index) > 0:
+                center_index = self.center_join_indexes.get(center_key)
+                if center_index is None:
+                    center_index = self.pool_join_index.subset_labels(manager_index)
+                    self.center_join_indexes[center_key] = center_index
+                view = center_index
+        return view, student_center, center_is_valid
+
+
+@dataclass(frozen=True)
+class _BatchPhase:
+    """پارامترهای ثابت یک فاز (مدرسه‌ای یا مرکزی) در ``allocate_batch``."""
+
+    enforce_center_manager: bool
+    rule_engine: RuleEngine
+    base_phase_trace: Tuple[Mapping[str, Any], ...]
+
+
+@dataclass(frozen=True)
+class _BatchStudentOutcome:
+    """خروجی تخصیص یک دانش‌آموز برای ادغام به ترتیب اصلی."""
+
+    log: AllocationLogRecord
+    trace: List[Mapping[str, object]]
+    outcome: TraceOutcome
+    allocation: Mapping[str, object] | None
+    row_update: tuple[int, int, int, float] | None
+    alerts: Tuple[Tuple[int, str], ...] = ()
+
+
+def _allocate_batch_student(
+    context: _BatchContext,
+    phase: _BatchPhase,
+    student_dict: Dict[str, object],
+    *,
+    processed: int,
+    alert_progress: ProgressFn,
+) -> _BatchStudentOutcome:
+    """تخصیص یک دانش‌آموز در حلقهٔ دسته‌ای و ثبت سطر انتخاب‌شده در دفتر سطری."""
+
+    policy = context.policy
+    mentor_state = context.mentor_state
+    prof = context.profiler
+    view_join_index, student_center, center_is_valid = context.view_for(
+        student_dict, enforce_center_manager=phase.enforce_center_manager
+    )
+    invalid_center_payload: Dict[str, object] | None = None
+    if not center_is_valid:
+        invalid_center_payload = {
+            "student_id": student_dict.get("student_id", processed),
+            "original_center": student_dict.get(context.center_column_name),
+            "center_column": context.center_column_name,
+        }
+
+    # محدودیت مدیر مرکز در موقعیت‌های view_join_index است؛ قاب مرجع فقط برای
+    # خواندن برچسب‌ها و ظرفیت سطرهای همان موقعیت‌ها ارسال می‌شود.
+    result = allocate_student(
+        student_dict,
+        view_join_index.frame,
+        policy=policy,
+        progress=_noop_progress,
+        capacity_column=context.capacity_column,
+        trace_plan=context.trace_plan,
+        stage_rules=context.stage_rules,
+        state=mentor_state,
+        pool_state_view=context.pool_state_view,
+        alert_progress=alert_progress,
+        join_index=view_join_index,
+        ranking_queue=context.ranking_queue,
+        profiler=prof,
+    )
+    lap_started = prof.start()
+    if invalid_center_payload is not None:
+        _append_invalid_center_alert(result.log, invalid_center_payload, student_center)
+    phase_trace = [dict(entry) for entry in phase.base_phase_trace]
+    existing_phase_entries = result.log.get("phase_rule_trace")
+    if isinstance(existing_phase_entries, list) and existing_phase_entries:
+        phase_trace.extend(existing_phase_entries)
+    if not phase.enforce_center_manager:
+        phase_trace.append(
+            {
+                "stage": "student_allocation",
+                "student_id": student_dict.get("student_id"),
+                "reason": ReasonCode.SCHOOL_STUDENT_PRIORITY.value,
+                "message": _phase_reason_message(ReasonCode.SCHOOL_STUDENT_PRIORITY),
+            }
+        )
+    else:
+        mentor_payload = (
+            result.mentor_row.to_dict() if result.mentor_row is not None else None
+        )
+        phase_reason = phase.rule_engine.evaluate_pair(student_dict, mentor_payload)
+        if phase_reason is not None:
+            stage_name = "student_allocation"
+            if phase_reason in (
+                ReasonCode.CENTER_MISMATCH,
+                ReasonCode.NO_MANAGER_FOR_CENTER,
+            ):
+                stage_name = "student_rejection"
+            elif phase_reason is ReasonCode.INVALID_CENTER_VALUE:
+                stage_name = "student_alert"
+            phase_trace.append(
+                {
+                    "stage": stage_name,
+                    "student_id": student_dict.get("student_id"),
+                    "reason": phase_reason.value,
+                    "message": _phase_reason_message(phase_reason),
+                }
+            )
+    result.log["phase_rule_trace"] = phase_trace
+    lap_started = prof.lap("phase_rules", lap_started)
+
+    outcome = summarize_trace_outcome(student_dict, result.trace, result.log, policy=policy)
+    result.log["trace_final_status"] = outcome.final_status
+    result.log["trace_failure_stage"] = outcome.failure_stage
+    result.log["trace_final_reason"] = outcome.final_reason
+    result.log["trace_stage_flags"] = dict(outcome.stage_flags)
+    lap_started = prof.lap("trace_summary", lap_started)
+
+    allocation: Dict[str, object] | None = None
+    row_update: tuple[int, int, int, float] | None = None
+    if result.mentor_row is not None:
+        chosen_index = result.mentor_row.name
+        mentor_identifier = _resolve_mentor_identifier(result, policy=policy)
+        resolved_identifier, state_entry = _resolve_mentor_state_entry(
+            mentor_state, mentor_identifier
+        )
+        if state_entry is None:
+            raise KeyError(
+                f"Mentor '{mentor_identifier}' missing from state after allocation"
+            )
+        position = int(context.row_labels.get_loc(chosen_index))
+        mentor_state.record_allocation(position, resolved_identifier)
+        row_update = (position, *mentor_state.row_snapshot(position))
+
+        mentor_id_display = result.log.get("mentor_id")
+        if mentor_id_display is None:
+            mentor_id_display = resolved_identifier
+        allocation = {
+            "student_id": student_dict.get("student_id", ""),
+            "student_national_code": _extract_student_national_code(student_dict),
+            "mentor": result.mentor_row.get("پشتیبان", ""),
+            "mentor_id": "" if mentor_id_display is None else str(mentor_id_display),
+            "mentor_alias_code": _extract_mentor_alias_code(result.mentor_row),
+        }
+        prof.lap("state_sync", lap_started)
+    return _BatchStudentOutcome(
+        log=result.log,
+        trace=result.trace,
+        outcome=outcome,
+        allocation=allocation,
+        row_update=row_update,
+    )
+
+
+def _row_mentor_keys(pool: pd.DataFrame, mentor_state: MentorStateStore) -> List[object]:
+    """کلید پشتیبان هر سطر استخر برابر با ورودی‌ای از ``mentor_state`` که تخصیص مصرف می‌کند.
+
+    شناسهٔ ستون ``mentor_id`` (همان ستونی که صف رتبه‌بندی و مصرف ظرفیت می‌خوانند) با
+    :func:`_resolve_mentor_state_entry` به اندیس چگال مخزن نگاشت می‌شود؛ بنابراین
+    سطرهایی که نوشتار متفاوتی از یک شناسه دارند (``7`` و ``"7"``) یک کلید می‌گیرند.
+    سطر حل‌نشده کلید یکتای خودش را دارد (تخصیص به آن به‌هرحال خطا می‌دهد).
+    """
+
+    rename = header_rename_map(pool.columns, "en")
+    column = next(
+        (
+            position
+            for position, name in enumerate(pool.columns)
+            if rename.get(name, name) == "mentor_id"
+        ),
+        None,
+    )
+    values = pool.iloc[:, column].tolist() if column is not None else [None] * len(pool)
+    keys: List[object] = []
+    for position, value in enumerate(values):
+        resolved, entry = _resolve_mentor_state_entry(
+            mentor_state, _normalize_mentor_identifier(value)
+        )
+        ordinal = mentor_state.ordinal(resolved) if entry is not None else None
+        keys.append(("row", position) if ordinal is None else ordinal)
+    return keys
+
+
+def _partition_batch_students(
+    context: _BatchContext,
+    phase: _BatchPhase,
+    students: Sequence[Mapping[str, object]],
+) -> List[List[int]]:
+    """مؤلفه‌های هم‌بند گراف «دانش‌آموز–پشتیبان واجد شرایط».
+
+    دو دانش‌آموز فقط وقتی در یک مؤلفه‌اند که (مستقیم یا غیرمستقیم) پشتیبان
+    مشترکی داشته باشند؛ مؤلفه‌های جدا هرگز بر سر ظرفیت رقابت نمی‌کنند.
+    """
+
+    row_keys = context.row_mentor_keys
+    if row_keys is None:
+        raise RuntimeError("row_mentor_keys must be built before partitioning students")
+    parents = list(range(len(students)))
+
+    def _find(item: int) -> int:
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    owners: Dict[object, int] = {}
+    for offset, student in enumerate(students):
+        view, _, _ = context.view_for(
+            student, enforce_center_manager=phase.enforce_center_manager
+        )
+        join_map, _ = _collect_join_key_map(student, context.policy)
+        positions = view.lookup(student, student_join_map=join_map)
+        for position in positions.tolist():
+            owner = owners.setdefault(row_keys[position], offset)
+            root_owner, root_self = _find(owner), _find(offset)
+            if root_owner != root_self:
+                parents[max(root_owner, root_self)] = min(root_owner, root_self)
+
+    components: Dict[int, List[int]] = {}
+    for offset in range(len(students)):
+        components.setdefault(_find(offset), []).append(offset)
+    return list(components.values())
+
+
+def _bucket_components(components: Sequence[List[int]], workers: int) -> List[List[int]]:
+    """تقسیم مؤلفه‌ها بین workerها با توازن تعداد دانش‌آموز (قطعی)."""
+
+    bucket_count = max(1, min(workers, len(components)))
+    buckets: List[List[int]] = [[] for _ in range(bucket_count)]
+    loads = [0] * bucket_count
+    for component in sorted(components, key=len, reverse=True):
+        target = loads.index(min(loads))
+        buckets[target].extend(component)
+        loads[target] += len(component)
+    return [sorted(bucket) for bucket in buckets if bucket]
+
+
+_WORKER_BATCH_CONTEXT: _BatchContext | None = None
+
+
+def _install_batch_context(context: _BatchContext) -> None:
+    global _WORKER_BATCH_CONTEXT
+    _WORKER_BATCH_CONTEXT = context
+
+
+def _run_batch_partition(
+    phase: _BatchPhase,
+    state: Mapping[str, np.ndarray],
+    items: Sequence[tuple[int, int, Dict[str, object]]],
+) -> tuple[
+    List[tuple[int, _BatchStudentOutcome]],
+    Dict[int, tuple[int, int, float, int]],
+    Dict[str, object] | None,
+]:
+    """اجرای یک سهم از مؤلفه‌ها در worker و بازگرداندن نتایج، برش وضعیت پشتیبان‌ها
+    و گزارش پروفایلر همین سهم (در صورت فعال بودن).
+
+    ``state`` خروجی :meth:`MentorStateStore.snapshot` والد در لحظهٔ ارسال است؛ worker
+    ممکن است پیش‌تر سهم دیگری اجرا کرده باشد، پس وضعیت و heapهای صف رتبه‌بندی
+    پیش از اجرا بازنشانی می‌شوند.
+    """
+
+    context = _WORKER_BATCH_CONTEXT
+    if context is None:
+        raise RuntimeError("Batch context is not installed in this worker")
+    if context.profiler.enabled:
+        context.profiler = StageProfiler()
+    store = context.mentor_state
+    store.restore(state)
+    if context.ranking_queue is not None:
+        context.ranking_queue.reset()
+    before = store.alloc_new.copy()
+    results: List[tuple[int, _BatchStudentOutcome]] = []
+    for offset, processed, student_dict in items:
+        alerts: List[Tuple[int, str]] = []
+        outcome = _allocate_batch_student(
+            context,
+            phase,
+            student_dict,
+            processed=processed,
+            alert_progress=lambda percent, message: alerts.append((percent, message)),
+        )
+        results.append((offset, replace(outcome, alerts=tuple(alerts))))
+    changed = np.flatnonzero(store.alloc_new != before)
+    profile = context.profiler.report() if context.profiler.enabled else None
+    return results, store.export_mentors(changed.tolist()), profile
+
+
+# هزینهٔ ثابت ساخت pool و ارسال زمینه حدود ۰٫۵ ثانیه و سربار تقسیم/بازگرداندن نتایج
+# حدود ۱۰٪ زمان تخصیص است؛ زیر این اندازه مسیر ترتیبی سریع‌تر است.
+_PARALLEL_MIN_STUDENTS = 500
+
+
+def _available_cpus() -> int:
+    """تعداد CPUهای در دسترس همین پردازه (با احترام به affinity/cgroup در لینوکس)."""
+
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except (AttributeError, OSError):
+        return max(os.cpu_count() or 1, 1)
+
+
+class _BatchWorkerPool:
+    """ProcessPool مشترک همهٔ فازهای یک ``allocate_batch`` (ساخت تنبل، یک‌بار).
+
+    زمینه فقط یک بار در initializer به workerها می‌رسد و هر سهم snapshot جاری
+    ``mentor_state`` والد را همراه دارد؛ بنابراین فاز مرکزی همان پردازه‌های فاز
+    مدرسه‌ای را با وضعیت به‌روز به کار می‌گیرد. گروه‌های کوچک‌تر از
+    ``_PARALLEL_MIN_STUDENTS``، گروه‌های تک‌مؤلفه‌ای و قواعد مرحله‌ای غیرقابل pickle به مسیر
+    ترتیبی برمی‌گردند (``allocate`` مقدار ``None`` برمی‌گرداند).
+    """
+
+    def __init__(self, context: _BatchContext, workers: int) -> None:
+        self._context = context
+        # worker بیش از CPUهای موجود فقط سربار دارد (روی یک CPU اجرای موازی کندتر است).
+        self._workers = min(workers, _available_cpus()) if workers > 1 else workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._rules_portable: bool | None = None
+
+    def _stage_rules_portable(self) -> bool:
+        if self._rules_portable is None:
+            try:
+                pickle.dumps(self._context.stage_rules)
+            except (pickle.PicklingError, AttributeError, TypeError):
+                warnings.warn(
+                    "Stage rules are not picklable; allocating students sequentially",
+                    UserWarning,
+                    stacklevel=4,
+                )
+                self._rules_portable = False
+            else:
+                self._rules_portable = True
+        return self._rules_portable
+
+    def allocate(
+        self,
+        phase: _BatchPhase,
+        students: Sequence[Dict[str, object]],
+        *,
+        start: int,
+    ) -> List[_BatchStudentOutcome] | None:
+        """تخصیص موازی مؤلفه‌های مستقل یک گروه یا ``None`` برای مسیر ترتیبی."""
+
+        if self._workers < 2 or len(students) < max(_PARALLEL_MIN_STUDENTS, 2):
+            return None
+        if not self._stage_rules_portable():
+            return None
+        components = _partition_batch_students(self._context, phase, students)
+        if len(components) < 2:
+            return None
+        buckets = _bucket_components(components, self._workers)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                initializer=_install_batch_context,
+                initargs=(self._context,),
+            )
+        state = self._context.mentor_state.snapshot()
+        futures = [
+            self._executor.submit(
+                _run_batch_partition,
+                phase,
+                state,
+                [(offset, start + offset + 1, students[offset]) for offset in bucket],
+            )
+            for bucket in buckets
+        ]
+        outcomes: List[_BatchStudentOutcome | None] = [None] * len(students)
+        for future in futures:
+            results, mentor_values, profile = future.result()
+            self._context.mentor_state.import_mentors(mentor_values)
+            if profile is not None:
+                self._context.profiler.merge(profile)
+            for offset, outcome in results:
+                outcomes[offset] = outcome
+        return [outcome for outcome in outcomes if outcome is not None]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
 def allocate_batch(
     students: pd.DataFrame,
     candidate_pool: pd.DataFrame,
@@ -1509,12 +2013,29 @@ def allocate_batch(
     center_priority: Sequence[int] | None = None,
     ui_center_manager_map: Mapping[int, Sequence[str]] | None = None,
     strict_center_validation: bool = False,
+    workers: int = 1,
+    profiler: StageProfiler | None = None,
+    compact_dtypes: bool = False,
 ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """تخصیص دسته‌ای دانش‌آموزان و بازگشت خروجی‌های چهارتایی.
 
     Args:
         center_manager_map: نگاشت اختیاری «کد مرکز → نام‌های مدیر» برای محدودسازی استخر.
         center_priority: ترتیب دلخواه مراکز برای پردازش دانش‌آموزان (stable sort).
+        workers: تعداد پردازه‌ها؛ در صورت ``> 1`` دانش‌آموزان هر فاز به مؤلفه‌های
+            مستقل گراف «دانش‌آموز–پشتیبان» تقسیم و موازی تخصیص داده می‌شوند و
+            نتایج به ترتیب اصلی ادغام می‌شوند (خروجی برابر با اجرای ترتیبی).
+            یک pool برای هر دو فاز ساخته می‌شود، تعداد آن به CPUهای در دسترس محدود
+            است و گروه‌های کوچک‌تر از ``_PARALLEL_MIN_STUDENTS`` ترتیبی می‌مانند.
+        profiler: پروفایلر مرحله‌ای؛ در صورت ``None`` از متغیر محیطی
+            ``MATRIX_ALLOC_PROFILE`` تعیین می‌شود. گزارش فعال در
+            ``trace_df.attrs["stage_profile"]`` قرار می‌گیرد.
+            دایجست جریانی تصمیم‌ها (:class:`~app.core.allocation.digest.DecisionDigest`)
+            همیشه در ``trace_df.attrs["decision_digest"]`` قرار می‌گیرد.
+        compact_dtypes: در صورت ``True`` قاب‌های ورودی با
+            :func:`~app.core.canonical_frames.compact_frame_dtypes` فشرده می‌شوند
+            (category برای متن‌های تکراری و Int16/Int32 برای کلیدها و ظرفیت) و
+            استخر به‌روزشده با همان dtypeها بازگردانده می‌شود.
 
     Raises:
         ValueError: زمانی که قاب‌های canonical قرارداد ستون‌ها را رعایت نکرده باشند.
@@ -1522,12 +2043,14 @@ def allocate_batch(
     """
     if policy is None:
         policy = load_policy()
+    if profiler is None:
+        profiler = profiler_from_env()
+    batch_started = profiler.start()
 
     resolved_capacity_column = _resolve_capacity_column(policy, capacity_column)
-    capacity_internal = canonicalize_headers(
-        pd.DataFrame(columns=[resolved_capacity_column]),
-        header_mode=policy.excel.header_mode_internal,
-    ).columns[0]
+    capacity_internal = canonical_header(
+        resolved_capacity_column, policy.excel.header_mode_internal
+    )
 
     def _validate_pool(frame: pd.DataFrame) -> pd.DataFrame:
         try:
@@ -1545,6 +2068,9 @@ def allocate_batch(
     else:
         students_norm = _normalize_students(students, policy)
         pool_norm = _validate_pool(_normalize_pool(candidate_pool, policy))
+    if compact_dtypes:
+        students_norm = compact_frame_dtypes(students_norm, policy=policy)
+        pool_norm = compact_frame_dtypes(pool_norm, policy=policy)
     final_manager_map, final_priority = resolve_center_manager_config(
         policy=policy,
         ui_managers=ui_center_manager_map,
@@ -1610,9 +2136,11 @@ def allocate_batch(
     if "mentor_id" not in pool_internal.columns:
         raise KeyError("Pool must contain 'mentor_id' column after canonicalization")
 
-    mentor_state = build_mentor_state(
-        pool_internal, capacity_column=capacity_internal, policy=policy
+    mentor_state = MentorStateStore.from_state(
+        build_mentor_state(pool_internal, capacity_column=capacity_internal, policy=policy)
     )
+    pool_state_view = CanonicalFrameView.build(pool_internal, header_mode="en")
+    pool_internal = pool_state_view.frame
 
     center_manager_index, _ = _build_center_manager_index(
         pool_with_ids,
@@ -1621,18 +2149,99 @@ def allocate_batch(
         strict_validation=strict_center_validation,
     )
     center_column_name = policy.stage_column("center")
+    pool_join_index = JoinKeyIndex.build(pool_with_ids, policy=policy)
+    ranking_queue = MentorRankingQueue.from_frame(
+        pool_with_ids, state=mentor_state, policy=policy
+    )
 
     allocations: List[Mapping[str, object]] = []
-    logs: List[AllocationLogRecord] = []
-    trace_rows: List[Mapping[str, object]] = []
-    trace_outcomes: List[TraceOutcome] = []
     stage_rules = default_stage_rule_map()
 
     total = max(int(students_norm.shape[0]), 1)
     trace_plan = build_trace_plan(policy, capacity_column=resolved_capacity_column)
+    # خروجی‌ها ستونی انباشته می‌شوند تا به‌جای صدها هزار dict فقط آرایهٔ هر ستون بماند.
+    log_columns = ColumnAccumulator(total)
+    trace_columns = ColumnAccumulator(
+        total * len(trace_plan), categorical=("stage", "column", "expected_op")
+    )
+    outcome_columns = ColumnAccumulator(total)
+    passed_names: Dict[str, str] = {}
+    gate_column = next(
+        column
+        for column in (
+            "remaining_capacity",
+            resolved_capacity_column,
+            canonical_header(resolved_capacity_column, "en"),
+            capacity_internal,
+        )
+        if column in pool_internal.columns
+    )
+    trace_capacity_column = next(
+        (plan.column for plan in trace_plan if plan.stage == "capacity_gate"),
+        resolved_capacity_column,
+    )
+    mentor_state.bind_rows(
+        ensure_series(pool_internal[gate_column]).reindex(pool_with_ids.index),
+        ensure_series(pool_with_ids[trace_capacity_column])
+        if trace_capacity_column in pool_with_ids.columns
+        else pd.Series(0, index=pool_with_ids.index),
+    )
+
+    def _sync_pool_frames() -> None:
+        for frame, capacity_name in (
+            (pool_internal, capacity_internal),
+            (pool_with_ids, resolved_capacity_column),
+        ):
+            capacity_columns = [capacity_name]
+            if capacity_name != "remaining_capacity" and "remaining_capacity" in frame.columns:
+                capacity_columns.append("remaining_capacity")
+            mentor_state.materialize(frame, capacity_columns=capacity_columns)
+
+    context = _BatchContext(
+        policy=policy,
+        capacity_column=resolved_capacity_column,
+        trace_plan=trace_plan,
+        stage_rules=stage_rules,
+        mentor_state=mentor_state,
+        pool_state_view=pool_state_view,
+        pool_join_index=pool_join_index,
+        center_manager_index=center_manager_index,
+        center_column_name=center_column_name,
+        row_labels=pool_with_ids.index,
+        row_mentor_keys=(
+            _row_mentor_keys(pool_with_ids, mentor_state) if workers > 1 else None
+        ),
+        ranking_queue=ranking_queue,
+        profiler=profiler,
+    )
+    profiler.lap("batch_setup", batch_started)
 
     progress(0, "start")
     processed = 0
+    decision_digest = DecisionDigest()
+
+    def _apply_outcome(result: _BatchStudentOutcome) -> None:
+        decision_digest.update(result.log)
+        log_columns.append(result.log)
+        student_key = {"student_id": result.log["student_id"]}
+        for stage in result.trace:
+            trace_columns.append(student_key, stage)
+        outcome = result.outcome
+        for stage in outcome.stage_flags:
+            if stage not in passed_names:
+                passed_names[stage] = f"passed_{stage}"
+        outcome_columns.append(
+            {
+                "student_id": outcome.student_id,
+                "final_status": outcome.final_status,
+                "failure_stage": outcome.failure_stage,
+                "final_reason": outcome.final_reason,
+            },
+            {passed_names[stage]: flag for stage, flag in outcome.stage_flags.items()},
+            outcome.metadata,
+        )
+        if result.allocation is not None:
+            allocations.append(result.allocation)
 
     def _allocate_group(
         group: pd.DataFrame,
@@ -1651,183 +2260,77 @@ def allocate_batch(
         base_phase_trace = rule_engine.run_stage(
             phase_stage, stage_students, extras=stage_extras
         )
-        is_school_phase = not enforce_center_manager
-        for _, student_row in group.iterrows():
+        phase = _BatchPhase(
+            enforce_center_manager=enforce_center_manager,
+            rule_engine=rule_engine,
+            base_phase_trace=tuple(base_phase_trace),
+        )
+        group_students = [student_row.to_dict() for _, student_row in group.iterrows()]
+        partitioned = worker_pool.allocate(phase, group_students, start=processed)
+        for offset, student_dict in enumerate(group_students):
             processed += 1
-            student_dict = student_row.to_dict()
             progress(int(processed * 100 / total), f"allocating {processed}/{total}")
-            student_center, center_is_valid = _extract_and_validate_center(
-                student_dict, policy
-            )
-            invalid_center_payload: Dict[str, object] | None = None
-            if not center_is_valid:
-                invalid_center_payload = {
-                    "student_id": student_dict.get("student_id", processed),
-                    "original_center": student_dict.get(center_column_name),
-                    "center_column": center_column_name,
-                }
-            pool_view = pool_with_ids
-            if enforce_center_manager and student_center is not None:
-                center_key = int(student_center)
-                manager_index = center_manager_index.get(center_key)
-                if manager_index is not None and len(manager_index) > 0:
-                    pool_view = pool_with_ids.loc[manager_index]
-
-            result = allocate_student(
-                student_dict,
-                pool_view,
-                policy=policy,
-                progress=_noop_progress,
-                capacity_column=resolved_capacity_column,
-                trace_plan=trace_plan,
-                stage_rules=stage_rules,
-                state=mentor_state,
-                pool_state_view=pool_internal,
-                alert_progress=progress,
-            )
-            if invalid_center_payload is not None:
-                _append_invalid_center_alert(
-                    result.log, invalid_center_payload, student_center
-                )
-            phase_trace = [dict(entry) for entry in base_phase_trace]
-            existing_phase_entries = result.log.get("phase_rule_trace")
-            if isinstance(existing_phase_entries, list) and existing_phase_entries:
-                phase_trace.extend(existing_phase_entries)
-            if is_school_phase:
-                phase_trace.append(
-                    {
-                        "stage": "student_allocation",
-                        "student_id": student_dict.get("student_id"),
-                        "reason": ReasonCode.SCHOOL_STUDENT_PRIORITY.value,
-                        "message": _phase_reason_message(
-                            ReasonCode.SCHOOL_STUDENT_PRIORITY
-                        ),
-                    }
-                )
-            else:
-                mentor_payload = (
-                    result.mentor_row.to_dict()
-                    if result.mentor_row is not None
-                    else None
-                )
-                phase_reason = rule_engine.evaluate_pair(student_dict, mentor_payload)
-                if phase_reason is not None:
-                    stage_name = "student_allocation"
-                    if phase_reason in (
-                        ReasonCode.CENTER_MISMATCH,
-                        ReasonCode.NO_MANAGER_FOR_CENTER,
-                    ):
-                        stage_name = "student_rejection"
-                    elif phase_reason is ReasonCode.INVALID_CENTER_VALUE:
-                        stage_name = "student_alert"
-                    phase_trace.append(
-                        {
-                            "stage": stage_name,
-                            "student_id": student_dict.get("student_id"),
-                            "reason": phase_reason.value,
-                            "message": _phase_reason_message(phase_reason),
-                        }
+            if partitioned is None:
+                _apply_outcome(
+                    _allocate_batch_student(
+                        context,
+                        phase,
+                        student_dict,
+                        processed=processed,
+                        alert_progress=progress,
                     )
-            result.log["phase_rule_trace"] = phase_trace
-            logs.append(result.log)
-            for stage in result.trace:
-                trace_rows.append({"student_id": result.log["student_id"], **stage})
-
-            outcome = summarize_trace_outcome(
-                student_dict, result.trace, result.log, policy=policy
-            )
-            trace_outcomes.append(outcome)
-            result.log["trace_final_status"] = outcome.final_status
-            result.log["trace_failure_stage"] = outcome.failure_stage
-            result.log["trace_final_reason"] = outcome.final_reason
-            result.log["trace_stage_flags"] = dict(outcome.stage_flags)
-
-            if result.mentor_row is not None:
-                chosen_index = result.mentor_row.name
-                mentor_identifier = _resolve_mentor_identifier(result, policy=policy)
-                resolved_identifier, state_entry = _resolve_mentor_state_entry(
-                    mentor_state, mentor_identifier
                 )
-                if state_entry is None:
-                    raise KeyError(
-                        f"Mentor '{mentor_identifier}' missing from state after allocation"
-                    )
-                pool_internal.loc[chosen_index, capacity_internal] = state_entry["remaining"]
-                if (
-                    capacity_internal != "remaining_capacity"
-                    and "remaining_capacity" in pool_internal.columns
-                ):
-                    pool_internal.loc[chosen_index, "remaining_capacity"] = state_entry["remaining"]
-                pool_internal.loc[chosen_index, "allocations_new"] = state_entry["alloc_new"]
-                initial_value = max(int(state_entry.get("initial", 0)), 1)
-                pool_internal.loc[chosen_index, "occupancy_ratio"] = (
-                    (int(state_entry.get("initial", 0)) - state_entry["remaining"]) / initial_value
-                )
-                pool_with_ids.loc[chosen_index, resolved_capacity_column] = state_entry["remaining"]
-                if (
-                    resolved_capacity_column != "remaining_capacity"
-                    and "remaining_capacity" in pool_with_ids.columns
-                ):
-                    pool_with_ids.loc[chosen_index, "remaining_capacity"] = state_entry["remaining"]
-                pool_with_ids.loc[chosen_index, "allocations_new"] = state_entry["alloc_new"]
-                pool_with_ids.loc[chosen_index, "occupancy_ratio"] = pool_internal.loc[
-                    chosen_index, "occupancy_ratio"
-                ]
-
-                mentor_id_display = result.log.get("mentor_id")
-                if mentor_id_display is None:
-                    mentor_id_display = resolved_identifier
-                student_national_code = _extract_student_national_code(student_dict)
-                mentor_alias_code = _extract_mentor_alias_code(result.mentor_row)
-                allocations.append(
-                    {
-                        "student_id": student_dict.get("student_id", ""),
-                        "student_national_code": student_national_code,
-                        "mentor": result.mentor_row.get("پشتیبان", ""),
-                        "mentor_id": ""
-                        if mentor_id_display is None
-                        else str(mentor_id_display),
-                        "mentor_alias_code": mentor_alias_code,
-                    }
+                continue
+            result = partitioned[offset]
+            for percent, message in result.alerts:
+                progress(percent, message)
+            if result.row_update is not None:
+                position, remaining, alloc_new, occupancy = result.row_update
+                mentor_state.record_row(
+                    position,
+                    remaining=remaining,
+                    alloc_new=alloc_new,
+                    occupancy=occupancy,
                 )
+            _apply_outcome(result)
 
     school_rules, center_rules = _build_phase_rule_engines(policy)
-    _allocate_group(
-        school_students,
-        enforce_center_manager=False,
-        phase_stage="school_phase_start",
-        rule_engine=school_rules,
-    )
-    _allocate_group(
-        center_students,
-        enforce_center_manager=True,
-        phase_stage="center_phase_start",
-        rule_engine=center_rules,
-    )
+    worker_pool = _BatchWorkerPool(context, workers)
+    try:
+        _allocate_group(
+            school_students,
+            enforce_center_manager=False,
+            phase_stage="school_phase_start",
+            rule_engine=school_rules,
+        )
+        sync_started = profiler.start()
+        _sync_pool_frames()
+        profiler.lap("pool_sync", sync_started)
+        _allocate_group(
+            center_students,
+            enforce_center_manager=True,
+            phase_stage="center_phase_start",
+            rule_engine=center_rules,
+        )
+    finally:
+        worker_pool.close()
+
+    sync_started = profiler.start()
+    _sync_pool_frames()
+    finalize_started = profiler.lap("pool_sync", sync_started)
 
-    for log in logs:
-        log["alias_autofill"] = alias_autofill
-        log["alias_unmatched"] = alias_unmatched
+    if len(log_columns):
+        log_columns.set_constant("alias_autofill", alias_autofill)
+        log_columns.set_constant("alias_unmatched", alias_unmatched)
 
     progress(100, "done")
 
     allocations_df = pd.DataFrame(allocations, columns=_ALLOCATION_OUTPUT_COLUMNS)
-    logs_df = pd.DataFrame(logs)
-    trace_df = pd.DataFrame(trace_rows)
+    logs_df = log_columns.to_frame()
+    trace_df = trace_columns.to_frame()
 
-    if trace_outcomes:
-        outcome_records: list[dict[str, object]] = []
-        for outcome in trace_outcomes:
-            record: dict[str, object] = {
-                "student_id": outcome.student_id,
-                "final_status": outcome.final_status,
-                "failure_stage": outcome.failure_stage,
-                "final_reason": outcome.final_reason,
-            }
-            record.update({f"passed_{k}": v for k, v in outcome.stage_flags.items()})
-            record.update(outcome.metadata)
-            outcome_records.append(record)
-        trace_summary_df = pd.DataFrame(outcome_records)
+    if len(outcome_columns):
+        trace_summary_df = outcome_columns.to_frame()
         if "student_id" in trace_summary_df.columns and "student_id" in students.columns:
             student_indexed = students.set_index("student_id", drop=False)
             for column in (
@@ -1863,16 +2366,17 @@ def allocate_batch(
             pool_output[column] = pd.NA
     pool_output = pool_output.loc[:, desired_columns]
 
-    for column in original_columns:
+    # در حالت فشرده dtypeهای کم‌حجم حفظ می‌شوند و به dtype ورودی برنمی‌گردند.
+    restore_columns = () if compact_dtypes else original_columns
+    for column in restore_columns:
         if column in candidate_pool.columns:
             try:
                 pool_output[column] = pool_output[column].astype(candidate_pool[column].dtype)
             except (TypeError, ValueError):
                 continue
 
-    for entry in mentor_state.values():
-        if entry["remaining"] < 0:
-            raise ValueError("Negative remaining capacity detected after allocation")
+    if bool((mentor_state.remaining < 0).any()):
+        raise ValueError("Negative remaining capacity detected after allocation")
 
     internal_remaining = pd.to_numeric(
         ensure_series(pool_internal[capacity_internal]), errors="coerce"
@@ -1880,6 +2384,12 @@ def allocate_batch(
     if (internal_remaining < 0).any():
         raise ValueError("Pool capacity column contains negative values after allocation")
 
+    trace_df.attrs["decision_digest"] = decision_digest.report()
+
+    if profiler.enabled:
+        profiler.lap("batch_finalize", finalize_started)
+        trace_df.attrs["stage_profile"] = profiler.report()
+
     return allocations_df, pool_output, logs_df, trace_df
 
 
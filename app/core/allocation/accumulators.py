@@ -0,0 +1,155 @@
+"""انباشتگرهای ستونی برای خروجی‌های تریس و لاگ تخصیص.
+
+``allocate_batch`` به‌جای نگه‌داشتن یک dict برای هر مرحلهٔ تریس (هشت سطر برای هر
+دانش‌آموز)، یک dict بزرگ لاگ و یک ``TraceOutcome`` برای هر دانش‌آموز، فقط
+tuple مقادیر هر سطر را زیر «طرح» کلیدهایش نگه می‌دارد؛ نام کلیدها یک بار برای هر
+طرح ذخیره می‌شود و dict های موقت بلافاصله آزاد می‌شوند. در پایان
+:meth:`ColumnAccumulator.to_frame` یک‌جا آرایهٔ هر ستون را می‌سازد:
+
+* ستون‌های پرتکرار کوتاه (مثل ``stage``) با ``pd.factorize`` به کد و ``category``
+  تبدیل می‌شوند؛
+* رشته‌های تکراری ستون‌های object (دلیل‌ها و وضعیت‌ها) intern می‌شوند تا هر
+  مقدار یکتا فقط یک بار در حافظهٔ قاب نهایی باشد؛
+* کلیدهای غایب در یک سطر ``NaN`` می‌شوند و dtype ستون‌ها مانند
+  ``pd.DataFrame(list_of_dicts)`` استنتاج می‌شود (``int64``/``float64``/``bool``/``object``).
+
+مثال::
+
+    >>> acc = ColumnAccumulator(categorical=("stage",))
+    >>> acc.append({"student_id": "S1"}, {"stage": "type", "matched": True})
+    >>> acc.to_frame()["stage"].dtype.name
+    'category'
+"""
+
+from __future__ import annotations
+
+from array import array
+from operator import itemgetter
+from typing import Collection, Dict, List, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["ColumnAccumulator"]
+
+
+class _SchemaRows:
+    """سطرهای هم‌طرح: شمارهٔ سطر و tuple مقادیر به ترتیب کلیدهای طرح."""
+
+    __slots__ = ("positions", "rows")
+
+    def __init__(self) -> None:
+        self.positions = array("q")
+        self.rows: List[Tuple[object, ...]] = []
+
+
+def _interned(values: np.ndarray) -> np.ndarray:
+    """جایگزینی مقادیر برابر با یک شیء مشترک؛ مقادیر تهی و غیر hashable دست‌نخورده می‌مانند."""
+
+    try:
+        codes, uniques = pd.factorize(values)
+    except TypeError:
+        return values
+    if len(uniques) == 0:
+        return values
+    shared = np.asarray(uniques, dtype=object).take(codes)
+    missing = codes < 0
+    if missing.any():
+        shared[missing] = values[missing]
+    return shared
+
+
+class ColumnAccumulator:
+    """انباشتگر سطری با ساخت یک‌جای DataFrame ستونی.
+
+    Args:
+        capacity: تعداد سطرهای مورد انتظار (فقط برای ``reserve`` آرایهٔ شمارهٔ سطرها).
+        categorical: ستون‌هایی که در خروجی ``category`` می‌شوند؛ مقادیر این
+            ستون‌ها باید hashable باشند.
+    """
+
+    def __init__(self, capacity: int = 0, *, categorical: Collection[str] = ()) -> None:
+        self._capacity = max(int(capacity), 0)
+        self._size = 0
+        self._categorical = frozenset(categorical)
+        self._order: Dict[str, None] = {}
+        self._schemas: Dict[Tuple[str, ...], _SchemaRows] = {}
+        self._constants: Dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return tuple(self._order)
+
+    def _schema(self, keys: Tuple[str, ...]) -> _SchemaRows:
+        schema = self._schemas.get(keys)
+        if schema is None:
+            schema = self._schemas[keys] = _SchemaRows()
+            for key in keys:
+                self._order.setdefault(key)
+        return schema
+
+    def append(self, *records: Mapping[str, object]) -> None:
+        """افزودن یک سطر از ادغام ``records`` (کلیدهای بعدی مقدار قبلی را بازنویسی می‌کنند)."""
+
+        if len(records) == 1:
+            record = records[0]
+        elif len(records) == 2:
+            record = {**records[0], **records[1]}
+        else:
+            record = {}
+            for part in records:
+                record.update(part)
+        schema = self._schema(tuple(record))
+        schema.positions.append(self._size)
+        schema.rows.append(tuple(record.values()))
+        self._size += 1
+
+    def set_constant(self, name: str, value: object) -> None:
+        """مقدار ثابت برای همهٔ سطرهای ستون ``name`` در قاب نهایی."""
+
+        self._order.setdefault(name)
+        self._constants[name] = value
+
+    def _column_values(self, name: str) -> np.ndarray:
+        size = self._size
+        if name in self._constants:
+            values = np.empty(size, dtype=object)
+            values.fill(self._constants[name])
+            return values
+        values = np.full(size, np.nan, dtype=object)
+        for keys, schema in self._schemas.items():
+            if name not in keys:
+                continue
+            # fromiter با dtype=object فهرست‌ها/dictها را به بعد جدید باز نمی‌کند.
+            column = np.fromiter(
+                map(itemgetter(keys.index(name)), schema.rows),
+                dtype=object,
+                count=len(schema.rows),
+            )
+            if len(schema.rows) == size:
+                return column
+            values[np.frombuffer(schema.positions, dtype=np.int64)] = column
+        return values
+
+    def to_frame(self) -> pd.DataFrame:
+        """ساخت DataFrame نهایی؛ dtype ستون‌های غیردسته‌ای مانند سازندهٔ رکوردی استنتاج می‌شود."""
+
+        if not self._order:
+            return pd.DataFrame(index=pd.RangeIndex(self._size))
+        data: Dict[str, object] = {}
+        for name in self._order:
+            values = self._column_values(name)
+            if name in self._categorical:
+                codes, uniques = pd.factorize(values)
+                data[name] = pd.Categorical.from_codes(
+                    codes, categories=pd.Index(uniques, dtype=object)
+                )
+                continue
+            inferred = pd.Series(values, copy=False).infer_objects()
+            if inferred.dtype == object:
+                inferred = pd.Series(_interned(values), copy=False)
+            data[name] = inferred
+        return pd.DataFrame(data, copy=False)
@@ -0,0 +1,206 @@
+"""دایجست جریانی تصمیم‌های تخصیص برای بررسی دترمینیسم بدون اجرای دوباره.
+
+هر تصمیم (شناسهٔ دانش‌آموز، وضعیت، پشتیبان انتخاب‌شده، شمار کاندیداهای هر مرحله و
+ظرفیت پیش/پس از تخصیص) یک هش کوتاه می‌گیرد و این هش‌ها به ترتیب پردازش در یک
+زنجیرهٔ ``blake2b`` وارد می‌شوند. مقایسهٔ دو اجرا فقط به مقایسهٔ رشته‌های هش نیاز
+دارد و در صورت اختلاف، نخستین دانش‌آموزی که تصمیمش فرق کرده گزارش می‌شود.
+
+فهرست هش‌های هر تصمیم به‌صورت یک رشتهٔ تغییرناپذیر («شناسه\\tهش» در هر سطر)
+نگه داشته می‌شود تا کپی عمیق ``DataFrame.attrs`` ارزان بماند.
+
+این ماژول در Core است و هیچ I/O ندارد؛ ذخیرهٔ دایجست هر اجرا بر عهدهٔ لایهٔ
+Infra (``LocalDatabase.insert_run_digest``) است.
+
+مثال::
+
+    >>> digest = DecisionDigest()
+    >>> digest.update({"student_id": "S1", "allocation_status": "success", "mentor_id": 7})
+    >>> digest.report()["decision_count"]
+    1
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Dict, List, Mapping, Sequence
+
+import pandas as pd
+
+__all__ = [
+    "DecisionDigest",
+    "DeterminismReport",
+    "compare_run_digests",
+    "decision_entries",
+    "frame_digest",
+]
+
+_FIELD_SEPARATOR = "\x1f"
+_DECISION_HASH_SIZE = 8
+_CHAIN_HASH_SIZE = 16
+
+
+def _text(value: object) -> str:
+    if value is None:
+        return ""
+    try:
+        if pd.isna(value):  # type: ignore[arg-type]
+            return ""
+    except (TypeError, ValueError):
+        pass
+    return str(value)
+
+
+class DecisionDigest:
+    """هش زنجیره‌ای تصمیم‌ها به ترتیب اعمال در ``allocate_batch``."""
+
+    def __init__(self) -> None:
+        self._chain = blake2b(digest_size=_CHAIN_HASH_SIZE)
+        self._entries: List[str] = []
+
+    def update(self, log: Mapping[str, object]) -> None:
+        """افزودن تصمیم ثبت‌شده در ``log`` (رکورد :class:`AllocationLogRecord`)."""
+
+        stage_counts = log.get("stage_candidate_counts") or {}
+        stage_text = ",".join(
+            f"{stage}={_text(count)}" for stage, count in sorted(stage_counts.items())  # type: ignore[union-attr]
+        )
+        student_id = _text(log.get("student_id"))
+        payload = _FIELD_SEPARATOR.join(
+            (
+                student_id,
+                _text(log.get("allocation_status")),
+                _text(log.get("mentor_id")),
+                stage_text,
+                _text(log.get("capacity_before")),
+                _text(log.get("capacity_after")),
+            )
+        ).encode("utf-8")
+        decision = blake2b(payload, digest_size=_DECISION_HASH_SIZE)
+        self._chain.update(decision.digest())
+        self._entries.append(f"{student_id}\t{decision.hexdigest()}")
+
+    @property
+    def decision_count(self) -> int:
+        return len(self._entries)
+
+    def hexdigest(self) -> str:
+        return self._chain.hexdigest()
+
+    def report(self) -> Dict[str, object]:
+        """خلاصهٔ قابل‌سریال‌سازی JSON؛ ``decisions`` رشتهٔ سطربه‌سطر هش تصمیم‌هاست."""
+
+        return {
+            "decision_digest": self.hexdigest(),
+            "decision_count": self.decision_count,
+            "decisions": "\n".join(self._entries),
+        }
+
+
+def frame_digest(frame: pd.DataFrame) -> str:
+    """هش محتوای canonical قاب (نام ستون‌ها و مقادیر، مستقل از ایندکس)."""
+
+    hasher = blake2b(digest_size=_CHAIN_HASH_SIZE)
+    hasher.update(_FIELD_SEPARATOR.join(str(column) for column in frame.columns).encode("utf-8"))
+    hasher.update(str(frame.shape).encode("ascii"))
+    if frame.empty:
+        return hasher.hexdigest()
+    for column in frame.columns:
+        series = frame[column].reset_index(drop=True)
+        try:
+            hashed = pd.util.hash_pandas_object(series, index=False)
+        except TypeError:
+            # مقادیر dict/list (مثل ``join_keys`` در لاگ) هش‌پذیر نیستند.
+            hashed = pd.util.hash_pandas_object(series.map(repr), index=False)
+        hasher.update(hashed.to_numpy().tobytes())
+    return hasher.hexdigest()
+
+
+def decision_entries(decisions: str) -> List[tuple[str, str]]:
+    """تبدیل رشتهٔ ``decisions`` گزارش به فهرست «شناسه، هش» به ترتیب پردازش."""
+
+    if not decisions:
+        return []
+    entries: List[tuple[str, str]] = []
+    for line in decisions.split("\n"):
+        student_id, _, digest = line.partition("\t")
+        entries.append((student_id, digest))
+    return entries
+
+
+@dataclass(frozen=True)
+class DeterminismReport:
+    """نتیجهٔ مقایسهٔ دایجست دو اجرا."""
+
+    matches: bool
+    compared_decisions: int
+    first_divergence: Mapping[str, object] | None = None
+    frame_mismatches: tuple[str, ...] = ()
+
+    def describe(self) -> str:
+        if self.matches:
+            return f"determinism ok ({self.compared_decisions} decisions)"
+        parts: List[str] = []
+        if self.first_divergence is not None:
+            parts.append(
+                "first diverging decision #{position} (student_id={student_id})".format(
+                    **self.first_divergence
+                )
+            )
+        if self.frame_mismatches:
+            parts.append("frames differ: " + ", ".join(self.frame_mismatches))
+        return "; ".join(parts) or "digests differ"
+
+
+def compare_run_digests(
+    current: Mapping[str, object],
+    previous: Mapping[str, object],
+    *,
+    prefix_only: bool = False,
+    frames: Sequence[str] | None = None,
+) -> DeterminismReport:
+    """مقایسهٔ دایجست اجرای جاری با اجرای قبلی یا اجرای نمونه.
+
+    Args:
+        prefix_only: فقط تصمیم‌های مشترک ابتدای دو فهرست مقایسه می‌شوند (برای
+            اجرای نمونه روی چند دانش‌آموز اول ترتیب پردازش).
+        frames: نام قاب‌هایی از ``frames`` که باید هش یکسان داشته باشند؛ ``None``
+            یعنی همهٔ قاب‌های مشترک دو دایجست.
+    """
+
+    current_entries = decision_entries(str(current.get("decisions", "") or ""))
+    previous_entries = decision_entries(str(previous.get("decisions", "") or ""))
+    compared = min(len(current_entries), len(previous_entries))
+    divergence: Dict[str, object] | None = None
+    for position in range(compared):
+        if current_entries[position] != previous_entries[position]:
+            divergence = {
+                "position": position + 1,
+                "student_id": current_entries[position][0],
+                "previous_student_id": previous_entries[position][0],
+            }
+            break
+    if divergence is None and not prefix_only and len(current_entries) != len(previous_entries):
+        longer = current_entries if len(current_entries) > compared else previous_entries
+        divergence = {
+            "position": compared + 1,
+            "student_id": longer[compared][0],
+            "previous_student_id": "",
+        }
+
+    current_frames = current.get("frames") or {}
+    previous_frames = previous.get("frames") or {}
+    names = frames if frames is not None else sorted(
+        set(current_frames) & set(previous_frames)  # type: ignore[arg-type]
+    )
+    mismatches = tuple(
+        name
+        for name in names
+        if current_frames.get(name) != previous_frames.get(name)  # type: ignore[union-attr]
+    )
+    return DeterminismReport(
+        matches=divergence is None and not mismatches,
+        compared_decisions=compared,
+        first_divergence=divergence,
+        frame_mismatches=mismatches,
+    )
@@ -0,0 +1,161 @@
+"""پروفایلر مرحله‌ای مسیر داغ تخصیص با هزینهٔ تقریباً صفر در حالت خاموش.
+
+هر مرحله (prefilter، ساخت تریس، capacity gate، رتبه‌بندی، مصرف ظرفیت و همگام‌سازی
+وضعیت، قواعد فاز و خلاصه‌سازی تریس) زمان تجمعی، تعداد، بیشینه و هیستوگرام
+لگاریتمی مدت‌ها را نگه می‌دارد. در حالت خاموش از :data:`NULL_PROFILER` استفاده
+می‌شود که حتی ساعت را هم نمی‌خواند.
+
+این ماژول در Core است و هیچ I/O ندارد؛ نوشتن گزارش JSON و ردیف‌های
+``run_metrics`` بر عهدهٔ لایهٔ Infra است.
+
+مثال::
+
+    >>> profiler = StageProfiler()
+    >>> started = profiler.start()
+    >>> started = profiler.lap("prefilter", started)
+    >>> profiler.report()["stages"]["prefilter"]["count"]
+    1
+"""
+
+from __future__ import annotations
+
+import os
+from bisect import bisect_left
+from time import perf_counter
+from typing import Dict, List, Mapping
+
+__all__ = [
+    "HISTOGRAM_BOUNDS_SECONDS",
+    "NULL_PROFILER",
+    "PROFILE_ENV",
+    "StageProfiler",
+    "profiler_from_env",
+    "summarize_stage_totals",
+]
+
+PROFILE_ENV = "MATRIX_ALLOC_PROFILE"
+
+#: مرزهای بالایی سطل‌های هیستوگرام (ثانیه)؛ سطل آخر «بیشتر از آخرین مرز» است.
+HISTOGRAM_BOUNDS_SECONDS: tuple[float, ...] = (
+    1e-5,
+    1e-4,
+    1e-3,
+    1e-2,
+    1e-1,
+    1.0,
+)
+
+
+class _StageStats:
+    __slots__ = ("count", "total", "maximum", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_SECONDS) + 1)
+
+    def add(self, elapsed: float) -> None:
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.maximum:
+            self.maximum = elapsed
+        self.buckets[bisect_left(HISTOGRAM_BOUNDS_SECONDS, elapsed)] += 1
+
+    def merge(self, payload: Mapping[str, object]) -> None:
+        self.count += int(payload.get("count", 0))  # type: ignore[arg-type]
+        self.total += float(payload.get("total_seconds", 0.0))  # type: ignore[arg-type]
+        self.maximum = max(self.maximum, float(payload.get("max_seconds", 0.0)))  # type: ignore[arg-type]
+        histogram = payload.get("histogram", [])
+        for slot, value in enumerate(histogram):  # type: ignore[arg-type]
+            if slot < len(self.buckets):
+                self.buckets[slot] += int(value)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "count": self.count,
+            "total_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "max_seconds": self.maximum,
+            "histogram": list(self.buckets),
+        }
+
+
+class StageProfiler:
+    """شمارنده‌های تجمعی و هیستوگرام زمان هر مرحله."""
+
+    enabled = True
+
+    def __init__(self) -> None:
+        self._stages: Dict[str, _StageStats] = {}
+
+    def start(self) -> float:
+        """نقطهٔ شروع اندازه‌گیری (برای ارسال به :meth:`lap`)."""
+
+        return perf_counter()
+
+    def lap(self, stage: str, started: float) -> float:
+        """ثبت زمان سپری‌شده از ``started`` برای ``stage`` و بازگرداندن «اکنون»."""
+
+        now = perf_counter()
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = _StageStats()
+        stats.add(now - started)
+        return now
+
+    def merge(self, report: Mapping[str, object]) -> None:
+        """ادغام گزارش یک پروفایلر دیگر (مثلاً worker موازی)."""
+
+        stages = report.get("stages", {})
+        for stage, payload in stages.items():  # type: ignore[union-attr]
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.merge(payload)
+
+    def report(self) -> Dict[str, object]:
+        """گزارش قابل‌سریال‌سازی JSON از همهٔ مراحل."""
+
+        return {
+            "histogram_bounds_seconds": list(HISTOGRAM_BOUNDS_SECONDS),
+            "stages": {stage: stats.as_dict() for stage, stats in self._stages.items()},
+        }
+
+
+class _NullProfiler(StageProfiler):
+    """پروفایلر خاموش؛ هیچ ساعتی خوانده و هیچ شمارنده‌ای به‌روز نمی‌شود."""
+
+    enabled = False
+
+    def start(self) -> float:
+        return 0.0
+
+    def lap(self, stage: str, started: float) -> float:
+        return 0.0
+
+    def merge(self, report: Mapping[str, object]) -> None:
+        return None
+
+
+NULL_PROFILER: StageProfiler = _NullProfiler()
+
+
+def profiler_from_env() -> StageProfiler:
+    """پروفایلر فعال در صورت تنظیم ``MATRIX_ALLOC_PROFILE`` (1/true/yes/on)."""
+
+    value = os.environ.get(PROFILE_ENV, "").strip().lower()
+    if value in {"1", "true", "yes", "on"}:
+        return StageProfiler()
+    return NULL_PROFILER
+
+
+def summarize_stage_totals(report: Mapping[str, object]) -> List[tuple[str, float]]:
+    """فهرست «مرحله، زمان کل» به ترتیب نزولی برای نمایش خلاصه."""
+
+    stages = report.get("stages", {})
+    totals = [
+        (str(stage), float(payload.get("total_seconds", 0.0)))  # type: ignore[union-attr]
+        for stage, payload in stages.items()  # type: ignore[union-attr]
+    ]
+    return sorted(totals, key=lambda item: item[1], reverse=True)
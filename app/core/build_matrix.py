@@ -13,6 +13,7 @@ Summary
 from __future__ import annotations
 
 from logging import getLogger
+import hashlib
 import json
 import math
 import re
@@ -21,7 +22,20 @@ from dataclasses import dataclass, field
 from enum import IntEnum, auto
 from functools import lru_cache
 from itertools import product
-from typing import Any, Callable, Collection, Dict, Iterable, List, Mapping, Sequence, Tuple, TypeVar
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Protocol,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
 
 import numpy as np
 import pandas as pd
@@ -30,6 +44,7 @@ from app.core.canonical_frames import (
     POOL_DUPLICATE_SUMMARY_ATTR,
     POOL_JOIN_KEY_DUPLICATES_ATTR,
     canonicalize_pool_frame,
+    compact_frame_dtypes,
 )
 from app.core.common.columns import (
     coerce_semantics,
@@ -272,6 +287,7 @@ class BuildConfig:
     join_key_duplicate_threshold: int | None = None
     school_lookup_mismatch_threshold: float | None = None
     fail_on_school_lookup_threshold: bool = False
+    compact_dtypes: bool = False
     policy_version: str = field(init=False, repr=False, default="")
 
     def __post_init__(self) -> None:
@@ -1276,7 +1292,38 @@ def generate_row_variants(
 # =============================================================================
 
 
-def _prepare_base_rows(
+# با تغییر قالب/منطق قطعه‌های ماتریس افزایش یابد تا کش قبلی نامعتبر شود.
+_MATRIX_FRAGMENT_VERSION = 2
+_FRAGMENT_TUPLE_KEY = "__tuple__"
+
+
+class MatrixFragmentStore(Protocol):
+    """مخزن قطعه‌های ماتریس به‌ازای اثرانگشت ردیف (پیاده‌سازی در Infra/SQLite).
+
+    payload هر قطعه JSON (UTF-8) است. ``retain`` اثرانگشت‌های ساخت جاری در
+    زمینهٔ ``context`` است؛ مخزن فقط قطعه‌های استفاده‌نشدهٔ همان زمینه را حذف
+    می‌کند و قطعه‌های زمینه‌های دیگر (Crosswalk/Policy دیگر) را نگه می‌دارد.
+    """
+
+    def load_matrix_fragments(self, fingerprints: Sequence[str]) -> Mapping[str, bytes]:
+        ...
+
+    def save_matrix_fragments(
+        self, fragments: Mapping[str, bytes], *, retain: Collection[str], context: str
+    ) -> None:
+        ...
+
+
+@dataclass(frozen=True)
+class _BaseRowFragment:
+    """نتیجهٔ آماده‌سازی یک ردیف Inspactor (قطعهٔ قابل‌کش ماتریس)."""
+
+    base: dict[str, Any] | None
+    unseen_groups: tuple[dict[str, Any], ...]
+    unmatched_schools: tuple[dict[str, Any], ...]
+
+
+def _iter_base_row_fragments(
     insp: pd.DataFrame,
     *,
     cfg: BuildConfig,
@@ -1291,10 +1338,8 @@ def _prepare_base_rows(
     school_cols: list[str],
     gender_col: str | None,
     included_col: str | None,
-) -> tuple[pd.DataFrame, list[dict], list[dict]]:
-    records: list[dict[str, Any]] = []
-    unseen_groups: list[dict[str, Any]] = []
-    unmatched_schools: list[dict[str, Any]] = []
+) -> Iterator[_BaseRowFragment]:
+    """تولید یک قطعه به‌ازای هر ردیف ``insp`` با همان ترتیب ورودی."""
 
     finance_variants = list(finance_cross(cfg.finance_variants, cfg=domain_cfg))
     normal_statuses = [int(s) for s in cfg.policy.normal_statuses]
@@ -1306,14 +1351,18 @@ def _prepare_base_rows(
     binding_policy = cfg.policy.mentor_school_binding
 
     for row in insp.to_dict(orient="records"):
+        row_unseen_groups: list[dict[str, Any]] = []
+        row_unmatched_schools: list[dict[str, Any]] = []
         mentor_id_raw = row.get(COL_MENTOR_ID, "")
         mentor_id = str(mentor_id_raw).strip()
         if not mentor_id:
+            yield _BaseRowFragment(None, (), ())
             continue
 
         if COL_CAN_ALLOC in row:
             can_alloc = str(row.get(COL_CAN_ALLOC, "")).strip() in cfg.can_allocate_truthy
             if not can_alloc:
+                yield _BaseRowFragment(None, (), ())
                 continue
 
         mentor_name = str(row.get(COL_MENTOR_NAME, "")).strip()
@@ -1380,9 +1429,10 @@ def _prepare_base_rows(
         if not group_pairs:
             tokens = list(dict.fromkeys(row_unseen_tokens or [""]))
             for token in tokens:
-                unseen_groups.append(
+                row_unseen_groups.append(
                     {"group_token": token, "supporter": mentor_name, "manager": manager_name}
                 )
+            yield _BaseRowFragment(None, tuple(row_unseen_groups), ())
             continue
 
         mentor_mode = classify_mentor_mode(
@@ -1436,11 +1486,178 @@ def _prepare_base_rows(
 
         for sc in school_codes:
             if str(sc) not in code_to_name_school:
-                unmatched_schools.append(
+                row_unmatched_schools.append(
                     {"raw_school": str(sc), "supporter": mentor_name, "manager": manager_name}
                 )
 
-        records.append(base)
+        yield _BaseRowFragment(base, (), tuple(row_unmatched_schools))
+
+
+def _matrix_fragment_context(
+    *,
+    cfg: BuildConfig,
+    name_to_code: dict[str, int],
+    code_to_name: dict[int, str],
+    buckets: dict[str, list[tuple[str, int]]],
+    synonyms: dict[str, str],
+    school_name_to_code: dict[str, str],
+    code_to_name_school: dict[str, str],
+    group_cols: list[str],
+    school_cols: list[str],
+    gender_col: str | None,
+    included_col: str | None,
+) -> str:
+    """اثرانگشت نسخهٔ Crosswalk/مدارس/Policy/پیکربندی که قطعه‌ها به آن وابسته‌اند."""
+
+    payload = json.dumps(
+        {
+            "fragment_version": _MATRIX_FRAGMENT_VERSION,
+            "builder_version": __version__,
+            "cfg": repr(cfg),
+            "name_to_code": name_to_code,
+            "code_to_name": {str(key): value for key, value in code_to_name.items()},
+            "buckets": buckets,
+            "synonyms": synonyms,
+            "school_name_to_code": school_name_to_code,
+            "code_to_name_school": code_to_name_school,
+            "columns": [group_cols, school_cols, gender_col, included_col],
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _matrix_row_fingerprints(insp: pd.DataFrame, context: str) -> list[str]:
+    """اثرانگشت هر ردیف ورودی (مقادیر ستون‌ها + اثرانگشت زمینه)."""
+
+    fingerprints: list[str] = []
+    for row in insp.to_dict(orient="records"):
+        digest = hashlib.sha256(context.encode("ascii"))
+        digest.update(repr(tuple(row.items())).encode("utf-8"))
+        fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+
+def _fragment_json_value(value: Any) -> Any:
+    """تبدیل مقادیر قطعه به JSON؛ tuple ها با کلید نشانه حفظ می‌شوند."""
+
+    if isinstance(value, tuple):
+        return {_FRAGMENT_TUPLE_KEY: [_fragment_json_value(item) for item in value]}
+    if isinstance(value, list):
+        return [_fragment_json_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _fragment_json_value(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _fragment_json_hook(obj: dict[str, Any]) -> Any:
+    if len(obj) == 1 and _FRAGMENT_TUPLE_KEY in obj:
+        return tuple(obj[_FRAGMENT_TUPLE_KEY])
+    return obj
+
+
+def _dump_fragment(fragment: _BaseRowFragment) -> bytes | None:
+    """payload JSON قطعه؛ ``None`` اگر مقداری قابل‌سریال‌سازی نباشد (قطعه کش نمی‌شود)."""
+
+    try:
+        text = json.dumps(
+            {
+                "base": _fragment_json_value(fragment.base),
+                "unseen_groups": _fragment_json_value(list(fragment.unseen_groups)),
+                "unmatched_schools": _fragment_json_value(list(fragment.unmatched_schools)),
+            },
+            ensure_ascii=False,
+        )
+    except (TypeError, ValueError):
+        return None
+    return text.encode("utf-8")
+
+
+def _load_fragment(payload: bytes) -> _BaseRowFragment | None:
+    try:
+        data = json.loads(payload.decode("utf-8"), object_hook=_fragment_json_hook)
+        return _BaseRowFragment(
+            data["base"], tuple(data["unseen_groups"]), tuple(data["unmatched_schools"])
+        )
+    except (ValueError, KeyError, TypeError, AttributeError):
+        # قطعهٔ خراب یا قالب قدیمی معادل نبودِ کش است.
+        return None
+
+
+def _prepare_base_rows(
+    insp: pd.DataFrame,
+    *,
+    cfg: BuildConfig,
+    domain_cfg: DomainBuildConfig,
+    name_to_code: dict[str, int],
+    code_to_name: dict[int, str],
+    buckets: dict[str, list[tuple[str, int]]],
+    synonyms: dict[str, str],
+    school_name_to_code: dict[str, str],
+    code_to_name_school: dict[str, str],
+    group_cols: list[str],
+    school_cols: list[str],
+    gender_col: str | None,
+    included_col: str | None,
+    fragment_store: MatrixFragmentStore | None = None,
+) -> tuple[pd.DataFrame, list[dict], list[dict]]:
+    """آماده‌سازی ردیف‌های مبنا؛ با ``fragment_store`` فقط ردیف‌های تغییرکرده بازسازی می‌شوند.
+
+    در حالت افزایشی آمار بازاستفاده در ``base_df.attrs["matrix_fragments"]`` ثبت می‌شود.
+    """
+
+    options = dict(
+        cfg=cfg,
+        domain_cfg=domain_cfg,
+        name_to_code=name_to_code,
+        code_to_name=code_to_name,
+        buckets=buckets,
+        synonyms=synonyms,
+        school_name_to_code=school_name_to_code,
+        code_to_name_school=code_to_name_school,
+        group_cols=group_cols,
+        school_cols=school_cols,
+        gender_col=gender_col,
+        included_col=included_col,
+    )
+    fragment_stats: dict[str, int] | None = None
+    if fragment_store is None:
+        fragments = list(_iter_base_row_fragments(insp, **options))
+    else:
+        options_for_context = {key: value for key, value in options.items() if key != "domain_cfg"}
+        context = _matrix_fragment_context(**options_for_context)
+        fingerprints = _matrix_row_fingerprints(insp, context)
+        cached = fragment_store.load_matrix_fragments(sorted(set(fingerprints)))
+        resolved: list[_BaseRowFragment | None] = []
+        for fingerprint in fingerprints:
+            payload = cached.get(fingerprint)
+            resolved.append(_load_fragment(payload) if payload is not None else None)
+        missing = [position for position, fragment in enumerate(resolved) if fragment is None]
+        fresh: dict[str, bytes] = {}
+        if missing:
+            rebuilt = _iter_base_row_fragments(insp.iloc[missing], **options)
+            for position, fragment in zip(missing, rebuilt):
+                resolved[position] = fragment
+                encoded = _dump_fragment(fragment)
+                if encoded is not None:
+                    fresh[fingerprints[position]] = encoded
+        fragment_store.save_matrix_fragments(fresh, retain=set(fingerprints), context=context)
+        fragments = [fragment for fragment in resolved if fragment is not None]
+        fragment_stats = {"total": len(fingerprints), "rebuilt": len(missing)}
+
+    binding_policy = cfg.policy.mentor_school_binding
+    records: list[dict[str, Any]] = []
+    unseen_groups: list[dict[str, Any]] = []
+    unmatched_schools: list[dict[str, Any]] = []
+    for fragment in fragments:
+        unseen_groups.extend(dict(entry) for entry in fragment.unseen_groups)
+        unmatched_schools.extend(dict(entry) for entry in fragment.unmatched_schools)
+        if fragment.base is not None:
+            records.append(dict(fragment.base))
 
     base_df = pd.DataFrame(records)
     required_flags = {
@@ -1452,6 +1669,8 @@ def _prepare_base_rows(
     for col, default in required_flags.items():
         if col not in base_df.columns:
             base_df[col] = default
+    if fragment_stats is not None:
+        base_df.attrs["matrix_fragments"] = fragment_stats
     return base_df, unseen_groups, unmatched_schools
 
 
@@ -1632,6 +1851,69 @@ def _filter_invalid_mentors(
     return insp_valid, invalid_df
 
 
+@dataclass(frozen=True)
+class _ListCells:
+    """سلول‌های لیستی یک ستون به‌صورت آرایهٔ تخت + طول/آفست هر سطر.
+
+    معناشناسی همان ``DataFrame.explode`` است: لیست تهی یک سطر ``NaN`` و مقدار
+    غیرلیستی یک سطر با همان مقدار تولید می‌کند.
+    """
+
+    values: list[Any]
+    lengths: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "_ListCells":
+        values: list[Any] = []
+        lengths = np.empty(len(series), dtype=np.int64)
+        for position, cell in enumerate(series.tolist()):
+            if pd.api.types.is_list_like(cell):
+                items = list(cell)
+                if not items:
+                    items = [np.nan]
+            else:
+                items = [cell]
+            values.extend(items)
+            lengths[position] = len(items)
+        offsets = np.zeros(len(series), dtype=np.int64)
+        if len(series):
+            np.cumsum(lengths[:-1], out=offsets[1:])
+        return cls(values=values, lengths=lengths, offsets=offsets)
+
+
+def _cartesian_positions(cells: Sequence[_ListCells]) -> tuple[np.ndarray, list[np.ndarray]]:
+    """حاصل‌ضرب دکارتی سطربه‌سطر لیست‌ها با repeat/اندیس مختلط‌پایه.
+
+    خروجی: شمارهٔ سطر مبنا برای هر ردیف حاصل و برای هر ستون، موقعیت مقدار در
+    آرایهٔ تخت آن ستون. ستون آخر سریع‌ترین تغییر را دارد (هم‌ارز explode زنجیره‌ای).
+
+    مثال::
+
+        >>> cells = [_ListCells.from_series(pd.Series([[1, 2]])), _ListCells.from_series(pd.Series([["a", "b"]]))]
+        >>> rows, (first, second) = _cartesian_positions(cells)
+        >>> first.tolist(), second.tolist()
+        ([0, 0, 1, 1], [0, 1, 0, 1])
+    """
+
+    if not cells:
+        return np.empty(0, dtype=np.int64), []
+    counts = np.ones_like(cells[0].lengths)
+    for cell in cells:
+        counts = counts * cell.lengths
+    row_ids = np.repeat(np.arange(counts.shape[0], dtype=np.int64), counts)
+    starts = np.cumsum(counts) - counts
+    local = np.arange(row_ids.shape[0], dtype=np.int64) - starts[row_ids]
+    positions: list[np.ndarray] = []
+    stride = np.ones_like(counts)
+    for cell in reversed(cells):
+        within = (local // stride[row_ids]) % cell.lengths[row_ids]
+        positions.append(cell.offsets[row_ids] + within)
+        stride = stride * cell.lengths
+    positions.reverse()
+    return row_ids, positions
+
+
 def _explode_rows(
     base: pd.DataFrame,
     *,
@@ -1648,20 +1930,6 @@ def _explode_rows(
     school_code_col: str,
 ) -> pd.DataFrame:
 
-    def _build_school_code_series(values: pd.Series, index: pd.Index) -> pd.Series:
-        """تولید ستون «کد مدرسه» با dtype یکنواخت ``Int64`` بدون هشدارهای آیندهٔ pandas.
-
-        مثال::
-
-            >>> _build_school_code_series(pd.Series([None, "4001"]), pd.RangeIndex(2))
-            0       0
-            1    4001
-            dtype: Int64
-        """
-
-        numeric = pd.Series(values.map(_coerce_int_like), index=index, dtype="Int64")
-        return numeric.fillna(0).astype("Int64")
-
     if base.empty:
         return pd.DataFrame()
 
@@ -1670,100 +1938,85 @@ def _explode_rows(
     if df.empty:
         return pd.DataFrame()
 
-    df = df.assign(finance_list=df["finance"], school_list=df[school_col])
-    df = df.drop(columns=["finance", school_col])
-    df = df.explode("group_pairs")
-    gp = pd.DataFrame(df.pop("group_pairs").tolist(), columns=["group_name", "group_code"], index=df.index)
-    df = df.join(gp)
-    df = df.explode("genders").explode(status_col).explode("school_list").explode("finance_list")
-
-    if df.empty:
+    # ترتیب حاصل‌ضرب دکارتی همان ترتیب explodeهای زنجیره‌ای است:
+    # گروه → جنسیت → وضعیت → مدرسه → مالی (درونی‌ترین).
+    group_cells = _ListCells.from_series(df["group_pairs"])
+    gender_cells = _ListCells.from_series(df["genders"])
+    status_cells = _ListCells.from_series(df[status_col])
+    school_cells = _ListCells.from_series(df[school_col])
+    finance_cells = _ListCells.from_series(df["finance"])
+    row_ids, (group_pos, gender_pos, status_pos, school_pos, finance_pos) = _cartesian_positions(
+        [group_cells, gender_cells, status_cells, school_cells, finance_cells]
+    )
+    if row_ids.size == 0:
         return pd.DataFrame()
 
-    def _optional_int(value: Any) -> int | None:
-        """تبدیل مقدار به عدد صحیح در صورت امکان و بازگرداندن ``None`` برای تهی.
-
-        این تابع صرفاً تبدیل را انجام می‌دهد و نگاشت «تهی → صفر» را به لایهٔ فراخوان
-        می‌سپارد تا فقط برای کلیدهای join که Policy/SSoT آن را مجاز می‌دانند اعمال شود.
-        """
-
-        return _coerce_int_like(value)
-
-    def _normalize_demographic_key(series: pd.Series) -> pd.Series:
-        """نرمال‌سازی جنسیت/وضعیت فارغ‌التحصیلی مطابق فضای کاندید (تهی → صفر).
-
-        نمونه::
-
-            >>> _normalize_demographic_key(pd.Series(["", pd.NA, 1]))
-            0    0
-            1    0
-            2    1
-            dtype: Int64
-        """
+    def _int_codes(values: Sequence[Any], *, blank_as_zero: bool = False) -> np.ndarray:
+        """تبدیل یک‌بارهٔ مقادیر یکتای هر لیست به کد صحیح (تهی → صفر)."""
 
-        normalized = pd.Series(series.map(_optional_int), index=series.index, dtype="Int64")
-        return normalized.fillna(0).astype("Int64")
-
-    gender_series = df["genders"]
-    df["gender_code"] = _normalize_demographic_key(gender_series)
-
-    status_series = df[status_col]
-    df["status_code"] = _normalize_demographic_key(status_series)
+        codes = np.zeros(len(values), dtype=np.int64)
+        for position, value in enumerate(values):
+            if blank_as_zero and isinstance(value, str) and not value.strip():
+                continue
+            coerced = _coerce_int_like(value)
+            if coerced is not None:
+                codes[position] = coerced
+        return codes
+
+    def _gather_int(codes: np.ndarray, positions: np.ndarray) -> pd.arrays.IntegerArray:
+        return pd.array(codes[positions], dtype="Int64")
+
+    group_names = np.empty(len(group_cells.values), dtype=object)
+    group_codes: list[Any] = []
+    for position, pair in enumerate(group_cells.values):
+        if isinstance(pair, tuple) and len(pair) == 2:
+            group_names[position] = pair[0]
+            group_codes.append(pair[1])
+        else:
+            group_names[position] = np.nan
+            group_codes.append(None)
 
-    blank_school_mask = df["school_list"].map(lambda v: pd.isna(v) or (isinstance(v, str) and not v.strip()))
-    df["کد مدرسه"] = _build_school_code_series(df["school_list"], df.index)
-    df.loc[blank_school_mask.fillna(True), "کد مدرسه"] = 0
-    df["کد مدرسه"] = df["کد مدرسه"].astype("Int64")
-    df["نام مدرسه"] = df["کد مدرسه"].astype(str).map(code_to_name_school).fillna("")
-    if school_code_col != "کد مدرسه":
-        df = df.rename(columns={"کد مدرسه": school_code_col})
-        school_code_display = school_code_col
-    else:
-        school_code_display = "کد مدرسه"
+    gender_codes = _int_codes(gender_cells.values)
+    status_codes = _int_codes(status_cells.values)
+    gender_labels = np.array([gender_text(code) for code in gender_codes], dtype=object)
+    status_labels = np.array([status_text(code) for code in status_codes], dtype=object)
 
-    alias_series = df[alias_col]
-    df["جایگزین"] = alias_series.map(to_numlike_str)
+    index = df.index.take(row_ids)
 
-    df = df.drop(columns=["genders", status_col, "school_list", alias_col])
-    df["عادی مدرسه"] = type_label
+    def _per_mentor(values: np.ndarray | pd.api.extensions.ExtensionArray) -> Any:
+        return values.take(row_ids)
 
-    df = df.rename(
-        columns={
-            "supporter": "پشتیبان",
-            "mentor_id": "کد کارمندی پشتیبان",
-            "manager": "مدیر",
-            "mentor_row_id": "ردیف پشتیبان",
-            "group_name": "نام رشته",
-            "group_code": "کدرشته",
-            "center_code": "مرکز گلستان صدرا",
-            "finance_list": "مالی حکمت بنیاد",
-        }
-    )
-
-    df[cap_current_col] = safe_int_column(df, "capacity_current")
-    df[cap_special_col] = safe_int_column(df, "capacity_special")
-    df[remaining_col] = safe_int_column(df, "capacity_remaining")
-
-    df["مالی حکمت بنیاد"] = safe_int_column(df, "مالی حکمت بنیاد")
-    df["جنسیت"] = df["gender_code"].astype("Int64")
-    df["دانش آموز فارغ"] = df["status_code"].astype("Int64")
-    df["مرکز گلستان صدرا"] = safe_int_column(df, "مرکز گلستان صدرا", default=0)
-    df["کدرشته"] = safe_int_column(df, "کدرشته", default=0)
-    df["جنسیت2"] = df["جنسیت"].map(lambda v: gender_text(v) if pd.notna(v) else "")
-    df["دانش آموز فارغ2"] = df["دانش آموز فارغ"].map(lambda v: status_text(v) if pd.notna(v) else "")
-    df["مرکز گلستان صدرا3"] = df["center_text"]
-
-    df = df.drop(
-        columns=[
-            "gender_code",
-            "status_code",
-            "center_text",
-            "capacity_current",
-            "capacity_special",
-            "capacity_remaining",
-        ],
-        errors="ignore",
+    school_codes = pd.Series(
+        _gather_int(_int_codes(school_cells.values, blank_as_zero=True), school_pos),
+        index=index,
     )
+    columns: dict[str, Any] = {
+        "جایگزین": _per_mentor(df[alias_col].map(to_numlike_str).to_numpy(dtype=object)),
+        "پشتیبان": _per_mentor(df["supporter"].array),
+        "کد کارمندی پشتیبان": _per_mentor(df["mentor_id"].array),
+        "مدیر": _per_mentor(df["manager"].array),
+        "ردیف پشتیبان": _per_mentor(df["mentor_row_id"].array),
+        "نام رشته": group_names[group_pos],
+        "کدرشته": _gather_int(_int_codes(group_codes), group_pos),
+        "جنسیت": _gather_int(gender_codes, gender_pos),
+        "دانش آموز فارغ": _gather_int(status_codes, status_pos),
+        "مرکز گلستان صدرا": _per_mentor(safe_int_column(df, "center_code", default=0).array),
+        "مالی حکمت بنیاد": _gather_int(_int_codes(finance_cells.values), finance_pos),
+        school_code_col: school_codes.array,
+        "نام مدرسه": school_codes.astype(str).map(code_to_name_school).fillna("").array,
+        "جنسیت2": gender_labels[gender_pos],
+        "دانش آموز فارغ2": status_labels[status_pos],
+        "مرکز گلستان صدرا3": _per_mentor(df["center_text"].array),
+        cap_current_col: _per_mentor(safe_int_column(df, "capacity_current").array),
+        cap_special_col: _per_mentor(safe_int_column(df, "capacity_special").array),
+        remaining_col: _per_mentor(safe_int_column(df, "capacity_remaining").array),
+    }
+    for optional in ("mentor_school_binding_mode", "has_school_constraint"):
+        if optional in df.columns:
+            columns[optional] = _per_mentor(df[optional].array)
+    df = pd.DataFrame(columns, index=index)
+    df["عادی مدرسه"] = type_label
+    school_code_display = school_code_col
 
     binding_policy = cfg.policy.mentor_school_binding
     if "mentor_school_binding_mode" not in df.columns:
@@ -1837,6 +2090,7 @@ def build_matrix(
     crosswalk_synonyms_df: pd.DataFrame | None = None,
     cfg: BuildConfig = BuildConfig(),
     progress: ProgressFn = noop_progress,
+    fragment_store: MatrixFragmentStore | None = None,
 ) -> tuple[
     pd.DataFrame,
     pd.DataFrame,
@@ -1860,6 +2114,9 @@ def build_matrix(
         crosswalk_synonyms_df: دیتافریم نگاشت نام‌های مترادف.
         cfg: پیکربندی ساخت ماتریس.
         progress: تابع پیشرفت تزریق‌شده از لایهٔ زیرساخت.
+        fragment_store: مخزن اختیاری قطعه‌های هر پشتیبان برای ساخت افزایشی؛
+            فقط ردیف‌هایی که اثرانگشتشان تغییر کرده بازسازی می‌شوند و dedupe،
+            قراردادهای مالی/alias/کد مدرسه و پوشش روی کل ماتریس اجرا می‌شوند.
 
     Returns:
         هشت‌تایی دیتافریم شامل ماتریس، گزارش QA، لاگ پیشرفت و جداول کنترلی.
@@ -2086,7 +2343,14 @@ def build_matrix(
         school_cols=school_cols,
         gender_col=gender_col,
         included_col=included_col,
+        fragment_store=fragment_store,
     )
+    fragment_stats = base_df.attrs.pop("matrix_fragments", None)
+    if fragment_stats is not None:
+        progress(
+            54,
+            "incremental matrix: rebuilt {rebuilt}/{total} mentor rows".format(**fragment_stats),
+        )
     if not school_lookup_invalid.empty and "raw_school_value" in school_lookup_invalid.columns:
         derived_unmatched = [
             {
@@ -2246,6 +2510,8 @@ def build_matrix(
             matrix[center_col] = ensure_series(matrix[center_col]).astype("int64")
         matrix["جنسیت"] = ensure_series(matrix["جنسیت"]).astype("Int64")
         matrix["دانش آموز فارغ"] = ensure_series(matrix["دانش آموز فارغ"]).astype("Int64")
+        if cfg.compact_dtypes:
+            matrix = compact_frame_dtypes(matrix, policy=cfg.policy)
 
         rows_before_dedupe = len(matrix)
         dedupe_cols = [col for col in DEDUP_KEY_ORDER if col in matrix.columns]
@@ -2549,6 +2815,190 @@ def resolve_students_gender_series(
     return pd.Series([Gender.MALE] * n, index=stud_df.index)
 
 
+_VALIDATION_STAGE_REASONS: dict[str, tuple[str, ...]] = {
+    "normal_by_alias": (
+        "no normal alias match",
+        "gender mismatch",
+        "status mismatch",
+        "center mismatch (manager-based)",
+        "group_code mismatch",
+    ),
+    "school_by_mentorid": (
+        "no mentor-id school match",
+        "gender mismatch",
+        "status mismatch",
+        "center mismatch (manager-based)",
+        "group_code mismatch",
+    ),
+    "school_by_schoolcode": (
+        "no school-code match",
+        "gender mismatch",
+        "status mismatch",
+        "center mismatch (manager-based)",
+        "group_code mismatch",
+    ),
+}
+_MISSING_GROUP_REASON = "دانش‌آموز فاقد «کد رشته» و «گروه آزمایشی» معتبر است"
+
+
+def _resolve_student_group_codes(
+    frame: pd.DataFrame,
+    group_map: Mapping[str, int],
+    *,
+    prefer_major_code: bool,
+    stats: Dict[str, int],
+) -> list[int | None]:
+    """حل «کد رشته» یک‌بار برای هر ترکیب یکتای کد رشته/گروه آزمایشی.
+
+    آمار و هشدارهای ناسازگاری همچنان برای تک‌تک دانش‌آموزان ثبت می‌شود.
+    """
+
+    def _resolve(row: pd.Series, row_stats: Dict[str, int]) -> int | None:
+        return resolve_group_code(
+            row,
+            group_map,
+            major_column="کد رشته",
+            group_column="گروه آزمایشی",
+            prefer_major_code=prefer_major_code,
+            stats=row_stats,
+            logger=LOGGER,
+        )
+
+    key_columns = [col for col in ("کد رشته", "گروه آزمایشی") if col in frame.columns]
+    if not key_columns or frame.empty:
+        return [_resolve(row, stats) for _, row in frame.iterrows()]
+    group_ids = frame.groupby(key_columns, dropna=False, sort=False).ngroup().to_numpy()
+    results: list[int | None] = [None] * len(frame)
+    positions_by_group: dict[int, list[int]] = {}
+    for position, group_id in enumerate(group_ids):
+        positions_by_group.setdefault(int(group_id), []).append(position)
+    for positions in positions_by_group.values():
+        local_stats: Dict[str, int] = {}
+        code = _resolve(frame.iloc[positions[0]], local_stats)
+        if "mismatch_major_vs_group" in local_stats:
+            # هشدار ناسازگاری شامل شناسهٔ دانش‌آموز است؛ برای هر ردیف جدا ثبت شود.
+            for position in positions[1:]:
+                _resolve(frame.iloc[position], local_stats)
+            for key, value in local_stats.items():
+                stats[key] = stats.get(key, 0) + value
+        else:
+            for key, value in local_stats.items():
+                stats[key] = stats.get(key, 0) + value * len(positions)
+        for position in positions:
+            results[position] = code
+    return results
+
+
+def _student_type_from_postal(value: str, postal_range: tuple[int, int]) -> str:
+    if not value:
+        return "normal_by_alias"
+    try:
+        iv = int(value)
+    except (ValueError, TypeError, OverflowError):
+        return "school_by_mentorid"
+    postal_min, postal_max = postal_range
+    if iv < postal_min:
+        return "school_by_schoolcode"
+    if postal_min <= iv <= postal_max:
+        return "normal_by_alias"
+    return "school_by_mentorid"
+
+
+def _is_missing_key(value: object) -> bool:
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _stage_key_sets(keys: Iterable[tuple[object, ...]]) -> list[set[tuple[object, ...]]]:
+    """ساخت مجموعهٔ پیشوندهای کلید برای هر مرحله (هش‌جوین مرحله‌ای)."""
+
+    levels: list[set[tuple[object, ...]]] = [set() for _ in range(5)]
+    for key in keys:
+        for depth in range(5):
+            if _is_missing_key(key[depth]):
+                break
+            levels[depth].add(key[: depth + 1])
+    return levels
+
+
+def _first_fail_reasons(
+    stud: pd.DataFrame,
+    mat: pd.DataFrame,
+    *,
+    postal_range: tuple[int, int],
+    center_col: str,
+    group_col: str,
+    center_of: Callable[[object], object],
+) -> list[str]:
+    """اولین مرحلهٔ ناموفق هر دانش‌آموز با جست‌وجوی پیشوندی در کلیدهای ماتریس.
+
+    هر مرحله (نوع/جایگزین، جنسیت، وضعیت، مرکز، گروه) یک سطح از کلید ترکیبی است؛
+    وجود پیشوند در مجموعهٔ ماتریس معادل ناتهی بودن زیرمجموعهٔ فیلترشده است.
+    """
+
+    kind = ensure_series(mat["عادی مدرسه"])
+    stage_values = [
+        ensure_series(mat["جنسیت"]),
+        ensure_series(mat["دانش آموز فارغ"]),
+        ensure_series(mat[center_col]),
+        ensure_series(mat[group_col]),
+    ]
+
+    def _levels(mask: pd.Series, head: pd.Series) -> list[set[tuple[object, ...]]]:
+        columns = [head[mask].tolist()] + [values[mask].tolist() for values in stage_values]
+        return _stage_key_sets(zip(*columns))
+
+    normal_mask = kind == "عادی"
+    school_mask = kind == "مدرسه‌ای"
+    lookups = {
+        "normal_by_alias": _levels(normal_mask, mat["alias_norm"]),
+        "school_by_mentorid": _levels(school_mask, mat["alias_norm"]),
+        "school_by_schoolcode": _levels(school_mask, mat["school_code"].astype(str)),
+    }
+    # مدرسه‌ای بدون کد مدرسه: همهٔ ردیف‌های مدرسه‌ای با یک کلید ثابت.
+    any_school = _levels(school_mask, pd.Series("", index=mat.index))
+
+    type_cache: dict[str, str] = {}
+    center_cache: dict[object, object] = {}
+    reasons: list[str] = []
+    for postal, alias, school_code, gender, status, manager, group in zip(
+        stud["student_postal"].tolist(),
+        stud["alias_norm"].tolist(),
+        stud["school_code"].tolist(),
+        stud["gender_code"].tolist(),
+        stud["status_code"].tolist(),
+        stud["manager"].tolist(),
+        stud["group_code"].tolist(),
+    ):
+        stype = type_cache.get(postal)
+        if stype is None:
+            stype = type_cache[postal] = _student_type_from_postal(postal, postal_range)
+        if manager not in center_cache:
+            center_cache[manager] = center_of(manager)
+        if stype == "school_by_schoolcode":
+            levels = lookups[stype] if school_code else any_school
+            head = str(school_code) if school_code else ""
+        else:
+            levels = lookups[stype]
+            head = alias
+        messages = _VALIDATION_STAGE_REASONS[stype]
+        key_parts = (head, gender, status, center_cache[manager])
+        reason = "MATCHED"
+        for depth in range(4):
+            if _is_missing_key(key_parts[depth]) or key_parts[: depth + 1] not in levels[depth]:
+                reason = messages[depth]
+                break
+        else:
+            if group is None or _is_missing_key(group):
+                reason = _MISSING_GROUP_REASON
+            elif key_parts + (int(group),) not in levels[4]:
+                reason = messages[4]
+        reasons.append(reason)
+    return reasons
+
+
 def validate_with_students(
     students_df: pd.DataFrame,
     matrix_df: pd.DataFrame,
@@ -2588,17 +3038,11 @@ def validate_with_students(
     resolution_frame["student_postal"] = postal_series
 
     group_stats: Dict[str, int] = {}
-    group_codes = resolution_frame.apply(
-        lambda row: resolve_group_code(
-            row,
-            name_to_code,
-            major_column="کد رشته",
-            group_column="گروه آزمایشی",
-            prefer_major_code=bool(cfg.prefer_major_code),
-            stats=group_stats,
-            logger=LOGGER,
-        ),
-        axis=1,
+    group_codes = _resolve_student_group_codes(
+        resolution_frame,
+        name_to_code,
+        prefer_major_code=bool(cfg.prefer_major_code),
+        stats=group_stats,
     )
 
     stud = pd.DataFrame(
@@ -2635,65 +3079,15 @@ def validate_with_students(
     mat["alias_norm"] = ensure_series(mat["جایگزین"]).apply(to_numlike_str)
     mat["school_code"] = ensure_series(mat[school_code_col]).astype(str).str.strip()
 
-    def _student_type_from_postal(v: str) -> str:
-        if not v:
-            return "normal_by_alias"
-        try:
-            iv = int(v)
-            postal_min, postal_max = cfg.postal_valid_range or (1000, 9999)
-            if iv < postal_min:
-                return "school_by_schoolcode"
-            if postal_min <= iv <= postal_max:
-                return "normal_by_alias"
-            return "school_by_mentorid"
-        except (ValueError, TypeError, OverflowError):
-            return "school_by_mentorid"
-
-    def _sub_by_type(row: pd.Series) -> tuple[pd.DataFrame, str | None]:
-        stype = _student_type_from_postal(row["student_postal"])
-        if stype == "normal_by_alias":
-            sub = mat[(mat["عادی مدرسه"] == "عادی") & (mat["alias_norm"] == row["alias_norm"])]
-            return (sub, None if not sub.empty else "no normal alias match")
-        if stype == "school_by_mentorid":
-            sub = mat[(mat["عادی مدرسه"] == "مدرسه‌ای") & (mat["alias_norm"] == row["alias_norm"])]
-            return (sub, None if not sub.empty else "no mentor-id school match")
-        sub = mat[(mat["عادی مدرسه"] == "مدرسه‌ای")]
-        if row["school_code"]:
-            sub = sub[sub["school_code"].astype(str) == str(row["school_code"])]
-        return (sub, None if not sub.empty else "no school-code match")
-
-    def _check_gender(row: pd.Series, sub: pd.DataFrame) -> tuple[pd.DataFrame, str | None]:
-        sub2 = sub[sub["جنسیت"] == row["gender_code"]]
-        return (sub2, None if not sub2.empty else "gender mismatch")
-
-    def _check_status(row: pd.Series, sub: pd.DataFrame) -> tuple[pd.DataFrame, str | None]:
-        sub2 = sub[sub["دانش آموز فارغ"] == row["status_code"]]
-        return (sub2, None if not sub2.empty else "status mismatch")
-
-    def _check_center(row: pd.Series, sub: pd.DataFrame) -> tuple[pd.DataFrame, str | None]:
-        expected = domain_center_from_manager(row["manager"], cfg=domain_cfg)
-        sub2 = sub[sub[center_col] == expected]
-        return (sub2, None if not sub2.empty else "center mismatch (manager-based)")
-
-    def _check_group(row: pd.Series, sub: pd.DataFrame) -> tuple[pd.DataFrame, str | None]:
-        value = row.get("group_code")
-        if value is None or (pd.isna(value)):
-            return (sub, "دانش‌آموز فاقد «کد رشته» و «گروه آزمایشی» معتبر است")
-        group_col = cfg.policy.join_keys[0]
-        sub2 = sub[sub[group_col] == int(value)]
-        return (sub2, None if not sub2.empty else "group_code mismatch")
-
-    def first_fail_reason(row: pd.Series) -> str:
-        sub, err = _sub_by_type(row)
-        if err:
-            return err
-        for checker in (_check_gender, _check_status, _check_center, _check_group):
-            sub, err = checker(row, sub)
-            if err:
-                return err
-        return "MATCHED"
-
-    stud["reason"] = stud.apply(first_fail_reason, axis=1)
+    postal_min, postal_max = cfg.postal_valid_range or (1000, 9999)
+    stud["reason"] = _first_fail_reasons(
+        stud,
+        mat,
+        postal_range=(postal_min, postal_max),
+        center_col=center_col,
+        group_col=cfg.policy.join_keys[0],
+        center_of=lambda manager: domain_center_from_manager(manager, cfg=domain_cfg),
+    )
     stud["match"] = stud["reason"].eq("MATCHED")
 
     breakdown = stud["reason"].value_counts().reset_index()
@@ -6,6 +6,7 @@ import re
 from dataclasses import dataclass
 from typing import Any, Sequence
 
+import numpy as np
 import pandas as pd
 
 from .common.column_normalizer import normalize_input_columns
@@ -31,6 +32,8 @@ __all__ = [
     "canonicalize_students_frame",
     "canonicalize_pool_frame",
     "canonicalize_allocation_frames",
+    "compact_frame_dtypes",
+    "COMPACT_TEXT_COLUMNS",
     "sanitize_pool_for_allocation",
 ]
 
@@ -42,6 +45,28 @@ _FINAL_EXAM_GROUP_TOKENS = tuple(
     token for token in _FINAL_EXAM_GROUP_NORMALIZED.split(" ") if token
 )
 
+#: ستون‌های متنی پرتکرار که در حالت فشرده به category تبدیل می‌شوند.
+COMPACT_TEXT_COLUMNS: tuple[str, ...] = (
+    "پشتیبان",
+    "مدیر",
+    "نام پشتیبان",
+    "نام مدیر",
+    "نام رشته",
+    "عادی مدرسه",
+    "جنسیت2",
+    "دانش آموز فارغ2",
+    "مرکز گلستان صدرا3",
+    CANON_EN_TO_FA["exam_group"],
+    "نام مدرسه",
+    "mentor_name",
+    "manager_name",
+    "mentor_school_binding_mode",
+    "exam_group",
+)
+_COMPACT_CAPACITY_COLUMNS = ("remaining_capacity", "allocations_new")
+_COMPACT_INT_DTYPES = ("Int8", "Int16", "Int32")
+_MAX_CATEGORY_RATIO = 0.5
+
 
 @dataclass(slots=True)
 class PoolCanonicalizationStats:
@@ -100,6 +125,92 @@ def _coerce_capacity_series(
     return filled
 
 
+def _smallest_int_dtype(series: pd.Series, *, floor: str = "Int16") -> str | None:
+    """کوچک‌ترین dtype صحیح nullable (حداقل ``floor``) که بازهٔ مقادیر را پوشش دهد."""
+
+    numeric = pd.to_numeric(series, errors="coerce")
+    if numeric.notna().sum() != series.notna().sum():
+        return None
+    valid = numeric.dropna()
+    if not valid.empty and not (valid == valid.round()).all():
+        return None
+    low = int(valid.min()) if not valid.empty else 0
+    high = int(valid.max()) if not valid.empty else 0
+    for dtype in _COMPACT_INT_DTYPES[_COMPACT_INT_DTYPES.index(floor) :]:
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            return dtype
+    return None
+
+
+def compact_frame_dtypes(
+    frame: pd.DataFrame,
+    *,
+    policy: PolicyConfig,
+    text_columns: Sequence[str] = COMPACT_TEXT_COLUMNS,
+    max_category_ratio: float = _MAX_CATEGORY_RATIO,
+) -> pd.DataFrame:
+    """کوچک‌سازی dtypeها برای کاهش حافظهٔ فریم‌های بزرگ استخر/ماتریس/دانش‌آموز.
+
+    * کلیدهای join به کوچک‌ترین نوع صحیح nullable (``Int16``/``Int32``) که بازهٔ
+      مقادیر موجود را پوشش دهد تبدیل می‌شوند؛ ``pd.NA`` حفظ می‌شود.
+    * ستون‌های ظرفیت (``remaining_capacity``، ``allocations_new`` و ستون ظرفیت
+      Policy) به ``Int32`` می‌روند تا کاهش/افزایش ظرفیت در تخصیص سرریز نکند.
+    * ستون‌های متنی ``text_columns`` در صورتی که نسبت مقادیر یکتا به تعداد
+      ردیف‌ها حداکثر ``max_category_ratio`` باشد ``category`` می‌شوند.
+
+    مقادیر دست نمی‌خورند؛ فقط نمایش در حافظه تغییر می‌کند. ``attrs`` حفظ می‌شود.
+
+    مثال::
+
+        >>> compact = compact_frame_dtypes(pool, policy=load_policy())  # doctest: +SKIP
+        >>> compact["کدرشته"].dtype  # doctest: +SKIP
+        Int16Dtype()
+    """
+
+    result = frame.copy()
+    result.attrs = dict(frame.attrs)
+    join_key_columns = [
+        column
+        for key in dict.fromkeys(policy.join_keys)
+        for column in result.columns
+        if column == key or str(column).startswith(f"{key} | ")
+    ]
+    for column in join_key_columns:
+        series = ensure_series(result[column])
+        if not pd.api.types.is_numeric_dtype(series):
+            continue
+        dtype = _smallest_int_dtype(series)
+        if dtype is not None:
+            result[column] = pd.to_numeric(series, errors="coerce").astype(dtype)
+    capacity_columns = dict.fromkeys(
+        (*_COMPACT_CAPACITY_COLUMNS, policy.columns.remaining_capacity)
+    )
+    for column in capacity_columns:
+        if column not in result.columns:
+            continue
+        series = ensure_series(result[column])
+        if not pd.api.types.is_numeric_dtype(series):
+            continue
+        dtype = _smallest_int_dtype(series, floor="Int32")
+        if dtype is not None:
+            result[column] = pd.to_numeric(series, errors="coerce").astype(dtype)
+    row_count = len(result)
+    if row_count:
+        for column in text_columns:
+            if column not in result.columns:
+                continue
+            series = ensure_series(result[column])
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                continue
+            if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+                continue
+            if series.nunique(dropna=False) > row_count * max_category_ratio:
+                continue
+            result[column] = series.astype("category")
+    return result
+
+
 def _make_unique_columns(columns: Sequence[str]) -> list[str]:
     """ساخت نام ستون یکتا با حفظ ترتیب اولیه برای جلوگیری از برخورد."""
 
@@ -400,8 +511,12 @@ def canonicalize_students_frame(
     students_df: pd.DataFrame,
     *,
     policy: PolicyConfig,
+    compact_dtypes: bool = False,
 ) -> pd.DataFrame:
-    """کاننیکال‌سازی کامل دیتافریم دانش‌آموز برای تخصیص (SSoT)."""
+    """کاننیکال‌سازی کامل دیتافریم دانش‌آموز برای تخصیص (SSoT).
+
+    با ``compact_dtypes=True`` خروجی از :func:`compact_frame_dtypes` عبور می‌کند.
+    """
 
     students = resolve_aliases(students_df.copy(deep=True), "report")
     students = _promote_final_exam_group_column(students)
@@ -465,6 +580,8 @@ def canonicalize_students_frame(
     if missing_required:
         raise ValueError(f"Missing columns: {missing_required}")
     students = enforce_join_key_types(students, policy.join_keys)
+    if compact_dtypes:
+        students = compact_frame_dtypes(students, policy=policy)
     return students
 
 
@@ -476,10 +593,12 @@ def canonicalize_pool_frame(
     pool_source: str = "inspactor",
     require_join_keys: bool = True,
     preserve_columns: Sequence[str] | None = None,
+    compact_dtypes: bool = False,
 ) -> pd.DataFrame:
     """کاننیکال‌سازی استخر منتورها از هر منبع (inspactor/matrix).
 
     آمار اصلاحات در ``df.attrs["pool_canonicalization_stats"]`` قرار می‌گیرد.
+    با ``compact_dtypes=True`` خروجی از :func:`compact_frame_dtypes` عبور می‌کند.
     """
 
     source = pool_source if pool_source in {"inspactor", "matrix"} else "inspactor"
@@ -592,6 +711,8 @@ def canonicalize_pool_frame(
         for column, original in preserved.items():
             if column not in pool.columns:
                 pool[column] = original.reindex(pool.index)
+    if compact_dtypes:
+        pool = compact_frame_dtypes(pool, policy=policy)
     return _attach_pool_stats(pool, stats)
 
 
@@ -602,15 +723,19 @@ def canonicalize_allocation_frames(
     policy: PolicyConfig,
     sanitize_pool: bool = True,
     pool_source: str = "inspactor",
+    compact_dtypes: bool = False,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """تولید نسخهٔ کاننیکال دانش‌آموز/استخر برای مصرف allocate_batch."""
 
-    students = canonicalize_students_frame(students_df, policy=policy)
+    students = canonicalize_students_frame(
+        students_df, policy=policy, compact_dtypes=compact_dtypes
+    )
     pool = canonicalize_pool_frame(
         pool_df,
         policy=policy,
         sanitize_pool=sanitize_pool,
         pool_source=pool_source,
+        compact_dtypes=compact_dtypes,
     )
     return students, pool
 
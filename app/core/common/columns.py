@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import lru_cache
 import re
 from typing import Collection, Dict, Iterable, List, Literal, Mapping, Sequence
 
@@ -20,6 +21,9 @@ __all__ = [
     "ensure_required_columns",
     "coerce_semantics",
     "canonicalize_headers",
+    "canonical_header",
+    "header_rename_map",
+    "CanonicalFrameView",
     "ensure_series",
     "collect_aliases_for",
     "accepted_synonyms",
@@ -737,39 +741,105 @@ def coerce_semantics(df: pd.DataFrame, source: Source) -> pd.DataFrame:
     return result
 
 
-def canonicalize_headers(df: pd.DataFrame, header_mode: HeaderMode) -> pd.DataFrame:
-    """تبدیل نام ستون‌ها به فارسی، انگلیسی یا دوزبانه."""
+@lru_cache(maxsize=1)
+def _canonical_en_lookup() -> Mapping[str, str]:
+    lookup: Dict[str, str] = {}
+    for candidate_en in CANON_EN_TO_FA:
+        lookup.setdefault(_normalize_header(candidate_en), candidate_en)
+    return lookup
 
-    if header_mode not in {"fa", "en", "fa_en"}:
-        raise ValueError(f"Unsupported header_mode '{header_mode}'")
 
-    rename: Dict[str, str] = {}
-    for column in df.columns:
-        en_key: str | None = None
-        for normalized in _normalized_header_tokens(column):
-            en_key = CANON_FA_TO_EN.get(normalized)
-            if en_key is not None:
-                break
-            for candidate_en in CANON_EN_TO_FA:
-                if normalized == _normalize_header(candidate_en):
-                    en_key = candidate_en
-                    break
-            if en_key is not None:
-                break
+def _canonical_key_for(column: object) -> str | None:
+    en_lookup = _canonical_en_lookup()
+    for normalized in _normalized_header_tokens(column):
+        en_key = CANON_FA_TO_EN.get(normalized)
+        if en_key is None:
+            en_key = en_lookup.get(normalized)
+        if en_key is not None:
+            return en_key
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _cached_rename_items(
+    columns: tuple[object, ...], header_mode: HeaderMode
+) -> tuple[tuple[object, str], ...]:
+    items: list[tuple[object, str]] = []
+    for column in columns:
+        en_key = _canonical_key_for(column)
         if en_key is None:
             continue
         fa_name = CANON_EN_TO_FA[en_key]
         if header_mode == "fa":
-            rename[column] = fa_name
+            items.append((column, fa_name))
         elif header_mode == "en":
-            rename[column] = en_key
+            items.append((column, en_key))
         else:
-            rename[column] = f"{fa_name} | {en_key}"
+            items.append((column, f"{fa_name} | {en_key}"))
+    return tuple(items)
+
+
+def header_rename_map(columns: Iterable[object], header_mode: HeaderMode) -> Dict[object, str]:
+    """نگاشت تغییر نام ستون‌ها با کش بر اساس «امضای ستون‌ها + header_mode».
+
+    نتیجه برای هر تاپل یکسان از نام ستون‌ها فقط یک بار محاسبه می‌شود؛ بنابراین
+    فراخوانی‌های مکرر روی استخرهای هم‌شکل (مسیر هر دانش‌آموز) هزینهٔ نرمال‌سازی
+    هدرها را تکرار نمی‌کنند.
+    """
+
+    if header_mode not in {"fa", "en", "fa_en"}:
+        raise ValueError(f"Unsupported header_mode '{header_mode}'")
+    return dict(_cached_rename_items(tuple(columns), header_mode))
+
+
+def canonical_header(column: object, header_mode: HeaderMode = "en") -> object:
+    """نام کاننیکال یک ستون منفرد (یا همان نام در صورت نبود نگاشت)."""
+
+    return header_rename_map((column,), header_mode).get(column, column)
+
+
+def canonicalize_headers(df: pd.DataFrame, header_mode: HeaderMode) -> pd.DataFrame:
+    """تبدیل نام ستون‌ها به فارسی، انگلیسی یا دوزبانه."""
+
+    rename = header_rename_map(df.columns, header_mode)
     if not rename:
         return df.copy()
     return df.rename(columns=rename)
 
 
+@dataclass(frozen=True)
+class CanonicalFrameView:
+    """نمای کاننیکال یک‌بارساخته‌شده از یک قاب برای مسیرهای داغ.
+
+    اگر قاب ورودی از قبل کاننیکال و بدون ستون تکراری باشد، نما به خود قاب
+    اشاره می‌کند (بدون کپی) تا به‌روزرسانی‌های درجا (مثل ظرفیت در
+    ``allocate_batch``) همیشه دیده شوند؛ در غیر این صورت یک بار کاننیکال و
+    dedupe می‌شود.
+
+    مثال::
+
+        >>> frame = pd.DataFrame({"mentor_id": ["EMP-1"], "remaining_capacity": [2]})
+        >>> view = CanonicalFrameView.build(frame)
+        >>> view.frame is frame
+        True
+    """
+
+    frame: pd.DataFrame
+    header_mode: HeaderMode = "en"
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, header_mode: HeaderMode = "en") -> "CanonicalFrameView":
+        rename = {
+            source: target
+            for source, target in header_rename_map(df.columns, header_mode).items()
+            if source != target
+        }
+        frame = df.rename(columns=rename) if rename else df
+        if frame.columns.duplicated().any():
+            frame = frame.loc[:, ~frame.columns.duplicated()].copy()
+        return cls(frame=frame, header_mode=header_mode)
+
+
 # ---------------------------------------------------------------------------
 # Doctest-style examples (برای اسناد داخلی)
 # ---------------------------------------------------------------------------
@@ -101,13 +101,13 @@ def _coerce_school_candidate(candidate: object) -> tuple[int | None, bool]:
         return None, True
 
 
-def _sanitize_school_series(series: pd.Series) -> pd.Series:
+def sanitize_school_series(series: pd.Series) -> pd.Series:
     """بازگرداندن Series از مقادیر نرمال‌شدهٔ کد مدرسه بدون mutate ورودی.
 
     مثال کوتاه::
 
         >>> import pandas as pd
-        >>> _sanitize_school_series(pd.Series(["35-81", "۳۵/۸۱"]))
+        >>> sanitize_school_series(pd.Series(["35-81", "۳۵/۸۱"]))
         0    3581
         1    3581
         dtype: Int64
@@ -131,7 +131,7 @@ def filter_school_by_value(
     if pd.api.types.is_integer_dtype(column_series):
         mask = column_series == target
     else:
-        sanitized = _sanitize_school_series(column_series)
+        sanitized = sanitize_school_series(column_series)
         mask = sanitized == target
     matched = bool(mask.any())
     if not matched:
@@ -196,11 +196,18 @@ __all__ = [
     "filter_by_school",
     "filter_school_by_value",
     "resolve_student_school_code",
+    "sanitize_school_series",
+    "school_constraint_mask",
+    "school_code_matches",
+    "school_keep_mask",
+    "student_join_value",
+    "student_center_value",
+    "is_center_wildcard",
     "apply_join_filters",
 ]
 
 
-def _student_value(student: Mapping[str, object], column: str) -> object:
+def student_join_value(student: Mapping[str, object], column: str) -> object:
     """بازیابی مقدار ستون از دانش‌آموز با پشتیبانی از آندرلاین/فاصله."""
 
     if column in student:
@@ -232,11 +239,11 @@ def _coerce_center_candidate(candidate: object) -> int | None:
         return None
 
 
-def _student_center_value(student: Mapping[str, object], column: str) -> int | None:
+def student_center_value(student: Mapping[str, object], column: str) -> int | None:
     """استخراج مقدار مرکز دانش‌آموز با مدیریت ستون‌های معادل."""
 
     try:
-        raw = _student_value(student, column)
+        raw = student_join_value(student, column)
     except KeyError:
         return None
     return _coerce_center_candidate(raw)
@@ -251,7 +258,7 @@ def _center_wildcard(policy: PolicyConfig) -> int | None:
     return int(wildcard)
 
 
-def _is_center_wildcard(value: int | None, policy: PolicyConfig) -> bool:
+def is_center_wildcard(value: int | None, policy: PolicyConfig) -> bool:
     """بررسی می‌کند که آیا مقدار مرکز باید فیلتر را غیرفعال کند یا خیر."""
 
     if value is None:
@@ -281,7 +288,7 @@ def _filter_by_stage(
     if student_join_map and normalized in student_join_map:
         value = student_join_map[normalized]
     else:
-        value = _student_value(student, column)
+        value = student_join_value(student, column)
     return _eq_filter(pool, column, value)
 
 
@@ -377,8 +384,8 @@ def filter_by_center(
     if policy is None:
         policy = load_policy()
     column = policy.stage_column("center")
-    center_value = _student_center_value(student, column)
-    if _is_center_wildcard(center_value, policy):
+    center_value = student_center_value(student, column)
+    if is_center_wildcard(center_value, policy):
         return pool
     if center_value is None:
         return pool
@@ -423,42 +430,64 @@ def filter_by_school(
     if school_code.value is None:
         return pool
     target = int(school_code.value)
-    constraint_mask: pd.Series | None = None
+    restricted = school_constraint_mask(pool, policy)
+    if restricted is not None and not bool(restricted.any()):
+        return pool
+    column_series = pool[column]
+    if restricted is not None:
+        # فقط سطرهای مقید نیاز به نرمال‌سازی کد مدرسه دارند.
+        matches = np.zeros(pool.shape[0], dtype=bool)
+        restricted_series = column_series.iloc[restricted]
+        matches[restricted] = school_code_matches(restricted_series, target)
+    else:
+        matches = school_code_matches(column_series, target)
+    keep = school_keep_mask(matches, restricted)
+    if keep is None:
+        return pool
+    return pool.iloc[keep]
+
+
+def school_constraint_mask(pool: pd.DataFrame, policy: PolicyConfig) -> np.ndarray | None:
+    """ماسک پشتیبان‌های مدرسه‌ای (مقید)؛ ``None`` یعنی استخر اطلاعات قید ندارد."""
+
     constraint_col = "has_school_constraint"
     if constraint_col in pool.columns:
         series = pool[constraint_col]
-        constraint_mask = pd.Series(series.fillna(False).astype(bool), index=pool.index)
-    elif "mentor_school_binding_mode" in pool.columns:
+        return series.fillna(False).astype(bool).to_numpy(dtype=bool, copy=True)
+    if "mentor_school_binding_mode" in pool.columns:
         restricted_mode = policy.mentor_school_binding.restricted_mode
         binding_series = pool["mentor_school_binding_mode"].astype("string").fillna("")
-        constraint_mask = binding_series.str.strip().eq(restricted_mode)
+        return binding_series.str.strip().eq(restricted_mode).to_numpy(dtype=bool, copy=True)
+    return None
 
-    if constraint_mask is None:
-        filtered, matched = filter_school_by_value(pool, column, target)
-        if not matched:
-            return pool
-        return filtered
 
-    restricted_mask = constraint_mask.astype(bool)
-    mask_values = restricted_mask.to_numpy(dtype=bool, copy=False)
-    if not bool(mask_values.any()):
-        return pool
+def school_code_matches(series: pd.Series, target: int) -> np.ndarray:
+    """ماسک بولی تطابق کد مدرسهٔ نرمال‌شده با مقدار هدف (تهی‌ها False)."""
 
-    restricted_positions = np.flatnonzero(mask_values)
-    restricted = pool.iloc[mask_values].copy()
-    restricted["__row_pos"] = restricted_positions
-    keep_values = (~mask_values).copy()
+    if pd.api.types.is_integer_dtype(series):
+        mask = series == target
+    else:
+        mask = sanitize_school_series(series) == target
+    return pd.array(mask, dtype="boolean").to_numpy(dtype=bool, na_value=False)
 
-    filtered_restricted, matched = filter_school_by_value(restricted, column, target)
-    if not matched:
-        return pool.iloc[keep_values]
-
-    positions = filtered_restricted.get("__row_pos")
-    if positions is not None:
-        keep_values = keep_values.copy()
-        keep_values[positions.to_numpy(dtype=int, copy=False)] = True
-    result = pool.iloc[keep_values]
-    return result
+
+def school_keep_mask(
+    matches: np.ndarray, restricted: np.ndarray | None
+) -> np.ndarray | None:
+    """قاعدهٔ مشترک مرحلهٔ مدرسه روی ماسک‌ها؛ ``None`` یعنی همهٔ سطرها باقی می‌مانند.
+
+    - بدون اطلاعات قید: اگر هیچ تطابقی نبود همه باقی می‌مانند، وگرنه فقط تطابق‌ها.
+    - با قید: سطرهای آزاد همیشه باقی می‌مانند و از سطرهای مقید فقط تطابق‌ها؛
+      اگر هیچ سطر مقیدی وجود نداشته باشد، فیلتر اعمال نمی‌شود.
+    """
+
+    if restricted is None:
+        if not bool(matches.any()):
+            return None
+        return matches
+    if not bool(restricted.any()):
+        return None
+    return ~restricted | (restricted & matches)
 
 
 def apply_join_filters(
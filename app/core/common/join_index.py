@@ -0,0 +1,329 @@
+"""ایندکس هش کلیدهای join برای انتخاب سریع کاندیدها در allocate_batch (Core-only).
+
+این ماژول جایگزین اجرای هفت ماسک بولی روی کل استخر برای هر دانش‌آموز است.
+استخر یک بار خوانده می‌شود و برای هر ترکیب پیشوندی از ستون‌های مرحله‌ای
+(type → group → gender → graduation_status → center → finance) نگاشتی از
+«تاپل مقدار» به موقعیت سطرها ساخته می‌شود؛ مرحلهٔ مدرسه نیز روی آرایه‌های
+ازپیش‌نرمال‌شدهٔ کد مدرسه و قید مدرسه‌ای اجرا می‌شود. هزینهٔ هر جست‌وجو
+متناسب با تعداد تطابق‌هاست، نه اندازهٔ استخر، و شمارش مراحل دقیقاً با
+:func:`app.core.common.filters.apply_join_filters` برابر است.
+
+مثال::
+
+    >>> import pandas as pd
+    >>> from app.core.common.join_index import JoinKeyIndex
+    >>> pool = pd.DataFrame({
+    ...     "کدرشته": [1201, 1202],
+    ...     "جنسیت": [1, 1],
+    ...     "دانش آموز فارغ": [0, 0],
+    ...     "مرکز گلستان صدرا": [1, 1],
+    ...     "مالی حکمت بنیاد": [0, 0],
+    ...     "کد مدرسه": [3581, 4001],
+    ... })
+    >>> index = JoinKeyIndex.build(pool)
+    >>> student = {"کدرشته": 1201, "جنسیت": 1, "دانش_آموز_فارغ": 0,
+    ...            "مرکز_گلستان_صدرا": 1, "مالی_حکمت_بنیاد": 0, "کد_مدرسه": 3581}
+    >>> index.select(student).shape[0]
+    1
+"""
+
+from __future__ import annotations
+
+import copy
+from numbers import Number
+from typing import Dict, List, Mapping, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..policy_loader import PolicyConfig, load_policy
+from .filters import (
+    FilterTracker,
+    is_center_wildcard,
+    resolve_student_school_code,
+    sanitize_school_series,
+    school_constraint_mask,
+    school_keep_mask,
+    student_center_value,
+    student_join_value,
+)
+
+__all__ = ["JoinKeyIndex", "JoinStageStep"]
+
+_EQUALITY_STAGES: Tuple[str, ...] = (
+    "type",
+    "group",
+    "gender",
+    "graduation_status",
+    "center",
+    "finance",
+)
+
+_INDEX_STAGE_NAMES: Tuple[str, ...] = _EQUALITY_STAGES + ("school",)
+
+_EMPTY_POSITIONS = np.empty(0, dtype=np.int64)
+
+_BucketKey = Tuple[object, ...]
+_BucketMap = Dict[_BucketKey, np.ndarray]
+
+
+class JoinStageStep(NamedTuple):
+    """موقعیت‌های قبل/بعد یک مرحله در :meth:`JoinKeyIndex.lookup` و مقدار دانش‌آموز.
+
+    ``value`` برای مرحلهٔ مدرسه ``None`` است (کد مدرسه جداگانه حل می‌شود).
+    """
+
+    stage: str
+    value: object
+    before: np.ndarray
+    after: np.ndarray
+
+
+def _is_missing_key(value: object) -> bool:
+    """مقادیر تهی هرگز در مقایسهٔ ``==`` پانداس تطبیق نمی‌خورند."""
+
+    if value is None or value is pd.NA or value is pd.NaT:
+        return True
+    if isinstance(value, Number) and not isinstance(value, bool):
+        try:
+            return bool(pd.isna(value))  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _school_code_array(series: pd.Series) -> np.ndarray:
+    """تبدیل ستون کد مدرسه به آرایهٔ int64 با مقدار نگهبان برای تهی‌ها."""
+
+    if pd.api.types.is_integer_dtype(series):
+        numeric = series
+    else:
+        numeric = sanitize_school_series(series)
+    values = pd.array(numeric, dtype="Int64")
+    return values.to_numpy(dtype=np.int64, na_value=np.iinfo(np.int64).min)
+
+
+class JoinKeyIndex:
+    """نگاشت هش از تاپل کلیدهای join به موقعیت سطرهای استخر کاندید.
+
+    ایندکس روی ستون‌های join (که در طول تخصیص تغییر نمی‌کنند) ساخته می‌شود و
+    تنها به قاب مرجع اشاره دارد؛ بنابراین ستون‌های ظرفیت که در حین
+    ``allocate_batch`` به‌روزرسانی می‌شوند، همیشه مقدار جاری را برمی‌گردانند.
+    نگاشت‌های پیشوندی به‌صورت تنبل و فقط برای ترکیب‌های واقعاً استفاده‌شده
+    ساخته و کش می‌شوند (مثلاً حالت wildcard مرکز که ستون مرکز را کنار می‌گذارد).
+    """
+
+    def __init__(
+        self,
+        frame: pd.DataFrame,
+        *,
+        policy: PolicyConfig,
+        positions: np.ndarray | None = None,
+    ) -> None:
+        self.frame = frame
+        self.policy = policy
+        if positions is None:
+            positions = np.arange(frame.shape[0], dtype=np.int64)
+        self._positions = np.asarray(positions, dtype=np.int64)
+        self._stage_columns: Dict[str, str] = {
+            stage: policy.stage_column(stage) for stage in _INDEX_STAGE_NAMES
+        }
+        missing = [
+            column for column in self._stage_columns.values() if column not in frame.columns
+        ]
+        if missing:
+            raise KeyError(f"Missing columns in candidate pool: {missing}")
+        self._column_values: Dict[str, tuple[list[object], np.ndarray]] = {}
+        self._buckets: Dict[Tuple[str, ...], _BucketMap] = {}
+        school_column = self._stage_columns["school"]
+        self._school_codes = _school_code_array(frame[school_column])
+        self._school_restricted = school_constraint_mask(frame, policy)
+
+    @classmethod
+    def build(
+        cls, frame: pd.DataFrame, *, policy: PolicyConfig | None = None
+    ) -> "JoinKeyIndex":
+        """ساخت ایندکس روی کل قاب استخر."""
+
+        if policy is None:
+            policy = load_policy()
+        return cls(frame, policy=policy)
+
+    def subset(self, positions: Sequence[int] | np.ndarray) -> "JoinKeyIndex":
+        """ساخت نمای محدود (مثلاً منتورهای یک مدیر) با همان قاب مرجع.
+
+        آرایه‌های ستونی و کد مدرسه مستقل از زیرمجموعه‌اند و با والد به اشتراک
+        گذاشته می‌شوند؛ فقط سطل‌های هش برای زیرمجموعه از نو (و به‌صورت تنبل) ساخته می‌شوند.
+        """
+
+        child = copy.copy(self)
+        child._positions = np.sort(np.asarray(positions, dtype=np.int64))
+        child._buckets = {}
+        return child
+
+    def subset_labels(self, labels: pd.Index) -> "JoinKeyIndex":
+        """نسخهٔ مبتنی بر برچسب :meth:`subset` برای ایندکس‌های ``pool.index[mask]``.
+
+        Raises:
+            KeyError: اگر برچسبی در قاب مرجع وجود نداشته باشد.
+        """
+
+        positions = self.frame.index.get_indexer(labels)
+        unknown = positions < 0
+        if bool(unknown.any()):
+            missing = list(pd.Index(labels)[unknown][:5])
+            raise KeyError(f"Labels not found in candidate pool: {missing}")
+        return self.subset(positions)
+
+    @property
+    def positions(self) -> np.ndarray:
+        """موقعیت سطرهای این نما در قاب مرجع (مرتب صعودی)."""
+
+        return self._positions
+
+    def first_value(self, column: str, positions: np.ndarray) -> object | None:
+        """اولین مقدار غیرتهی ستون در موقعیت‌های داده‌شده (هم‌ارز ``dropna().iloc[0]``)."""
+
+        values, missing = self._values(column)
+        present = positions[~missing[positions]]
+        if present.shape[0] == 0:
+            return None
+        return values[int(present[0])]
+
+    # ------------------------------------------------------------------
+    # ساخت تنبل سطل‌ها
+    # ------------------------------------------------------------------
+    def _values(self, column: str) -> tuple[list[object], np.ndarray]:
+        cached = self._column_values.get(column)
+        if cached is None:
+            series = self.frame[column]
+            cached = (series.tolist(), series.isna().to_numpy(dtype=bool))
+            self._column_values[column] = cached
+        return cached
+
+    def _bucket_map(self, columns: Tuple[str, ...]) -> _BucketMap:
+        cached = self._buckets.get(columns)
+        if cached is not None:
+            return cached
+        resolved = [self._values(column) for column in columns]
+        value_lists = [values for values, _ in resolved]
+        valid = np.ones(self._positions.shape[0], dtype=bool)
+        for _, missing in resolved:
+            valid &= ~missing[self._positions]
+        grouped: Dict[_BucketKey, list[int]] = {}
+        for position in self._positions[valid].tolist():
+            key = tuple(values[position] for values in value_lists)
+            bucket = grouped.get(key)
+            if bucket is None:
+                grouped[key] = [position]
+            else:
+                bucket.append(position)
+        buckets: _BucketMap = {
+            key: np.asarray(items, dtype=np.int64) for key, items in grouped.items()
+        }
+        self._buckets[columns] = buckets
+        return buckets
+
+    def positions_for(
+        self, columns: Sequence[str], values: Sequence[object]
+    ) -> np.ndarray:
+        """موقعیت سطرهایی که برای همهٔ ستون‌ها مقدار برابر دارند (معادل AND ماسک‌ها)."""
+
+        if not columns:
+            return self._positions
+        if any(_is_missing_key(value) for value in values):
+            return _EMPTY_POSITIONS
+        buckets = self._bucket_map(tuple(columns))
+        try:
+            return buckets.get(tuple(values), _EMPTY_POSITIONS)
+        except TypeError:
+            return _EMPTY_POSITIONS
+
+    # ------------------------------------------------------------------
+    # مرحلهٔ مدرسه
+    # ------------------------------------------------------------------
+    def filter_school_positions(
+        self, positions: np.ndarray, student: Mapping[str, object]
+    ) -> np.ndarray:
+        """اجرای منطق :func:`filter_by_school` روی موقعیت‌های فعلی."""
+
+        school_code = resolve_student_school_code(student, self.policy)
+        if school_code.wildcard or school_code.missing or school_code.value is None:
+            return positions
+        target = int(school_code.value)
+        matches = self._school_codes[positions] == target
+        restricted = (
+            None if self._school_restricted is None else self._school_restricted[positions]
+        )
+        keep = school_keep_mask(matches, restricted)
+        if keep is None:
+            return positions
+        return positions[keep]
+
+    # ------------------------------------------------------------------
+    # جست‌وجوی کامل هفت مرحله
+    # ------------------------------------------------------------------
+    def lookup(
+        self,
+        student: Mapping[str, object],
+        *,
+        student_join_map: Mapping[str, int] | None = None,
+        tracker: FilterTracker | None = None,
+        steps: List[JoinStageStep] | None = None,
+    ) -> np.ndarray:
+        """موقعیت کاندیدهای نهایی با همان ترتیب و شمارش مرحله‌ای ``apply_join_filters``.
+
+        با ``steps`` برای هر هفت مرحله یک :class:`JoinStageStep` ثبت می‌شود تا تریس
+        بدون پیمایش دوباره از همین موقعیت‌ها ساخته شود.
+        """
+
+        columns: list[str] = []
+        values: list[object] = []
+        current = self._positions
+        for stage in _INDEX_STAGE_NAMES:
+            if current.shape[0] == 0 and steps is None:
+                if tracker is not None:
+                    tracker(stage, 0)
+                continue
+            column = self._stage_columns[stage]
+            before = current
+            value: object = None
+            if stage == "school":
+                if current.shape[0]:
+                    current = self.filter_school_positions(current, student)
+            elif stage == "center":
+                value = student_center_value(student, column)
+                if value is not None and not is_center_wildcard(value, self.policy):
+                    columns.append(column)
+                    values.append(value)
+                    if current.shape[0]:
+                        current = self.positions_for(columns, values)
+            else:
+                normalized = column.replace(" ", "_")
+                if student_join_map and normalized in student_join_map:
+                    value = student_join_map[normalized]
+                else:
+                    value = student_join_value(student, column)
+                columns.append(column)
+                values.append(value)
+                if current.shape[0]:
+                    current = self.positions_for(columns, values)
+            if tracker is not None:
+                tracker(stage, int(current.shape[0]))
+            if steps is not None:
+                steps.append(JoinStageStep(stage, value, before, current))
+        return current
+
+    def select(
+        self,
+        student: Mapping[str, object],
+        *,
+        student_join_map: Mapping[str, int] | None = None,
+        tracker: FilterTracker | None = None,
+    ) -> pd.DataFrame:
+        """برگرداندن سطرهای واجد شرایط از قاب مرجع (مقادیر ظرفیت به‌روز)."""
+
+        positions = self.lookup(
+            student, student_join_map=student_join_map, tracker=tracker
+        )
+        return self.frame.iloc[positions]
@@ -0,0 +1,361 @@
+"""مخزن ستونی وضعیت ظرفیت پشتیبان‌ها برای allocate_batch (Core-only).
+
+به‌جای دیکشنری تو‌در‌تو (``mentor_id → {remaining, alloc_new, ...}``) مقادیر در
+آرایه‌های NumPy با اندیس چگال پشتیبان نگه‌داری می‌شوند؛ مصرف ظرفیت یک به‌روزرسانی
+O(1) روی آرایه است. برای سازگاری با کدهای موجود، مخزن رابط ``Mapping`` را حفظ
+می‌کند و هر ورودی یک نمای قابل‌نوشتن روی همان آرایه‌هاست.
+
+دفتر سطری (``bind_rows``) وضعیت سطرهای استخر را پس از هر تخصیص نگه می‌دارد تا
+دروازهٔ ظرفیت و تریس مقدار جاری را بخوانند و قاب‌های استخر فقط با
+:meth:`MentorStateStore.materialize` (یک انتساب برداری برای هر ستون) همگام شوند.
+
+مثال::
+
+    >>> store = MentorStateStore.from_state({"EMP-1": {"initial": 2, "remaining": 2}})
+    >>> store.consume("EMP-1")
+    (2, 1, 0.5)
+    >>> store["EMP-1"]["alloc_new"]
+    1
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterator, Sequence
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["MentorStateStore"]
+
+# کلیدهای ورودی state و آرایهٔ متناظر؛ کلیدهای مستعار روی همان آرایه نوشته می‌شوند.
+_ENTRY_FIELDS: Dict[str, str] = {
+    "initial": "initial",
+    "remaining": "remaining",
+    "alloc_new": "alloc_new",
+    "occupancy_ratio": "occupancy",
+    "total_capacity": "total_capacity",
+    "current_allocations": "alloc_new",
+    "remaining_capacity": "remaining",
+}
+
+
+def _as_int(value: object) -> int:
+    try:
+        if pd.isna(value):  # type: ignore[arg-type]
+            return 0
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(float(value))  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        return 0
+
+
+def _numeric_array(values: pd.Series) -> np.ndarray:
+    numeric = pd.to_numeric(values, errors="coerce").fillna(0)
+    return numeric.to_numpy(dtype=np.float64)
+
+
+class _MentorStateRow(MutableMapping):
+    """نمای دیکشنری‌مانند روی یک سطر از آرایه‌های مخزن."""
+
+    __slots__ = ("_store", "_ordinal")
+
+    def __init__(self, store: "MentorStateStore", ordinal: int) -> None:
+        self._store = store
+        self._ordinal = ordinal
+
+    def __getitem__(self, key: str) -> object:
+        field = _ENTRY_FIELDS.get(key)
+        if field is None:
+            raise KeyError(key)
+        value = getattr(self._store, field)[self._ordinal]
+        return float(value) if field == "occupancy" else int(value)
+
+    def __setitem__(self, key: str, value: object) -> None:
+        field = _ENTRY_FIELDS.get(key)
+        if field is None:
+            raise KeyError(f"Unsupported mentor state field '{key}'")
+        array = getattr(self._store, field)
+        array[self._ordinal] = float(value) if field == "occupancy" else _as_int(value)  # type: ignore[arg-type]
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("Mentor state fields cannot be deleted")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_ENTRY_FIELDS)
+
+    def __len__(self) -> int:
+        return len(_ENTRY_FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class MentorStateStore(Mapping):
+    """وضعیت ظرفیت پشتیبان‌ها در آرایه‌های int32/float64 با اندیس چگال.
+
+    ``occupancy`` عمداً float64 است تا مقادیر ثبت‌شده در لاگ‌ها و خروجی استخر
+    بیت‌به‌بیت با مسیر دیکشنری برابر بماند.
+    """
+
+    def __init__(
+        self,
+        mentor_ids: Sequence[object],
+        *,
+        initial: np.ndarray,
+        remaining: np.ndarray,
+        alloc_new: np.ndarray,
+        occupancy: np.ndarray,
+        total_capacity: np.ndarray,
+    ) -> None:
+        self._mentor_ids = list(mentor_ids)
+        self._ordinals: Dict[object, int] = {
+            mentor: ordinal for ordinal, mentor in enumerate(self._mentor_ids)
+        }
+        self.initial = initial
+        self.remaining = remaining
+        self.alloc_new = alloc_new
+        self.occupancy = occupancy
+        self.total_capacity = total_capacity
+        self._row_gate: np.ndarray | None = None
+        self._row_trace: np.ndarray | None = None
+        self._row_remaining: np.ndarray | None = None
+        self._row_alloc: np.ndarray | None = None
+        self._row_occupancy: np.ndarray | None = None
+        self._row_touched: np.ndarray | None = None
+        self._row_labels: pd.Index | None = None
+
+    @classmethod
+    def from_state(
+        cls, state: Mapping[Any, Mapping[str, object]]
+    ) -> "MentorStateStore":
+        """تبدیل خروجی :func:`build_mentor_state` به مخزن ستونی."""
+
+        mentor_ids = list(state.keys())
+        size = len(mentor_ids)
+
+        def _column(key: str, default: str | None = None) -> np.ndarray:
+            values = np.zeros(size, dtype=np.int32)
+            for ordinal, mentor in enumerate(mentor_ids):
+                entry = state[mentor]
+                raw = entry.get(key, entry.get(default, 0) if default else 0)
+                values[ordinal] = _as_int(raw)
+            return values
+
+        initial = _column("initial")
+        occupancy = np.zeros(size, dtype=np.float64)
+        for ordinal, mentor in enumerate(mentor_ids):
+            try:
+                occupancy[ordinal] = float(state[mentor].get("occupancy_ratio", 0.0))  # type: ignore[arg-type]
+            except (TypeError, ValueError):
+                occupancy[ordinal] = 0.0
+        return cls(
+            mentor_ids,
+            initial=initial,
+            remaining=_column("remaining"),
+            alloc_new=_column("alloc_new"),
+            occupancy=occupancy,
+            total_capacity=_column("total_capacity", "initial"),
+        )
+
+    # ------------------------------------------------------------------
+    # رابط Mapping
+    # ------------------------------------------------------------------
+    def __getitem__(self, mentor: object) -> _MentorStateRow:
+        ordinal = self._ordinals.get(mentor)
+        if ordinal is None:
+            raise KeyError(mentor)
+        return _MentorStateRow(self, ordinal)
+
+    def __iter__(self) -> Iterator[object]:
+        return iter(self._mentor_ids)
+
+    def __len__(self) -> int:
+        return len(self._mentor_ids)
+
+    def __contains__(self, mentor: object) -> bool:
+        try:
+            return mentor in self._ordinals
+        except TypeError:
+            return False
+
+    def get(self, mentor: object, default: Any = None) -> Any:
+        try:
+            ordinal = self._ordinals.get(mentor)
+        except TypeError:
+            return default
+        if ordinal is None:
+            return default
+        return _MentorStateRow(self, ordinal)
+
+    def ordinal(self, mentor: object) -> int | None:
+        """اندیس چگال پشتیبان یا ``None``."""
+
+        try:
+            return self._ordinals.get(mentor)
+        except TypeError:
+            return None
+
+    # ------------------------------------------------------------------
+    # مصرف ظرفیت
+    # ------------------------------------------------------------------
+    def consume(self, mentor: object) -> tuple[int, int, float]:
+        """کاهش O(1) ظرفیت؛ هم‌ارز :func:`consume_capacity` روی دیکشنری."""
+
+        ordinal = self.ordinal(mentor)
+        if ordinal is None:
+            raise KeyError(f"Mentor '{mentor}' missing from state")
+        before = int(self.remaining[ordinal])
+        if before <= 0:
+            raise ValueError("CAPACITY_UNDERFLOW")
+        after = before - 1
+        self.remaining[ordinal] = after
+        self.alloc_new[ordinal] += 1
+        initial = int(self.initial[ordinal])
+        if initial <= 0:
+            initial = max(before, 1)
+        self.total_capacity[ordinal] = max(initial, int(self.total_capacity[ordinal]))
+        occupancy_ratio = (initial - after) / max(initial, 1)
+        self.occupancy[ordinal] = occupancy_ratio
+        return before, after, float(occupancy_ratio)
+
+    # ------------------------------------------------------------------
+    # دفتر سطری استخر
+    # ------------------------------------------------------------------
+    def bind_rows(self, gate_capacity: pd.Series, trace_capacity: pd.Series) -> None:
+        """ثبت ظرفیت اولیهٔ سطرهای استخر (هم‌تراز با موقعیت قاب مرجع).
+
+        برچسب‌های ``trace_capacity`` برچسب سطرها در همهٔ قاب‌های همگام‌شده‌اند.
+        """
+
+        self._row_labels = trace_capacity.index
+        self._row_gate = _numeric_array(gate_capacity)
+        self._row_trace = _numeric_array(trace_capacity)
+        size = self._row_gate.shape[0]
+        self._row_remaining = np.zeros(size, dtype=np.int64)
+        self._row_alloc = np.zeros(size, dtype=np.int64)
+        self._row_occupancy = np.zeros(size, dtype=np.float64)
+        self._row_touched = np.zeros(size, dtype=bool)
+
+    @property
+    def rows_bound(self) -> bool:
+        return self._row_gate is not None
+
+    def gate_capacity(self, positions: np.ndarray) -> np.ndarray:
+        """ظرفیت جاری سطرها برای دروازهٔ ظرفیت ``allocate_student``."""
+
+        if self._row_gate is None:
+            raise RuntimeError("Pool rows are not bound to the mentor state store")
+        return self._row_gate[positions]
+
+    @property
+    def trace_capacity(self) -> np.ndarray | None:
+        """ظرفیت جاری همهٔ سطرها برای مرحلهٔ capacity_gate تریس."""
+
+        return self._row_trace
+
+    def record_allocation(self, position: int, mentor: object) -> None:
+        """ثبت وضعیت پس از تخصیص برای سطر انتخاب‌شده (جایگزین نوشتن ``.loc``)."""
+
+        ordinal = self.ordinal(mentor)
+        if ordinal is None:
+            raise KeyError(f"Mentor '{mentor}' missing from state after allocation")
+        remaining = int(self.remaining[ordinal])
+        initial = int(self.initial[ordinal])
+        self.record_row(
+            position,
+            remaining=remaining,
+            alloc_new=int(self.alloc_new[ordinal]),
+            occupancy=(initial - remaining) / max(initial, 1),
+        )
+
+    def record_row(
+        self, position: int, *, remaining: int, alloc_new: int, occupancy: float
+    ) -> None:
+        """ثبت مستقیم وضعیت یک سطر (مثلاً نتیجهٔ برگشتی از یک worker)."""
+
+        if self._row_touched is None:
+            raise RuntimeError("Pool rows are not bound to the mentor state store")
+        self._row_gate[position] = remaining  # type: ignore[index]
+        self._row_trace[position] = remaining  # type: ignore[index]
+        self._row_remaining[position] = remaining  # type: ignore[index]
+        self._row_alloc[position] = alloc_new  # type: ignore[index]
+        self._row_occupancy[position] = occupancy  # type: ignore[index]
+        self._row_touched[position] = True
+
+    def row_snapshot(self, position: int) -> tuple[int, int, float]:
+        """وضعیت ثبت‌شدهٔ یک سطر: ``(remaining, alloc_new, occupancy)``."""
+
+        if self._row_touched is None:
+            raise RuntimeError("Pool rows are not bound to the mentor state store")
+        return (
+            int(self._row_remaining[position]),  # type: ignore[index]
+            int(self._row_alloc[position]),  # type: ignore[index]
+            float(self._row_occupancy[position]),  # type: ignore[index]
+        )
+
+    def export_mentors(self, ordinals: Sequence[int]) -> Dict[int, tuple[int, int, float, int]]:
+        """برش وضعیت پشتیبان‌های مشخص برای ادغام در مخزن دیگر."""
+
+        return {
+            int(ordinal): (
+                int(self.remaining[ordinal]),
+                int(self.alloc_new[ordinal]),
+                float(self.occupancy[ordinal]),
+                int(self.total_capacity[ordinal]),
+            )
+            for ordinal in ordinals
+        }
+
+    def import_mentors(self, values: Mapping[int, tuple[int, int, float, int]]) -> None:
+        """اعمال برش خروجی :meth:`export_mentors` روی همین مخزن."""
+
+        for ordinal, (remaining, alloc_new, occupancy, total) in values.items():
+            self.remaining[ordinal] = remaining
+            self.alloc_new[ordinal] = alloc_new
+            self.occupancy[ordinal] = occupancy
+            self.total_capacity[ordinal] = total
+
+    def snapshot(self) -> Dict[str, np.ndarray]:
+        """کپی آرایه‌های تصمیم‌ساز (ظرفیت پشتیبان‌ها و دروازهٔ سطری) برای ارسال به worker."""
+
+        values = {
+            "remaining": self.remaining.copy(),
+            "alloc_new": self.alloc_new.copy(),
+            "occupancy": self.occupancy.copy(),
+            "total_capacity": self.total_capacity.copy(),
+        }
+        if self._row_gate is not None and self._row_trace is not None:
+            values["row_gate"] = self._row_gate.copy()
+            values["row_trace"] = self._row_trace.copy()
+        return values
+
+    def restore(self, values: Mapping[str, np.ndarray]) -> None:
+        """بازنویسی درجای آرایه‌ها با خروجی :meth:`snapshot` (ارجاع‌ها معتبر می‌مانند)."""
+
+        for name in ("remaining", "alloc_new", "occupancy", "total_capacity"):
+            np.copyto(getattr(self, name), values[name])
+        if "row_gate" in values and self._row_gate is not None:
+            np.copyto(self._row_gate, values["row_gate"])
+            np.copyto(self._row_trace, values["row_trace"])  # type: ignore[arg-type]
+
+    def materialize(
+        self,
+        frame: pd.DataFrame,
+        *,
+        capacity_columns: Sequence[str],
+    ) -> None:
+        """نوشتن یک‌بارهٔ سطرهای تخصیص‌یافته در قاب بر اساس برچسب سطرها."""
+
+        if self._row_touched is None or self._row_labels is None:
+            return
+        if not bool(self._row_touched.any()):
+            return
+        positions = np.flatnonzero(self._row_touched)
+        labels = self._row_labels[positions]
+        for column in dict.fromkeys(capacity_columns):
+            frame.loc[labels, column] = self._row_remaining[positions]  # type: ignore[index]
+        frame.loc[labels, "allocations_new"] = self._row_alloc[positions]  # type: ignore[index]
+        frame.loc[labels, "occupancy_ratio"] = self._row_occupancy[positions]  # type: ignore[index]
@@ -566,7 +566,17 @@ _BIDI_REMOVALS = {
 }
 _ZWJ = "\u200d"
 _ZWNJ = "\u200c"
-_PERSIAN_DIGIT_TABLE = str.maketrans("0123456789", "۰۱۲۳۴۵۶۷۸۹")
+_PERSIAN_DIGIT_PAIRS = tuple(zip("0123456789", "۰۱۲۳۴۵۶۷۸۹"))
+_BIDI_DELETE_CHARS = tuple(chr(codepoint) for codepoint in sorted(_BIDI_REMOVALS)) + (_ZWJ,)
+_KEPT_CONTROL_CHARS = ("\t", "\n", "\r", _ZWNJ)
+_ZWNJ_RUN_PATTERN = re.compile(f"{_ZWNJ}{{2,}}")
+
+
+def _strip_chars(text: str, chars: tuple[str, ...]) -> str:
+    for char in chars:
+        if char in text:
+            text = text.replace(char, "")
+    return text
 
 
 def sanitize_bidi(text: object) -> str:
@@ -574,9 +584,16 @@ def sanitize_bidi(text: object) -> str:
 
     if text is None:
         return ""
+    value = _strip_chars(str(text), _BIDI_DELETE_CHARS)
+    # مسیر سریع: وقتی جز کنترل‌های مجاز کاراکتر Cc/Cf دیگری نمانده باشد،
+    # فقط فشرده‌سازی نیم‌فاصله‌های پیاپی لازم است.
+    if value.isprintable() or _strip_chars(value, _KEPT_CONTROL_CHARS).isprintable():
+        if _ZWNJ + _ZWNJ in value:
+            return _ZWNJ_RUN_PATTERN.sub(_ZWNJ, value)
+        return value
     result: list[str] = []
     previous_zwnj = False
-    for char in str(text):
+    for char in value:
         codepoint = ord(char)
         if codepoint in _BIDI_REMOVALS or char == _ZWJ:
             continue
@@ -599,7 +616,11 @@ def fa_digitize(text: object) -> str:
     if text is None:
         return ""
     sanitized = sanitize_bidi(text)
-    return sanitized.translate(_PERSIAN_DIGIT_TABLE)
+    # زنجیرهٔ replace روی متن‌های غیر ASCII چند برابر سریع‌تر از translate است.
+    for latin, persian in _PERSIAN_DIGIT_PAIRS:
+        if latin in sanitized:
+            sanitized = sanitized.replace(latin, persian)
+    return sanitized
 
 
 def safe_truncate(text: object, max_len: int) -> str:
@@ -3,14 +3,23 @@
 from __future__ import annotations
 
 from hashlib import blake2b
+import heapq
 from pathlib import Path
 from numbers import Number
-from typing import Any, Dict, Mapping, Sequence
+import re
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
-from app.core.common.columns import canonicalize_headers, dedupe_columns
+from app.core.common.columns import (
+    canonical_header,
+    canonicalize_headers,
+    dedupe_columns,
+    header_rename_map,
+)
 from app.core.policy_loader import PolicyConfig, load_policy
+from .mentor_state import MentorStateStore
 from .types import natural_key
 from .ids import ensure_ranking_columns
 from .reasons import ReasonCode, build_reason
@@ -21,6 +30,7 @@ __all__ = [
     "apply_ranking_policy",
     "consume_capacity",
     "ensure_ranking_columns",
+    "MentorRankingQueue",
 ]
 
 _DEFAULT_POLICY_PATH = Path("config/policy.json")
@@ -59,9 +69,7 @@ def build_mentor_state(
     policy_defined = policy.columns.remaining_capacity
     if policy_defined not in candidates:
         candidates.append(policy_defined)
-    canonical_candidate = canonicalize_headers(
-        pd.DataFrame(columns=[capacity_column]), header_mode="en"
-    ).columns[0]
+    canonical_candidate = canonical_header(capacity_column, "en")
     if canonical_candidate not in candidates:
         candidates.append(canonical_candidate)
     if "remaining_capacity" not in candidates:
@@ -170,15 +178,14 @@ def apply_ranking_policy(
     ranked["mentor_sort_key"] = mentor_ids.map(natural_key)
     ranked["mentor_id_en"] = mentor_ids
 
-    sort_columns: list[str] = []
-    ascending_flags: list[bool] = []
-    for rule in policy.ranking_rules:
-        if rule.column not in ranked.columns:
-            raise KeyError(f"Ranking column '{rule.column}' missing from candidate pool")
-        sort_columns.append(rule.column)
-        ascending_flags.append(bool(rule.ascending))
+    sort_columns, ascending_flags = policy.ranking_sort_spec
+    for column in sort_columns:
+        if column not in ranked.columns:
+            raise KeyError(f"Ranking column '{column}' missing from candidate pool")
 
-    ranked = ranked.sort_values(by=sort_columns, ascending=ascending_flags, kind="stable")
+    ranked = ranked.sort_values(
+        by=list(sort_columns), ascending=list(ascending_flags), kind="stable"
+    )
     ranked = ranked.reset_index(drop=True)
     tie_columns: Sequence[str]
     if len(sort_columns) > 1:
@@ -199,6 +206,157 @@ def apply_ranking_policy(
     return ranked.reset_index(drop=True)
 
 
+# ستون‌هایی که صف اولویت می‌تواند از state بازسازی کند و جهت مجاز هر کدام؛
+# جهت‌ها طوری انتخاب شده‌اند که مصرف ظرفیت کلید را فقط افزایش دهد.
+_QUEUE_MONOTONE_RULES: Mapping[str, frozenset[bool]] = {
+    "occupancy_ratio": frozenset({True}),
+    "allocations_new": frozenset({True}),
+    "remaining_capacity_desc": frozenset({True}),
+    "remaining_capacity": frozenset({False}),
+    "mentor_sort_key": frozenset({True}),
+}
+
+_RankKey = Tuple[object, ...]
+
+
+class MentorRankingQueue:
+    """صف اولویت تنبل برای انتخاب برترین کاندید بدون sort کامل استخر.
+
+    برای هر مجموعهٔ کاندید (گروه join پس از فیلتر مدرسه) یک heap با کلید
+    ``policy.ranking_rules`` و موقعیت سطر (معادل sort پایدار) نگه‌داری می‌شود.
+    کلید هر سطر از همان ``state`` خوانده می‌شود که :func:`consume_capacity`
+    درجا به‌روزرسانی می‌کند؛ چون مصرف ظرفیت کلید را فقط افزایش می‌دهد، ورودی
+    کهنه هنگام رسیدن به رأس heap بازمحاسبه و دوباره درج می‌شود و انتخاب برتر
+    O(log n) است. سطرهایی که از دروازهٔ ظرفیت رد می‌شوند نیز برای همیشه حذف
+    می‌شوند (ظرفیت در طول عمر صف فقط کم می‌شود).
+
+    اگر قوانین رتبه‌بندی خارج از ستون‌های مشتق از state باشند یا
+    ``fairness_strategy`` غیر از ``none`` باشد، :meth:`from_frame` مقدار ``None``
+    برمی‌گرداند و مسیر کامل :func:`apply_ranking_policy` استفاده می‌شود.
+    """
+
+    def __init__(
+        self,
+        mentor_ids: Sequence[object],
+        *,
+        state: Mapping[Any, Mapping[str, object]],
+        policy: PolicyConfig,
+    ) -> None:
+        self._mentor_ids = list(mentor_ids)
+        self._state = state
+        self._rules = tuple(policy.ranking_rules)
+        self._sort_keys: Dict[int, Tuple[object, ...]] = {}
+        self._heaps: Dict[bytes, List[Tuple[_RankKey, int]]] = {}
+
+    @staticmethod
+    def supports(policy: PolicyConfig) -> bool:
+        """آیا قوانین Policy با صف اولویت تنبل سازگارند؟"""
+
+        strategy = getattr(policy, "fairness_strategy", "none") or "none"
+        if strategy != "none" or not policy.ranking_rules:
+            return False
+        return all(
+            bool(rule.ascending) in _QUEUE_MONOTONE_RULES.get(rule.column, frozenset())
+            for rule in policy.ranking_rules
+        )
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        *,
+        state: Mapping[Any, Mapping[str, object]],
+        policy: PolicyConfig,
+    ) -> "MentorRankingQueue | None":
+        """ساخت صف روی قاب مرجع ``JoinKeyIndex`` (موقعیت‌ها هم‌تراز با قاب)."""
+
+        if not cls.supports(policy):
+            return None
+        rename = header_rename_map(frame.columns, "en")
+        for position, column in enumerate(frame.columns):
+            if rename.get(column, column) == "mentor_id":
+                values = frame.iloc[:, position].tolist()
+                return cls(values, state=state, policy=policy)
+        return None
+
+    def _state_int(self, entry: Mapping[str, object] | None, key: str) -> int:
+        if not entry:
+            return 0
+        try:
+            value = int(entry.get(key, 0))  # type: ignore[arg-type]
+        except (ValueError, TypeError):
+            return 0
+        return value
+
+    def _rank_key(self, position: int) -> _RankKey:
+        mentor = self._mentor_ids[position]
+        ordinal = (
+            self._state.ordinal(mentor)
+            if isinstance(self._state, MentorStateStore)
+            else None
+        )
+        if ordinal is not None:
+            store = self._state
+            initial = int(store.initial[ordinal])  # type: ignore[attr-defined]
+            remaining = int(store.remaining[ordinal])  # type: ignore[attr-defined]
+            allocations = int(store.alloc_new[ordinal])  # type: ignore[attr-defined]
+        else:
+            entry = self._state.get(mentor)
+            initial = self._state_int(entry, "initial")
+            remaining = self._state_int(entry, "remaining")
+            allocations = self._state_int(entry, "alloc_new")
+        safe_initial = 1 if initial <= 0 else initial
+        values: Dict[str, object] = {
+            "occupancy_ratio": (initial - remaining) / safe_initial,
+            "allocations_new": allocations,
+            "remaining_capacity": remaining,
+            "remaining_capacity_desc": -remaining,
+        }
+        key: list[object] = []
+        for rule in self._rules:
+            if rule.column == "mentor_sort_key":
+                sort_key = self._sort_keys.get(position)
+                if sort_key is None:
+                    sort_key = natural_key(mentor)  # type: ignore[arg-type]
+                    self._sort_keys[position] = sort_key
+                key.append(sort_key)
+            elif rule.ascending:
+                key.append(values[rule.column])
+            else:
+                key.append(-values[rule.column])  # type: ignore[operator]
+        return tuple(key)
+
+    def select(self, positions: np.ndarray, allowed: np.ndarray) -> int | None:
+        """موقعیت کاندید برتر از بین ``positions`` (مرتب صعودی) که ``allowed`` آن‌ها True است.
+
+        نتیجه با سطر اول خروجی :func:`apply_ranking_policy` روی همان کاندیدها برابر است.
+        """
+
+        group = np.asarray(positions, dtype=np.int64)
+        heap = self._heaps.get(group.tobytes())
+        if heap is None:
+            heap = [(self._rank_key(position), position) for position in group.tolist()]
+            heapq.heapify(heap)
+            self._heaps[group.tobytes()] = heap
+        while heap:
+            rank, position = heap[0]
+            offset = int(np.searchsorted(group, position))
+            if not bool(allowed[offset]):
+                heapq.heappop(heap)
+                continue
+            current = self._rank_key(position)
+            if current != rank:
+                heapq.heapreplace(heap, (current, position))
+                continue
+            return position
+        return None
+
+    def reset(self) -> None:
+        """حذف heapها پس از بازنشانی ``state`` به مقادیر کمتر (فرض یکنوایی دیگر برقرار نیست)."""
+
+        self._heaps.clear()
+
+
 def _coerce_capacity_value(value: Any) -> int:
     """تبدیل امن مقادیر ظرفیت به عدد صحیح غیرمنفی."""
 
@@ -217,10 +375,15 @@ def _coerce_capacity_value(value: Any) -> int:
 
 
 def consume_capacity(
-    state: Dict[Any, Dict[str, float | int]], mentor_id: Any
+    state: Dict[Any, Dict[str, float | int]] | MentorStateStore, mentor_id: Any
 ) -> tuple[int, int, float]:
-    """به‌روزرسانی ظرفیت پشتیبان پس از تخصیص و بازگشت ظرفیت قبل/بعد."""
+    """به‌روزرسانی ظرفیت پشتیبان پس از تخصیص و بازگشت ظرفیت قبل/بعد.
+
+    برای :class:`MentorStateStore` به‌روزرسانی مستقیماً روی آرایه‌ها انجام می‌شود.
+    """
 
+    if isinstance(state, MentorStateStore):
+        return state.consume(mentor_id)
     if mentor_id not in state:
         raise KeyError(f"Mentor '{mentor_id}' missing from state")
     entry = state[mentor_id]
@@ -72,12 +72,15 @@ def apply_rule(rule: Rule, context: RuleContext) -> RuleResult:
     return result
 
 
-def compose_rules(*rules: Rule) -> Rule:
-    """ترکیب چند Rule با short-circuit بر روی اولین خطا."""
+@dataclass(frozen=True, slots=True)
+class _ComposedRule:
+    """زنجیرهٔ Ruleها با short-circuit؛ برخلاف closure قابل pickle است (ارسال به worker)."""
 
-    def _combined(context: RuleContext) -> RuleResult:
+    rules: tuple[Rule, ...]
+
+    def __call__(self, context: RuleContext) -> RuleResult:
         last_result: RuleResult | None = None
-        for rule in rules:
+        for rule in self.rules:
             last_result = rule(context)
             if not last_result.passed:
                 return last_result
@@ -85,7 +88,11 @@ def compose_rules(*rules: Rule) -> Rule:
             raise ValueError("compose_rules requires at least one rule")
         return last_result
 
-    return _combined
+
+def compose_rules(*rules: Rule) -> Rule:
+    """ترکیب چند Rule با short-circuit بر روی اولین خطا."""
+
+    return _ComposedRule(tuple(rules))
 
 
 @dataclass(frozen=True, slots=True)
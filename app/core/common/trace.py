@@ -29,10 +29,12 @@ from enum import Enum
 from numbers import Number
 from typing import Any, Iterable, List, Mapping, Sequence
 
+import numpy as np
 import pandas as pd
 
 from ..policy_loader import PolicyConfig, load_policy
-from .filters import filter_school_by_value, resolve_student_school_code
+from .filters import FilterTracker, filter_school_by_value, resolve_student_school_code
+from .join_index import JoinKeyIndex, JoinStageStep
 from .columns import normalize_bool_like, to_int64
 from .rules import Rule, RuleContext, apply_rule, default_stage_rule_map
 from .eligibility import build_stage_pass_flags
@@ -49,6 +51,8 @@ __all__ = [
     "build_trace_plan",
     "build_stage_rule_map",
     "build_allocation_trace",
+    "StageEvaluation",
+    "evaluate_allocation_stages",
     "summarize_trace_outcome",
     "FinalStatus",
     "classify_final_status",
@@ -75,6 +79,15 @@ class TraceStagePlan:
     column: str
 
 
+@dataclass(frozen=True)
+class StageEvaluation:
+    """خروجی ارزیابی یک‌بارهٔ مراحل: کاندیدهای واجد شرایط و رکوردهای تریس."""
+
+    eligible: pd.DataFrame
+    trace: List[TraceStageRecord]
+    positions: np.ndarray | None = None
+
+
 @dataclass(frozen=True)
 class TraceOutcome:
     """خروجی خلاصهٔ تریس برای یک دانش‌آموز."""
@@ -343,6 +356,59 @@ def _school_stage_filter(
     return filtered, extras, norm_value
 
 
+def _add_mentor_value_extras(stage_extras: dict[str, Any], mentor_join_value: object) -> None:
+    """افزودن مقدار خام/نرمال ستون مرحله در اولین کاندید به extras رکورد تریس."""
+
+    if mentor_join_value is None:
+        return
+    mentor_raw: object | None = mentor_join_value
+    if isinstance(mentor_join_value, Number) and not isinstance(mentor_join_value, bool):
+        try:
+            if pd.isna(mentor_join_value):  # type: ignore[arg-type]
+                mentor_raw = None
+            else:
+                mentor_raw = int(mentor_join_value)
+        except Exception:
+            mentor_raw = None
+    if mentor_raw is not None:
+        stage_extras["mentor_value_raw"] = mentor_raw
+    mentor_norm = _coerce_optional_int(mentor_join_value)
+    if mentor_norm is not None:
+        stage_extras["mentor_value_norm"] = mentor_norm
+
+
+def _capacity_gate_record(column: str, before: int, after: int) -> TraceStageRecord:
+    capacity_extras: dict[str, Any] = {
+        "expected_op": ">",
+        "expected_threshold": 0,
+        "capacity_before": before,
+        "capacity_after": after,
+        "join_value_raw": None,
+        "join_value_norm": None,
+    }
+    return TraceStageRecord(
+        stage="capacity_gate",
+        column=column,
+        expected_value=">0",
+        total_before=before,
+        total_after=after,
+        matched=bool(after),
+        expected_op=">",
+        expected_threshold=0,
+        extras=capacity_extras,
+    )
+
+
+def _split_stage_plan(
+    stage_plan: Sequence[TraceStagePlan], capacity_column: str
+) -> tuple[List[TraceStagePlan], TraceStagePlan]:
+    non_capacity_plan = [plan for plan in stage_plan if plan.stage != "capacity_gate"]
+    capacity_stage = next((plan for plan in stage_plan if plan.stage == "capacity_gate"), None)
+    if capacity_stage is None:
+        capacity_stage = TraceStagePlan(stage="capacity_gate", column=capacity_column)
+    return non_capacity_plan, capacity_stage
+
+
 def build_allocation_trace(
     student: StudentRow,
     candidate_pool: pd.DataFrame,
@@ -364,11 +430,7 @@ def build_allocation_trace(
         dict(stage_rules) if stage_rules is not None else dict(build_stage_rule_map(policy))
     )
 
-    non_capacity_plan = [plan for plan in stage_plan if plan.stage != "capacity_gate"]
-    capacity_stage = next((plan for plan in stage_plan if plan.stage == "capacity_gate"), None)
-    if capacity_stage is None:
-        capacity_stage = TraceStagePlan(stage="capacity_gate", column=capacity_column)
-
+    non_capacity_plan, capacity_stage = _split_stage_plan(stage_plan, capacity_column)
     columns_needed = [plan.column for plan in non_capacity_plan] + [capacity_stage.column]
     _ensure_columns(candidate_pool, columns_needed)
 
@@ -397,21 +459,7 @@ def build_allocation_trace(
             expected_value = value
             stage_extras["join_value_raw"] = value
             stage_extras["join_value_norm"] = _coerce_optional_int(value)
-        if mentor_join_value is not None:
-            mentor_raw: object | None = mentor_join_value
-            if isinstance(mentor_join_value, Number) and not isinstance(mentor_join_value, bool):
-                try:
-                    if pd.isna(mentor_join_value):  # type: ignore[arg-type]
-                        mentor_raw = None
-                    else:
-                        mentor_raw = int(mentor_join_value)
-                except Exception:
-                    mentor_raw = None
-            if mentor_raw is not None:
-                stage_extras["mentor_value_raw"] = mentor_raw
-            mentor_norm = _coerce_optional_int(mentor_join_value)
-            if mentor_norm is not None:
-                stage_extras["mentor_value_norm"] = mentor_norm
+        _add_mentor_value_extras(stage_extras, mentor_join_value)
         stage_extras["expected_op"] = expected_op
         stage_extras["expected_threshold"] = expected_threshold
         trace.append(
@@ -430,33 +478,117 @@ def build_allocation_trace(
         _apply_stage_rule(trace[-1], resolved_rules, student)
         current = filtered
 
-    before_capacity = int(current.shape[0])
     capacity_filtered = current.loc[current[capacity_stage.column] > 0]
-    capacity_extras: dict[str, Any] = {
-        "expected_op": ">",
-        "expected_threshold": 0,
-        "capacity_before": before_capacity,
-        "capacity_after": int(capacity_filtered.shape[0]),
-        "join_value_raw": None,
-        "join_value_norm": None,
-    }
     trace.append(
-        TraceStageRecord(
-            stage="capacity_gate",
-            column=capacity_stage.column,
-            expected_value=">0",
-            total_before=before_capacity,
-            total_after=int(capacity_filtered.shape[0]),
-            matched=bool(capacity_filtered.shape[0]),
-            expected_op=">",
-            expected_threshold=0,
-            extras=capacity_extras,
+        _capacity_gate_record(
+            capacity_stage.column, int(current.shape[0]), int(capacity_filtered.shape[0])
         )
     )
     _apply_stage_rule(trace[-1], resolved_rules, student)
     return trace
 
 
+def evaluate_allocation_stages(
+    student: StudentRow,
+    join_index: JoinKeyIndex,
+    *,
+    policy: PolicyConfig | None = None,
+    stage_plan: Sequence[TraceStagePlan] | None = None,
+    capacity_column: str = "remaining_capacity",
+    stage_rules: Mapping[TraceStageLiteral, Rule] | None = None,
+    student_join_map: Mapping[str, int] | None = None,
+    tracker: FilterTracker | None = None,
+    capacity_values: np.ndarray | None = None,
+) -> StageEvaluation:
+    """ارزیابی یک‌بارهٔ فیلترهای join و تریس ۸ مرحله‌ای روی یک ایندکس مشترک.
+
+    رکوردهای تریس مستقیماً از موقعیت‌های هر مرحلهٔ :meth:`JoinKeyIndex.lookup`
+    ساخته می‌شوند (مرحلهٔ مدرسه همان :meth:`JoinKeyIndex.filter_school_positions`
+    است)؛ بنابراین شمارش‌های تریس با کاندیدهای واقعی تخصیص یکی است و هیچ سطری
+    تا پیش از خروجی ``eligible`` مادی نمی‌شود. ``capacity_values`` (هم‌تراز با
+    موقعیت‌های قاب مرجع ایندکس) در صورت ارسال به‌جای ستون ظرفیت قاب در مرحلهٔ
+    capacity_gate خوانده می‌شود.
+    """
+
+    if policy is None:
+        policy = load_policy()
+    if stage_plan is None:
+        stage_plan = build_trace_plan(policy, capacity_column=capacity_column)
+    resolved_rules = (
+        dict(stage_rules) if stage_rules is not None else dict(build_stage_rule_map(policy))
+    )
+    non_capacity_plan, capacity_stage = _split_stage_plan(stage_plan, capacity_column)
+    columns_needed = [plan.column for plan in non_capacity_plan] + [capacity_stage.column]
+    _ensure_columns(join_index.frame, columns_needed)
+
+    steps: List[JoinStageStep] = []
+    positions = join_index.lookup(
+        student, student_join_map=student_join_map, tracker=tracker, steps=steps
+    )
+    steps_by_stage = {step.stage: step for step in steps}
+
+    trace: List[TraceStageRecord] = []
+    for plan in non_capacity_plan:
+        step = steps_by_stage[plan.stage]
+        expected_value: object
+        expected_op: str | None = "="
+        expected_threshold: object | None = None
+        stage_extras: dict[str, Any] = {}
+        if plan.stage == "school":
+            code = resolve_student_school_code(student, policy)
+            expected_value = code.value
+            expected_op = ">"
+            expected_threshold = 0
+            raw = _string_or_none(student.get("school_code_raw"))
+            stage_extras.update(
+                {
+                    "school_code_raw": raw,
+                    "school_code_norm": code.value,
+                    "school_status_resolved": _resolve_school_status(student, code.value),
+                    # filter_school_positions بدون اعمال فیلتر همان آرایهٔ ورودی را برمی‌گرداند.
+                    "school_filter_applied": step.after is not step.before,
+                    "join_value_raw": raw,
+                    "join_value_norm": code.value,
+                }
+            )
+        else:
+            expected_value = step.value
+            stage_extras["join_value_raw"] = step.value
+            stage_extras["join_value_norm"] = _coerce_optional_int(step.value)
+        _add_mentor_value_extras(
+            stage_extras, join_index.first_value(plan.column, step.before)
+        )
+        stage_extras["expected_op"] = expected_op
+        stage_extras["expected_threshold"] = expected_threshold
+        after = int(step.after.shape[0])
+        trace.append(
+            TraceStageRecord(
+                stage=plan.stage,
+                column=plan.column,
+                expected_value=expected_value,
+                total_before=int(step.before.shape[0]),
+                total_after=after,
+                matched=bool(after),
+                expected_op=expected_op,
+                expected_threshold=expected_threshold,
+                extras=stage_extras,
+            )
+        )
+        _apply_stage_rule(trace[-1], resolved_rules, student)
+
+    if capacity_values is not None:
+        after_capacity = int((capacity_values[positions] > 0).sum())
+    else:
+        capacity_series = join_index.frame[capacity_stage.column].iloc[positions]
+        after_capacity = int((capacity_series > 0).sum())
+    trace.append(
+        _capacity_gate_record(capacity_stage.column, int(positions.shape[0]), after_capacity)
+    )
+    _apply_stage_rule(trace[-1], resolved_rules, student)
+    eligible = join_index.frame.iloc[positions]
+    return StageEvaluation(eligible=eligible, trace=trace, positions=positions)
+
+
 def summarize_trace_outcome(
     student: Mapping[str, object],
     trace: Sequence[TraceStageRecord],
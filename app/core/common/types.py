@@ -113,6 +113,11 @@ class JoinKeyValues(Mapping[str, int]):
     def __repr__(self) -> str:  # pragma: no cover - debug helper
         return f"JoinKeyValues({dict(self._items)!r})"
 
+    def __reduce__(self) -> tuple[type["JoinKeyValues"], tuple[Dict[str, int]]]:
+        """پشتیبانی از pickle (ارسال نتایج بین پردازه‌های ``allocate_batch``)."""
+
+        return (type(self), (dict(self._items),))
+
     def keys(self) -> KeysView[str]:
         """دسترسی به کلیدها با حفظ ترتیب درج."""
 
@@ -8,12 +8,16 @@
 from __future__ import annotations
 
 import json
+import os
 import re
+import threading
+import time
 import warnings
 from dataclasses import dataclass, field
 from enum import Enum
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pathlib import Path
+from types import MappingProxyType
 from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 from typing import Literal, cast
 
@@ -399,13 +403,37 @@ class PolicyConfig:
 
         return tuple(stage.stage for stage in self.trace_stages)
 
+    @cached_property
+    def stage_columns(self) -> Mapping[str, str]:
+        """نگاشت پیش‌محاسبه‌شدهٔ مرحله → ستون (اولین تعریف هر مرحله)."""
+
+        mapping: Dict[str, str] = {}
+        for item in self.trace_stages:
+            mapping.setdefault(item.stage, item.column)
+        return MappingProxyType(mapping)
+
+    @cached_property
+    def join_key_tuple(self) -> tuple[str, ...]:
+        """کلیدهای join به‌صورت tuple تغییرناپذیر."""
+
+        return tuple(self.join_keys)
+
+    @cached_property
+    def ranking_sort_spec(self) -> tuple[tuple[str, ...], tuple[bool, ...]]:
+        """ستون‌ها و جهت مرتب‌سازی قوانین رتبه‌بندی برای ``sort_values``."""
+
+        return (
+            tuple(rule.column for rule in self.ranking_rules),
+            tuple(bool(rule.ascending) for rule in self.ranking_rules),
+        )
+
     def stage_column(self, stage: str) -> str:
         """نام ستون متناظر با مرحلهٔ تریس را برمی‌گرداند."""
 
-        for item in self.trace_stages:
-            if item.stage == stage:
-                return item.column
-        raise KeyError(f"Stage '{stage}' is not defined in policy trace stages")
+        try:
+            return self.stage_columns[stage]
+        except KeyError:
+            raise KeyError(f"Stage '{stage}' is not defined in policy trace stages") from None
 
     @property
     def capacity_column(self) -> str:
@@ -1695,36 +1723,191 @@ def _load_policy_cached(
     return config
 
 
-def load_policy(
-    path: str | Path = "config/policy.json",
-    *,
-    expected_version: Optional[str] = DEFAULT_POLICY_VERSION,
-    on_version_mismatch: VersionMismatchMode = "raise",
-) -> PolicyConfig:
-    """بارگذاری سیاست از فایل JSON و بازگشت ساختار کش‌شونده."""
-
-    policy_path = Path(path)
+def _read_policy_file(
+    policy_path: Path,
+    expected_version: Optional[str],
+    on_version_mismatch: VersionMismatchMode,
+) -> tuple[PolicyConfig, int, int]:
     try:
         raw = policy_path.read_text(encoding="utf-8")
     except FileNotFoundError as exc:  # pragma: no cover - پیام واضح برای مصرف‌کننده
         raise FileNotFoundError(f"Policy file not found: {policy_path}") from exc
 
     try:
-        mtime_ns = policy_path.stat().st_mtime_ns
+        stat = policy_path.stat()
     except FileNotFoundError as exc:  # pragma: no cover - race condition guard
         raise FileNotFoundError(f"Policy file not found: {policy_path}") from exc
 
     resolved = str(policy_path.resolve())
-    return _load_policy_cached(
+    config = _load_policy_cached(
         resolved,
         raw,
-        mtime_ns,
+        stat.st_mtime_ns,
         expected_version,
         on_version_mismatch,
     )
+    return config, stat.st_mtime_ns, stat.st_size
+
+
+_RACY_MTIME_WINDOW_NS = 2_000_000_000
+
+
+def _is_racy_mtime(mtime_ns: int) -> bool:
+    """آیا mtime آن‌قدر تازه است که ویرایش هم‌زمان با همان mtime ممکن باشد؟
+
+    دقت زمان فایل‌سیستم محدود است؛ تا وقتی فایل «تازه» است، به‌جای اعتماد به
+    ``stat`` محتوا دوباره خوانده می‌شود (کش محتوایی همان نمونه را برمی‌گرداند).
+    """
+
+    return time.time_ns() - mtime_ns < _RACY_MTIME_WINDOW_NS
+
+
+@dataclass
+class _PolicyHandle:
+    config: PolicyConfig
+    mtime_ns: int
+    size: int
+    checked_at: float
+
+
+_RegistryKey = Tuple[str, str, Optional[str], str]
+
+
+class PolicyRegistry:
+    """نگه‌دارندهٔ سراسری Policyهای بارگذاری‌شده در سطح فرایند.
+
+    هر مسیر یک‌بار خوانده و به :class:`PolicyConfig` فریزشده تبدیل می‌شود. بررسی
+    تغییر فایل به ``poll_interval`` بستگی دارد:
+
+    - ``0`` (پیش‌فرض): در هر فراخوانی فقط یک ``stat()`` (بدون خواندن و هش فایل)؛
+    - عدد مثبت: حداکثر یک ``stat()`` در هر بازهٔ ثانیه‌ای؛ بین دو بررسی هزینهٔ
+      فراخوانی فقط یک جست‌وجوی دیکشنری است؛
+    - ``None``: فایل فقط با :meth:`refresh` دوباره بررسی می‌شود.
+
+    مثال::
+
+        >>> registry = PolicyRegistry(poll_interval=None)
+        >>> policy = registry.get("config/policy.json")  # doctest: +SKIP
+        >>> registry.get("config/policy.json") is policy  # doctest: +SKIP
+        True
+    """
+
+    def __init__(self, poll_interval: float | None = 0.0) -> None:
+        self._handles: Dict[_RegistryKey, _PolicyHandle] = {}
+        self._lock = threading.Lock()
+        self.poll_interval = poll_interval
+
+    @property
+    def poll_interval(self) -> float | None:
+        return self._poll_interval
+
+    @poll_interval.setter
+    def poll_interval(self, value: float | None) -> None:
+        if value is not None and value < 0:
+            raise ValueError("poll_interval must be >= 0 or None")
+        self._poll_interval = None if value is None else float(value)
+
+    @staticmethod
+    def _key(
+        path: str | Path,
+        expected_version: Optional[str],
+        on_version_mismatch: VersionMismatchMode,
+    ) -> _RegistryKey:
+        text = str(path)
+        base = "" if os.path.isabs(text) else os.getcwd()
+        return (base, text, expected_version, on_version_mismatch)
+
+    def get(
+        self,
+        path: str | Path = "config/policy.json",
+        *,
+        expected_version: Optional[str] = DEFAULT_POLICY_VERSION,
+        on_version_mismatch: VersionMismatchMode = "raise",
+    ) -> PolicyConfig:
+        key = self._key(path, expected_version, on_version_mismatch)
+        handle = self._handles.get(key)
+        if handle is not None:
+            interval = self._poll_interval
+            if interval is None:
+                return handle.config
+            now = time.monotonic()
+            if interval > 0 and now - handle.checked_at < interval:
+                return handle.config
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if (
+                stat is not None
+                and stat.st_mtime_ns == handle.mtime_ns
+                and stat.st_size == handle.size
+                and not _is_racy_mtime(handle.mtime_ns)
+            ):
+                handle.checked_at = now
+                return handle.config
+        with self._lock:
+            config, mtime_ns, size = _read_policy_file(
+                Path(path), expected_version, on_version_mismatch
+            )
+            self._handles[key] = _PolicyHandle(
+                config=config, mtime_ns=mtime_ns, size=size, checked_at=time.monotonic()
+            )
+        return config
+
+    def refresh(self, path: str | Path | None = None) -> None:
+        """اجبار به بررسی دوبارهٔ فایل(ها) در فراخوانی بعدی."""
+
+        with self._lock:
+            if path is None:
+                self._handles.clear()
+                return
+            text = str(path)
+            for key in [key for key in self._handles if key[1] == text]:
+                del self._handles[key]
+
+    def clear(self) -> None:
+        """حذف همهٔ Policyهای ثبت‌شده و کش محتوایی."""
+
+        with self._lock:
+            self._handles.clear()
+        _load_policy_cached.cache_clear()
+
+
+POLICY_REGISTRY = PolicyRegistry()
+
+
+def set_policy_poll_interval(seconds: float | None) -> None:
+    """تنظیم بازهٔ بررسی تغییر فایل Policy برای کل فرایند."""
+
+    POLICY_REGISTRY.poll_interval = seconds
+
+
+def refresh_policy(path: str | Path | None = None) -> None:
+    """بازخوانی Policy در فراخوانی بعدی :func:`load_policy`."""
+
+    POLICY_REGISTRY.refresh(path)
+
+
+def load_policy(
+    path: str | Path = "config/policy.json",
+    *,
+    expected_version: Optional[str] = DEFAULT_POLICY_VERSION,
+    on_version_mismatch: VersionMismatchMode = "raise",
+) -> PolicyConfig:
+    """بارگذاری سیاست از فایل JSON و بازگشت ساختار کش‌شونده.
+
+    نتیجه در :data:`POLICY_REGISTRY` نگه‌داری می‌شود؛ فراخوانی‌های تکراری بدون
+    خواندن یا هش کردن دوبارهٔ فایل همان نمونه را برمی‌گردانند.
+    """
+
+    return POLICY_REGISTRY.get(
+        path,
+        expected_version=expected_version,
+        on_version_mismatch=on_version_mismatch,
+    )
 
 
-load_policy.cache_clear = _load_policy_cached.cache_clear  # type: ignore[attr-defined]
+load_policy.cache_clear = POLICY_REGISTRY.clear  # type: ignore[attr-defined]
 load_policy.cache_info = _load_policy_cached.cache_info  # type: ignore[attr-defined]
 
 
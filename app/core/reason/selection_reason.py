@@ -5,6 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Mapping, Sequence
 
+import numpy as np
 import pandas as pd
 
 from app.core.common.columns import canonicalize_headers, ensure_series
@@ -91,8 +92,7 @@ def render_reason(context: ReasonContext, policy: SelectionReasonPolicy) -> str:
         "trace_summary": context.trace_summary or "",
     }
     raw_text = policy.template.format_map(template_payload)
-    normalized = sanitize_bidi(raw_text.replace("\n", " ").replace("\t", " "))
-    digitized = fa_digitize(normalized)
+    digitized = fa_digitize(raw_text.replace("\n", " ").replace("\t", " "))
     return safe_truncate(digitized, 512)
 
 
@@ -226,7 +226,12 @@ def build_selection_reason_rows(
         raise KeyError(f"students missing join keys: {missing_keys}")
     for key in policy.join_keys:
         series = ensure_series(students_fa[key])
-        normalized = series.map(to_numlike_str)
+        codes, uniques = pd.factorize(series, use_na_sentinel=False)
+        normalized = pd.Series(
+            np.array([to_numlike_str(value) for value in uniques], dtype=object)[codes],
+            index=series.index,
+            dtype=object,
+        )
         if key == policy.columns.school_code and policy.school_code_empty_as_zero:
             normalized = normalized.replace("", "0")
         coerced = pd.to_numeric(normalized, errors="coerce")
@@ -253,21 +258,13 @@ def build_selection_reason_rows(
         allocations_en["mentor_id"] = ""
 
     if "student_id" in students_en.columns:
-        student_id_series = ensure_series(students_en["student_id"]).astype("string")
-        student_index_key = student_id_series
+        student_keys = _text_values(ensure_series(students_en["student_id"]))
     else:
-        student_index_key = pd.Index(students_en.index.map(str))
-    students_index = students_en.set_index(student_index_key, drop=False)
-
-    student_lookup: dict[str, pd.Series] = {}
-    for index_value, student_row in students_index.iterrows():
-        row_copy = student_row.copy()
-        primary_id = str(row_copy.get("student_id", "") or "").strip()
-        fallback_id = str(index_value if index_value is not None else "").strip()
-        if primary_id:
-            student_lookup.setdefault(primary_id, row_copy)
-        if fallback_id and fallback_id not in student_lookup:
-            student_lookup[fallback_id] = row_copy
+        student_keys = pd.Series(
+            [str(value).strip() for value in students_en.index],
+            index=students_en.index,
+            dtype=object,
+        )
 
     def _alias(column: str) -> str:
         try:
@@ -276,29 +273,52 @@ def build_selection_reason_rows(
             alias = column
         return alias
 
-    def _student_value(student_id: str, *columns: str) -> str:
-        row = student_lookup.get(student_id)
-        if row is None:
-            return ""
-        for column in columns:
-            if column and column in row.index:
-                value = row.get(column)
-                if pd.notna(value) and str(value).strip():
-                    return str(value).strip()
-        return ""
+    gender_column = policy.stage_column("gender")
+    school_column = policy.stage_column("school")
+    track_column = policy.stage_column("group")
+    capacity_column = policy.capacity_column
+    gender_alias = _alias(gender_column)
+    school_alias = _alias(school_column)
+    track_alias = _alias(track_column)
+    capacity_alias = _alias(capacity_column)
+
+    # هر فیلد یک‌بار و به‌صورت ستونی از زنجیرهٔ fallback ستون‌ها ساخته می‌شود.
+    student_fields = pd.DataFrame(
+        {
+            "national_id": _coalesce_text(students_en, ("national_id", "کدملی", "کد ملی")),
+            "first_name": _coalesce_text(students_en, ("first_name", "نام")),
+            "last_name": _coalesce_text(
+                students_en, ("last_name", "family_name", "نام خانوادگی")
+            ),
+            "gender": _coalesce_text(students_en, (gender_column, gender_alias, "gender")),
+            "school": _coalesce_text(
+                students_en,
+                ("school_name", "school_name_1", school_column, school_alias, "school"),
+            ),
+            "track": _coalesce_text(
+                students_en, ("exam_group", "group_name", track_column, track_alias)
+            ),
+            "after_school": _coalesce_text(
+                students_en,
+                ("after_school", "after_school_flag", "پس مدرسه ای", "پس‌مدرسه‌ای"),
+            ),
+            "counter": _coalesce_text(students_en, ("counter", "شمارنده")),
+        },
+        index=students_en.index,
+    )
+    student_fields.index = pd.Index(student_keys.tolist())
+    student_fields = student_fields[student_fields.index != ""]
+    student_fields = student_fields[~student_fields.index.duplicated(keep="first")]
 
     mentor_lookup: dict[str, str] = {}
     if "mentor_id" in mentors_en.columns:
-        for _, row in mentors_en.iterrows():
-            mentor_id = str(row.get("mentor_id", "")).strip()
-            if not mentor_id:
-                continue
-            for column in ("mentor_name", "mentor", "پشتیبان"):
-                name_value = row.get(column)
-                if pd.notna(name_value) and str(name_value).strip():
-                    mentor_lookup[mentor_id] = str(name_value).strip()
-                    break
-            mentor_lookup.setdefault(mentor_id, mentor_id)
+        mentor_keys = [
+            str(value).strip() for value in ensure_series(mentors_en["mentor_id"]).tolist()
+        ]
+        mentor_names = _coalesce_text(mentors_en, ("mentor_name", "mentor", "پشتیبان"))
+        for mentor_id, name_value in zip(mentor_keys, mentor_names.tolist()):
+            if mentor_id and name_value:
+                mentor_lookup[mentor_id] = name_value
 
     stage_order: Sequence[str] = policy.trace_stage_names or (
         "type",
@@ -343,91 +363,122 @@ def build_selection_reason_rows(
                 if student_key:
                     log_lookup[student_key] = record
 
-    gender_column = policy.stage_column("gender")
-    school_column = policy.stage_column("school")
-    track_column = policy.stage_column("group")
-    capacity_column = policy.capacity_column
-    gender_alias = _alias(gender_column)
-    school_alias = _alias(school_column)
-    track_alias = _alias(track_column)
-    capacity_alias = _alias(capacity_column)
-
     tiebreak_text = _build_tiebreak_text(policy, config.labels)
 
-    records: list[dict[str, object]] = []
-    counter_candidates = ("counter", "allocation_counter", "row_number", "row_index")
-
-    for _, row in allocations_en.iterrows():
-        student_id = str(row.get("student_id", "")).strip()
-        if not student_id:
-            continue
-        mentor_id = str(row.get("mentor_id", "")).strip()
-        mentor_name = mentor_lookup.get(mentor_id, mentor_id)
-
-        national_id = _student_value(student_id, "national_id", "کدملی", "کد ملی")
-        if not national_id:
-            fallback_national = row.get("student_national_code") or row.get(
-                "national_code"
-            )
-            if pd.notna(fallback_national):
-                national_id = str(fallback_national).strip()
-        first_name = _student_value(student_id, "first_name", "نام")
-        last_name = _student_value(student_id, "last_name", "family_name", "نام خانوادگی")
-        gender_value = _student_value(student_id, gender_column, gender_alias, "gender")
-        school_value = _student_value(
-            student_id,
-            "school_name",
-            "school_name_1",
-            school_column,
-            school_alias,
-            "school",
+    student_ids = [str(value).strip() for value in allocations_en["student_id"].tolist()]
+    keep_mask = [bool(student_id) for student_id in student_ids]
+    allocations_en = allocations_en.loc[keep_mask].reset_index(drop=True)
+    student_ids = [student_id for student_id in student_ids if student_id]
+    if not student_ids:
+        return _empty_frame()
+    mentor_ids = [str(value).strip() for value in allocations_en["mentor_id"].tolist()]
+    aligned = student_fields.reindex(pd.Index(student_ids)).fillna("")
+
+    def _allocation_column(column: str) -> list[object]:
+        if column in allocations_en.columns:
+            return ensure_series(allocations_en[column]).tolist()
+        return [None] * len(student_ids)
+
+    national_fallbacks = [
+        _or_value(primary, fallback)
+        for primary, fallback in zip(
+            _allocation_column("student_national_code"), _allocation_column("national_code")
         )
-        track_value = _student_value(
-            student_id,
-            "exam_group",
-            "group_name",
-            track_column,
-            track_alias,
+    ]
+    capacity_values = [
+        _or_value(primary, fallback)
+        for primary, fallback in zip(
+            _allocation_column(capacity_column), _allocation_column(capacity_alias)
         )
-        after_school_label = "پس‌مدرسه‌ای: خیر"
-        is_after_school = False
-        after_school_flag = _student_value(
-            student_id,
-            "after_school",
-            "after_school_flag",
-            "پس مدرسه ای",
-            "پس‌مدرسه‌ای",
+    ]
+    row_occupancy = [_format_ratio(value) for value in _allocation_column("occupancy_ratio")]
+    row_allocations_new = [
+        _format_int(value) for value in _allocation_column("allocations_new")
+    ]
+
+    counter_values = aligned["counter"].where(aligned["counter"] != "", None).astype(object)
+    counter_values.index = allocations_en.index
+    for column in ("counter", "allocation_counter", "row_number", "row_index"):
+        if column not in allocations_en.columns:
+            continue
+        candidate = ensure_series(allocations_en[column])
+        usable = _text_values(candidate) != ""
+        counter_values = counter_values.where(
+            counter_values.notna(), candidate.astype(object).where(usable, None)
         )
-        if after_school_flag:
-            normalized_flag = after_school_flag.strip().lower()
-            if normalized_flag in {"1", "true", "بله", "yes", "y", "t"}:
-                after_school_label = "پس‌مدرسه‌ای: بله"
-                is_after_school = True
-        counter_value: object | None = None
-        student_counter = _student_value(student_id, "counter", "شمارنده")
-        if student_counter:
-            counter_value = student_counter
-
-        if counter_value is None:
-            for column in counter_candidates:
-                if column in allocations_en.columns:
-                    value = row.get(column)
-                    if pd.notna(value) and str(value).strip():
-                        counter_value = value
-                        break
-        if counter_value is None or not str(counter_value).strip():
-            counter_value = student_id
-
-        gender_label = _resolve_gender_label(gender_value, policy)
-        log_data = log_lookup.get(student_id, {})
-        occupancy_ratio = _format_ratio(log_data.get("occupancy_ratio"))
-        if not occupancy_ratio:
-            occupancy_ratio = _format_ratio(row.get("occupancy_ratio"))
-        allocations_new = _format_int(
-            log_data.get("allocations_new")
-            if log_data.get("allocations_new") is not None
-            else None
+    counter_values = counter_values.where(
+        counter_values.notna(), pd.Series(student_ids, index=allocations_en.index)
+    )
+
+    display_cache: dict[str, str] = {}
+    bidi_cache: dict[str, str] = {}
+    gender_cache: dict[str, str] = {}
+    render_cache: dict[ReasonContext, str] = {}
+
+    def _display(text: str) -> str:
+        cached = display_cache.get(text)
+        if cached is None:
+            cached = display_cache[text] = fa_digitize(sanitize_bidi(text))
+        return cached
+
+    def _bidi(text: str) -> str:
+        cached = bidi_cache.get(text)
+        if cached is None:
+            cached = bidi_cache[text] = sanitize_bidi(text)
+        return cached
+
+    def _gender_label(value: str) -> str:
+        cached = gender_cache.get(value)
+        if cached is None:
+            cached = gender_cache[value] = fa_digitize(_resolve_gender_label(value, policy))
+        return cached
+
+    after_school_yes = _display("پس‌مدرسه‌ای: بله")
+    after_school_no = _display("پس‌مدرسه‌ای: خیر")
+    empty_log: dict[str, object] = {}
+
+    records: list[dict[str, object]] = []
+    for (
+        student_id,
+        mentor_id,
+        national_id,
+        first_name,
+        last_name,
+        gender_value,
+        school_value,
+        track_value,
+        after_school_flag,
+        national_fallback,
+        capacity_value_raw,
+        occupancy_fallback,
+        allocations_new_fallback,
+        counter_value,
+    ) in zip(
+        student_ids,
+        mentor_ids,
+        aligned["national_id"].tolist(),
+        aligned["first_name"].tolist(),
+        aligned["last_name"].tolist(),
+        aligned["gender"].tolist(),
+        aligned["school"].tolist(),
+        aligned["track"].tolist(),
+        aligned["after_school"].tolist(),
+        national_fallbacks,
+        capacity_values,
+        row_occupancy,
+        row_allocations_new,
+        counter_values.tolist(),
+    ):
+        mentor_name = mentor_lookup.get(mentor_id, mentor_id)
+        if not national_id and pd.notna(national_fallback):
+            national_id = str(national_fallback).strip()
+        is_after_school = (
+            after_school_flag.strip().lower() in {"1", "true", "بله", "yes", "y", "t"}
         )
+
+        log_data = log_lookup.get(student_id, empty_log)
+        occupancy_ratio = _format_ratio(log_data.get("occupancy_ratio")) or occupancy_fallback
+        allocations_new = _format_int(log_data.get("allocations_new"))
         if not allocations_new:
             before = log_data.get("capacity_before")
             after = log_data.get("capacity_after")
@@ -437,64 +488,56 @@ def build_selection_reason_rows(
                 except (TypeError, ValueError):
                     allocations_new = ""
         if not allocations_new:
-            allocations_new = _format_int(row.get("allocations_new"))
+            allocations_new = allocations_new_fallback
         remaining_capacity = _format_int(log_data.get("capacity_after"))
         if not remaining_capacity:
-            remaining_capacity = _format_int(row.get(capacity_column) or row.get(capacity_alias))
+            remaining_capacity = _format_int(capacity_value_raw)
         capacity_raw = _format_capacity_text(occupancy_ratio, allocations_new, remaining_capacity)
         if not capacity_raw:
             capacity_raw = config.labels.capacity
-        capacity_value = fa_digitize(sanitize_bidi(capacity_raw))
 
         trace_summary = trace_summary_map.get(student_id)
-        reason_text = render_reason(
-            ReasonContext(
-                gender_value=fa_digitize(gender_label),
-                school_value=fa_digitize(sanitize_bidi(school_value)),
-                track_value=fa_digitize(sanitize_bidi(track_value)),
-                capacity_value=capacity_value,
-                mentor_id=fa_digitize(sanitize_bidi(mentor_id)),
-                mentor_name=fa_digitize(sanitize_bidi(mentor_name)),
-                after_school_label=fa_digitize(sanitize_bidi(after_school_label)),
-                occupancy_ratio=occupancy_ratio,
-                allocations_new=allocations_new,
-                remaining_capacity=remaining_capacity,
-                tiebreak_text=tiebreak_text,
-                trace_summary=fa_digitize(trace_summary) if trace_summary else None,
-                is_after_school=is_after_school,
-            ),
-            config,
+        context = ReasonContext(
+            gender_value=_gender_label(gender_value),
+            school_value=_display(school_value),
+            track_value=_display(track_value),
+            capacity_value=_display(capacity_raw),
+            mentor_id=_display(mentor_id),
+            mentor_name=_display(mentor_name),
+            after_school_label=after_school_yes if is_after_school else after_school_no,
+            occupancy_ratio=occupancy_ratio,
+            allocations_new=allocations_new,
+            remaining_capacity=remaining_capacity,
+            tiebreak_text=tiebreak_text,
+            trace_summary=fa_digitize(trace_summary) if trace_summary else None,
+            is_after_school=is_after_school,
         )
-        rule_code_raw = log_data.get("rule_reason_code")
-        rule_message_raw = log_data.get("rule_reason_text")
-        rule_detail_text = _format_rule_details(log_data.get("rule_reason_details"))
-        rule_code, rule_message = _normalize_reason_payload(rule_code_raw, rule_message_raw)
-        fairness_text = _resolve_fairness_text(log_data)
-        reason_segments = [reason_text]
-        if rule_code and rule_message:
-            reason_segments.append(
-                fa_digitize(
-                    sanitize_bidi(f"دلیل Policy: [{rule_code}] {rule_message}")
-                )
+        reason_text = render_cache.get(context)
+        if reason_text is None:
+            reason_text = render_cache[context] = render_reason(context, config)
+        if log_data:
+            rule_code, rule_message = _normalize_reason_payload(
+                log_data.get("rule_reason_code"), log_data.get("rule_reason_text")
             )
-        if rule_detail_text:
-            reason_segments.append(
-                fa_digitize(
-                    sanitize_bidi(f"جزئیات Policy: {rule_detail_text}")
-                )
-            )
-        if fairness_text:
-            reason_segments.append(fa_digitize(sanitize_bidi(f"عدالت: {fairness_text}")))
-        reason_text = " — ".join(segment for segment in reason_segments if segment)
+            rule_detail_text = _format_rule_details(log_data.get("rule_reason_details"))
+            fairness_text = _resolve_fairness_text(log_data)
+            reason_segments = [reason_text]
+            if rule_code and rule_message:
+                reason_segments.append(_display(f"دلیل Policy: [{rule_code}] {rule_message}"))
+            if rule_detail_text:
+                reason_segments.append(_display(f"جزئیات Policy: {rule_detail_text}"))
+            if fairness_text:
+                reason_segments.append(_display(f"عدالت: {fairness_text}"))
+            reason_text = " — ".join(segment for segment in reason_segments if segment)
 
         records.append(
             {
                 "student_id": student_id,
                 "شمارنده": counter_value,
-                "کدملی": sanitize_bidi(national_id),
-                "نام": sanitize_bidi(first_name),
-                "نام خانوادگی": sanitize_bidi(last_name),
-                "شناسه پشتیبان": sanitize_bidi(mentor_id),
+                "کدملی": _bidi(national_id),
+                "نام": _bidi(first_name),
+                "نام خانوادگی": _bidi(last_name),
+                "شناسه پشتیبان": _bidi(mentor_id),
                 "دلیل انتخاب پشتیبان": reason_text,
                 "__mentor_id__": mentor_id,
             }
@@ -538,6 +581,35 @@ def build_selection_reason_rows(
     return reason_df
 
 
+def _text_values(series: pd.Series) -> pd.Series:
+    """متن trim‌شدهٔ هر سلول؛ مقادیر گمشده به رشتهٔ خالی تبدیل می‌شوند."""
+
+    result = pd.Series("", index=series.index, dtype=object)
+    present = series.notna().to_numpy()
+    if present.any():
+        result[present] = [str(value).strip() for value in series[present].tolist()]
+    return result
+
+
+def _coalesce_text(frame: pd.DataFrame, columns: Sequence[str]) -> pd.Series:
+    """نخستین مقدار غیرخالی از میان ستون‌های جایگزین، به ترتیب اولویت."""
+
+    result = pd.Series("", index=frame.index, dtype=object)
+    for column in dict.fromkeys(columns):
+        if not column or column not in frame.columns:
+            continue
+        values = _text_values(ensure_series(frame[column]))
+        result = result.where(result != "", values)
+    return result
+
+
+def _or_value(primary: object, fallback: object) -> object:
+    try:
+        return primary or fallback
+    except (TypeError, ValueError):
+        return fallback
+
+
 def _resolve_gender_label(value: object, policy: PolicyConfig) -> str:
     text = str(value or "").strip()
     if not text:
@@ -14,114 +14,151 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import logging
 import platform
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Callable, Dict, Literal, Mapping, Sequence
+from typing import TYPE_CHECKING, Any, Callable, Dict, Literal, Mapping, Sequence
 from uuid import uuid4
 
 from dataclasses import asdict
 
-import pandas as pd
-from pandas import testing as pd_testing
-from pandas.api import types as pd_types
-
-from app.core.allocate_students import allocate_batch, build_selection_reason_rows
-from app.core.allocation.engine import enrich_summary_with_history
-from app.core.allocation.history_metrics import METRIC_COLUMNS, compute_history_metrics
-from app.core.allocation.mentor_pool import (
-    MentorPoolGovernanceConfig,
-    apply_manager_mentor_governance,
-    apply_mentor_pool_governance,
+from app.core.policy_loader import (
+    MentorStatus,
+    PolicyConfig,
+    load_policy,
+    set_policy_poll_interval,
 )
-from app.core.canonical_frames import (
-    canonicalize_allocation_frames,
-    canonicalize_pool_frame,
-    canonicalize_students_frame,
-    sanitize_pool_for_allocation as _sanitize_pool_for_allocation,
+from app.infra.errors import ReferenceDataMissingError, SchemaVersionMismatchError
+from app.utils.lazy_import import lazy_attr, lazy_module
+
+if TYPE_CHECKING:  # pragma: no cover - فقط برای type checker
+    from app.core.common.columns import HeaderMode
+
+# ماژول‌های سنگین (pandas، خروجی‌گیرها و موتور تخصیص) فقط در اولین استفادهٔ
+# زیرفرمان import می‌شوند تا ``--help`` و زیرفرمان‌های سبک سریع بالا بیایند.
+pd = lazy_module("pandas")
+StageProfiler = lazy_attr("app.core.allocation.profiler", "StageProfiler")
+summarize_stage_totals = lazy_attr("app.core.allocation.profiler", "summarize_stage_totals")
+compare_run_digests = lazy_attr("app.core.allocation.digest", "compare_run_digests")
+decision_entries = lazy_attr("app.core.allocation.digest", "decision_entries")
+frame_digest = lazy_attr("app.core.allocation.digest", "frame_digest")
+pd_types = lazy_module("pandas.api.types")
+allocate_batch = lazy_attr("app.core.allocate_students", "allocate_batch")
+build_selection_reason_rows = lazy_attr("app.core.allocate_students", "build_selection_reason_rows")
+enrich_summary_with_history = lazy_attr("app.core.allocation.engine", "enrich_summary_with_history")
+compute_history_metrics = lazy_attr(
+    "app.core.allocation.history_metrics", "compute_history_metrics"
 )
-from app.core.build_matrix import BuildConfig, build_matrix
-from app.core.policy_loader import MentorStatus, PolicyConfig, load_policy
-from app.core.qa.invariants import run_all_invariants
-from app.infra.excel_writer import write_selection_reasons_sheet
-from app.infra.excel.export_allocations import (
-    DEFAULT_SABT_PROFILE_PATH,
-    build_sabt_export_frame,
-    collect_trace_debug_sheets,
-    load_sabt_export_profile,
+MentorPoolGovernanceConfig = lazy_attr(
+    "app.core.allocation.mentor_pool", "MentorPoolGovernanceConfig"
 )
-from app.infra.errors import ReferenceDataMissingError, SchemaVersionMismatchError
-from app.infra.excel.export_qa_validation import (
-    QaValidationContext,
-    export_qa_validation,
+apply_manager_mentor_governance = lazy_attr(
+    "app.core.allocation.mentor_pool", "apply_manager_mentor_governance"
+)
+apply_mentor_pool_governance = lazy_attr(
+    "app.core.allocation.mentor_pool", "apply_mentor_pool_governance"
+)
+canonicalize_allocation_frames = lazy_attr(
+    "app.core.canonical_frames", "canonicalize_allocation_frames"
+)
+canonicalize_pool_frame = lazy_attr("app.core.canonical_frames", "canonicalize_pool_frame")
+canonicalize_students_frame = lazy_attr("app.core.canonical_frames", "canonicalize_students_frame")
+_sanitize_pool_for_allocation = lazy_attr(
+    "app.core.canonical_frames", "sanitize_pool_for_allocation"
+)
+BuildConfig = lazy_attr("app.core.build_matrix", "BuildConfig")
+build_matrix = lazy_attr("app.core.build_matrix", "build_matrix")
+run_all_invariants = lazy_attr("app.core.qa.invariants", "run_all_invariants")
+write_selection_reasons_sheet = lazy_attr("app.infra.excel_writer", "write_selection_reasons_sheet")
+build_sabt_export_frame = lazy_attr("app.infra.excel.export_allocations", "build_sabt_export_frame")
+collect_trace_debug_sheets = lazy_attr(
+    "app.infra.excel.export_allocations", "collect_trace_debug_sheets"
+)
+load_sabt_export_profile = lazy_attr(
+    "app.infra.excel.export_allocations", "load_sabt_export_profile"
+)
+QaValidationContext = lazy_attr("app.infra.excel.export_qa_validation", "QaValidationContext")
+export_qa_validation = lazy_attr("app.infra.excel.export_qa_validation", "export_qa_validation")
+apply_alias_rule = lazy_attr("app.infra.excel.import_to_sabt", "apply_alias_rule")
+build_errors_frame = lazy_attr("app.infra.excel.import_to_sabt", "build_errors_frame")
+build_optional_sheet_frame = lazy_attr(
+    "app.infra.excel.import_to_sabt", "build_optional_sheet_frame"
 )
-from app.infra.excel.import_to_sabt import (
-    apply_alias_rule,
-    build_errors_frame,
-    build_optional_sheet_frame,
-    build_sheet2_frame,
-    build_summary_frame,
-    load_exporter_config,
-    prepare_allocation_export_frame,
-    write_import_to_sabt_excel,
+build_sheet2_frame = lazy_attr("app.infra.excel.import_to_sabt", "build_sheet2_frame")
+build_summary_frame = lazy_attr("app.infra.excel.import_to_sabt", "build_summary_frame")
+load_exporter_config = lazy_attr("app.infra.excel.import_to_sabt", "load_exporter_config")
+prepare_allocation_export_frame = lazy_attr(
+    "app.infra.excel.import_to_sabt", "prepare_allocation_export_frame"
 )
-from app.infra.io_utils import (
-    ALT_CODE_COLUMN,
-    read_crosswalk_workbook,
-    read_excel_first_sheet,
-    read_inspactor_workbook,
-    write_xlsx_atomic,
+write_import_to_sabt_excel = lazy_attr(
+    "app.infra.excel.import_to_sabt", "write_import_to_sabt_excel"
 )
-from app.infra.local_database import LocalDatabase
-from app.infra.exporter_archive_repository import (
-    ExporterArchiveConfig,
-    ExporterArchiveRepository,
+read_crosswalk_workbook = lazy_attr("app.infra.io_utils", "read_crosswalk_workbook")
+read_excel_first_sheet = lazy_attr("app.infra.io_utils", "read_excel_first_sheet")
+read_inspactor_workbook = lazy_attr("app.infra.io_utils", "read_inspactor_workbook")
+write_xlsx_atomic = lazy_attr("app.infra.io_utils", "write_xlsx_atomic")
+LocalDatabase = lazy_attr("app.infra.local_database", "LocalDatabase")
+ExporterArchiveConfig = lazy_attr("app.infra.exporter_archive_repository", "ExporterArchiveConfig")
+ExporterArchiveRepository = lazy_attr(
+    "app.infra.exporter_archive_repository", "ExporterArchiveRepository"
 )
-from app.infra.reference_schools_repository import (
-    get_school_reference_frames,
-    import_school_crosswalk_from_excel,
-    import_school_report_from_excel,
+get_school_reference_frames = lazy_attr(
+    "app.infra.reference_schools_repository", "get_school_reference_frames"
 )
-from app.infra.reference_managers_repository import import_managers_from_excel
-from app.infra.reference_students_repository import (
-    import_student_report_from_excel,
-    load_students_from_cache,
+import_school_crosswalk_from_excel = lazy_attr(
+    "app.infra.reference_schools_repository", "import_school_crosswalk_from_excel"
 )
-from app.infra.forms_repository import FormsRepository, WordPressFormsClient
-from app.infra.reference_mentors_repository import (
-    import_mentor_pool_from_excel,
-    load_mentor_pool_from_cache,
+import_school_report_from_excel = lazy_attr(
+    "app.infra.reference_schools_repository", "import_school_report_from_excel"
 )
-from app.infra import history_store
-from app.infra.audit_allocations import audit_allocations, summarize_report
-# --- واردات اصلاح شده از app.core ---
-from app.core.common.columns import (
-    CANON_EN_TO_FA,
-    HeaderMode,
-    canonicalize_headers,
-    enrich_school_columns_en,
+import_managers_from_excel = lazy_attr(
+    "app.infra.reference_managers_repository", "import_managers_from_excel"
 )
-from app.core.counter import (
-    assert_unique_student_ids,
-    assign_counters,
-    build_registration_id,
-    detect_academic_year_from_counters,
-    find_duplicate_student_id_groups,
-    infer_year_strict,
-    pick_counter_sheet_name,
-    year_to_yy,
+import_student_report_from_excel = lazy_attr(
+    "app.infra.reference_students_repository", "import_student_report_from_excel"
 )
+load_students_from_cache = lazy_attr(
+    "app.infra.reference_students_repository", "load_students_from_cache"
+)
+FormsRepository = lazy_attr("app.infra.forms_repository", "FormsRepository")
+WordPressFormsClient = lazy_attr("app.infra.forms_repository", "WordPressFormsClient")
+import_mentor_pool_from_excel = lazy_attr(
+    "app.infra.reference_mentors_repository", "import_mentor_pool_from_excel"
+)
+load_mentor_pool_from_cache = lazy_attr(
+    "app.infra.reference_mentors_repository", "load_mentor_pool_from_cache"
+)
+history_store = lazy_module("app.infra.history_store")
+audit_allocations = lazy_attr("app.infra.audit_allocations", "audit_allocations")
+summarize_report = lazy_attr("app.infra.audit_allocations", "summarize_report")
+canonicalize_headers = lazy_attr("app.core.common.columns", "canonicalize_headers")
+enrich_school_columns_en = lazy_attr("app.core.common.columns", "enrich_school_columns_en")
+assert_unique_student_ids = lazy_attr("app.core.counter", "assert_unique_student_ids")
+assign_counters = lazy_attr("app.core.counter", "assign_counters")
+build_registration_id = lazy_attr("app.core.counter", "build_registration_id")
+detect_academic_year_from_counters = lazy_attr(
+    "app.core.counter", "detect_academic_year_from_counters"
+)
+find_duplicate_student_id_groups = lazy_attr("app.core.counter", "find_duplicate_student_id_groups")
+infer_year_strict = lazy_attr("app.core.counter", "infer_year_strict")
+pick_counter_sheet_name = lazy_attr("app.core.counter", "pick_counter_sheet_name")
+year_to_yy = lazy_attr("app.core.counter", "year_to_yy")
 # --- پایان واردات اصلاح شده ---
 
 ProgressFn = Callable[[int, str], None]
 
+_DETERMINISM_MODES = ("digest", "sample", "rerun")
+_DEFAULT_DETERMINISM_SAMPLE = 200
+
 _DEFAULT_POLICY_PATH = Path("config/policy.json")
 _DEFAULT_EXPORTER_CONFIG_PATH = Path("config/SmartAlloc_Exporter_Config_v1.json")
 _DEFAULT_SABT_TEMPLATE_PATH = Path("templates/ImportToSabt (1404) - Copy.xlsx")
-_DEFAULT_ALLOC_PROFILE_PATH = DEFAULT_SABT_PROFILE_PATH
+# هم‌راستا با ``export_allocations.DEFAULT_SABT_PROFILE_PATH`` (بدون import سنگین)
+_DEFAULT_ALLOC_PROFILE_PATH = Path("docs/Report (4).xlsx")
 _DEFAULT_LOCAL_DB_PATH = Path("smart_alloc.db")
 
 logger = logging.getLogger(__name__)
@@ -132,6 +169,40 @@ def _default_progress(pct: int, message: str) -> None:
     print(f"{pct:3d}% | {message}")
 
 
+def _add_compact_dtypes_arg(parser: argparse.ArgumentParser) -> None:
+    """افزودن سوییچ حالت کم‌حافظه (category و Int16/Int32) به زیردستور."""
+
+    parser.add_argument(
+        "--compact-dtypes",
+        action="store_true",
+        help="نگه‌داری ستون‌های متنی تکراری به‌صورت category و کلیدها/ظرفیت با Int16/Int32",
+    )
+
+
+def _add_determinism_args(parser: argparse.ArgumentParser) -> None:
+    """افزودن سوییچ‌های بررسی دترمینیسم مبتنی بر دایجست به زیردستور تخصیص."""
+
+    parser.add_argument(
+        "--determinism-check",
+        nargs="?",
+        const="digest",
+        default=None,
+        choices=_DETERMINISM_MODES,
+        help=(
+            "بررسی دترمینیسم: digest (پیش‌فرض؛ مقایسه با دایجست آخرین اجرای هم‌ورودی در "
+            "پایگاه داده و در نبود آن اجرای نمونه)، sample (اجرای دوبارهٔ N دانش‌آموز اول) "
+            "یا rerun (اجرای کامل دوباره)"
+        ),
+    )
+    parser.add_argument(
+        "--determinism-sample",
+        type=int,
+        default=_DEFAULT_DETERMINISM_SAMPLE,
+        metavar="N",
+        help="تعداد دانش‌آموزان اول ترتیب پردازش برای اجرای نمونهٔ بررسی دترمینیسم",
+    )
+
+
 def _add_local_db_args(parser: argparse.ArgumentParser) -> None:
     """افزودن آرگومان‌های پایگاه دادهٔ محلی برای لاگ اجرا."""
 
@@ -146,6 +217,12 @@ def _add_local_db_args(parser: argparse.ArgumentParser) -> None:
         action="store_true",
         help="غیرفعال‌سازی ثبت تاریخچه در SQLite",
     )
+    parser.add_argument(
+        "--cache-backend",
+        choices=("sqlite", "arrow"),
+        default="sqlite",
+        help="محل نگهداری کش دانش‌آموزان/استخر: جدول SQLite یا فایل Arrow (نیازمند pyarrow)",
+    )
 
 
 def _add_exporter_archive_args(parser: argparse.ArgumentParser) -> None:
@@ -176,7 +253,12 @@ def _resolve_local_db(args: argparse.Namespace) -> LocalDatabase | None:
         or str(_DEFAULT_LOCAL_DB_PATH)
     )
     try:
-        return LocalDatabase(Path(path_text))
+        return LocalDatabase(
+            Path(path_text),
+            cache_backend=overrides.get("cache_backend")
+            or getattr(args, "cache_backend", None)
+            or "sqlite",
+        )
     except Exception:  # pragma: no cover - خطاهای غیرمنتظرهٔ مسیر
         logger.exception("Failed to prepare local DB at %s", path_text)
         return None
@@ -229,6 +311,8 @@ def _parse_since(value: str | None) -> datetime | None:
 def _empty_history_metrics_df() -> pd.DataFrame:
     """دیتافریم خالی با ستون‌های KPI تاریخچه."""
 
+    from app.core.allocation.history_metrics import METRIC_COLUMNS
+
     return pd.DataFrame(columns=METRIC_COLUMNS)
 
 
@@ -406,6 +490,17 @@ def _resolve_mentor_pool_frame(
     return df, inputs, inputs_mtime
 
 
+def _write_stage_profile(path: Path, report: Mapping[str, object]) -> None:
+    """نوشتن گزارش پروفایل مراحل تخصیص و چاپ خلاصهٔ پرهزینه‌ترین مراحل."""
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    top = ", ".join(
+        f"{stage}={seconds:.2f}s" for stage, seconds in summarize_stage_totals(report)[:3]
+    )
+    print(f"stage profile written to {path} ({top})")
+
+
 def _qa_validation_output_path(base: Path, *, stem_override: str | None = None) -> Path:
     suffix = stem_override or f"{base.stem}_validation.xlsx"
     return base.with_name(suffix)
@@ -491,6 +586,8 @@ def _apply_mentor_pool_overrides(
 def _detect_reader(path: Path) -> Callable[[Path], pd.DataFrame]:
     """انتخاب تابع خواندن مناسب؛ برای Excel شیت 'matrix' را ترجیح بده."""
     suffix = path.suffix.lower()
+    from app.infra.io_utils import ALT_CODE_COLUMN
+
     dtype_map = {ALT_CODE_COLUMN: str}
     if suffix in {".xlsx", ".xls", ".xlsm"}:
         def _read_xlsx(p: Path) -> pd.DataFrame:
@@ -619,7 +716,11 @@ def _make_excel_safe(df: pd.DataFrame) -> pd.DataFrame:
                 # اگر DataFrame خالی بود
                 out[col] = pd.Series([""] * len(out), index=out.index)
                 continue
-        
+
+        # ستون‌های category (مثل stage در تریس) مانند object متنی می‌شوند
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            s = s.astype(object)
+
         # برای ستون‌های از نوع object
         if pd_types.is_object_dtype(s.dtype):
             # تابع تبدیل ایمن برای هر مقدار
@@ -947,6 +1048,7 @@ def _maybe_export_import_to_sabt(
         df_9394,
         template_path,
         sabt_output,
+        streaming=bool(getattr(args, "sabt_streaming", False)),
     )
     if db is not None and getattr(args, "archive_exporter", False):
         archive_cfg = ExporterArchiveConfig(
@@ -1286,6 +1388,8 @@ def _inject_student_ids(
         students_df, header_mode="en"
     )
     students_fa = canonicalize_headers(students_en, header_mode="fa")
+    from app.core.common.columns import CANON_EN_TO_FA
+
     school_fa = CANON_EN_TO_FA.get("school_code", "کد مدرسه")
     if school_fa in students_fa.columns:
         school_series = students_fa[school_fa]
@@ -1363,6 +1467,7 @@ def _run_build_matrix(args: argparse.Namespace, policy: PolicyConfig, progress:
         policy=policy,
         min_coverage_ratio=min_coverage,
         expected_policy_version=expected_policy_version,
+        compact_dtypes=bool(getattr(args, "compact_dtypes", False)),
     )
 
     if cfg.expected_policy_version and cfg.policy_version != cfg.expected_policy_version:
@@ -1387,6 +1492,7 @@ def _run_build_matrix(args: argparse.Namespace, policy: PolicyConfig, progress:
         crosswalk_synonyms_df=crosswalk_synonyms_df,
         cfg=cfg,
         progress=progress,
+        **({"fragment_store": db} if getattr(args, "incremental", False) else {}),
     )
 
     duplicate_threshold = int(getattr(cfg, "join_key_duplicate_threshold", 0) or 0)
@@ -1589,6 +1695,7 @@ def _prepare_allocation_frames(
     policy: PolicyConfig,
     sanitize_pool: bool = True,
     pool_source: str = "inspactor",
+    compact_dtypes: bool = False,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """نرمال‌سازی ستون‌های ورودی برای اجرای تخصیص."""
 
@@ -1598,8 +1705,122 @@ def _prepare_allocation_frames(
         policy=policy,
         sanitize_pool=sanitize_pool,
         pool_source=pool_source,
+        compact_dtypes=compact_dtypes,
     )
 
+def _resolve_determinism_mode(args: argparse.Namespace) -> str | None:
+    """حالت بررسی دترمینیسم؛ مقدار ``True`` (فراخوانی برنامه‌ای قدیمی) یعنی ``digest``."""
+
+    value = getattr(args, "determinism_check", None)
+    if value is True:
+        return "digest"
+    if not value:
+        return None
+    return str(value)
+
+
+def _allocation_inputs_digest(
+    students_base: pd.DataFrame,
+    pool_base: pd.DataFrame,
+    *,
+    policy: PolicyConfig,
+    policy_path: Path,
+    options: Mapping[str, object],
+) -> str:
+    """هش ورودی‌های مؤثر بر تخصیص برای یافتن اجرای قبلی هم‌ورودی."""
+
+    hasher = hashlib.blake2b(digest_size=16)
+    parts = (
+        frame_digest(students_base),
+        frame_digest(pool_base),
+        policy.version,
+        json.dumps(options, ensure_ascii=False, sort_keys=True, default=str),
+    )
+    for part in parts:
+        hasher.update(str(part).encode("utf-8"))
+        hasher.update(b"\x1f")
+    if policy_path.is_file():
+        hasher.update(policy_path.read_bytes())
+    return hasher.hexdigest()
+
+
+def _build_run_digest(
+    outputs: tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame],
+    *,
+    inputs_digest: str,
+) -> dict[str, object]:
+    """دایجست تصمیم‌ها (از ``trace.attrs``) به‌همراه هش قاب‌های خروجی خام تخصیص."""
+
+    allocations, pool, logs, trace = outputs
+    digest = dict(trace.attrs.get("decision_digest") or {})
+    digest["inputs_digest"] = inputs_digest
+    digest["frames"] = {
+        "allocations": frame_digest(allocations),
+        "pool": frame_digest(pool),
+        "logs": frame_digest(logs),
+        "trace": frame_digest(trace),
+    }
+    return digest
+
+
+def _verify_determinism(
+    mode: str,
+    run_digest: Mapping[str, object],
+    *,
+    rerun: Callable[[pd.DataFrame], tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]],
+    students_base: pd.DataFrame,
+    sample_size: int,
+    db: LocalDatabase | None,
+    progress: ProgressFn,
+) -> None:
+    """بررسی دترمینیسم بدون اجرای کامل دوباره (مگر در حالت ``rerun``).
+
+    * ``digest``: مقایسه با دایجست آخرین اجرای موفق با همان ورودی‌ها؛ اگر چنین اجرایی
+      ثبت نشده باشد (یا پایگاه داده غیرفعال باشد) به ``sample`` برمی‌گردد.
+    * ``sample``: اجرای دوبارهٔ ``sample_size`` دانش‌آموز اول ترتیب پردازش؛ چون
+      تصمیم هر دانش‌آموز فقط به تصمیم‌های پیش از خودش وابسته است، هش تصمیم‌های
+      این اجرا باید با ابتدای فهرست اجرای اصلی برابر باشد.
+    * ``rerun``: اجرای کامل دوباره و مقایسهٔ دایجست تصمیم‌ها و قاب‌ها.
+
+    Raises:
+        RuntimeError: با ذکر نخستین دانش‌آموزی که تصمیمش متفاوت است.
+    """
+
+    report = None
+    if mode == "digest":
+        previous = None
+        if db is not None:
+            db.initialize()
+            previous = db.fetch_latest_run_digest(str(run_digest.get("inputs_digest", "")))
+        if previous is None:
+            progress(92, "determinism: no previous digest for these inputs; sampling")
+            mode = "sample"
+        else:
+            report = compare_run_digests(run_digest, previous)
+    if mode == "sample":
+        entries = decision_entries(str(run_digest.get("decisions", "") or ""))
+        sample_ids = {student_id for student_id, _ in entries[: max(1, int(sample_size))]}
+        student_ids = students_base["student_id"].astype("string")
+        subset = students_base.loc[student_ids.isin(sample_ids).fillna(False).to_numpy()]
+        sample_outputs = rerun(subset)
+        report = compare_run_digests(
+            dict(sample_outputs[3].attrs.get("decision_digest") or {}),
+            run_digest,
+            prefix_only=True,
+            frames=(),
+        )
+    elif mode == "rerun":
+        rerun_digest = _build_run_digest(
+            rerun(students_base), inputs_digest=str(run_digest.get("inputs_digest", ""))
+        )
+        report = compare_run_digests(rerun_digest, run_digest)
+    if report is None:
+        raise ValueError(f"Unsupported determinism check mode: {mode!r}")
+    if not report.matches:
+        raise RuntimeError(f"Determinism check failed: {report.describe()}")
+    progress(93, report.describe())
+
+
 def _allocate_and_write(
     students_base: pd.DataFrame,
     pool_base: pd.DataFrame,
@@ -1632,6 +1853,13 @@ def _allocate_and_write(
     ui_center_map, cli_center_map, center_priority, strict_validation = _resolve_center_preferences(
         args, policy
     )
+    workers = max(1, int(getattr(args, "workers", 1) or 1))
+    compact_dtypes = bool(getattr(args, "compact_dtypes", False))
+    profile_arg = getattr(args, "profile_stages", None)
+    profiler = StageProfiler() if profile_arg is not None else None
+    stage_profile: Mapping[str, object] | None = None
+    determinism_mode = _resolve_determinism_mode(args)
+    run_digest: dict[str, object] | None = None
 
     allocations_df: pd.DataFrame | None = None
     updated_pool_df: pd.DataFrame | None = None
@@ -1639,20 +1867,53 @@ def _allocate_and_write(
     trace_df: pd.DataFrame | None = None
     sabt_allocations_df: pd.DataFrame | None = None
 
-    try:
-        allocations_df, updated_pool_df, logs_df, trace_df = allocate_batch(
-            students_base.copy(deep=True),
+    def _run_allocation(
+        students_frame: pd.DataFrame,
+        *,
+        progress_fn: ProgressFn = lambda *_: None,
+        stage_profiler: StageProfiler | None = None,
+    ) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        return allocate_batch(
+            students_frame.copy(deep=True),
             pool_base.copy(deep=True),
             policy=policy,
-            progress=progress,
+            progress=progress_fn,
             capacity_column=capacity_column,
             frames_already_canonical=True,
             center_manager_map=cli_center_map,
             ui_center_manager_map=ui_center_map,
             center_priority=center_priority,
             strict_center_validation=strict_validation,
+            workers=workers,
+            profiler=stage_profiler,
+            compact_dtypes=compact_dtypes,
         )
 
+    try:
+        outputs = _run_allocation(students_base, progress_fn=progress, stage_profiler=profiler)
+        allocations_df, updated_pool_df, logs_df, trace_df = outputs
+        if determinism_mode is not None or db is not None:
+            inputs_digest = _allocation_inputs_digest(
+                students_base,
+                pool_base,
+                policy=policy,
+                policy_path=policy_path,
+                options={
+                    "capacity_column": capacity_column,
+                    "center_manager_map": cli_center_map,
+                    "ui_center_manager_map": ui_center_map,
+                    "center_priority": center_priority,
+                    "strict_center_validation": strict_validation,
+                },
+            )
+            run_digest = _build_run_digest(outputs, inputs_digest=inputs_digest)
+        stage_profile = trace_df.attrs.get("stage_profile")
+        if isinstance(stage_profile, Mapping):
+            profile_path = (
+                Path(profile_arg) if profile_arg else output.with_suffix(".profile.json")
+            )
+            _write_stage_profile(profile_path, stage_profile)
+
         header_internal: HeaderMode = policy.excel.header_mode_internal  # type: ignore[assignment]
 
         def _attach_student_id(frame: pd.DataFrame, ensure_existing: bool = False) -> pd.DataFrame:
@@ -1838,34 +2099,21 @@ def _allocate_and_write(
             sheet_prepare_modes=prepare_overrides,
         )
 
-        if getattr(args, "determinism_check", False):
+        if determinism_mode is not None and run_digest is not None:
             progress(92, "determinism check")
-            allocations_check, pool_check, logs_check, trace_check = allocate_batch(
-                students_base.copy(deep=True),
-                pool_base.copy(deep=True),
-                policy=policy,
-                progress=lambda *_: None,
-                capacity_column=capacity_column,
-                frames_already_canonical=True,
-                center_manager_map=cli_center_map,
-                ui_center_manager_map=ui_center_map,
-                center_priority=center_priority,
-                strict_center_validation=strict_validation,
+            _verify_determinism(
+                determinism_mode,
+                run_digest,
+                rerun=_run_allocation,
+                students_base=students_base,
+                sample_size=int(
+                    getattr(args, "determinism_sample", _DEFAULT_DETERMINISM_SAMPLE)
+                    or _DEFAULT_DETERMINISM_SAMPLE
+                ),
+                db=db,
+                progress=progress,
             )
 
-            header_internal = policy.excel.header_mode_internal
-
-            def _canon(df: pd.DataFrame) -> pd.DataFrame:
-                return canonicalize_headers(df, header_mode=header_internal).reset_index(drop=True)
-
-            try:
-                pd_testing.assert_frame_equal(_canon(allocations_df), _canon(allocations_check))
-                pd_testing.assert_frame_equal(_canon(updated_pool_df), _canon(pool_check))
-                pd_testing.assert_frame_equal(_canon(logs_df), _canon(logs_check))
-                pd_testing.assert_frame_equal(_canon(trace_df), _canon(trace_check))
-            except AssertionError as exc:  # pragma: no cover - determinism failure path
-                raise RuntimeError("Determinism check failed: outputs differ between runs") from exc
-
         if getattr(args, "audit", False) or getattr(args, "metrics", False):
             progress(95, "auditing allocations")
             report = audit_allocations(output)
@@ -1916,6 +2164,8 @@ def _allocate_and_write(
             qa_outcome=qa_outcome,
             qa_report=qa_report,
             trace_snapshot=trace_df if success else None,
+            stage_profile=stage_profile,
+            run_digest=run_digest if success else None,
             db=db,
         )
 
@@ -1941,6 +2191,7 @@ def _run_allocate(args: argparse.Namespace, policy: PolicyConfig, progress: Prog
         policy=policy,
         sanitize_pool=True,
         pool_source="inspactor",
+        compact_dtypes=bool(getattr(args, "compact_dtypes", False)),
     )
 
     pool_base = _apply_mentor_pool_overrides(pool_base, policy, args)
@@ -1984,6 +2235,7 @@ def _run_rule_engine(
         policy=policy,
         sanitize_pool=True,
         pool_source="matrix",
+        compact_dtypes=bool(getattr(args, "compact_dtypes", False)),
     )
 
     pool_base = _apply_mentor_pool_overrides(pool_base, policy, args)
@@ -2008,15 +2260,27 @@ def _run_rule_engine(
 def _import_students_from_forms_cache(
     *, db: LocalDatabase, policy: PolicyConfig
 ) -> pd.DataFrame:
-    """بارگذاری forms_entries و ذخیره در کش دانش‌آموزان برای Core."""
-
-    repo = FormsRepository(client=None, db=db)
-    entries = repo.load_entries()
-    if entries.empty:
-        raise ReferenceDataMissingError(
-            table="forms_entries",
-            message="کش forms_entries خالی است؛ ابتدا sync-forms را اجرا کنید.",
-        )
+    """بارگذاری forms_entries و ذخیره در کش دانش‌آموزان برای Core.
+
+    اگر کش دانش‌آموزان قبلاً از همین جدول ساخته شده باشد، فقط ورودی‌هایی که پس
+    از watermark مصرف (``normalized_at``) درج یا تغییر کرده‌اند نرمال و upsert
+    می‌شوند؛ در غیر این صورت کش کامل بازسازی می‌شود.
+    """
+
+    from app.infra.local_database import STUDENTS_FROM_FORMS_WATERMARK
+
+    watermark = db.fetch_sync_watermark(STUDENTS_FROM_FORMS_WATERMARK)
+    if watermark is not None:
+        entries = db.load_forms_entries(changed_since=watermark)
+        if entries.empty:
+            return entries
+    else:
+        entries = FormsRepository(client=None, db=db).load_entries()
+        if entries.empty:
+            raise ReferenceDataMissingError(
+                table="forms_entries",
+                message="کش forms_entries خالی است؛ ابتدا sync-forms را اجرا کنید.",
+            )
     normalized = entries.copy()
     for key in policy.join_keys:
         if key not in normalized.columns:
@@ -2025,7 +2289,17 @@ def _import_students_from_forms_cache(
                 message=f"ستون مورد انتظار {key!r} در forms_entries یافت نشد.",
             )
         normalized[key] = pd.to_numeric(normalized[key], errors="coerce").astype("Int64")
-    db.upsert_students_cache(normalized, join_keys=policy.join_keys)
+    if watermark is not None:
+        db.upsert_students_cache_rows(normalized, join_keys=policy.join_keys)
+    else:
+        db.upsert_students_cache(normalized, join_keys=policy.join_keys)
+    consumed = normalized["normalized_at"].dropna() if "normalized_at" in normalized else None
+    if consumed is not None and not consumed.empty:
+        db.store_sync_watermark(
+            STUDENTS_FROM_FORMS_WATERMARK,
+            consumed.max(),
+            row_count=int(normalized.shape[0]),
+        )
     return normalized
 
 
@@ -2051,9 +2325,12 @@ def _run_sync_forms(args: argparse.Namespace, policy: PolicyConfig, progress: Pr
         return 0
 
     since_dt = _parse_since(getattr(args, "since", None))
-    result = repo.sync_from_wordpress(since=since_dt)
+    result = repo.sync_from_wordpress(
+        since=since_dt, full_refresh=bool(getattr(args, "full_refresh", False))
+    )
     print(
-        f"forms synced: fetched={result.fetched_count}, persisted={result.persisted_count}"
+        f"forms synced: fetched={result.fetched_count}, persisted={result.persisted_count}, "
+        f"changed={result.changed_count}"
     )
     return 0
 
@@ -2079,7 +2356,11 @@ def _run_exporter_archive(args: argparse.Namespace, *, db: LocalDatabase) -> int
         if args.snapshot_a is None or args.snapshot_b is None:
             raise ValueError("برای compare باید --a و --b مشخص شود.")
         try:
-            result = repo.compare_snapshots(args.snapshot_a, args.snapshot_b)
+            result = repo.compare_snapshots(
+                args.snapshot_a,
+                args.snapshot_b,
+                include_rows=not bool(getattr(args, "keys_only", False)),
+            )
         except ValueError as exc:
             print(str(exc))
             return 1
@@ -2115,6 +2396,12 @@ def _build_parser() -> argparse.ArgumentParser:
         help="(اختیاری) مسیر Crosswalk برای بروزرسانی مرجع در SQLite",
     )
     build_cmd.add_argument("--output", required=True, help="مسیر Excel خروجی")
+    build_cmd.add_argument(
+        "--incremental",
+        action="store_true",
+        help="ساخت افزایشی: فقط پشتیبان‌های تغییرکرده بازسازی و قطعه‌ها در SQLite نگه‌داری می‌شوند",
+    )
+    _add_compact_dtypes_arg(build_cmd)
     build_cmd.add_argument(
         "--policy",
         default=str(_DEFAULT_POLICY_PATH),
@@ -2194,6 +2481,11 @@ def _build_parser() -> argparse.ArgumentParser:
         required=False,
         help="(اختیاری) زمان شروع به‌صورت ISO8601 برای دریافت افزایشی",
     )
+    forms_cmd.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="نادیده گرفتن watermark ذخیره‌شده و جایگزینی کامل جدول forms_entries",
+    )
     forms_cmd.add_argument(
         "--cache-only",
         action="store_true",
@@ -2282,6 +2574,11 @@ def _build_parser() -> argparse.ArgumentParser:
         default=str(_DEFAULT_SABT_TEMPLATE_PATH),
         help="مسیر فایل قالب ImportToSabt",
     )
+    alloc_cmd.add_argument(
+        "--sabt-streaming",
+        action="store_true",
+        help="نوشتن ImportToSabt با Workbook جریانی (write-only) برای خروجی‌های بزرگ",
+    )
     alloc_cmd.add_argument(
         "--export-profile",
         choices=("basic", "sabt"),
@@ -2295,9 +2592,22 @@ def _build_parser() -> argparse.ArgumentParser:
     )
     _add_exporter_archive_args(alloc_cmd)
     alloc_cmd.add_argument(
-        "--determinism-check",
-        action="store_true",
-        help="اجرای دوباره تخصیص برای تضمین دترمینیسم",
+        "--workers",
+        type=int,
+        default=1,
+        help="تعداد پردازه‌های موازی تخصیص (۱=ترتیبی؛ خروجی در هر حالت یکسان است)",
+    )
+    _add_determinism_args(alloc_cmd)
+    alloc_cmd.add_argument(
+        "--profile-stages",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help=(
+            "پروفایل زمانی مراحل تخصیص را در JSON بنویس (پیش‌فرض: کنار خروجی با پسوند "
+            ".profile.json)؛ متغیر محیطی MATRIX_ALLOC_PROFILE=1 نیز آن را فعال می‌کند"
+        ),
     )
     alloc_cmd.add_argument(
         "--counter-duplicate-strategy",
@@ -2305,6 +2615,7 @@ def _build_parser() -> argparse.ArgumentParser:
         default="prompt",
         help="نحوهٔ مدیریت student_id تکراری: prompt=سوال تعاملی، drop=حذف، assign-new=شمارندهٔ جدید",
     )
+    _add_compact_dtypes_arg(alloc_cmd)
     _add_local_db_args(alloc_cmd)
 
     rule_cmd = sub.add_parser(
@@ -2371,9 +2682,22 @@ def _build_parser() -> argparse.ArgumentParser:
         help="پس از اجرا، خلاصهٔ JSON ممیزی را چاپ کن",
     )
     rule_cmd.add_argument(
-        "--determinism-check",
-        action="store_true",
-        help="اجرای دوباره تخصیص برای تضمین دترمینیسم",
+        "--workers",
+        type=int,
+        default=1,
+        help="تعداد پردازه‌های موازی تخصیص (۱=ترتیبی؛ خروجی در هر حالت یکسان است)",
+    )
+    _add_determinism_args(rule_cmd)
+    rule_cmd.add_argument(
+        "--profile-stages",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help=(
+            "پروفایل زمانی مراحل تخصیص را در JSON بنویس (پیش‌فرض: کنار خروجی با پسوند "
+            ".profile.json)؛ متغیر محیطی MATRIX_ALLOC_PROFILE=1 نیز آن را فعال می‌کند"
+        ),
     )
     rule_cmd.add_argument(
         "--sabt-output",
@@ -2390,6 +2714,11 @@ def _build_parser() -> argparse.ArgumentParser:
         default=str(_DEFAULT_SABT_TEMPLATE_PATH),
         help="مسیر فایل قالب ImportToSabt",
     )
+    rule_cmd.add_argument(
+        "--sabt-streaming",
+        action="store_true",
+        help="نوشتن ImportToSabt با Workbook جریانی (write-only) برای خروجی‌های بزرگ",
+    )
     rule_cmd.add_argument(
         "--export-profile",
         choices=("basic", "sabt"),
@@ -2407,6 +2736,7 @@ def _build_parser() -> argparse.ArgumentParser:
         default="prompt",
         help="نحوهٔ مدیریت student_id تکراری هنگام تولید شمارنده",
     )
+    _add_compact_dtypes_arg(rule_cmd)
     _add_local_db_args(rule_cmd)
     _add_exporter_archive_args(rule_cmd)
 
@@ -2431,6 +2761,11 @@ def _build_parser() -> argparse.ArgumentParser:
         dest="snapshot_b",
         help="شناسه Snapshot مقصد برای مقایسه",
     )
+    archive_cmd.add_argument(
+        "--keys-only",
+        action="store_true",
+        help="در compare فقط کلید سطرهای افزوده/حذف/تغییرکرده بدون بازکردن بلوک ردیف‌ها",
+    )
     _add_local_db_args(archive_cmd)
     return parser
 
@@ -2554,4 +2889,9 @@ def main(
 
 
 if __name__ == "__main__":
+    # اجرای CLI کوتاه‌عمر است؛ Policy یک‌بار خوانده و تا پایان فرایند نگه داشته می‌شود.
+    set_policy_poll_interval(None)
+    from app.infra.parsed_input_cache import configure_default_parsed_input_cache
+
+    configure_default_parsed_input_cache()
     raise SystemExit(main())
@@ -0,0 +1,92 @@
+"""ذخیره‌سازی ستونی (Arrow IPC) برای کش‌های بزرگ LocalDatabase.
+
+فایل‌های Arrow IPC بدون فشرده‌سازی در کنار فایل SQLite نوشته می‌شوند و هنگام
+خواندن به‌صورت memory-map باز می‌شوند. تبدیل به pandas با ``split_blocks`` (هر
+ستون بلوک جدا، بدون ادغام در یک ماتریس دوبعدی) و ``self_destruct`` (آزادسازی
+بافر Arrow هر ستون پس از تبدیل) انجام می‌شود تا ستون‌های عددی بدون تهی بدون کپی
+و بقیه با یک کپی به pandas برسند؛ dtype ستون‌ها (از جمله ``Int64`` کلیدهای
+اتصال) از متادیتای pandas بازیابی می‌شود. وابستگی ``pyarrow`` اختیاری است
+(``requirements-optional.txt``) و فقط در این ماژول بارگذاری می‌شود.
+
+نمونه::
+
+    >>> store = ColumnarFrameStore(Path("smart_alloc_cache"))  # doctest: +SKIP
+    >>> path = store.write_frame("students_cache", df)  # doctest: +SKIP
+    >>> store.read_frame(path, columns=["student_id"])  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import tempfile
+from pathlib import Path
+from typing import Sequence
+
+import pandas as pd
+
+__all__ = [
+    "ARROW_FORMAT",
+    "ColumnarFrameStore",
+    "columnar_backend_available",
+]
+
+ARROW_FORMAT = "arrow_ipc"
+_SUFFIX = ".arrow"
+
+
+def columnar_backend_available() -> bool:
+    """آیا ``pyarrow`` برای backend ستونی نصب است؟"""
+
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+class ColumnarFrameStore:
+    """نوشتن/خواندن اتمیک دیتافریم‌ها به‌صورت فایل Arrow IPC در یک پوشه."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def path_for(self, name: str) -> Path:
+        return self.root / f"{name}{_SUFFIX}"
+
+    def write_frame(self, name: str, df: pd.DataFrame) -> Path:
+        """نوشتن اتمیک ``df`` (temp → replace) و بازگرداندن مسیر فایل.
+
+        ستون‌هایی که Arrow نمی‌تواند نوع‌شان را تعیین کند (مثلاً object با عدد و
+        متن مخلوط) ``pyarrow.ArrowException`` می‌دهند و فایلی نوشته نمی‌شود.
+        """
+
+        import pyarrow as pa
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        target = self.path_for(name)
+        fd, temp_name = tempfile.mkstemp(suffix=_SUFFIX, dir=self.root)
+        os.close(fd)
+        try:
+            with pa.OSFile(temp_name, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(temp_name, target)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        return target
+
+    @staticmethod
+    def read_frame(path: Path, *, columns: Sequence[str] | None = None) -> pd.DataFrame:
+        """خواندن memory-mapped فایل با امکان انتخاب ستون‌ها."""
+
+        import pyarrow as pa
+
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns is not None:
+                table = table.select(
+                    [column for column in columns if column in table.column_names]
+                )
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    def remove(self, name: str) -> None:
+        self.path_for(name).unlink(missing_ok=True)
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 from collections import OrderedDict
+from copy import copy
 from datetime import datetime
 import hashlib
 import re
@@ -18,7 +19,7 @@ from app.core.common.phone_rules import (
     normalize_landline_series,
     normalize_mobile,
 )
-from app.infra.excel._writer import ensure_text_columns
+from app.infra.excel._writer import TEXT_COLUMN_NAMES, ensure_text_columns
 from app.core.pipeline import (
     REGISTRATION_STATUS_CANDIDATES,
     debug_registration_distribution,
@@ -1317,12 +1318,14 @@ def _rewrite_sheet_headers(ws, expected: Sequence[str]) -> None:
         ws.delete_cols(len(expected) + 1, extra_cols)
 
 
-def _verify_headers(
+def _check_template_headers(
     ws,
     expected: Sequence[str],
     *,
     on_mismatch: Callable[[str, Sequence[str], Sequence[str]], None] | None = None,
-) -> None:
+) -> bool:
+    """مقایسهٔ هدر قالب با ستون‌های انتظاری؛ True یعنی هدر باید بازنویسی شود."""
+
     header_cells = next(ws.iter_rows(min_row=1, max_row=1))
     headers = [cell.value if cell.value is not None else "" for cell in header_cells]
     expected_list = list(expected)
@@ -1333,11 +1336,165 @@ def _verify_headers(
         )
     template_headers = headers[: len(expected_list)]
     if _headers_equivalent(template_headers, expected_list):
-        return
+        return False
     if on_mismatch is not None:
         on_mismatch(ws.title, template_headers, expected_list)
     print(f"⚠️  Rewriting headers in sheet '{ws.title}' to match config exactly")
-    _rewrite_sheet_headers(ws, expected_list)
+    return True
+
+
+def _verify_headers(
+    ws,
+    expected: Sequence[str],
+    *,
+    on_mismatch: Callable[[str, Sequence[str], Sequence[str]], None] | None = None,
+) -> None:
+    if _check_template_headers(ws, expected, on_mismatch=on_mismatch):
+        _rewrite_sheet_headers(ws, list(expected))
+
+
+def _copy_cell_style(source, target) -> None:
+    """کپی استایل یک سلول قالب روی سلول مقصد در Workbook دیگر."""
+
+    if not source.has_style:
+        return
+    target.font = copy(source.font)
+    target.fill = copy(source.fill)
+    target.border = copy(source.border)
+    target.alignment = copy(source.alignment)
+    target.protection = copy(source.protection)
+    target.number_format = source.number_format
+
+
+def _copy_sheet_layout(source, target) -> None:
+    """انتقال چیدمان و ویژگی‌های شیت قالب به شیت جریانی (پیش از نوشتن ردیف‌ها).
+
+    کپی می‌شود: عرض/پنهان‌بودن ستون‌ها، ارتفاع/استایل/گروه‌بندی ردیف‌ها، جهت
+    راست‌به‌چپ، Freeze، سلول‌های ادغام‌شده، اعتبارسنجی داده، قالب‌بندی شرطی،
+    تنظیمات چاپ (page setup، حاشیه‌ها، سرصفحه/پاصفحه، ناحیه و عنوان‌های چاپ)،
+    ویژگی‌های شیت، محافظت، AutoFilter، جدول‌ها و نام‌های تعریف‌شدهٔ سطح شیت.
+    تصویر و نمودار قالب در Workbook write-only منتقل نمی‌شوند و برایشان هشدار
+    چاپ می‌شود.
+    """
+
+    for letter, dimension in source.column_dimensions.items():
+        if dimension.width:
+            target.column_dimensions[letter].width = dimension.width
+        if dimension.hidden:
+            target.column_dimensions[letter].hidden = True
+    for index, dimension in source.row_dimensions.items():
+        row = target.row_dimensions[index]
+        if dimension.ht:
+            row.ht = dimension.ht
+        if dimension.hidden:
+            row.hidden = True
+        if dimension.outlineLevel:
+            row.outlineLevel = dimension.outlineLevel
+        _copy_cell_style(dimension, row)
+    target.sheet_view.rightToLeft = source.sheet_view.rightToLeft
+    if source.freeze_panes:
+        target.freeze_panes = source.freeze_panes
+    for merged in source.merged_cells.ranges:
+        target.merged_cells.add(merged.coord)
+    for validation in source.data_validations.dataValidation:
+        target.data_validations.append(copy(validation))
+    for formatting in source.conditional_formatting:
+        for rule in formatting.rules:
+            target.conditional_formatting.add(str(formatting.sqref), copy(rule))
+    target.sheet_properties = copy(source.sheet_properties)
+    target.page_setup = copy(source.page_setup)
+    target.print_options = copy(source.print_options)
+    target.page_margins = copy(source.page_margins)
+    target.HeaderFooter = copy(source.HeaderFooter)
+    target.protection = copy(source.protection)
+    target.auto_filter = copy(source.auto_filter)
+    if source.print_title_rows:
+        target.print_title_rows = source.print_title_rows
+    if source.print_title_cols:
+        target.print_title_cols = source.print_title_cols
+    if source.print_area:
+        target.print_area = [str(area).split("!")[-1] for area in source._print_area]
+    for table in source.tables.values():
+        target.add_table(copy(table))
+    for name, defined in source.defined_names.items():
+        target.defined_names[name] = copy(defined)
+    if getattr(source, "_images", None) or getattr(source, "_charts", None):
+        print(
+            f"⚠️  Images/charts of template sheet '{source.title}' are not copied in streaming mode"
+        )
+
+
+def _stream_template_rows(source, target) -> None:
+    """کپی کامل شیت قالبی که Exporter آن را بازنویسی نمی‌کند."""
+
+    from openpyxl.cell import WriteOnlyCell
+
+    for row in source.iter_rows():
+        values = []
+        for cell in row:
+            out = WriteOnlyCell(target, value=cell.value)
+            _copy_cell_style(cell, out)
+            if cell.comment is not None:
+                out.comment = copy(cell.comment)
+            if cell.hyperlink is not None:
+                out.hyperlink = copy(cell.hyperlink)
+            values.append(out)
+        target.append(values)
+
+
+def _stream_dataframe_to_sheet(source, target, df: pd.DataFrame) -> None:
+    """نوشتن هدر با استایل قالب و جریان ردیف‌های دیتافریم در شیت write-only."""
+
+    from openpyxl.cell import WriteOnlyCell
+
+    headers = [str(label) for label in df.columns]
+    text_indexes = [idx for idx, label in enumerate(headers) if label in TEXT_COLUMN_NAMES]
+    template_header = next(source.iter_rows(min_row=1, max_row=1), ())
+    header_row = []
+    for idx, label in enumerate(df.columns):
+        out = WriteOnlyCell(target, value=label)
+        if idx < len(template_header):
+            _copy_cell_style(template_header[idx], out)
+            if template_header[idx].comment is not None:
+                out.comment = copy(template_header[idx].comment)
+        if idx in text_indexes:
+            out.number_format = "@"
+        header_row.append(out)
+    target.append(header_row)
+    for values in df.itertuples(index=False, name=None):
+        if not text_indexes:
+            target.append(values)
+            continue
+        row = list(values)
+        for idx in text_indexes:
+            out = WriteOnlyCell(target, value=row[idx])
+            out.number_format = "@"
+            row[idx] = out
+        target.append(row)
+
+
+def _save_streaming_workbook(
+    template_wb,
+    frames: Mapping[str, pd.DataFrame],
+    output_path: Path,
+) -> None:
+    """ساخت خروجی با Workbook write-only بر پایهٔ ترتیب و استایل شیت‌های قالب."""
+
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for name, defined in template_wb.defined_names.items():
+        workbook.defined_names[name] = copy(defined)
+    for name in template_wb.sheetnames:
+        source = template_wb[name]
+        target = workbook.create_sheet(title=name)
+        _copy_sheet_layout(source, target)
+        df = frames.get(name)
+        if df is None:
+            _stream_template_rows(source, target)
+        else:
+            _stream_dataframe_to_sheet(source, target, df)
+    workbook.save(output_path)
 
 
 def build_header_signature(
@@ -1388,8 +1545,18 @@ def write_import_to_sabt_excel(
     df_9394: pd.DataFrame | None,
     template_path: str | Path,
     output_path: str | Path,
+    *,
+    streaming: bool = False,
 ) -> None:
-    """نوشتن خروجی ImportToSabt روی قالب موجود بدون تغییر استایل."""
+    """نوشتن خروجی ImportToSabt روی قالب موجود بدون تغییر استایل.
+
+    در حالت ``streaming=True`` قالب فقط یک‌بار برای خواندن هدر، استایل و چیدمان
+    شیت‌ها باز می‌شود و ردیف‌ها به‌صورت دسته‌ای در یک Workbook write-only نوشته
+    می‌شوند؛ زمان و حافظه با تعداد ردیف به‌صورت خطی و با ضریب پایین رشد می‌کند.
+    ویژگی‌های شیت‌های قالب (اعتبارسنجی، ادغام، قالب‌بندی شرطی، تنظیمات چاپ، استایل
+    ردیف‌ها و نام‌های تعریف‌شده؛ فهرست کامل در :func:`_copy_sheet_layout`) منتقل
+    می‌شوند؛ تصویر و نمودار قالب فقط در حالت عادی حفظ می‌شوند.
+    """
 
     from openpyxl import load_workbook
 
@@ -1423,6 +1590,7 @@ def write_import_to_sabt_excel(
         ("9394", df_9394),
         ("Summary", df_summary),
     ]
+    frames: dict[str, pd.DataFrame] = {}
     for name, df in sheets:
         if df is None:
             continue
@@ -1432,6 +1600,13 @@ def write_import_to_sabt_excel(
             ws = workbook.create_sheet(title=name)
         else:
             ws = workbook[name]
+        if streaming:
+            _check_template_headers(ws, df.columns, on_mismatch=_record_header_mismatch)
+            frames[name] = df
+            continue
         _verify_headers(ws, df.columns, on_mismatch=_record_header_mismatch)
         _write_dataframe_to_sheet(ws, df)
+    if streaming:
+        _save_streaming_workbook(workbook, frames, Path(output_path))
+        return
     workbook.save(Path(output_path))
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
-"""بایگانی دترمینیستیک خروجی‌های ImportToSabt در SQLite."""
+"""بایگانی دترمینیستیک خروجی‌های ImportToSabt در SQLite.
+
+هنگام بایگانی برای هر سطر یک کلید هویتی (کد ملی/شناسهٔ دانش‌آموز) و هش محتوا
+ساخته و در جدول ایندکس‌دار ``exporter_snapshot_rows`` ثبت می‌شود؛ مقایسهٔ دو
+Snapshot فقط پرس‌وجوی مجموعه‌ای روی (کلید، هش) است و بلوک ردیف‌ها تنها برای
+سطرهای تغییرکرده و فقط در صورت نیاز باز می‌شود.
+"""
 
 import hashlib
 import json
-from dataclasses import dataclass
-from typing import Iterable, Mapping, Sequence
+from dataclasses import dataclass, replace
+from typing import Mapping, Sequence
 
+import numpy as np
 import pandas as pd
 
 from app.infra.local_database import LocalDatabase
@@ -18,11 +25,19 @@ class ExporterArchiveConfig:
 
     enabled: bool = False
     row_limit: int = 500
+    #: نخستین ستون موجود از این فهرست کلید هویتی سطرها در مقایسه است؛ در نبود
+    #: همهٔ آن‌ها خود هش محتوا کلید می‌شود (فقط افزوده/حذف‌شده، بدون «تغییرکرده»).
+    key_columns: tuple[str, ...] = ("کد ملی", "شناسه دانش آموز", "شمارنده")
 
 
 @dataclass(frozen=True)
 class ExporterDiff:
-    """خروجی مقایسهٔ Snapshot ها شامل ردیف‌های افزوده/حذف‌شده."""
+    """خروجی مقایسهٔ Snapshot ها شامل ردیف‌های افزوده/حذف‌شده/تغییرکرده.
+
+    ``modified`` برای هر کلید مشترک با محتوای متفاوت ``{"key", "before", "after"}``
+    است. با ``include_rows=False`` فهرست‌های ردیف ``None`` می‌مانند و فقط
+    ``*_keys`` پر می‌شوند.
+    """
 
     snapshot_a: dict[str, object]
     snapshot_b: dict[str, object]
@@ -30,6 +45,11 @@ class ExporterDiff:
     row_count_delta: int
     added: list[dict[str, object]] | None
     removed: list[dict[str, object]] | None
+    modified: list[dict[str, object]] | None = None
+    key_column: str | None = None
+    added_keys: list[str] | None = None
+    removed_keys: list[str] | None = None
+    modified_keys: list[str] | None = None
 
 
 class ExporterArchiveRepository:
@@ -40,9 +60,13 @@ class ExporterArchiveRepository:
         *,
         db: LocalDatabase,
         exporter_name: str = "import_to_sabt",
+        key_columns: Sequence[str] | None = None,
     ) -> None:
         self.db = db
         self.exporter_name = exporter_name
+        self.key_columns = tuple(
+            key_columns if key_columns is not None else ExporterArchiveConfig().key_columns
+        )
 
     def archive_snapshot(
         self,
@@ -66,13 +90,11 @@ class ExporterArchiveRepository:
         }
         row_hash = self._hash_payload(payload)
         metadata_json = json.dumps(metadata or {}, ensure_ascii=False, separators=(",", ":"))
-        is_truncated = False
-        rows_json: str | None = None
         row_limit = int(cfg.row_limit)
-        if row_limit >= 0 and len(payload["rows"]) > row_limit:
-            is_truncated = True
-        else:
-            rows_json = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        is_truncated = row_limit >= 0 and len(payload["rows"]) > row_limit
+        key_column, row_hashes = (None, None)
+        if not is_truncated:
+            key_column, row_hashes = _row_hashes(normalized, cfg.key_columns)
         return self.db.insert_exporter_snapshot(
             exporter_name=self.exporter_name,
             exporter_version=exporter_version,
@@ -82,40 +104,118 @@ class ExporterArchiveRepository:
             metadata_json=metadata_json,
             row_hash=row_hash,
             columns_json=json.dumps(payload["columns"], ensure_ascii=False, separators=(",", ":")),
-            rows_json=rows_json,
+            store_rows=not is_truncated,
             row_limit=row_limit,
             is_truncated=is_truncated,
+            row_hashes=row_hashes,
+            row_key_column=key_column,
         )
 
     def list_snapshots(self) -> list[dict[str, object]]:
         """بازگرداندن لیست Snapshot ها به‌صورت دیکشنری."""
 
         rows = self.db.list_exporter_snapshots()
-        return [dict(row) for row in rows]
+        return [self._snapshot_meta(row) for row in rows]
 
-    def compare_snapshots(self, snapshot_a: int, snapshot_b: int) -> ExporterDiff:
-        """مقایسهٔ دو Snapshot با نرمال‌سازی و کنترل truncation."""
+    def compare_snapshots(
+        self, snapshot_a: int, snapshot_b: int, *, include_rows: bool = True
+    ) -> ExporterDiff:
+        """مقایسهٔ دو Snapshot روی (کلید، هش) سطرها با کنترل truncation.
 
-        row_a, df_a = self.db.fetch_exporter_snapshot(snapshot_a)
-        row_b, df_b = self.db.fetch_exporter_snapshot(snapshot_b)
+        بلوک ردیف‌های هر Snapshot فقط وقتی باز می‌شود که ``include_rows`` فعال
+        باشد و سطر تغییرکرده‌ای از آن Snapshot در خروجی لازم باشد.
+        """
+
+        row_a, _ = self.db.fetch_exporter_snapshot(snapshot_a, decode_rows=False)
+        row_b, _ = self.db.fetch_exporter_snapshot(snapshot_b, decode_rows=False)
         if row_a is None or row_b is None:
             raise ValueError("یکی از شناسه‌های Snapshot موجود نیست.")
         if row_a["is_truncated"] or row_b["is_truncated"]:
             raise ValueError("مقایسهٔ Snapshot های ناقص (truncated) پشتیبانی نمی‌شود.")
         row_hash_equal = bool(row_a["row_hash"] == row_b["row_hash"])
         row_count_delta = int(row_b["row_count"]) - int(row_a["row_count"])
-        added: list[dict[str, object]] | None = None
-        removed: list[dict[str, object]] | None = None
-        if df_a is not None and df_b is not None:
-            added, removed = self._diff_records(df_a, df_b)
-        return ExporterDiff(
-            snapshot_a=dict(row_a),
-            snapshot_b=dict(row_b),
+        diff = ExporterDiff(
+            snapshot_a=self._snapshot_meta(row_a),
+            snapshot_b=self._snapshot_meta(row_b),
             row_hash_equal=row_hash_equal,
             row_count_delta=row_count_delta,
-            added=added,
-            removed=removed,
+            added=None,
+            removed=None,
+        )
+        comparable = (
+            row_a["has_rows"]
+            and row_b["has_rows"]
+            and json.loads(row_a["columns_json"]) == json.loads(row_b["columns_json"])
+        )
+        if not comparable:
+            return diff
+        key_a = self._ensure_row_hashes(snapshot_a, row_a)
+        key_b = self._ensure_row_hashes(snapshot_b, row_b)
+        if key_a != key_b:
+            key_b = self._ensure_row_hashes(snapshot_b, row_b, key_column=key_a)
+        changes = (
+            {"added": [], "removed": [], "modified": []}
+            if row_hash_equal
+            else self.db.diff_exporter_row_hashes(snapshot_a, snapshot_b)
         )
+        keyed = key_a is not None
+        added_keys = [key for key, _, _ in changes["added"]]
+        removed_keys = [key for key, _, _ in changes["removed"]]
+        modified_keys = [key for key, _, _ in changes["modified"]]
+        diff = replace(
+            diff,
+            key_column=key_a,
+            added_keys=added_keys if keyed else None,
+            removed_keys=removed_keys if keyed else None,
+            modified_keys=modified_keys if keyed else None,
+        )
+        if not include_rows:
+            return diff
+        frame_a = frame_b = None
+        if changes["removed"] or changes["modified"]:
+            frame_a = self.db.fetch_exporter_snapshot(snapshot_a)[1]
+        if changes["added"] or changes["modified"]:
+            frame_b = self.db.fetch_exporter_snapshot(snapshot_b)[1]
+        return replace(
+            diff,
+            added=_records(frame_b, [pos for _, _, pos in changes["added"]]),
+            removed=_records(frame_a, [pos for _, pos, _ in changes["removed"]]),
+            modified=[
+                {"key": key, "before": before, "after": after}
+                for key, before, after in zip(
+                    modified_keys,
+                    _records(frame_a, [pos for _, pos, _ in changes["modified"]]),
+                    _records(frame_b, [pos for _, _, pos in changes["modified"]]),
+                )
+            ],
+        )
+
+    def _ensure_row_hashes(
+        self,
+        snapshot_id: int,
+        row: Mapping[str, object],
+        *,
+        key_column: str | None = None,
+    ) -> str | None:
+        """کلید هویتی Snapshot؛ برای Snapshot های قدیمی هش سطرها یک بار ساخته و ذخیره می‌شود."""
+
+        stored_key = row["row_key_column"]
+        forced = key_column is not None and key_column != stored_key
+        if not forced and self.db.has_exporter_row_hashes(snapshot_id):
+            return stored_key  # type: ignore[return-value]
+        frame = self.db.fetch_exporter_snapshot(snapshot_id)[1]
+        if frame is None:
+            return None
+        candidates = (key_column,) if forced else self.key_columns
+        resolved, row_hashes = _row_hashes(frame, candidates)
+        self.db.store_exporter_row_hashes(snapshot_id, row_hashes, row_key_column=resolved)
+        return resolved
+
+    @staticmethod
+    def _snapshot_meta(row: Mapping[str, object]) -> dict[str, object]:
+        """متادیتای Snapshot بدون payload دودویی ردیف‌ها."""
+
+        return {key: row[key] for key in row.keys() if key not in ("rows_json", "has_rows")}
 
     @staticmethod
     def _normalize_rows(df: pd.DataFrame) -> pd.DataFrame:
@@ -137,22 +237,56 @@ class ExporterArchiveRepository:
         serialized = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
         return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
 
-    @staticmethod
-    def _diff_records(
-        df_a: pd.DataFrame, df_b: pd.DataFrame
-    ) -> tuple[list[dict[str, object]] | None, list[dict[str, object]] | None]:
-        if list(df_a.columns) != list(df_b.columns):
-            return None, None
-        a_records = ExporterArchiveRepository._rows_to_tuples(df_a)
-        b_records = ExporterArchiveRepository._rows_to_tuples(df_b)
-        added = [dict(zip(df_b.columns, row)) for row in sorted(b_records - a_records)]
-        removed = [dict(zip(df_a.columns, row)) for row in sorted(a_records - b_records)]
-        return added, removed
 
-    @staticmethod
-    def _rows_to_tuples(df: pd.DataFrame) -> set[tuple]:
-        records: Iterable[Sequence[object]] = df.itertuples(index=False, name=None)
-        return {tuple(record) for record in records}
+def _records(frame: pd.DataFrame | None, positions: Sequence[int]) -> list[dict[str, object]]:
+    if frame is None or not positions:
+        return []
+    return frame.iloc[list(positions)].to_dict(orient="records")
+
+
+def _hash_text(value: object) -> str:
+    """نمایش متنی یکتای مقدار برای هش؛ ۱ و ۱٫۰ و True مانند مقایسهٔ پایتون برابرند."""
+
+    if value is None:
+        return "\x00"
+    if isinstance(value, float):
+        if pd.isna(value):
+            return "\x00"
+        if value.is_integer():
+            return str(int(value))
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return str(value)
+
+
+def _hash_column(series: pd.Series) -> pd.Series:
+    if pd.api.types.infer_dtype(series, skipna=False) == "string":
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return series.astype(str)
+    return series.map(_hash_text)
+
+
+def _row_hashes(
+    frame: pd.DataFrame, key_columns: Sequence[str]
+) -> tuple[str | None, list[tuple[str, str, int]]]:
+    """کلید هویتی و هش محتوای هر سطر Snapshot نرمال‌شده.
+
+    کلیدهای تکراری (یا خالی) با شمارهٔ تکرار به ترتیب سطرها یکتا می‌شوند.
+    """
+
+    if frame.empty:
+        return None, []
+    text = pd.DataFrame({column: _hash_column(frame[column]) for column in frame.columns})
+    hashes = pd.util.hash_pandas_object(text, index=False).to_numpy(dtype=np.uint64)
+    digests = pd.Series([format(int(value), "016x") for value in hashes])
+    key_column = next((column for column in key_columns if column in frame.columns), None)
+    base = text[key_column].reset_index(drop=True) if key_column is not None else digests
+    occurrence = base.groupby(base, sort=False).cumcount()
+    keys = base.where(occurrence == 0, base + "#" + occurrence.astype(str))
+    return key_column, list(zip(keys.tolist(), digests.tolist(), range(len(frame))))
 
 
 def _natural_key(value: str) -> tuple:
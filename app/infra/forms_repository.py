@@ -31,11 +31,17 @@ NormalizerFn = Callable[[Sequence[Mapping[str, Any]]], pd.DataFrame]
 
 @dataclass(frozen=True)
 class FormsSyncResult:
-    """خروجی همگام‌سازی فرم شامل دیتافریم و شمارش."""
+    """خروجی همگام‌سازی فرم شامل دیتافریم و شمارش.
+
+    ``changed_count`` تعداد سطرهای واقعاً درج یا به‌روزرسانی‌شده در SQLite است و
+    ``since`` زمانی که از کلاینت درخواست شد (watermark ذخیره‌شده یا ورودی کاربر).
+    """
 
     entries: pd.DataFrame
     fetched_count: int
     persisted_count: int
+    changed_count: int = 0
+    since: datetime | None = None
 
 
 class FormsRepository:
@@ -61,25 +67,42 @@ class FormsRepository:
         self._privacy_hook = privacy_hook
 
     def sync_from_wordpress(
-        self, *, since: datetime | None = None, source: str | None = "wordpress"
+        self,
+        *,
+        since: datetime | None = None,
+        source: str | None = "wordpress",
+        full_refresh: bool = False,
     ) -> FormsSyncResult:
-        """دریافت ورودی‌ها از WordPress، نرمال‌سازی و ذخیره در SQLite."""
+        """دریافت ورودی‌ها از WordPress، نرمال‌سازی و ذخیره در SQLite.
+
+        بدون ``since`` از high-watermark ذخیره‌شدهٔ ``source`` استفاده می‌شود تا فقط
+        ورودی‌های جدید دریافت، نرمال و upsert شوند. ``full_refresh`` همهٔ
+        ورودی‌ها را دوباره دریافت و جدول را جایگزین می‌کند. ورودی‌هایی که پس از
+        ثبت ویرایش شده‌اند تنها در صورتی دیده می‌شوند که کلاینت آن‌ها را در
+        پاسخ ``since`` برگرداند.
+        """
 
         if self._client is None:
             raise ReferenceDataMissingError(
                 table="forms_entries",
                 message="کلاینت WordPress پیکربندی نشده است؛ برای sync کلاینت معتبر تزریق کنید.",
             )
+        if since is None and not full_refresh:
+            since = self._db.fetch_forms_watermark(source)
         raw_entries = self._client.fetch_entries(since=since)
         normalized = self._normalize(raw_entries)
         # حریم خصوصی: در صورت نیاز می‌توان privacy_hook را برای حذف PII اعمال کرد.
         normalized = self._apply_privacy(normalized)
         normalized = self._ensure_normalized_at(normalized)
-        self._db.upsert_forms_entries(normalized, source=source)
+        changed = self._db.upsert_forms_entries(
+            normalized, source=source, full_refresh=full_refresh
+        )
         return FormsSyncResult(
             entries=normalized,
             fetched_count=len(raw_entries),
             persisted_count=int(normalized.shape[0]),
+            changed_count=changed,
+            since=since,
         )
 
     def load_entries(self) -> pd.DataFrame:
@@ -0,0 +1,367 @@
+"""کدگذاری دودویی فشرده، ستونی و نسخه‌دار دیتافریم‌ها برای Snapshot های SQLite.
+
+قالب ``MXF2`` هیچ شیء پایتونی را pickle نمی‌کند و بنابراین با ارتقای pandas/numpy
+یا خواندن payload دستکاری‌شده، کد دلخواه اجرا نمی‌شود:
+
+* سرآیند JSON نسخهٔ قالب، نام ستون‌ها، مشخصات dtype هر ستون و طول بلوک‌ها را
+  نگه می‌دارد؛
+* ستون‌های numpy (عدد، بولی، تاریخ بدون منطقه) بافر خام آرایه به‌همراه رشتهٔ
+  dtype هستند؛ dtype های nullable (``Int64``، ``boolean``، ``Float64``) بافر
+  مقادیر و ماسک، تاریخ‌های دارای منطقهٔ زمانی بافر ``int64`` به‌وقت UTC و
+  ستون‌های ``category`` بافر کدها به‌همراه دسته‌ها هستند؛
+* ستون‌های object/``string`` و هر dtype دیگر به JSON برچسب‌دار تبدیل می‌شوند
+  (``Timestamp``، ``NA``، ``Decimal`` و ... با برچسب حفظ می‌شوند و شیء ناشناخته
+  به متن تبدیل می‌شود؛ tuple داخل مقادیر مانند JSON به فهرست بازمی‌گردد).
+
+هر ستون بلوک zlib جداگانه دارد، پس خواندن چند ستون از یک Snapshot بزرگ فقط همان
+بلوک‌ها را باز می‌کند.
+
+نمونه::
+
+    >>> payload = encode_frame(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+    >>> decode_frame(payload, columns=["b"])["b"].tolist()
+    ['x', 'y']
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import struct
+import zlib
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+__all__ = [
+    "FRAME_MAGIC",
+    "decode_frame",
+    "encode_frame",
+    "encoded_columns",
+    "is_encoded_frame",
+]
+
+FRAME_MAGIC = b"MXF2"
+_FORMAT_VERSION = 2
+_HEADER = struct.Struct("<I")
+_COMPRESSION_LEVEL = 3
+_TAG = "__mxf__"
+_MASKED_KINDS = {"b", "i", "u", "f"}
+
+
+def _json_default(value: object) -> object:
+    """برچسب‌گذاری مقادیری که JSON استاندارد ندارند."""
+
+    if value is pd.NA:
+        return {_TAG: "na"}
+    if value is pd.NaT:
+        return {_TAG: "nat"}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return {_TAG: "ts", "v": value.isoformat()}
+    if isinstance(value, datetime):
+        return {_TAG: "dt", "v": value.isoformat()}
+    if isinstance(value, date):
+        return {_TAG: "date", "v": value.isoformat()}
+    if isinstance(value, time):
+        return {_TAG: "time", "v": value.isoformat()}
+    if isinstance(value, pd.Timedelta):
+        return {_TAG: "td", "v": int(value.value)}
+    if isinstance(value, timedelta):
+        return {_TAG: "td", "v": int(pd.Timedelta(value).value)}
+    if isinstance(value, Decimal):
+        return {_TAG: "dec", "v": str(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {_TAG: "bytes", "v": base64.b64encode(bytes(value)).decode("ascii")}
+    if isinstance(value, (set, frozenset)):
+        return {_TAG: "set", "v": list(value)}
+    return {_TAG: "str", "v": str(value)}
+
+
+def _json_object_hook(obj: Dict[str, Any]) -> object:
+    tag = obj.get(_TAG)
+    if tag is None:
+        return obj
+    if tag == "na":
+        return pd.NA
+    if tag == "nat":
+        return pd.NaT
+    if tag == "ts":
+        return pd.Timestamp(obj["v"])
+    if tag == "dt":
+        return datetime.fromisoformat(obj["v"])
+    if tag == "date":
+        return date.fromisoformat(obj["v"])
+    if tag == "time":
+        return time.fromisoformat(obj["v"])
+    if tag == "td":
+        return pd.Timedelta(obj["v"])
+    if tag == "dec":
+        return Decimal(obj["v"])
+    if tag == "bytes":
+        return base64.b64decode(obj["v"])
+    if tag == "set":
+        return set(obj["v"])
+    if tag == "tuple":
+        return tuple(obj["v"])
+    return obj.get("v")
+
+
+def _dumps(value: object) -> bytes:
+    return json.dumps(value, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+def _loads(payload: bytes) -> object:
+    return json.loads(payload.decode("utf-8"), object_hook=_json_object_hook)
+
+
+def _encode_label(label: object) -> object:
+    """نام ستون/ایندکس؛ tuple ها (ستون‌های چندسطحی) با برچسب حفظ می‌شوند."""
+
+    if isinstance(label, tuple):
+        return {_TAG: "tuple", "v": [_encode_label(part) for part in label]}
+    return label
+
+
+def _object_values(values: Sequence[object]) -> np.ndarray:
+    # fromiter با dtype=object فهرست‌ها/dictها را به بعد جدید باز نمی‌کند.
+    return np.fromiter(values, dtype=object, count=len(values))
+
+
+def _restorable_tz(name: str) -> bool:
+    try:
+        pd.Timestamp(0, tz=name)
+    except (TypeError, ValueError, KeyError):
+        return False
+    return True
+
+
+def _encode_array(array: object) -> Tuple[Dict[str, Any], List[bytes]]:
+    """مشخصات dtype و بافرهای یک آرایهٔ pandas/numpy."""
+
+    if type(array) is pd.arrays.NumpyExtensionArray:
+        array = array.to_numpy()
+    dtype = array.dtype  # type: ignore[attr-defined]
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = np.asarray(array.codes)  # type: ignore[attr-defined]
+        spec, buffers = _encode_array(pd.Index(dtype.categories).array)
+        return (
+            {
+                "kind": "category",
+                "ordered": bool(dtype.ordered),
+                "codes": codes.dtype.str,
+                "categories": spec,
+            },
+            [codes.tobytes(), *buffers],
+        )
+    if isinstance(dtype, pd.DatetimeTZDtype) and _restorable_tz(str(dtype.tz)):
+        values = np.asarray(array.asi8, dtype=np.int64)  # type: ignore[attr-defined]
+        return (
+            {"kind": "datetimetz", "unit": dtype.unit, "tz": str(dtype.tz)},
+            [values.tobytes()],
+        )
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        numpy_dtype = getattr(dtype, "numpy_dtype", None)
+        if isinstance(numpy_dtype, np.dtype) and numpy_dtype.kind in _MASKED_KINDS:
+            mask = np.asarray(pd.isna(array), dtype=np.bool_)
+            values = np.asarray(array.to_numpy(dtype=numpy_dtype, na_value=0))  # type: ignore[attr-defined]
+            return (
+                {"kind": "masked", "dtype": dtype.name, "values": values.dtype.str},
+                [values.tobytes(), mask.tobytes()],
+            )
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        values = np.ascontiguousarray(np.asarray(array))
+        return {"kind": "numpy", "dtype": values.dtype.str}, [values.tobytes()]
+    dtype_name = "object" if isinstance(dtype, np.dtype) else str(dtype)
+    values = np.asarray(array, dtype=object).tolist()
+    return {"kind": "json", "dtype": dtype_name}, [_dumps(values)]
+
+
+def _decode_array(spec: Dict[str, Any], buffers: List[bytes], length: int) -> object:
+    kind = spec["kind"]
+    if kind == "numpy":
+        return np.frombuffer(buffers[0], dtype=np.dtype(spec["dtype"]), count=length).copy()
+    if kind == "masked":
+        values = np.frombuffer(buffers[0], dtype=np.dtype(spec["values"]), count=length)
+        mask = np.frombuffer(buffers[1], dtype=np.bool_, count=length)
+        array = pd.array(values.copy(), dtype=spec["dtype"])
+        array[mask] = pd.NA
+        return array
+    if kind == "datetimetz":
+        values = np.frombuffer(buffers[0], dtype=np.int64, count=length)
+        naive = pd.DatetimeIndex(values.view(f"M8[{spec['unit']}]"))
+        return naive.tz_localize("UTC").tz_convert(spec["tz"]).array
+    if kind == "category":
+        codes = np.frombuffer(buffers[0], dtype=np.dtype(spec["codes"]), count=length)
+        categories_spec = spec["categories"]
+        categories = _decode_array(
+            categories_spec, buffers[1:], _declared_length(categories_spec, buffers[1:])
+        )
+        return pd.Categorical.from_codes(
+            codes.copy(), categories=pd.Index(categories), ordered=spec["ordered"]
+        )
+    values = _object_values(_loads(buffers[0]))  # type: ignore[arg-type]
+    dtype_name = spec.get("dtype", "object")
+    if dtype_name == "object":
+        return values
+    try:
+        return pd.array(values, dtype=dtype_name)
+    except (TypeError, ValueError):
+        return values
+
+
+def _declared_length(spec: Dict[str, Any], buffers: List[bytes]) -> int:
+    """طول آرایهٔ دسته‌ها که فقط از روی بافرها قابل استنتاج است."""
+
+    kind = spec["kind"]
+    if kind == "numpy":
+        return len(buffers[0]) // np.dtype(spec["dtype"]).itemsize
+    if kind == "masked":
+        return len(buffers[0]) // np.dtype(spec["values"]).itemsize
+    if kind == "datetimetz":
+        return len(buffers[0]) // 8
+    return -1
+
+
+def _pack_buffers(buffers: List[bytes]) -> Tuple[bytes, List[int]]:
+    return zlib.compress(b"".join(buffers), _COMPRESSION_LEVEL), [len(b) for b in buffers]
+
+
+def _unpack_buffers(block: memoryview, lengths: List[int]) -> List[bytes]:
+    raw = zlib.decompress(block)
+    buffers: List[bytes] = []
+    offset = 0
+    for size in lengths:
+        buffers.append(raw[offset : offset + size])
+        offset += size
+    return buffers
+
+
+def _encode_index(index: pd.Index) -> Tuple[Dict[str, Any], List[bytes]]:
+    name = _encode_label(index.name)
+    if isinstance(index, pd.RangeIndex):
+        return (
+            {"kind": "range", "start": index.start, "stop": index.stop, "step": index.step,
+             "name": name},
+            [],
+        )
+    if isinstance(index, pd.MultiIndex):
+        index = index.to_flat_index()
+    spec, buffers = _encode_array(index.array)
+    spec["name"] = name
+    return spec, buffers
+
+
+def is_encoded_frame(payload: object) -> bool:
+    """آیا payload با :func:`encode_frame` تولید شده است؟"""
+
+    return isinstance(payload, (bytes, bytearray, memoryview)) and bytes(
+        payload[: len(FRAME_MAGIC)]
+    ) == FRAME_MAGIC
+
+
+def encode_frame(df: pd.DataFrame) -> bytes:
+    """تبدیل ``df`` به بلوک دودویی فشرده (attrs ذخیره نمی‌شوند)."""
+
+    index_spec, index_buffers = _encode_index(df.index)
+    blocks: List[bytes] = []
+    column_specs: List[Dict[str, Any]] = []
+    if index_buffers:
+        block, lengths = _pack_buffers(index_buffers)
+        index_spec["buffers"] = lengths
+        blocks.append(block)
+    for position in range(df.shape[1]):
+        spec, buffers = _encode_array(df.iloc[:, position].array)
+        block, spec["buffers"] = _pack_buffers(buffers)
+        column_specs.append(spec)
+        blocks.append(block)
+    header = _dumps(
+        {
+            "version": _FORMAT_VERSION,
+            "length": len(df),
+            "index": index_spec,
+            "names": [_encode_label(name) for name in df.columns],
+            "columns": column_specs,
+            "sizes": [len(block) for block in blocks],
+        }
+    )
+    return b"".join([FRAME_MAGIC, _HEADER.pack(len(header)), header, *blocks])
+
+
+def _read_header(view: memoryview) -> Tuple[Dict[str, Any], int]:
+    """سرآیند JSON و نقطهٔ شروع نخستین بلوک."""
+
+    if bytes(view[: len(FRAME_MAGIC)]) != FRAME_MAGIC:
+        raise ValueError("payload is not an encoded DataFrame")
+    offset = len(FRAME_MAGIC)
+    (header_size,) = _HEADER.unpack_from(view, offset)
+    offset += _HEADER.size
+    header = _loads(bytes(view[offset : offset + header_size]))
+    if not isinstance(header, dict) or header.get("version") != _FORMAT_VERSION:
+        raise ValueError("unsupported frame format version")
+    return header, offset + header_size
+
+
+def encoded_columns(payload: bytes) -> List[object]:
+    """نام ستون‌های payload بدون بازکردن هیچ بلوکی."""
+
+    header, _ = _read_header(memoryview(payload))
+    return list(header["names"])
+
+
+def decode_frame(payload: bytes, *, columns: Sequence[object] | None = None) -> pd.DataFrame:
+    """بازسازی دیتافریم؛ ``columns`` فقط ستون‌های موجود در فهرست را باز می‌کند."""
+
+    view = memoryview(payload)
+    header, offset = _read_header(view)
+    length: int = header["length"]
+    starts: List[int] = []
+    for size in header["sizes"]:
+        starts.append(offset)
+        offset += size
+    sizes: List[int] = header["sizes"]
+
+    def _buffers(block: int, lengths: List[int]) -> List[bytes]:
+        start = starts[block]
+        return _unpack_buffers(view[start : start + sizes[block]], lengths)
+
+    index_spec: Dict[str, Any] = header["index"]
+    first_column_block = 0
+    if index_spec["kind"] == "range":
+        index = pd.RangeIndex(
+            index_spec["start"], index_spec["stop"], index_spec["step"], name=index_spec["name"]
+        )
+    else:
+        first_column_block = 1
+        index = pd.Index(
+            _decode_array(index_spec, _buffers(0, index_spec["buffers"]), length),
+            name=index_spec["name"],
+            copy=False,
+        )
+    all_columns: List[object] = header["names"]
+    specs: List[Dict[str, Any]] = header["columns"]
+    if columns is None:
+        positions = list(range(len(all_columns)))
+    else:
+        wanted = set(columns)
+        positions = [
+            position for position, name in enumerate(all_columns) if name in wanted
+        ]
+    frame = pd.DataFrame(
+        {
+            slot: _decode_array(
+                specs[position],
+                _buffers(position + first_column_block, specs[position]["buffers"]),
+                length,
+            )
+            for slot, position in enumerate(positions)
+        },
+        index=index,
+        copy=False,
+    )
+    frame.columns = pd.Index([all_columns[position] for position in positions])
+    return frame
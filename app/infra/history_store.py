@@ -13,6 +13,7 @@ import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Mapping
 
 import pandas as pd
 
@@ -155,6 +156,31 @@ def _build_metric_rows(run_id: int, history_metrics: pd.DataFrame | None) -> lis
     return rows
 
 
+def _build_profile_metric_rows(
+    run_id: int, stage_profile: Mapping[str, object] | None
+) -> list[RunMetricRow]:
+    """تبدیل گزارش پروفایلر مراحل به ردیف‌های ``run_metrics`` با پیشوند ``PROFILE``."""
+
+    if not stage_profile:
+        return []
+    stages = stage_profile.get("stages")
+    if not isinstance(stages, Mapping):
+        return []
+    rows: list[RunMetricRow] = []
+    for stage, payload in stages.items():
+        if not isinstance(payload, Mapping):
+            continue
+        for key in ("count", "total_seconds", "mean_seconds", "max_seconds"):
+            rows.append(
+                RunMetricRow(
+                    run_id=run_id,
+                    metric_key=f"PROFILE.{stage}.{key}",
+                    metric_value=float(payload.get(key, 0.0) or 0.0),
+                )
+            )
+    return rows
+
+
 def _build_qa_rows(run_id: int, qa_outcome: QaOutcome | None) -> list[QaSummaryRow]:
     """تبدیل خلاصهٔ QA به ردیف‌های ``qa_summary`` برای درج."""
     if qa_outcome is None:
@@ -177,10 +203,16 @@ def log_allocation_run(
     qa_outcome: QaOutcome | None,
     qa_report: QaReport | None = None,
     trace_snapshot: pd.DataFrame | None = None,
+    stage_profile: Mapping[str, object] | None = None,
+    run_digest: Mapping[str, object] | None = None,
     db: LocalDatabase | None,
 ) -> None:
     """ثبت کامل اجرای تخصیص/RuleEngine در SQLite.
 
+    ``run_digest`` (دایجست دترمینیسم تصمیم‌ها و قاب‌های خروجی) در صورت وجود در
+    جدول ``run_digests`` ذخیره می‌شود تا اجرای بعدی با همان ورودی‌ها با آن
+    مقایسه شود.
+
     اگر ``db`` تهی باشد یا خطایی در لایهٔ ذخیره رخ دهد، تنها لاگ
     ثبت می‌شود و جریان اصلی متوقف نمی‌شود تا تجربهٔ کاربر/GUI دچار
     اختلال نشود.
@@ -201,11 +233,14 @@ def log_allocation_run(
         )
         run_id = db.insert_run(run_record)
         metric_rows = _build_metric_rows(run_id, history_metrics)
+        metric_rows.extend(_build_profile_metric_rows(run_id, stage_profile))
         if metric_rows:
             db.insert_run_metrics(metric_rows)
         qa_rows = _build_qa_rows(run_id, qa_outcome)
         if qa_rows:
             db.insert_qa_summary(qa_rows)
+        if run_digest is not None:
+            db.insert_run_digest(run_id=run_id, digest=run_digest)
         _maybe_store_snapshots(
             db=db,
             run_id=run_id,
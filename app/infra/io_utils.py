@@ -7,6 +7,7 @@
 from __future__ import annotations
 
 import contextlib
+import importlib.util
 import json
 import os
 import re
@@ -25,6 +26,7 @@ from app.core.common.columns import (
     HeaderMode,
     canonicalize_headers,
     ensure_series,
+    header_rename_map,
 )
 from app.core.common.contact_columns import (
     MOBILE_COLUMN_KEYWORDS,
@@ -36,6 +38,7 @@ from app.core.common.contact_columns import (
 from app.core.inspactor_schema_helper import missing_inspactor_columns
 from app.core.policy_loader import get_policy
 from app.infra.excel.exporter import apply_workbook_formatting
+from app.infra.parsed_input_cache import cached_parse
 
 __all__ = [
     "ALT_CODE_COLUMN",
@@ -50,6 +53,8 @@ ALT_CODE_COLUMN = "کد جایگزین"
 _INVALID_SHEET_CHARS = re.compile(r"[\\/*?:\[\]]")
 _STRING_EXPORT_KEYS: Sequence[str] = ("alias", "mentor_id", "postal_code")
 _INT_EXPORT_KEYS: Sequence[str] = ("group_code", "school_code")
+# با هر تغییر در منطق خوانندگان افزایش یابد تا ورودی‌های کش قدیمی استفاده نشوند.
+_READER_VERSION = "1"
 
 
 def _safe_sheet_name(name: str, taken: set[str]) -> str:
@@ -377,10 +382,7 @@ def write_xlsx_atomic(
         os.replace(tmp_path, target_path)
 
 
-def read_excel_first_sheet(path: Path | str | PathLike[str]) -> pd.DataFrame:
-    """خواندن شیت اول فایل Excel به‌صورت DataFrame."""
-
-    source = Path(path)
+def _read_excel_first_sheet_uncached(source: Path) -> pd.DataFrame:
     try:
         with pd.ExcelFile(source) as workbook:
             if not workbook.sheet_names:
@@ -392,66 +394,88 @@ def read_excel_first_sheet(path: Path | str | PathLike[str]) -> pd.DataFrame:
         raise ValueError(f"خطا در خواندن فایل {source}: {exc}") from exc
 
 
-def read_inspactor_workbook(path: Path | str | PathLike[str]) -> pd.DataFrame:
-    """خواندن شیت مناسب Inspactor با تطبیق ستون‌های اجباری Policy.
+def _fast_excel_engine() -> str | None:
+    """موتور سریع‌تر خواندن Excel در صورت نصب (``python-calamine``)."""
 
-    این تابع همهٔ شیت‌های موجود را بررسی می‌کند، هدرها را به حالت فارسی
-    استاندارد تبدیل می‌کند و شیتی را برمی‌گرداند که کمترین ستون مفقود را
-    دارد. اگر شیتی بدون ستون مفقود یافت شود، همان نسخهٔ کاننیکال‌شده برمی‌گردد؛
-    در غیر این صورت کامل‌ترین شیت برگردانده می‌شود و کنترل نهایی اسکیمه به
-    Core سپرده می‌شود.
+    return "calamine" if importlib.util.find_spec("python_calamine") is not None else None
 
-    Args:
-        path: مسیر فایل Inspactor.
 
-    Returns:
-        pd.DataFrame: داده‌های کاننیکال‌شده با اولویت شیت‌های کامل.
+def _inspactor_sheet_headers(
+    workbook: pd.ExcelFile, sheet_name: str
+) -> tuple[list[object], Dict[object, str]]:
+    """فقط ردیف هدر یک شیت را می‌خواند و نگاشت کاننیکال فارسی آن را برمی‌گرداند."""
 
-    Raises:
-        FileNotFoundError: در صورت نبودن فایل.
-        ValueError: اگر هیچ شیتی وجود نداشته باشد یا همهٔ شیت‌ها خالی باشند.
-    """
+    header = workbook.parse(sheet_name, nrows=0)
+    if len(header.columns) == 0:
+        # شیت خالی یا هدر پس از ردیف‌های خالی؛ برای تشخیص دقیق کل شیت خوانده می‌شود.
+        header = workbook.parse(sheet_name)
+    columns = list(header.columns)
+    return columns, header_rename_map(columns, "fa")
 
-    source = Path(path)
+
+def _parse_inspactor_sheet(
+    workbook: pd.ExcelFile,
+    source: Path,
+    sheet_name: str,
+    dtype: Mapping[object, object],
+) -> pd.DataFrame:
+    """پارس کامل شیت انتخاب‌شده با موتور سریع و بازگشت به openpyxl."""
+
+    engine = _fast_excel_engine()
+    if engine is not None:
+        try:
+            return pd.read_excel(source, sheet_name=sheet_name, engine=engine, dtype=dtype)
+        except Exception:  # pragma: no cover - وابسته به نصب موتور اختیاری
+            pass
+    return workbook.parse(sheet_name, dtype=dtype)
+
+
+def _read_inspactor_workbook_uncached(source: Path) -> pd.DataFrame:
     try:
         with pd.ExcelFile(source) as workbook:
             if not workbook.sheet_names:
                 raise ValueError(f"هیچ شیتی در فایل {source} یافت نشد.")
 
-            best_frame: pd.DataFrame | None = None
+            best_sheet: str | None = None
+            best_columns: list[object] = []
             best_missing: list[str] | None = None
 
             for sheet_name in workbook.sheet_names:
-                candidate = workbook.parse(sheet_name)
-                canonical = canonicalize_headers(candidate, header_mode="fa")
-                if ALT_CODE_COLUMN in canonical.columns:
-                    canonical = canonical.copy()
-                    canonical[ALT_CODE_COLUMN] = canonical[ALT_CODE_COLUMN].astype(str)
-
-                missing = missing_inspactor_columns(canonical, REQUIRED_INSPACTOR_COLUMNS)
+                columns, rename = _inspactor_sheet_headers(workbook, sheet_name)
+                canonical_columns = pd.Index([rename.get(col, col) for col in columns])
+                missing = missing_inspactor_columns(
+                    pd.DataFrame(columns=canonical_columns), REQUIRED_INSPACTOR_COLUMNS
+                )
 
                 if best_missing is None or len(missing) < len(best_missing):
-                    best_frame = canonical
+                    best_sheet = sheet_name
+                    best_columns = columns
                     best_missing = list(missing)
 
                 if not missing:
-                    return canonical
+                    break
 
-            if best_frame is None:
+            if best_sheet is None:
                 raise ValueError(f"خطا در خواندن فایل {source}: تمامی شیت‌ها خالی هستند")
-            return best_frame
+
+            rename = header_rename_map(best_columns, "fa")
+            dtype_hints = {
+                col: str for col in best_columns if rename.get(col, col) == ALT_CODE_COLUMN
+            }
+            frame = _parse_inspactor_sheet(workbook, source, best_sheet, dtype_hints)
+            canonical = canonicalize_headers(frame, header_mode="fa")
+            if ALT_CODE_COLUMN in canonical.columns:
+                canonical[ALT_CODE_COLUMN] = canonical[ALT_CODE_COLUMN].astype(str)
+            return canonical
     except FileNotFoundError as exc:
         raise FileNotFoundError(f"فایل یافت نشد: {source}") from exc
     except Exception as exc:  # pragma: no cover - سناریوهای پیش‌بینی‌نشده
         raise ValueError(f"خطا در خواندن فایل {source}: {exc}") from exc
 
 
-def read_crosswalk_workbook(
-    path: Path | str | PathLike[str],
+def _read_crosswalk_workbook_uncached(
+    source: Path,
 ) -> tuple[pd.DataFrame, pd.DataFrame | None]:
-    """خواندن شیت‌های موردنیاز Crosswalk."""
-
-    source = Path(path)
     sheet_groups = "پایه تحصیلی (گروه آزمایشی)"
     try:
         with pd.ExcelFile(source) as workbook:
@@ -468,3 +492,81 @@ def read_crosswalk_workbook(
     except Exception as exc:  # pragma: no cover - سناریوهای پیش‌بینی‌نشده
         raise ValueError(f"خطا در باز کردن Crosswalk: {exc}") from exc
 
+
+def _single_frame(frame: pd.DataFrame) -> list[pd.DataFrame | None]:
+    return [frame]
+
+
+def _first_frame(parts: list[pd.DataFrame | None]) -> pd.DataFrame:
+    frame = parts[0]
+    if frame is None:  # pragma: no cover - ورودی کش همیشه یک قاب دارد
+        raise ValueError("ورودی کش خالی است")
+    return frame
+
+
+def _crosswalk_from_parts(
+    parts: list[pd.DataFrame | None],
+) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+    return _first_frame(parts), parts[1]
+
+
+def read_excel_first_sheet(path: Path | str | PathLike[str]) -> pd.DataFrame:
+    """خواندن شیت اول فایل Excel به‌صورت DataFrame (با کش محتوامحور در صورت فعال بودن)."""
+
+    source = Path(path)
+    return cached_parse(
+        source,
+        reader="excel_first_sheet",
+        version=_READER_VERSION,
+        parse=lambda: _read_excel_first_sheet_uncached(source),
+        to_parts=_single_frame,
+        from_parts=_first_frame,
+    )
+
+
+def read_inspactor_workbook(path: Path | str | PathLike[str]) -> pd.DataFrame:
+    """خواندن شیت مناسب Inspactor با تطبیق ستون‌های اجباری Policy.
+
+    انتخاب شیت فقط با خواندن ردیف هدر هر شیت انجام می‌شود: هدرها به حالت فارسی
+    استاندارد نگاشت می‌شوند و شیتی که کمترین ستون مفقود را دارد (اولین شیت
+    کامل، در صورت وجود) انتخاب می‌شود. سپس تنها همان شیت به‌طور کامل پارس
+    می‌شود (با ``calamine`` در صورت نصب و در غیر این صورت openpyxl) و ستون
+    «کد جایگزین» مستقیماً به‌صورت متن خوانده می‌شود. کنترل نهایی اسکیمه به Core
+    سپرده می‌شود.
+
+    Args:
+        path: مسیر فایل Inspactor.
+
+    Returns:
+        pd.DataFrame: داده‌های کاننیکال‌شده با اولویت شیت‌های کامل.
+
+    Raises:
+        FileNotFoundError: در صورت نبودن فایل.
+        ValueError: اگر هیچ شیتی وجود نداشته باشد یا همهٔ شیت‌ها خالی باشند.
+    """
+
+    source = Path(path)
+    return cached_parse(
+        source,
+        reader="inspactor_workbook",
+        version=_READER_VERSION,
+        parse=lambda: _read_inspactor_workbook_uncached(source),
+        to_parts=_single_frame,
+        from_parts=_first_frame,
+    )
+
+
+def read_crosswalk_workbook(
+    path: Path | str | PathLike[str],
+) -> tuple[pd.DataFrame, pd.DataFrame | None]:
+    """خواندن شیت‌های موردنیاز Crosswalk (با کش محتوامحور در صورت فعال بودن)."""
+
+    source = Path(path)
+    return cached_parse(
+        source,
+        reader="crosswalk_workbook",
+        version=_READER_VERSION,
+        parse=lambda: _read_crosswalk_workbook_uncached(source),
+        to_parts=list,
+        from_parts=_crosswalk_from_parts,
+    )
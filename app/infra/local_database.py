@@ -19,27 +19,47 @@ import io
 import json
 import logging
 import sqlite3
+import zlib
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Any, Callable, Collection, Iterable, List, Literal, Mapping, Sequence, Tuple
 
 import pandas as pd
 from pandas.api.types import is_integer_dtype
 
+from app.infra.columnar_store import (
+    ARROW_FORMAT,
+    ColumnarFrameStore,
+    columnar_backend_available,
+)
 from app.infra.errors import (
     DatabaseOperationError,
     ReferenceDataMissingError,
     SchemaVersionMismatchError,
 )
+from app.infra.frame_codec import (
+    decode_frame,
+    encode_frame,
+    encoded_columns,
+    is_encoded_frame,
+)
 from app.infra.sqlite_config import configure_connection
 from app.infra.sqlite_types import coerce_int_columns as _sqlite_coerce_int_columns
 from app.infra.sqlite_types import coerce_int_like as _sqlite_coerce_int_like
 
-_SCHEMA_VERSION = 7
+_SCHEMA_VERSION = 14
 _POLICY_VERSION = "1.0.3"
 _SSOT_VERSION = "1.0.2"
 _ISO_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+_MIGRATION_BATCH_SIZE = 200
+#: تعداد زمینه‌های اخیر build-matrix که قطعه‌هایشان نگه داشته می‌شود.
+_MATRIX_FRAGMENT_CONTEXTS_KEPT = 3
+
+CacheBackend = Literal["sqlite", "arrow"]
+
+#: نام watermark مصرف forms_entries توسط کش دانش‌آموزان (import-students --from-forms-cache).
+STUDENTS_FROM_FORMS_WATERMARK = "students_cache:forms_entries"
 
 logger = logging.getLogger(__name__)
 
@@ -93,8 +113,21 @@ class LocalDatabase:
     جداول و درج داده در اختیار Infra قرار می‌دهد.
     """
 
-    def __init__(self, path: Path) -> None:
+    def __init__(self, path: Path, *, cache_backend: CacheBackend = "sqlite") -> None:
+        """Args:
+            path: مسیر فایل SQLite.
+            cache_backend: ``"arrow"`` کش دانش‌آموزان/استخر را به‌صورت فایل Arrow IPC
+                کنار پایگاه داده نگه می‌دارد (متادیتا در ``columnar_caches``)؛ در نبود
+                ``pyarrow`` با هشدار به ``"sqlite"`` برمی‌گردد.
+        """
+
+        if cache_backend not in ("sqlite", "arrow"):
+            raise ValueError(f"Unsupported cache backend: {cache_backend!r}")
+        if cache_backend == "arrow" and not columnar_backend_available():
+            logger.warning("pyarrow is not installed; falling back to SQLite cache backend")
+            cache_backend = "sqlite"
         self.path = path
+        self.cache_backend: CacheBackend = cache_backend
 
     def _open_connection(self) -> sqlite3.Connection:
         """ایجاد اتصال پیکربندی‌شده با PRAGMA های یکسان."""
@@ -271,8 +304,8 @@ class LocalDatabase:
     ) -> None:
         """ذخیرهٔ Snapshot تریس تخصیص برای یک اجرا.
 
-        داده‌ها به‌صورت JSON دترمینیستیک ذخیره می‌شوند تا رفتار قابل‌آزمایش
-        باشد و در مرحلهٔ بازیابی بدون تغییر semantics بازسازی شوند.
+        داده‌ها به‌صورت بلوک دودویی فشرده و ستونی (:mod:`app.infra.frame_codec`)
+        ذخیره می‌شوند تا dtype ها حفظ شوند و خواندن بخشی از ستون‌ها ارزان باشد.
         """
 
         if trace_df is None:
@@ -297,9 +330,12 @@ class LocalDatabase:
             raise DatabaseOperationError("ثبت Snapshot تریس با خطا روبه‌رو شد.") from exc
 
     def fetch_trace_snapshot(
-        self, run_id: int
+        self, run_id: int, *, columns: Sequence[str] | None = None
     ) -> tuple[pd.DataFrame | None, pd.DataFrame | None, pd.DataFrame | None]:
-        """بازیابی Snapshot تریس برای یک اجرای مشخص."""
+        """بازیابی Snapshot تریس برای یک اجرای مشخص.
+
+        ``columns`` فقط ستون‌های خواسته‌شدهٔ تریس را از حالت فشرده باز می‌کند.
+        """
 
         with self._open_connection() as conn:
             cursor = conn.execute(
@@ -312,13 +348,33 @@ class LocalDatabase:
             row = cursor.fetchone()
         if row is None:
             return None, None, None
-        trace_df = _safe_deserialize_dataframe(row["trace_json"], label="trace_json")
+        trace_df = _safe_deserialize_dataframe(
+            row["trace_json"], label="trace_json", columns=columns
+        )
         summary_df = _safe_deserialize_dataframe(row["summary_json"], label="summary_json")
         history_df = _safe_deserialize_dataframe(
             row["history_info_json"], label="history_info_json"
         )
         return trace_df, summary_df, history_df
 
+    def fetch_trace_snapshot_columns(self, run_id: int) -> list[str] | None:
+        """نام ستون‌های Snapshot تریس بدون بازکردن داده‌ها.
+
+        برای Snapshot غایب یا JSON قدیمی ``None`` برمی‌گردد.
+        """
+
+        with self._open_connection() as conn:
+            row = conn.execute(
+                "SELECT trace_json FROM trace_snapshots WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        if row is None or not is_encoded_frame(row["trace_json"]):
+            return None
+        try:
+            return [str(name) for name in encoded_columns(row["trace_json"])]
+        except ValueError:
+            logger.exception("Failed to read trace snapshot header for run %s", run_id)
+            return None
+
     def insert_qa_snapshot(
         self,
         *,
@@ -371,6 +427,64 @@ class LocalDatabase:
         )
         return summary_df, details_df
 
+    # ------------------------------------------------------------------
+    # دایجست دترمینیسم اجرا
+    # ------------------------------------------------------------------
+    def insert_run_digest(self, *, run_id: int, digest: Mapping[str, object]) -> None:
+        """ثبت دایجست تصمیم‌ها و قاب‌های خروجی یک اجرا.
+
+        ``digest`` همان ساختار ``DecisionDigest.report()`` به‌همراه کلیدهای
+        ``inputs_digest`` و ``frames`` است؛ فهرست هش تصمیم‌ها فشرده ذخیره می‌شود.
+        """
+
+        decisions = str(digest.get("decisions", "") or "")
+        try:
+            with self._open_connection() as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO run_digests (
+                        run_id, inputs_digest, decision_digest, decision_count,
+                        frames_json, decisions, created_at
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        int(run_id),
+                        str(digest.get("inputs_digest", "")),
+                        str(digest.get("decision_digest", "")),
+                        int(digest.get("decision_count", 0)),  # type: ignore[arg-type]
+                        json.dumps(digest.get("frames") or {}, sort_keys=True),
+                        zlib.compress(decisions.encode("utf-8")),
+                        _to_iso(datetime.utcnow()),
+                    ),
+                )
+                conn.commit()
+        except sqlite3.Error as exc:  # pragma: no cover - مسیر غیرمنتظره
+            raise DatabaseOperationError("ثبت دایجست اجرا با خطا روبه‌رو شد.") from exc
+
+    def fetch_run_digest(self, run_id: int) -> dict[str, object] | None:
+        """بازیابی دایجست ثبت‌شده برای یک اجرا."""
+
+        with self._open_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM run_digests WHERE run_id = ?", (int(run_id),)
+            ).fetchone()
+        return _run_digest_from_row(row)
+
+    def fetch_latest_run_digest(self, inputs_digest: str) -> dict[str, object] | None:
+        """آخرین دایجست ثبت‌شده برای همان ورودی‌ها (یا ``None``)."""
+
+        with self._open_connection() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                """
+                SELECT * FROM run_digests WHERE inputs_digest = ?
+                ORDER BY run_id DESC LIMIT 1
+                """,
+                (inputs_digest,),
+            ).fetchone()
+        return _run_digest_from_row(row)
+
     # ------------------------------------------------------------------
     # Snapshot بایگانی خروجی Exporter
     # ------------------------------------------------------------------
@@ -385,14 +499,22 @@ class LocalDatabase:
         metadata_json: str | None,
         row_hash: str,
         columns_json: str,
-        rows_json: str | None,
+        store_rows: bool,
         row_limit: int,
         is_truncated: bool,
+        row_hashes: Sequence[tuple[str, str, int]] | None = None,
+        row_key_column: str | None = None,
     ) -> int:
-        """درج Snapshot خروجی Exporter در جدول ``exporter_snapshots``."""
+        """درج Snapshot خروجی Exporter در جدول ``exporter_snapshots``.
+
+        در صورت ``store_rows`` ردیف‌ها به‌صورت بلوک فشرده در ``rows_json`` می‌نشینند.
+        ``row_hashes`` (کلید سطر، هش محتوا، جایگاه در بلوک) در همان تراکنش در
+        ``exporter_snapshot_rows`` ثبت می‌شود تا مقایسه‌ها بدون بازکردن بلوک انجام شوند.
+        """
 
         if rows_df is None:
             raise ValueError("دیتافریم خروجی Exporter تهی است؛ ورودی معتبر بدهید.")
+        rows_payload = encode_frame(rows_df) if store_rows else None
         try:
             with self._open_connection() as conn:
                 LocalDatabase._ensure_exporter_archive_schema(conn)
@@ -401,8 +523,8 @@ class LocalDatabase:
                     INSERT INTO exporter_snapshots (
                         exporter_name, exporter_version, run_uuid, run_id,
                         created_at, row_count, row_hash, columns_json,
-                        rows_json, metadata_json, row_limit, is_truncated
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        rows_json, metadata_json, row_limit, is_truncated, row_key_column
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """,
                     (
                         exporter_name,
@@ -413,14 +535,18 @@ class LocalDatabase:
                         int(rows_df.shape[0]),
                         row_hash,
                         columns_json,
-                        rows_json,
+                        rows_payload,
                         metadata_json,
                         int(row_limit),
                         1 if is_truncated else 0,
+                        row_key_column,
                     ),
                 )
+                snapshot_id = int(cursor.lastrowid)
+                if row_hashes:
+                    _insert_exporter_row_hashes(conn, snapshot_id, row_hashes)
                 conn.commit()
-                return int(cursor.lastrowid)
+                return snapshot_id
         except sqlite3.Error as exc:  # pragma: no cover - مسیر غیرمنتظره
             raise DatabaseOperationError("ثبت Snapshot خروجی Exporter ناکام ماند.") from exc
 
@@ -437,20 +563,118 @@ class LocalDatabase:
             )
             return cursor.fetchall()
 
-    def fetch_exporter_snapshot(self, snapshot_id: int) -> tuple[sqlite3.Row | None, pd.DataFrame | None]:
-        """بازیابی Snapshot خروجی Exporter بر اساس شناسه."""
+    def fetch_exporter_snapshot(
+        self, snapshot_id: int, *, decode_rows: bool = True
+    ) -> tuple[sqlite3.Row | None, pd.DataFrame | None]:
+        """بازیابی Snapshot خروجی Exporter بر اساس شناسه.
+
+        با ``decode_rows=False`` فقط متادیتا (و نشانگر وجود بلوک ردیف‌ها در
+        ``has_rows``) خوانده می‌شود و بلوک ``rows_json`` از دیسک خوانده نمی‌شود.
+        """
 
         with self._open_connection() as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                "SELECT * FROM exporter_snapshots WHERE id = ?", (snapshot_id,),
-            )
-            row = cursor.fetchone()
-        if row is None:
-            return None, None
+            if decode_rows:
+                query = "SELECT * FROM exporter_snapshots WHERE id = ?"
+            else:
+                columns = [
+                    str(info[1])
+                    for info in conn.execute("PRAGMA table_info(exporter_snapshots)")
+                    if info[1] != "rows_json"
+                ]
+                query = (
+                    f"SELECT {', '.join(columns)}, rows_json IS NOT NULL AS has_rows "
+                    "FROM exporter_snapshots WHERE id = ?"
+                )
+            row = conn.execute(query, (snapshot_id,)).fetchone()
+        if row is None or not decode_rows:
+            return row, None
         rows_df = _deserialize_exporter_rows(row)
         return row, rows_df
 
+    def has_exporter_row_hashes(self, snapshot_id: int) -> bool:
+        """آیا هش سطرهای Snapshot در ``exporter_snapshot_rows`` ثبت شده است؟"""
+
+        with self._open_connection() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM exporter_snapshot_rows WHERE snapshot_id = ? LIMIT 1",
+                (snapshot_id,),
+            ).fetchone()
+        return row is not None
+
+    def store_exporter_row_hashes(
+        self,
+        snapshot_id: int,
+        row_hashes: Sequence[tuple[str, str, int]],
+        *,
+        row_key_column: str | None,
+    ) -> None:
+        """ثبت (یا بازنویسی) هش سطرهای یک Snapshot موجود؛ برای Snapshot های قدیمی."""
+
+        try:
+            with self._open_connection() as conn:
+                conn.execute(
+                    "DELETE FROM exporter_snapshot_rows WHERE snapshot_id = ?", (snapshot_id,)
+                )
+                conn.execute(
+                    "UPDATE exporter_snapshots SET row_key_column = ? WHERE id = ?",
+                    (row_key_column, snapshot_id),
+                )
+                _insert_exporter_row_hashes(conn, snapshot_id, row_hashes)
+                conn.commit()
+        except sqlite3.Error as exc:  # pragma: no cover - مسیر غیرمنتظره
+            raise DatabaseOperationError("ثبت هش سطرهای Snapshot ناکام ماند.") from exc
+
+    def diff_exporter_row_hashes(
+        self, snapshot_a: int, snapshot_b: int
+    ) -> dict[str, list[tuple[str, int | None, int | None]]]:
+        """اختلاف دو Snapshot روی (کلید، هش) با پرس‌وجوهای ایندکس‌دار.
+
+        Returns:
+            دیکشنری ``added``/``removed``/``modified`` از سه‌تایی‌های
+            ``(row_key, position_a, position_b)`` به ترتیب جایگاه سطر.
+        """
+
+        with self._open_connection() as conn:
+            added = conn.execute(
+                """
+                SELECT b.row_key, NULL, b.row_position FROM exporter_snapshot_rows AS b
+                WHERE b.snapshot_id = ? AND NOT EXISTS (
+                    SELECT 1 FROM exporter_snapshot_rows AS a
+                    WHERE a.snapshot_id = ? AND a.row_key = b.row_key
+                )
+                ORDER BY b.row_position
+                """,
+                (snapshot_b, snapshot_a),
+            ).fetchall()
+            removed = conn.execute(
+                """
+                SELECT a.row_key, a.row_position, NULL FROM exporter_snapshot_rows AS a
+                WHERE a.snapshot_id = ? AND NOT EXISTS (
+                    SELECT 1 FROM exporter_snapshot_rows AS b
+                    WHERE b.snapshot_id = ? AND b.row_key = a.row_key
+                )
+                ORDER BY a.row_position
+                """,
+                (snapshot_a, snapshot_b),
+            ).fetchall()
+            modified = conn.execute(
+                """
+                SELECT a.row_key, a.row_position, b.row_position
+                FROM exporter_snapshot_rows AS a
+                JOIN exporter_snapshot_rows AS b
+                    ON b.snapshot_id = ? AND b.row_key = a.row_key
+                WHERE a.snapshot_id = ? AND a.row_hash <> b.row_hash
+                ORDER BY b.row_position
+                """,
+                (snapshot_b, snapshot_a),
+            ).fetchall()
+        return {
+            "added": [tuple(row) for row in added],
+            "removed": [tuple(row) for row in removed],
+            "modified": [tuple(row) for row in modified],
+        }
+
     @staticmethod
     def _ensure_schema(conn: sqlite3.Connection) -> None:
         """ساخت جدول‌های runs/run_metrics/qa_summary و مراجع به‌صورت idempotent."""
@@ -606,6 +830,11 @@ class LocalDatabase:
             """
         )
         LocalDatabase._ensure_managers_reference_schema(conn)
+        LocalDatabase._ensure_matrix_fragments_schema(conn)
+        LocalDatabase._ensure_columnar_caches_schema(conn)
+        LocalDatabase._ensure_run_digests_schema(conn)
+        LocalDatabase._ensure_sync_watermarks_schema(conn)
+        LocalDatabase._ensure_exporter_archive_schema(conn)
 
     @staticmethod
     def _ensure_managers_reference_schema(conn: sqlite3.Connection) -> None:
@@ -662,6 +891,97 @@ class LocalDatabase:
             column="is_truncated",
             definition="INTEGER NOT NULL DEFAULT 0",
         )
+        _ensure_column_exists(
+            conn, table="exporter_snapshots", column="row_key_column", definition="TEXT"
+        )
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS exporter_snapshot_rows (
+                snapshot_id INTEGER NOT NULL,
+                row_key TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                row_position INTEGER NOT NULL,
+                PRIMARY KEY(snapshot_id, row_key),
+                FOREIGN KEY(snapshot_id) REFERENCES exporter_snapshots(id) ON DELETE CASCADE
+            ) WITHOUT ROWID;
+            """
+        )
+
+    @staticmethod
+    def _ensure_matrix_fragments_schema(conn: sqlite3.Connection) -> None:
+        """ایجاد جدول قطعه‌های ماتریس برای ساخت افزایشی build-matrix."""
+
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS matrix_fragments (
+                fingerprint TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                created_at TEXT NOT NULL,
+                context TEXT,
+                used_at TEXT
+            );
+            """
+        )
+        _ensure_column_exists(conn, table="matrix_fragments", column="context", definition="TEXT")
+        _ensure_column_exists(conn, table="matrix_fragments", column="used_at", definition="TEXT")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_matrix_fragments_context"
+            " ON matrix_fragments(context, used_at)"
+        )
+
+    @staticmethod
+    def _ensure_columnar_caches_schema(conn: sqlite3.Connection) -> None:
+        """ایجاد جدول متادیتای کش‌های ستونی (فایل‌های Arrow کنار پایگاه داده)."""
+
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS columnar_caches (
+                table_name TEXT PRIMARY KEY,
+                file_path TEXT NOT NULL,
+                format TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                columns_json TEXT NOT NULL,
+                written_at TEXT NOT NULL
+            );
+            """
+        )
+
+    @staticmethod
+    def _ensure_run_digests_schema(conn: sqlite3.Connection) -> None:
+        """ایجاد جدول دایجست دترمینیسم اجراها با ایندکس روی دایجست ورودی‌ها."""
+
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS run_digests (
+                run_id INTEGER PRIMARY KEY,
+                inputs_digest TEXT NOT NULL,
+                decision_digest TEXT NOT NULL,
+                decision_count INTEGER NOT NULL,
+                frames_json TEXT NOT NULL,
+                decisions BLOB,
+                created_at TEXT NOT NULL,
+                FOREIGN KEY(run_id) REFERENCES runs(id) ON DELETE CASCADE
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_run_digests_inputs
+            ON run_digests(inputs_digest, run_id);
+            """
+        )
+
+    @staticmethod
+    def _ensure_sync_watermarks_schema(conn: sqlite3.Connection) -> None:
+        """ایجاد جدول high-watermark همگام‌سازی‌های افزایشی (forms و کش دانش‌آموزان)."""
+
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sync_watermarks (
+                name TEXT PRIMARY KEY,
+                high_watermark TEXT,
+                updated_at TEXT NOT NULL,
+                row_count INTEGER
+            );
+            """
+        )
 
     @staticmethod
     def _ensure_schema_meta_table(conn: sqlite3.Connection) -> None:
@@ -740,6 +1060,34 @@ class LocalDatabase:
                 self._migrate_v6_to_v7(conn)
                 version = 7
                 continue
+            if version == 7:
+                self._migrate_v7_to_v8(conn)
+                version = 8
+                continue
+            if version == 8:
+                self._migrate_v8_to_v9(conn)
+                version = 9
+                continue
+            if version == 9:
+                self._migrate_v9_to_v10(conn)
+                version = 10
+                continue
+            if version == 10:
+                self._migrate_v10_to_v11(conn)
+                version = 11
+                continue
+            if version == 11:
+                self._migrate_v11_to_v12(conn)
+                version = 12
+                continue
+            if version == 12:
+                self._migrate_v12_to_v13(conn)
+                version = 13
+                continue
+            if version == 13:
+                self._migrate_v13_to_v14(conn)
+                version = 14
+                continue
             raise SchemaVersionMismatchError(
                 expected_version=_SCHEMA_VERSION,
                 actual_version=version,
@@ -825,6 +1173,104 @@ class LocalDatabase:
             "UPDATE schema_meta SET schema_version = ? WHERE id = 1", (7,),
         )
 
+    def _migrate_v7_to_v8(self, conn: sqlite3.Connection) -> None:
+        """افزودن جدول قطعه‌های ماتریس (build-matrix افزایشی) برای نسخهٔ ۸."""
+
+        LocalDatabase._ensure_matrix_fragments_schema(conn)
+        conn.execute(
+            "UPDATE schema_meta SET schema_version = ? WHERE id = 1", (8,),
+        )
+
+    def _migrate_v8_to_v9(self, conn: sqlite3.Connection) -> None:
+        """افزودن جدول متادیتای کش‌های ستونی برای نسخهٔ ۹."""
+
+        LocalDatabase._ensure_columnar_caches_schema(conn)
+        conn.execute(
+            "UPDATE schema_meta SET schema_version = ? WHERE id = 1", (9,),
+        )
+
+    def _migrate_v9_to_v10(self, conn: sqlite3.Connection) -> None:
+        """تبدیل Snapshot های JSON (orient=split) به بلوک فشردهٔ ستونی برای نسخهٔ ۱۰.
+
+        ردیف‌ها با کرسر و در دسته‌های ``_MIGRATION_BATCH_SIZE`` تایی خوانده و هر دسته
+        جداگانه commit می‌شود تا حافظه و قفل نوشتن به اندازهٔ یک دسته محدود بماند؛
+        ردیف‌های تبدیل‌شده در اجرای دوباره رد می‌شوند. در پایان فضای آزادشده با
+        ``VACUUM`` بازپس گرفته می‌شود.
+        """
+
+        snapshot_columns = {
+            "trace_snapshots": ("run_id", ("trace_json", "summary_json", "history_info_json")),
+            "qa_snapshots": ("run_id", ("qa_summary_json", "qa_details_json")),
+        }
+        converted = 0
+        for table, (key, payload_columns) in snapshot_columns.items():
+            if not _table_exists(conn, table):
+                continue
+            for column in payload_columns:
+                converted += _rewrite_payloads_in_batches(
+                    conn,
+                    f"SELECT {key}, {column} FROM {table}"
+                    f" WHERE {column} IS NOT NULL AND {key} > ? ORDER BY {key} LIMIT ?",
+                    f"UPDATE {table} SET {column} = ? WHERE {key} = ?",
+                    lambda row: _safe_deserialize_dataframe(row[1], label=column),
+                )
+        if _table_exists(conn, "exporter_snapshots"):
+            converted += _rewrite_payloads_in_batches(
+                conn,
+                "SELECT id, rows_json, columns_json FROM exporter_snapshots"
+                " WHERE rows_json IS NOT NULL AND id > ? ORDER BY id LIMIT ?",
+                "UPDATE exporter_snapshots SET rows_json = ? WHERE id = ?",
+                lambda row: _decode_exporter_rows(row[1], row[2]),
+            )
+        conn.execute(
+            "UPDATE schema_meta SET schema_version = ? WHERE id = 1", (10,),
+        )
+        conn.commit()
+        if converted:
+            conn.execute("VACUUM")
+
+    def _migrate_v10_to_v11(self, conn: sqlite3.Connection) -> None:
+        """افزودن جدول دایجست دترمینیسم اجراها برای نسخهٔ ۱۱."""
+
+        LocalDatabase._ensure_run_digests_schema(conn)
+        conn.execute(
+            "UPDATE schema_meta SET schema_version = ? WHERE id = 1", (11,),
+        )
+
+    def _migrate_v11_to_v12(self, conn: sqlite3.Connection) -> None:
+        """افزودن جدول high-watermark همگام‌سازی افزایشی برای نسخهٔ ۱۲."""
+
+        LocalDatabase._ensure_sync_watermarks_schema(conn)
+        conn.execute(
+            "UPDATE schema_meta SET schema_version = ? WHERE id = 1", (12,),
+        )
+
+    def _migrate_v12_to_v13(self, conn: sqlite3.Connection) -> None:
+        """افزودن جدول هش سطرهای Snapshot خروجی Exporter برای نسخهٔ ۱۳.
+
+        Snapshot های قدیمی backfill نمی‌شوند؛ هش سطرهای آن‌ها در نخستین مقایسه
+        ساخته و ذخیره می‌شود.
+        """
+
+        LocalDatabase._ensure_exporter_archive_schema(conn)
+        conn.execute(
+            "UPDATE schema_meta SET schema_version = ? WHERE id = 1", (13,),
+        )
+
+    def _migrate_v13_to_v14(self, conn: sqlite3.Connection) -> None:
+        """افزودن زمینه و زمان استفادهٔ قطعه‌های ماتریس برای نسخهٔ ۱۴.
+
+        payload قطعه‌های قبلی (pickle) دیگر خوانده نمی‌شود؛ این قطعه‌ها حذف و در
+        نخستین ساخت دوباره تولید می‌شوند.
+        """
+
+        if _table_exists(conn, "matrix_fragments"):
+            conn.execute("DELETE FROM matrix_fragments")
+        LocalDatabase._ensure_matrix_fragments_schema(conn)
+        conn.execute(
+            "UPDATE schema_meta SET schema_version = ? WHERE id = 1", (14,),
+        )
+
     # ------------------------------------------------------------------
     # جدول‌های مرجع مدارس / Crosswalk
     # ------------------------------------------------------------------
@@ -951,53 +1397,88 @@ class LocalDatabase:
 
         if df is None:
             raise ValueError("DataFrame دانش‌آموزان تهی است؛ ورودی معتبر بدهید.")
-        self.initialize()
-        _validate_join_keys(df, join_keys)
-        index_statements = _build_index_statements(
-            table_name="students_cache",
-            df=df,
-            unique_candidates=("student_id",),
+        self._store_cache_frame(
+            "students_cache",
+            df,
             join_keys=join_keys,
+            unique_candidates=("student_id",),
+            error_message="ذخیرهٔ کش دانش‌آموزان در SQLite ناکام ماند.",
         )
-        try:
-            with self._open_connection() as conn:
-                self._replace_table_atomic(
-                    conn,
-                    table_name="students_cache",
-                    df=df,
-                    index_statements=index_statements,
-                )
-        except sqlite3.Error as exc:
-            raise DatabaseOperationError(
-                "ذخیرهٔ کش دانش‌آموزان در SQLite ناکام ماند."
-            ) from exc
 
-    def load_students_cache(self, *, join_keys: Sequence[str]) -> pd.DataFrame:
-        """خواندن دیتافریم دانش‌آموزان از کش SQLite با حفظ نوع کلیدها."""
+    def upsert_students_cache_rows(
+        self, df: pd.DataFrame, *, join_keys: Sequence[str]
+    ) -> int:
+        """افزودن/به‌روزرسانی سطرهای ``df`` در کش دانش‌آموزان بر اساس ``student_id``.
+
+        در backend ``sqlite`` فقط همین سطرها با ``ON CONFLICT(student_id) DO UPDATE``
+        در یک تراکنش نوشته می‌شوند؛ در backend ``arrow`` یا نبود کش، کش کامل با
+        ادغام سطرهای جدید بازنویسی می‌شود.
+
+        Returns:
+            تعداد سطرهای درج یا به‌روزرسانی‌شده.
+        """
 
+        if df is None:
+            raise ValueError("DataFrame دانش‌آموزان تهی است؛ ورودی معتبر بدهید.")
+        if "student_id" not in df.columns:
+            raise ValueError("ستون student_id برای به‌روزرسانی افزایشی کش دانش‌آموزان ضروری است.")
+        _validate_join_keys(df, join_keys)
+        self.initialize()
+        error_message = "به‌روزرسانی افزایشی کش دانش‌آموزان با خطا مواجه شد."
         try:
             with self._open_connection() as conn:
-                if not _table_exists(conn, "students_cache"):
-                    raise ReferenceDataMissingError(
-                        table="students_cache",
-                        message="کش دانش‌آموز یافت نشد؛ ابتدا import-students را اجرا کنید.",
+                incremental = (
+                    self._columnar_cache_path(conn, "students_cache") is None
+                    and _table_exists(conn, "students_cache")
+                )
+                if incremental:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute(
+                        "CREATE UNIQUE INDEX IF NOT EXISTS idx_students_cache_student_id_uniq "
+                        'ON students_cache("student_id")'
                     )
-                df = pd.read_sql_query("SELECT * FROM students_cache", conn)
-                if df.empty:
-                    raise ReferenceDataMissingError(
-                        table="students_cache",
-                        message="کش دانش‌آموز خالی است؛ ابتدا import-students را اجرا کنید.",
+                    written = _upsert_rows(
+                        conn, table_name="students_cache", df=df, key="student_id"
                     )
-            return _coerce_int_columns(df, join_keys)
-        except sqlite3.OperationalError as exc:
-            if "no such table" in str(exc).lower():
-                raise ReferenceDataMissingError(
-                    table="students_cache",
-                    message="کش دانش‌آموز یافت نشد؛ ابتدا import-students را اجرا کنید.",
-                ) from exc
-            raise DatabaseOperationError("خواندن کش دانش‌آموزان با خطا مواجه شد.") from exc
+                    conn.commit()
+                    return written
+        except sqlite3.IntegrityError:
+            # کش قدیمی با student_id تکراری: ادغام کامل پایین‌تر آن را یکتا می‌کند.
+            pass
         except sqlite3.Error as exc:
-            raise DatabaseOperationError("خواندن کش دانش‌آموزان با خطا مواجه شد.") from exc
+            raise DatabaseOperationError(error_message) from exc
+        try:
+            existing = self.load_students_cache(join_keys=join_keys)
+        except ReferenceDataMissingError:
+            existing = df.iloc[0:0]
+        merged = pd.concat([existing, df], ignore_index=True)
+        merged = merged.drop_duplicates(subset=["student_id"], keep="last").reset_index(drop=True)
+        self._store_cache_frame(
+            "students_cache",
+            merged,
+            join_keys=join_keys,
+            unique_candidates=("student_id",),
+            error_message=error_message,
+            keep_watermarks=True,
+        )
+        return int(df.shape[0])
+
+    def load_students_cache(
+        self, *, join_keys: Sequence[str], columns: Sequence[str] | None = None
+    ) -> pd.DataFrame:
+        """خواندن دیتافریم دانش‌آموزان از کش (SQLite یا Arrow) با حفظ نوع کلیدها.
+
+        ``columns`` در صورت تعیین فقط همان ستون‌ها را می‌خواند (projection).
+        """
+
+        return self._load_cache_frame(
+            "students_cache",
+            join_keys=join_keys,
+            columns=columns,
+            missing_message="کش دانش‌آموز یافت نشد؛ ابتدا import-students را اجرا کنید.",
+            empty_message="کش دانش‌آموز خالی است؛ ابتدا import-students را اجرا کنید.",
+            error_message="خواندن کش دانش‌آموزان با خطا مواجه شد.",
+        )
 
     def upsert_mentor_pool_cache(
         self, df: pd.DataFrame, *, join_keys: Sequence[str]
@@ -1006,53 +1487,171 @@ class LocalDatabase:
 
         if df is None:
             raise ValueError("DataFrame استخر منتورها تهی است؛ ورودی معتبر بدهید.")
-        self.initialize()
-        _validate_join_keys(df, join_keys)
-        index_statements = _build_index_statements(
-            table_name="mentor_pool_cache",
-            df=df,
+        self._store_cache_frame(
+            "mentor_pool_cache",
+            df,
+            join_keys=join_keys,
             unique_candidates=("mentor_id", "کد کارمندی پشتیبان"),
+            error_message="ذخیرهٔ کش استخر منتورها در SQLite ناکام ماند.",
+        )
+
+    def load_mentor_pool_cache(
+        self, *, join_keys: Sequence[str], columns: Sequence[str] | None = None
+    ) -> pd.DataFrame:
+        """خواندن دیتافریم استخر منتورها از کش (SQLite یا Arrow) با حفظ نوع کلیدها."""
+
+        return self._load_cache_frame(
+            "mentor_pool_cache",
             join_keys=join_keys,
+            columns=columns,
+            missing_message="کش استخر منتورها یافت نشد؛ ابتدا import-mentors را اجرا کنید.",
+            empty_message="کش استخر منتورها خالی است؛ ابتدا import-mentors را اجرا کنید.",
+            error_message="خواندن کش استخر منتورها با خطا مواجه شد.",
         )
+
+    @property
+    def columnar_store(self) -> ColumnarFrameStore:
+        """پوشهٔ فایل‌های Arrow کنار فایل SQLite."""
+
+        return ColumnarFrameStore(self.path.parent / f"{self.path.stem}_columnar")
+
+    def _store_cache_frame(
+        self,
+        table_name: str,
+        df: pd.DataFrame,
+        *,
+        join_keys: Sequence[str],
+        unique_candidates: Sequence[str],
+        error_message: str,
+        keep_watermarks: bool = False,
+    ) -> None:
+        self.initialize()
+        _validate_join_keys(df, join_keys)
         try:
+            if not keep_watermarks:
+                # جایگزینی کامل کش، watermark مصرف‌کننده‌های افزایشی آن را باطل می‌کند.
+                with self._open_connection() as conn:
+                    conn.execute(
+                        "DELETE FROM sync_watermarks WHERE name LIKE ?", (f"{table_name}:%",)
+                    )
+                    conn.commit()
+            file_path = (
+                self._write_columnar_cache(table_name, df)
+                if self.cache_backend == "arrow"
+                else None
+            )
+            if file_path is not None:
+                with self._open_connection() as conn:
+                    conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO columnar_caches(
+                            table_name, file_path, format, row_count, columns_json, written_at
+                        ) VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        (
+                            table_name,
+                            file_path.relative_to(self.path.parent).as_posix(),
+                            ARROW_FORMAT,
+                            int(df.shape[0]),
+                            json.dumps([str(column) for column in df.columns], ensure_ascii=False),
+                            _to_iso(datetime.utcnow()),
+                        ),
+                    )
+                    conn.commit()
+                return
+            index_statements = _build_index_statements(
+                table_name=table_name,
+                df=df,
+                unique_candidates=unique_candidates,
+                join_keys=join_keys,
+            )
             with self._open_connection() as conn:
                 self._replace_table_atomic(
                     conn,
-                    table_name="mentor_pool_cache",
+                    table_name=table_name,
                     df=df,
                     index_statements=index_statements,
                 )
-        except sqlite3.Error as exc:
-            raise DatabaseOperationError(
-                "ذخیرهٔ کش استخر منتورها در SQLite ناکام ماند."
-            ) from exc
+                conn.execute("DELETE FROM columnar_caches WHERE table_name = ?", (table_name,))
+                conn.commit()
+            self.columnar_store.remove(table_name)
+        except (sqlite3.Error, OSError) as exc:
+            raise DatabaseOperationError(error_message) from exc
+
+    def _write_columnar_cache(self, table_name: str, df: pd.DataFrame) -> Path | None:
+        """نوشتن فایل Arrow؛ ``None`` اگر Arrow نوع ستون‌ها را نپذیرد (ذخیره در SQLite)."""
+
+        import pyarrow as pa
+
+        try:
+            return self.columnar_store.write_frame(table_name, df)
+        except pa.ArrowException as exc:
+            logger.warning(
+                "Arrow cannot store %s (%s); falling back to SQLite cache", table_name, exc
+            )
+            return None
+
+    def _columnar_cache_path(self, conn: sqlite3.Connection, table_name: str) -> Path | None:
+        """مسیر فایل Arrow ثبت‌شده؛ مسیرهای نسبی نسبت به پوشهٔ پایگاه داده هستند."""
 
-    def load_mentor_pool_cache(self, *, join_keys: Sequence[str]) -> pd.DataFrame:
-        """خواندن دیتافریم استخر منتورها از کش SQLite با حفظ نوع کلیدها."""
+        if not _table_exists(conn, "columnar_caches"):
+            return None
+        row = conn.execute(
+            "SELECT file_path, format FROM columnar_caches WHERE table_name = ?",
+            (table_name,),
+        ).fetchone()
+        if row is None or row[1] != ARROW_FORMAT:
+            return None
+        return self.path.parent / Path(row[0])
 
+    def _load_cache_frame(
+        self,
+        table_name: str,
+        *,
+        join_keys: Sequence[str],
+        columns: Sequence[str] | None,
+        missing_message: str,
+        empty_message: str,
+        error_message: str,
+    ) -> pd.DataFrame:
         try:
             with self._open_connection() as conn:
-                if not _table_exists(conn, "mentor_pool_cache"):
-                    raise ReferenceDataMissingError(
-                        table="mentor_pool_cache",
-                        message="کش استخر منتورها یافت نشد؛ ابتدا import-mentors را اجرا کنید.",
-                    )
-                df = pd.read_sql_query("SELECT * FROM mentor_pool_cache", conn)
-                if df.empty:
-                    raise ReferenceDataMissingError(
-                        table="mentor_pool_cache",
-                        message="کش استخر منتورها خالی است؛ ابتدا import-mentors را اجرا کنید.",
-                    )
-            return _coerce_int_columns(df, join_keys)
+                columnar_path = self._columnar_cache_path(conn, table_name)
+                if columnar_path is None:
+                    if not _table_exists(conn, table_name):
+                        raise ReferenceDataMissingError(table=table_name, message=missing_message)
+                    projection = "*"
+                    if columns is not None:
+                        existing = {
+                            str(row[1])
+                            for row in conn.execute(f"PRAGMA table_info({table_name})")
+                        }
+                        selected = [column for column in columns if column in existing]
+                        projection = ", ".join(
+                            '"' + column.replace('"', '""') + '"' for column in selected
+                        ) or "*"
+                    df = pd.read_sql_query(f"SELECT {projection} FROM {table_name}", conn)
+            if columnar_path is not None:
+                if not columnar_backend_available() or not columnar_path.exists():
+                    raise ReferenceDataMissingError(table=table_name, message=missing_message)
+                df = ColumnarFrameStore.read_frame(columnar_path, columns=columns)
+            if df.empty:
+                raise ReferenceDataMissingError(table=table_name, message=empty_message)
+            pending = [
+                column
+                for column in join_keys
+                if column in df.columns and str(df[column].dtype) != "Int64"
+            ]
+            if not pending:
+                return df
+            return _coerce_int_columns(df, pending)
         except sqlite3.OperationalError as exc:
             if "no such table" in str(exc).lower():
-                raise ReferenceDataMissingError(
-                    table="mentor_pool_cache",
-                    message="کش استخر منتورها یافت نشد؛ ابتدا import-mentors را اجرا کنید.",
-                ) from exc
-            raise DatabaseOperationError("خواندن کش استخر منتورها با خطا مواجه شد.") from exc
+                raise ReferenceDataMissingError(table=table_name, message=missing_message) from exc
+            raise DatabaseOperationError(error_message) from exc
         except sqlite3.Error as exc:
-            raise DatabaseOperationError("خواندن کش استخر منتورها با خطا مواجه شد.") from exc
+            raise DatabaseOperationError(error_message) from exc
 
     # ------------------------------------------------------------------
     # ورودی‌های فرم وردپرس / Gravity Forms
@@ -1062,12 +1661,22 @@ class LocalDatabase:
         df: pd.DataFrame,
         *,
         source: str | None = None,
-    ) -> None:
+        full_refresh: bool = False,
+    ) -> int:
         """ذخیرهٔ دیتافریم نرمال‌شدهٔ ورودی‌های فرم در جدول ``forms_entries``.
 
         ورودی باید شامل ستون ``entry_id`` باشد. ستون‌های زمان (received_at و
         normalized_at) به‌صورت ISO8601 ذخیره می‌شوند تا بازسازی دترمینیستیک
         آسان شود.
+
+        اگر جدول خالی باشد یا ``full_refresh`` فعال باشد جدول به‌صورت اتمیک
+        جایگزین می‌شود؛ در غیر این صورت فقط سطرهای ورودی با
+        ``INSERT ... ON CONFLICT(entry_id) DO UPDATE`` در یک تراکنش upsert می‌شوند
+        و سطرهایی که جز ``normalized_at`` تغییری ندارند دست‌نخورده می‌مانند. در
+        هر دو حالت بیشینهٔ ``received_at`` به‌عنوان high-watermark منبع ثبت می‌شود.
+
+        Returns:
+            تعداد سطرهای درج یا به‌روزرسانی‌شده.
         """
 
         if df is None:
@@ -1080,33 +1689,97 @@ class LocalDatabase:
             .drop_duplicates(subset=["entry_id"], keep="last")\
             .sort_values(by=["received_at", "entry_id"], kind="stable")\
             .reset_index(drop=True)
+        watermark_name = _forms_watermark_name(source)
+        received = normalized["received_at"].dropna() if "received_at" in normalized else None
+        batch_watermark = str(received.max()) if received is not None and not received.empty else None
 
         self.initialize()
-        index_statements = _build_index_statements(
-            table_name="forms_entries",
-            df=normalized,
-            unique_candidates=("entry_id",),
-            join_keys=(),
-        )
         try:
             with self._open_connection() as conn:
-                self._replace_table_atomic(
-                    conn,
-                    table_name="forms_entries",
-                    df=normalized,
-                    index_statements=index_statements,
+                existing_rows = int(
+                    conn.execute("SELECT COUNT(*) FROM forms_entries").fetchone()[0]
+                ) if _table_exists(conn, "forms_entries") else 0
+                if full_refresh or existing_rows == 0:
+                    self._replace_table_atomic(
+                        conn,
+                        table_name="forms_entries",
+                        df=normalized,
+                        index_statements=_build_index_statements(
+                            table_name="forms_entries",
+                            df=normalized,
+                            unique_candidates=("entry_id",),
+                            join_keys=(),
+                        ),
+                    )
+                    written = int(normalized.shape[0])
+                    previous_watermark = None
+                    # کش دانش‌آموزان پس از جایگزینی کامل باید دوباره کامل ساخته شود.
+                    conn.execute(
+                        "DELETE FROM sync_watermarks WHERE name = ?",
+                        (STUDENTS_FROM_FORMS_WATERMARK,),
+                    )
+                else:
+                    conn.execute("BEGIN IMMEDIATE")
+                    written = _upsert_rows(
+                        conn,
+                        table_name="forms_entries",
+                        df=normalized,
+                        key="entry_id",
+                        ignored_for_change=("normalized_at",),
+                    )
+                    previous_watermark = _fetch_watermark(conn, watermark_name)
+                total_rows = int(conn.execute("SELECT COUNT(*) FROM forms_entries").fetchone()[0])
+                watermark = max(
+                    (value for value in (previous_watermark, batch_watermark) if value),
+                    default=None,
                 )
+                _store_watermark(conn, watermark_name, watermark, row_count=total_rows)
                 self.record_reference_meta(
                     table_name="forms_entries",
                     source=source,
-                    row_count=int(normalized.shape[0]),
+                    row_count=total_rows,
                     conn=conn,
                 )
         except sqlite3.Error as exc:  # pragma: no cover - مسیر غیرمنتظره
             raise DatabaseOperationError("ثبت کش ورودی‌های فرم با خطا مواجه شد.") from exc
+        return written
+
+    def fetch_forms_watermark(self, source: str | None = None) -> datetime | None:
+        """بیشینهٔ ``received_at`` ثبت‌شده برای ``source`` (برای ``since`` همگام‌سازی بعدی)."""
+
+        value = self.fetch_sync_watermark(_forms_watermark_name(source))
+        if not value:
+            return None
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+    def fetch_sync_watermark(self, name: str) -> str | None:
+        """خواندن high-watermark ذخیره‌شده با نام ``name``؛ در نبود آن ``None``."""
+
+        self.initialize()
+        with self._open_connection() as conn:
+            return _fetch_watermark(conn, name)
+
+    def store_sync_watermark(
+        self, name: str, value: str | datetime | None, *, row_count: int | None = None
+    ) -> None:
+        """ثبت high-watermark با نام ``name`` (مقدار ``None`` یعنی همگام‌سازی کامل بعدی).
+
+        مقدار datetime (UTC) به همان قالب ISO ستون‌های زمانی جدول‌ها ذخیره می‌شود.
+        """
+
+        if isinstance(value, datetime):
+            value = _to_iso(value)
+        self.initialize()
+        with self._open_connection() as conn:
+            _store_watermark(conn, name, value, row_count=row_count)
+            conn.commit()
+
+    def load_forms_entries(self, *, changed_since: str | None = None) -> pd.DataFrame:
+        """بازیابی کش ورودی‌های فرم به‌صورت DataFrame.
 
-    def load_forms_entries(self) -> pd.DataFrame:
-        """بازیابی کش ورودی‌های فرم به‌صورت DataFrame."""
+        ``changed_since`` (رشتهٔ ISO مانند ستون ``normalized_at``) فقط سطرهایی را
+        برمی‌گرداند که در همگام‌سازی‌های پس از آن زمان درج یا تغییر کرده‌اند.
+        """
 
         with self._open_connection() as conn:
             if not _table_exists(conn, "forms_entries"):
@@ -1114,9 +1787,17 @@ class LocalDatabase:
                     table="forms_entries",
                     message="جدول forms_entries در پایگاه داده یافت نشد؛ ابتدا sync-forms را اجرا کنید.",
                 )
-            df = pd.read_sql_query(
-                "SELECT * FROM forms_entries ORDER BY received_at ASC, entry_id ASC", conn
-            )
+            if changed_since is None:
+                df = pd.read_sql_query(
+                    "SELECT * FROM forms_entries ORDER BY received_at ASC, entry_id ASC", conn
+                )
+            else:
+                df = pd.read_sql_query(
+                    "SELECT * FROM forms_entries WHERE normalized_at > ? "
+                    "ORDER BY received_at ASC, entry_id ASC",
+                    conn,
+                    params=(changed_since,),
+                )
         if df.empty:
             return df
         restored = _restore_timestamp_columns(
@@ -1124,6 +1805,100 @@ class LocalDatabase:
         )
         return restored
 
+    # ------------------------------------------------------------------
+    # قطعه‌های ماتریس (build-matrix افزایشی)
+    # ------------------------------------------------------------------
+    def load_matrix_fragments(self, fingerprints: Sequence[str]) -> dict[str, bytes]:
+        """بازیابی قطعه‌های ذخیره‌شده برای اثرانگشت‌های داده‌شده."""
+
+        self.initialize()
+        keys = list(dict.fromkeys(str(item) for item in fingerprints))
+        if not keys:
+            return {}
+        with self._open_connection() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS _fragment_keys (fingerprint TEXT PRIMARY KEY)")
+            conn.execute("DELETE FROM _fragment_keys")
+            conn.executemany(
+                "INSERT OR IGNORE INTO _fragment_keys(fingerprint) VALUES (?)",
+                ((key,) for key in keys),
+            )
+            cursor = conn.execute(
+                """
+                SELECT f.fingerprint, f.payload
+                FROM matrix_fragments AS f
+                JOIN _fragment_keys AS k ON k.fingerprint = f.fingerprint
+                """
+            )
+            return {str(row[0]): bytes(row[1]) for row in cursor.fetchall()}
+
+    def save_matrix_fragments(
+        self,
+        fragments: Mapping[str, bytes],
+        *,
+        retain: Collection[str],
+        context: str,
+    ) -> None:
+        """درج قطعه‌های جدید و هرس قطعه‌های استفاده‌نشده.
+
+        فقط قطعه‌های زمینهٔ ``context`` که در ``retain`` نیستند حذف می‌شوند؛ قطعه‌های
+        زمینه‌های دیگر (مثلاً Crosswalk یا Policy دیگر) تا زمانی که جزو
+        ``_MATRIX_FRAGMENT_CONTEXTS_KEPT`` زمینهٔ اخیراً استفاده‌شده باشند می‌مانند.
+        """
+
+        self.initialize()
+        now = _to_iso(datetime.utcnow())
+        try:
+            with self._open_connection() as conn:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS _fragment_keys (fingerprint TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM _fragment_keys")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO _fragment_keys(fingerprint) VALUES (?)",
+                    ((str(key),) for key in retain),
+                )
+                conn.execute(
+                    """
+                    DELETE FROM matrix_fragments
+                    WHERE context = ?
+                      AND fingerprint NOT IN (SELECT fingerprint FROM _fragment_keys)
+                    """,
+                    (context,),
+                )
+                conn.execute(
+                    """
+                    UPDATE matrix_fragments SET used_at = ?, context = ?
+                    WHERE fingerprint IN (SELECT fingerprint FROM _fragment_keys)
+                    """,
+                    (now, context),
+                )
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO matrix_fragments(
+                        fingerprint, payload, created_at, context, used_at
+                    )
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (
+                        (str(key), sqlite3.Binary(payload), now, context, now)
+                        for key, payload in fragments.items()
+                    ),
+                )
+                conn.execute(
+                    """
+                    DELETE FROM matrix_fragments
+                    WHERE context IS NULL OR context NOT IN (
+                        SELECT context FROM matrix_fragments
+                        WHERE context IS NOT NULL
+                        GROUP BY context
+                        ORDER BY MAX(used_at) DESC
+                        LIMIT ?
+                    )
+                    """,
+                    (_MATRIX_FRAGMENT_CONTEXTS_KEPT,),
+                )
+                conn.commit()
+        except sqlite3.Error as exc:  # pragma: no cover - مسیر غیرمنتظره
+            raise DatabaseOperationError("ذخیرهٔ قطعه‌های ماتریس با خطا مواجه شد.") from exc
+
     def record_reference_meta(
         self,
         *,
@@ -1209,6 +1984,39 @@ def _to_iso(dt: datetime) -> str:
     return dt.strftime(_ISO_FORMAT)
 
 
+def _rewrite_payloads_in_batches(
+    conn: sqlite3.Connection,
+    select_sql: str,
+    update_sql: str,
+    decode: Callable[[Tuple[Any, ...]], pd.DataFrame | None],
+) -> int:
+    """بازنویسی payload های قدیمی به :func:`encode_frame` با صفحه‌بندی کلیدی و commit هر دسته.
+
+    ``select_sql`` باید ستون اول را کلید صعودی و ستون دوم را payload برگرداند و دو
+    پارامتر «آخرین کلید» و «اندازهٔ دسته» بگیرد.
+    """
+
+    converted = 0
+    last_key: object = -1
+    while True:
+        cursor = conn.execute(select_sql, (last_key, _MIGRATION_BATCH_SIZE))
+        rows = cursor.fetchmany(_MIGRATION_BATCH_SIZE)
+        if not rows:
+            return converted
+        updates: List[Tuple[bytes, object]] = []
+        for row in rows:
+            if is_encoded_frame(row[1]):
+                continue
+            frame = decode(tuple(row))
+            if frame is not None:
+                updates.append((encode_frame(frame), row[0]))
+        last_key = rows[-1][0]
+        if updates:
+            conn.executemany(update_sql, updates)
+            conn.commit()
+            converted += len(updates)
+
+
 def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
     """بررسی وجود جدول به‌صورت امن و دترمینیستیک."""
 
@@ -1269,31 +2077,49 @@ def _normalize_forms_timestamps(df: pd.DataFrame) -> pd.DataFrame:
     return normalized
 
 
-def _serialize_dataframe(df: pd.DataFrame | None) -> str | None:
-    """سریال‌سازی دترمینیستیک دیتافریم به JSON orient=split."""
+def _serialize_dataframe(df: pd.DataFrame | None) -> bytes | None:
+    """سریال‌سازی دیتافریم به بلوک فشردهٔ ستونی با حفظ dtype."""
 
     if df is None:
         return None
-    normalized = df.copy()
-    return normalized.to_json(
-        orient="split", force_ascii=False, date_format="iso", double_precision=15
-    )
+    return encode_frame(df)
 
 
-def _safe_deserialize_dataframe(payload: str | bytes | None, *, label: str) -> pd.DataFrame | None:
-    """بازسازی امن دیتافریم از JSON ذخیره‌شده به‌صورت split."""
+def _safe_deserialize_dataframe(
+    payload: str | bytes | None,
+    *,
+    label: str,
+    columns: Sequence[str] | None = None,
+) -> pd.DataFrame | None:
+    """بازسازی امن دیتافریم از بلوک فشرده یا JSON قدیمی (orient=split)."""
 
     if payload in (None, b"", ""):
         return None
     try:
+        if is_encoded_frame(payload):
+            return decode_frame(payload, columns=columns)
         if isinstance(payload, bytes):
             payload = payload.decode("utf-8")
-        return pd.read_json(io.StringIO(payload), orient="split")
+        frame = pd.read_json(io.StringIO(payload), orient="split")
+        if columns is not None:
+            frame = frame.loc[:, [column for column in frame.columns if column in set(columns)]]
+        return frame
     except Exception:
         logger.exception("Failed to deserialize DataFrame payload for %s", label)
         return None
 
 
+def _decode_exporter_rows(payload: str | bytes, columns_json: str) -> pd.DataFrame:
+    if is_encoded_frame(payload):
+        return decode_frame(payload)
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8")
+    parsed = json.loads(payload)
+    columns = parsed.get("columns") or json.loads(columns_json)
+    rows = parsed.get("rows") or []
+    return pd.DataFrame(rows, columns=columns)
+
+
 def _deserialize_exporter_rows(row: sqlite3.Row) -> pd.DataFrame | None:
     """بازسازی Snapshot خروجی Exporter بر اساس payload ذخیره‌شده."""
 
@@ -1301,12 +2127,7 @@ def _deserialize_exporter_rows(row: sqlite3.Row) -> pd.DataFrame | None:
     if payload in (None, b"", ""):
         return None
     try:
-        if isinstance(payload, bytes):
-            payload = payload.decode("utf-8")
-        parsed = json.loads(payload)
-        columns = parsed.get("columns") or json.loads(row["columns_json"])
-        rows = parsed.get("rows") or []
-        return pd.DataFrame(rows, columns=columns)
+        return _decode_exporter_rows(payload, row["columns_json"])
     except Exception:
         logger.exception("Failed to deserialize exporter snapshot rows")
         return None
@@ -1323,6 +2144,125 @@ def _normalize_index_name(name: str) -> str:
     return "".join(ch for ch in safe if ch.isalnum() or ch == "_")
 
 
+def _run_digest_from_row(row: sqlite3.Row | None) -> dict[str, object] | None:
+    if row is None:
+        return None
+    payload = row["decisions"]
+    return {
+        "run_id": int(row["run_id"]),
+        "inputs_digest": row["inputs_digest"],
+        "decision_digest": row["decision_digest"],
+        "decision_count": int(row["decision_count"]),
+        "frames": json.loads(row["frames_json"] or "{}"),
+        "decisions": zlib.decompress(payload).decode("utf-8") if payload else "",
+        "created_at": row["created_at"],
+    }
+
+
+def _insert_exporter_row_hashes(
+    conn: sqlite3.Connection, snapshot_id: int, row_hashes: Sequence[tuple[str, str, int]]
+) -> None:
+    conn.executemany(
+        """
+        INSERT INTO exporter_snapshot_rows(snapshot_id, row_key, row_hash, row_position)
+        VALUES (?, ?, ?, ?)
+        """,
+        ((snapshot_id, key, digest, int(position)) for key, digest, position in row_hashes),
+    )
+
+
+def _forms_watermark_name(source: str | None) -> str:
+    return f"forms_entries:{source or 'default'}"
+
+
+def _fetch_watermark(conn: sqlite3.Connection, name: str) -> str | None:
+    row = conn.execute(
+        "SELECT high_watermark FROM sync_watermarks WHERE name = ?", (name,)
+    ).fetchone()
+    return None if row is None else row[0]
+
+
+def _store_watermark(
+    conn: sqlite3.Connection, name: str, value: str | None, *, row_count: int | None
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO sync_watermarks(name, high_watermark, updated_at, row_count)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET
+            high_watermark = excluded.high_watermark,
+            updated_at = excluded.updated_at,
+            row_count = excluded.row_count
+        """,
+        (name, value, _to_iso(datetime.utcnow()), row_count),
+    )
+
+
+def _quote_identifier(name: object) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql_rows(df: pd.DataFrame) -> Iterable[tuple[object, ...]]:
+    """سطرهای ``df`` با مقادیر قابل‌درج در sqlite3 (تهی‌ها ``None``، زمان‌ها ISO)."""
+
+    columns: list[pd.Series] = []
+    for _, series in df.items():
+        if isinstance(series.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(
+            series.dtype
+        ):
+            # همان قالب آداپتور پیش‌فرض sqlite3 که ``DataFrame.to_sql`` استفاده می‌کند.
+            series = series.map(lambda value: value.isoformat(" "), na_action="ignore")
+        series = series.astype(object)
+        columns.append(series.where(series.notna(), None))
+    return zip(*(column.tolist() for column in columns))
+
+
+def _upsert_rows(
+    conn: sqlite3.Connection,
+    *,
+    table_name: str,
+    df: pd.DataFrame,
+    key: str,
+    ignored_for_change: Sequence[str] = (),
+) -> int:
+    """upsert دسته‌ای ``df`` با ``executemany`` روی کلید یکتای ``key``.
+
+    ستون‌های تازه با ``ALTER TABLE ADD COLUMN`` اضافه می‌شوند. سطری که در همهٔ
+    ستون‌ها (به‌جز ``ignored_for_change``) با نسخهٔ ذخیره‌شده برابر است بازنویسی
+    نمی‌شود. تراکنش بر عهدهٔ فراخواننده است.
+    """
+
+    if df.empty:
+        return 0
+    existing = {str(row[1]) for row in conn.execute(f"PRAGMA table_info({table_name})")}
+    for column in df.columns:
+        if str(column) not in existing:
+            conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {_quote_identifier(column)}")
+    names = [_quote_identifier(column) for column in df.columns]
+    updates = [name for column, name in zip(df.columns, names) if column != key]
+    compared = [
+        name
+        for column, name in zip(df.columns, names)
+        if column != key and column not in ignored_for_change
+    ]
+    statement = (
+        f"INSERT INTO {table_name} ({', '.join(names)}) "
+        f"VALUES ({', '.join('?' for _ in names)}) "
+        f"ON CONFLICT({_quote_identifier(key)}) "
+    )
+    if updates:
+        statement += "DO UPDATE SET " + ", ".join(f"{name} = excluded.{name}" for name in updates)
+        if compared:
+            statement += " WHERE " + " OR ".join(
+                f"{table_name}.{name} IS NOT excluded.{name}" for name in compared
+            )
+    else:
+        statement += "DO NOTHING"
+    before = conn.total_changes
+    conn.executemany(statement, _sql_rows(df))
+    return conn.total_changes - before
+
+
 def _ensure_column_exists(
     conn: sqlite3.Connection, *, table: str, column: str, definition: str
 ) -> None:
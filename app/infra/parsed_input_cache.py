@@ -0,0 +1,253 @@
+"""کش محتوامحور خروجی پارس‌شدهٔ فایل‌های Excel ورودی.
+
+خوانندگان :mod:`app.infra.io_utils` (Inspactor، SchoolReport، Crosswalk و
+StudentReport) در صورت فعال بودن کش، DataFrame نهایی را با کلید «هش SHA256
+محتوای فایل + نام خواننده + نسخهٔ خواننده» در یک پوشهٔ محلی با codec ستونی
+:mod:`app.infra.frame_codec` ذخیره می‌کنند. اجرای دوباره روی فایل بدون تغییر
+بدون پارس Excel از همین کش خوانده می‌شود. حجم کل و تعداد ورودی‌ها محدود است و
+قدیمی‌ترین ورودی‌ها (LRU بر اساس زمان آخرین استفاده) حذف می‌شوند.
+
+کش در کتابخانه به‌طور پیش‌فرض خاموش است و با :func:`configure_parsed_input_cache`
+یا متغیر محیطی ``MATRIX_INPUT_CACHE_DIR`` فعال می‌شود؛ CLI و GUI آن را با
+:func:`configure_default_parsed_input_cache` در پوشهٔ کاربر روشن می‌کنند.
+
+مثال::
+
+    >>> configure_parsed_input_cache(Path("/tmp/matrix-cache"))  # doctest: +SKIP
+    >>> df = read_inspactor_workbook("InspactorReport.xlsx")  # doctest: +SKIP
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence, TypeVar
+
+import pandas as pd
+
+from app.infra.frame_codec import FRAME_MAGIC, decode_frame, encode_frame
+
+__all__ = [
+    "CACHE_DIR_ENV",
+    "ParsedInputCache",
+    "cached_parse",
+    "configure_default_parsed_input_cache",
+    "configure_parsed_input_cache",
+    "get_parsed_input_cache",
+]
+
+LOGGER = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "MATRIX_INPUT_CACHE_DIR"
+_DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_DEFAULT_MAX_ENTRIES = 64
+_ENTRY_SUFFIX = ".mxc"
+_PART_HEADER = struct.Struct("<q")
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+T = TypeVar("T")
+
+
+def _file_digest(path: Path) -> str:
+    sha = hashlib.sha256()
+    with path.open("rb") as handle:
+        while True:
+            chunk = handle.read(_HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _encode_parts(parts: Sequence[pd.DataFrame | None]) -> bytes:
+    chunks: list[bytes] = [_PART_HEADER.pack(len(parts))]
+    for part in parts:
+        if part is None:
+            chunks.append(_PART_HEADER.pack(-1))
+            continue
+        payload = encode_frame(part)
+        chunks.append(_PART_HEADER.pack(len(payload)))
+        chunks.append(payload)
+    return b"".join(chunks)
+
+
+def _decode_parts(payload: bytes) -> list[pd.DataFrame | None]:
+    view = memoryview(payload)
+    (count,) = _PART_HEADER.unpack_from(view, 0)
+    offset = _PART_HEADER.size
+    parts: list[pd.DataFrame | None] = []
+    for _ in range(count):
+        (size,) = _PART_HEADER.unpack_from(view, offset)
+        offset += _PART_HEADER.size
+        if size < 0:
+            parts.append(None)
+            continue
+        parts.append(decode_frame(bytes(view[offset : offset + size])))
+        offset += size
+    return parts
+
+
+@dataclass
+class ParsedInputCache:
+    """پوشهٔ کش با سقف حجم/تعداد و حذف LRU."""
+
+    directory: Path
+    max_bytes: int = _DEFAULT_MAX_BYTES
+    max_entries: int = _DEFAULT_MAX_ENTRIES
+
+    def __post_init__(self) -> None:
+        self.directory = Path(self.directory)
+        self._lock = threading.Lock()
+
+    def _entry_path(self, digest: str, reader: str, version: str) -> Path:
+        key = hashlib.sha256(
+            f"{digest}|{reader}|{version}|{FRAME_MAGIC.decode('ascii')}".encode("utf-8")
+        ).hexdigest()
+        return self.directory / f"{key}{_ENTRY_SUFFIX}"
+
+    def load(
+        self, source: Path, reader: str, version: str
+    ) -> tuple[Path, list[pd.DataFrame | None] | None]:
+        entry = self._entry_path(_file_digest(source), reader, version)
+        try:
+            payload = entry.read_bytes()
+        except OSError:
+            return entry, None
+        try:
+            parts = _decode_parts(payload)
+        except Exception as exc:  # ورودی خراب یا قالب قدیمی؛ دوباره پارس می‌شود
+            LOGGER.debug("ورودی کش %s نامعتبر بود: %s", entry, exc)
+            entry.unlink(missing_ok=True)
+            return entry, None
+        try:
+            os.utime(entry)
+        except OSError:  # pragma: no cover - فقط ترتیب LRU اثر می‌پذیرد
+            pass
+        return entry, parts
+
+    def store(self, entry: Path, parts: Sequence[pd.DataFrame | None]) -> None:
+        try:
+            payload = _encode_parts(parts)
+        except Exception as exc:
+            LOGGER.debug("ذخیرهٔ کش برای %s ممکن نشد: %s", entry, exc)
+            return
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(payload)
+                os.replace(tmp_name, entry)
+            except OSError as exc:
+                LOGGER.debug("نوشتن کش %s ناموفق بود: %s", entry, exc)
+                return
+            self._evict()
+
+    def _evict(self) -> None:
+        entries: list[tuple[float, int, Path]] = []
+        for path in self.directory.glob(f"*{_ENTRY_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort(key=lambda item: item[0])
+        total = sum(size for _, size, _ in entries)
+        while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+            _, size, path = entries.pop(0)
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self.directory.glob(f"*{_ENTRY_SUFFIX}"):
+                path.unlink(missing_ok=True)
+
+
+_ACTIVE_CACHE: ParsedInputCache | None = None
+_ENV_CHECKED = False
+
+
+def configure_parsed_input_cache(
+    directory: Path | str | None,
+    *,
+    max_bytes: int = _DEFAULT_MAX_BYTES,
+    max_entries: int = _DEFAULT_MAX_ENTRIES,
+) -> ParsedInputCache | None:
+    """فعال‌سازی (یا با ``None`` غیرفعال‌سازی) کش ورودی‌های پارس‌شده."""
+
+    global _ACTIVE_CACHE, _ENV_CHECKED
+    _ENV_CHECKED = True
+    if directory is None:
+        _ACTIVE_CACHE = None
+    else:
+        _ACTIVE_CACHE = ParsedInputCache(
+            Path(directory), max_bytes=max_bytes, max_entries=max_entries
+        )
+    return _ACTIVE_CACHE
+
+
+def configure_default_parsed_input_cache() -> ParsedInputCache | None:
+    """فعال‌سازی کش در پوشهٔ کاربر (یا مسیر ``MATRIX_INPUT_CACHE_DIR``) برای CLI/GUI.
+
+    مقدار ``off`` برای متغیر محیطی کش را غیرفعال می‌کند.
+    """
+
+    env_dir = os.environ.get(CACHE_DIR_ENV, "").strip()
+    if env_dir.lower() == "off":
+        return configure_parsed_input_cache(None)
+    if env_dir:
+        return configure_parsed_input_cache(env_dir)
+    from app.utils.path_utils import get_user_data_dir
+
+    return configure_parsed_input_cache(get_user_data_dir() / "input_cache")
+
+
+def get_parsed_input_cache() -> ParsedInputCache | None:
+    """کش فعال فعلی؛ در اولین فراخوانی متغیر محیطی نیز بررسی می‌شود."""
+
+    global _ENV_CHECKED
+    if not _ENV_CHECKED:
+        _ENV_CHECKED = True
+        env_dir = os.environ.get(CACHE_DIR_ENV, "").strip()
+        if env_dir and env_dir.lower() != "off":
+            configure_parsed_input_cache(env_dir)
+    return _ACTIVE_CACHE
+
+
+def cached_parse(
+    source: Path,
+    *,
+    reader: str,
+    version: str,
+    parse: Callable[[], T],
+    to_parts: Callable[[T], Sequence[pd.DataFrame | None]],
+    from_parts: Callable[[list[pd.DataFrame | None]], T],
+) -> T:
+    """اجرای ``parse`` با میان‌بر کش برای فایل ``source``.
+
+    اگر کش غیرفعال باشد یا فایل وجود نداشته باشد، ``parse`` مستقیم اجرا می‌شود
+    تا پیام‌های خطای خواننده دست‌نخورده بمانند.
+    """
+
+    cache = get_parsed_input_cache()
+    if cache is None or not source.is_file():
+        return parse()
+    try:
+        entry, parts = cache.load(source, reader, version)
+    except OSError as exc:  # pragma: no cover - خطای خواندن فایل منبع
+        LOGGER.debug("بررسی کش برای %s ممکن نشد: %s", source, exc)
+        return parse()
+    if parts is not None:
+        return from_parts(parts)
+    result = parse()
+    cache.store(entry, to_parts(result))
+    return result
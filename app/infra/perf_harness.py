@@ -3,15 +3,18 @@
 from __future__ import annotations
 
 import argparse
+import json
 import random
 import time
 import tracemalloc
+from pathlib import Path
 from typing import Sequence
 
 import numpy as np
 import pandas as pd
 
 from app.core.allocate_students import allocate_batch
+from app.core.allocation.profiler import StageProfiler, summarize_stage_totals
 from app.core.policy_loader import load_policy
 
 
@@ -54,14 +57,16 @@ def _generate_pool(size: int, *, policy_capacity: int) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
-def _run_once(size: int) -> tuple[float, float]:
+def _run_once(
+    size: int, *, profiler: StageProfiler | None = None
+) -> tuple[float, float]:
     policy = load_policy()
     students = _generate_students(size)
     pool = _generate_pool(size, policy_capacity=5)
 
     tracemalloc.start()
     start = time.perf_counter()
-    allocate_batch(students, pool, policy=policy)
+    allocate_batch(students, pool, policy=policy, profiler=profiler)
     elapsed = time.perf_counter() - start
     _, peak = tracemalloc.get_traced_memory()
     tracemalloc.stop()
@@ -69,6 +74,17 @@ def _run_once(size: int) -> tuple[float, float]:
     return elapsed, peak_mb
 
 
+def _print_stage_profile(report: dict[str, object]) -> None:
+    stages = report.get("stages", {})
+    for stage, seconds in summarize_stage_totals(report):
+        payload = stages[stage]  # type: ignore[index]
+        print(
+            f"  {stage:<16} total={seconds:8.3f}s count={payload['count']:>7} "
+            f"mean={payload['mean_seconds'] * 1000:8.3f}ms "
+            f"max={payload['max_seconds'] * 1000:8.3f}ms"
+        )
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="Performance harness for allocator")
     parser.add_argument("--size", type=int, default=10000, help="تعداد دانش‌آموزان نمونه")
@@ -79,10 +95,28 @@ def main(argv: Sequence[str] | None = None) -> int:
         default=2048.0,
         help="حداکثر حافظهٔ مجاز (مگابایت)",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="نمایش زمان تجمعی هر مرحلهٔ تخصیص (prefilter، ranking، ...)",
+    )
+    parser.add_argument(
+        "--profile-json",
+        default=None,
+        help="مسیر ذخیرهٔ گزارش JSON پروفایل مراحل (فعال‌سازی ضمنی --profile)",
+    )
     args = parser.parse_args(list(argv) if argv is not None else None)
 
-    elapsed, peak_mb = _run_once(args.size)
+    profiler = StageProfiler() if (args.profile or args.profile_json) else None
+    elapsed, peak_mb = _run_once(args.size, profiler=profiler)
     print(f"students={args.size} elapsed={elapsed:.2f}s peak_ram={peak_mb:.1f}MB")
+    if profiler is not None:
+        report = profiler.report()
+        _print_stage_profile(report)
+        if args.profile_json:
+            Path(args.profile_json).write_text(
+                json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
 
     exit_code = 0
     if elapsed > args.budget_seconds:
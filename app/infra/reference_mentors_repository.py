@@ -12,7 +12,7 @@ import pandas as pd
 from app.core.canonical_frames import canonicalize_pool_frame
 from app.core.policy_loader import PolicyConfig
 from app.infra.io_utils import read_inspactor_workbook
-from app.infra.local_database import LocalDatabase, _coerce_int_columns
+from app.infra.local_database import LocalDatabase
 
 
 def import_mentor_pool_from_excel(
@@ -40,8 +40,7 @@ def load_mentor_pool_from_cache(
 ) -> pd.DataFrame:
     """بازیابی استخر منتورها از کش SQLite."""
 
-    cached = db.load_mentor_pool_cache(join_keys=policy.join_keys)
-    return _coerce_int_columns(cached, policy.join_keys)
+    return db.load_mentor_pool_cache(join_keys=policy.join_keys)
 
 
 __all__ = [
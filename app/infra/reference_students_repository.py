@@ -13,7 +13,7 @@ import pandas as pd
 from app.core.canonical_frames import canonicalize_students_frame
 from app.core.policy_loader import PolicyConfig
 from app.infra.io_utils import read_excel_first_sheet
-from app.infra.local_database import LocalDatabase, _coerce_int_columns
+from app.infra.local_database import LocalDatabase
 
 
 def _read_student_source(path: Path) -> pd.DataFrame:
@@ -41,8 +41,7 @@ def import_student_report_from_excel(
 def load_students_from_cache(*, db: LocalDatabase, policy: PolicyConfig) -> pd.DataFrame:
     """بازیابی دیتافریم نرمال‌شدهٔ دانش‌آموزان از SQLite."""
 
-    cached = db.load_students_cache(join_keys=policy.join_keys)
-    return _coerce_int_columns(cached, policy.join_keys)
+    return db.load_students_cache(join_keys=policy.join_keys)
 
 
 __all__ = [
@@ -63,7 +63,8 @@ def coerce_int_columns(
     """کپی دیتافریم با ستون‌های عددی تبدیل‌شده به ``Int64``.
 
     اگر ستونی موجود نباشد نادیده گرفته می‌شود و سایر ستون‌ها دست‌نخورده
-    باقی می‌مانند.
+    باقی می‌مانند. ستون‌هایی که از پیش ``Int64`` هستند بدون تبدیل مجدد عبور
+    می‌کنند.
     """
 
     if df is None:
@@ -71,6 +72,10 @@ def coerce_int_columns(
     coerced = df.copy()
     for col in columns:
         if col in coerced.columns:
+            if str(coerced[col].dtype) == "Int64" and not (
+                fill_values is not None and fill_values.get(col) is not None
+            ):
+                continue
             fill_value = None
             if fill_values is not None and col in fill_values:
                 fill_value = fill_values[col]
@@ -18,6 +18,7 @@ from typing import Any, Callable
 from PySide6.QtWidgets import QApplication, QMessageBox
 from PySide6.QtCore import Qt, QSharedMemory, QTimer, qVersion
 
+from app.core.policy_loader import set_policy_poll_interval
 from app.infra.logging import LoggingContext, configure_logging, install_exception_hook
 from app.ui.fonts import apply_default_font
 from app.utils.path_utils import get_log_directory
@@ -498,6 +499,11 @@ def main() -> int:
         
         # پیکربندی محیط
         setup_environment()
+        # در GUI تغییرات policy.json حداکثر هر دو ثانیه یک‌بار بررسی می‌شود.
+        set_policy_poll_interval(2.0)
+        from app.infra.parsed_input_cache import configure_default_parsed_input_cache
+
+        configure_default_parsed_input_cache()
         
         # بررسی Singleton
         guard = SingleInstanceGuard()
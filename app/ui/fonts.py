@@ -16,8 +16,6 @@ import shutil
 from pathlib import Path
 from typing import TYPE_CHECKING, Iterable, List, Sequence
 
-from app.ui.assets.font_data_vazirmatn import VAZIRMATN_REGULAR_BASE64, VAZIRMATN_REGULAR_TTF_BASE64
-
 if TYPE_CHECKING:  # pragma: no cover
     from PySide6.QtGui import QFont
     from PySide6.QtWidgets import QApplication
@@ -187,6 +185,13 @@ def _materialize_embedded_font(target_dir: Path) -> Path | None:
     if target.exists():
         return target
 
+    # دادهٔ base64 (~۱ مگابایت) فقط وقتی فایل محلی نیست import و decode می‌شود
+    # تا بارگذاری ماژول فونت در مسیر راه‌اندازی سبک بماند.
+    from app.ui.assets.font_data_vazirmatn import (
+        VAZIRMATN_REGULAR_BASE64,
+        VAZIRMATN_REGULAR_TTF_BASE64,
+    )
+
     try:
         base64_data = VAZIRMATN_REGULAR_TTF_BASE64 or VAZIRMATN_REGULAR_BASE64
         data = base64.b64decode(base64_data)
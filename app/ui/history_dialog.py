@@ -1,13 +1,22 @@
-"""دیالوگ مرور تاریخچهٔ QA/Trace ذخیره‌شده در SQLite."""
+"""دیالوگ مرور تاریخچهٔ QA/Trace ذخیره‌شده در SQLite.
+
+جدول‌ها با :class:`DataFrameTableModel` مجازی‌سازی می‌شوند: مدل هیچ کپی از
+دیتافریم نمی‌گیرد، سطرها را صفحه‌به‌صفحه با ``canFetchMore``/``fetchMore`` به
+نما می‌دهد، رشتهٔ نمایشی هر ستون را یک‌جا (برای قاب‌های بزرگ در نخ پس‌زمینه)
+می‌سازد و مرتب‌سازی/فیلتر را به‌صورت برداری روی ستون‌های Snapshot انجام می‌دهد؛
+در نتیجه بازکردن تریس چندصدهزار سطری UI را قفل نمی‌کند.
+"""
 
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
-from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QThread, QTimer, Qt, Signal
 from PySide6.QtWidgets import (
     QDialog,
     QHBoxLayout,
     QLabel,
+    QLineEdit,
     QListWidget,
     QTabWidget,
     QTableView,
@@ -17,58 +26,245 @@ from PySide6.QtWidgets import (
 
 from app.infra.local_database import LocalDatabase
 
+#: تعداد سطرهایی که در هر ``fetchMore`` به نما اضافه می‌شود.
+DEFAULT_PAGE_SIZE = 1_000
+#: از این تعداد سلول به بالا رشته‌های نمایشی در نخ پس‌زمینه ساخته می‌شوند.
+_BACKGROUND_FORMAT_MIN_CELLS = 200_000
+#: ستون‌های تو در توی تریس (dict جزئیات قواعد) که در جدول خوانا نیستند و باز نمی‌شوند.
+TRACE_HIDDEN_COLUMNS = frozenset({"extras"})
+
+
+def _format_value(value: object) -> str:
+    missing = pd.isna(value)
+    if isinstance(missing, (bool, np.bool_)) and missing:
+        return ""
+    return str(value)
+
+
+def _format_column(series: pd.Series) -> np.ndarray:
+    """رشتهٔ نمایشی همهٔ سلول‌های ستون (تهی‌ها رشتهٔ خالی)."""
+
+    text = series.astype(str).to_numpy(dtype=object)
+    missing = series.isna().to_numpy()
+    if missing.any():
+        text[missing] = ""
+    return text
+
+
+class _ColumnFormatter(QThread):
+    """ساخت رشته‌های نمایشی ستون‌ها در نخ جداگانه؛ هر ستون جدا اعلام می‌شود."""
+
+    formatted: Signal = Signal(int, int, object)
+
+    def __init__(self, generation: int, columns: list[pd.Series], parent=None) -> None:
+        super().__init__(parent)
+        self._generation = generation
+        self._columns = columns
+        self._cancelled = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def run(self) -> None:  # type: ignore[override]
+        for position, series in enumerate(self._columns):
+            if self._cancelled:
+                return
+            self.formatted.emit(self._generation, position, _format_column(series))
+
 
 class DataFrameTableModel(QAbstractTableModel):
-    """مدل عمومی فقط‌خواندنی برای نمایش دیتافریم.
+    """مدل مجازی فقط‌خواندنی برای نمایش دیتافریم.
 
     این مدل ستون‌ها را به ترتیب ورودی حفظ می‌کند و مقادیر NaN را به
-    رشتهٔ خالی تبدیل می‌نماید تا نمایش UI پایدار باشد.
+    رشتهٔ خالی تبدیل می‌نماید تا نمایش UI پایدار باشد. ``rowCount`` فقط
+    سطرهای بارگذاری‌شده در نما را برمی‌گرداند؛ :meth:`visible_row_count` تعداد
+    سطرهای پس از فیلتر و :meth:`source_row_count` تعداد کل سطرهاست.
     """
 
-    def __init__(self, df: pd.DataFrame | None = None, parent: QWidget | None = None) -> None:
+    def __init__(
+        self,
+        df: pd.DataFrame | None = None,
+        parent: QWidget | None = None,
+        *,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> None:
         super().__init__(parent)
-        self._df = self._normalize(df)
-
-    @staticmethod
-    def _normalize(df: pd.DataFrame | None) -> pd.DataFrame:
+        self._page_size = max(int(page_size), 1)
+        self._generation = 0
+        self._formatter: _ColumnFormatter | None = None
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._filter_text = ""
+        self._set_frame(df)
+        self._apply_view()
+        self._start_formatting()
+
+    def _set_frame(self, df: pd.DataFrame | None) -> None:
         if df is None:
-            return pd.DataFrame()
-        return df.copy()
+            df = pd.DataFrame()
+        # بدون کپی داده؛ فقط ارجاع ستون‌ها (attrs سنگین در هر دسترسی کپی نشوند).
+        frame = df.copy(deep=False)
+        frame.attrs = {}
+        self._headers = [str(column) for column in frame.columns]
+        self._columns = [frame.iloc[:, position] for position in range(frame.shape[1])]
+        self._text: list[np.ndarray | None] = [None] * len(self._columns)
+        self._codes: dict[int, tuple[np.ndarray, pd.Index]] = {}
+        self._row_total = int(frame.shape[0])
+        self._order = np.arange(self._row_total, dtype=np.int64)
+        self._loaded = min(self._page_size, self._row_total)
 
     def update(self, df: pd.DataFrame | None) -> None:
+        self.shutdown()
+        self.beginResetModel()
+        self._generation += 1
+        self._set_frame(df)
+        self._apply_view()
+        self.endResetModel()
+        self._start_formatting()
+
+    def shutdown(self) -> None:
+        """توقف نخ قالب‌بندی در حال اجرا (پیش از بستن دیالوگ)."""
+
+        if self._formatter is not None:
+            self._formatter.cancel()
+            self._formatter.wait()
+            self._formatter = None
+
+    def source_row_count(self) -> int:
+        return self._row_total
+
+    def visible_row_count(self) -> int:
+        return int(self._order.shape[0])
+
+    def set_filter(self, text: str) -> None:
+        """نمایش سطرهایی که رشتهٔ ``text`` (بدون حساسیت به حروف) در یکی از ستون‌هایشان هست."""
+
+        text = text.strip()
+        if text == self._filter_text:
+            return
+        self._filter_text = text
         self.beginResetModel()
-        self._df = self._normalize(df)
+        self._apply_view()
         self.endResetModel()
 
+    def _column_text(self, column: int) -> np.ndarray:
+        text = self._text[column]
+        if text is None:
+            text = self._text[column] = _format_column(self._columns[column])
+        return text
+
+    def _column_codes(self, column: int) -> tuple[np.ndarray, pd.Index]:
+        """کد و مقادیر یکتای رشته‌های نمایشی ستون؛ فیلتر فقط روی مقادیر یکتا اجرا می‌شود."""
+
+        cached = self._codes.get(column)
+        if cached is None:
+            cached = self._codes[column] = pd.factorize(self._column_text(column))
+        return cached
+
+    def _apply_view(self) -> None:
+        positions = np.arange(self._row_total, dtype=np.int64)
+        if self._filter_text and self._columns:
+            mask = np.zeros(self._row_total, dtype=bool)
+            for column in range(len(self._columns)):
+                codes, uniques = self._column_codes(column)
+                hits = pd.Series(uniques, dtype=object).str.contains(
+                    self._filter_text, case=False, regex=False
+                ).to_numpy(dtype=bool)
+                mask |= hits[codes]
+            positions = positions[mask]
+        if 0 <= self._sort_column < len(self._columns) and positions.size:
+            positions = positions[self._sort_permutation(positions)]
+        self._order = positions
+        self._loaded = min(self._page_size, int(positions.shape[0]))
+
+    def _sort_permutation(self, positions: np.ndarray) -> np.ndarray:
+        ascending = self._sort_order == Qt.AscendingOrder
+        keys = self._columns[self._sort_column].iloc[positions].reset_index(drop=True)
+        try:
+            ordered = keys.sort_values(ascending=ascending, kind="stable", na_position="last")
+        except TypeError:
+            # ستون با انواع ناهمگون: مرتب‌سازی روی رشتهٔ نمایشی.
+            text = pd.Series(self._column_text(self._sort_column)[positions], copy=False)
+            ordered = text.sort_values(ascending=ascending, kind="stable")
+        return ordered.index.to_numpy()
+
+    def _start_formatting(self) -> None:
+        pending = [column for column, text in enumerate(self._text) if text is None]
+        if not pending:
+            return
+        if self._row_total * len(pending) < _BACKGROUND_FORMAT_MIN_CELLS:
+            for column in pending:
+                self._text[column] = _format_column(self._columns[column])
+            return
+        self._formatter = _ColumnFormatter(self._generation, list(self._columns), self)
+        self._formatter.formatted.connect(self._on_column_formatted)
+        self._formatter.start()
+
+    def _on_column_formatted(self, generation: int, column: int, text: object) -> None:
+        if generation != self._generation or column >= len(self._text):
+            return
+        if self._text[column] is None:
+            self._text[column] = text  # type: ignore[assignment]
+        if self._loaded:
+            self.dataChanged.emit(
+                self.index(0, column), self.index(self._loaded - 1, column), [Qt.DisplayRole]
+            )
+
     # Qt overrides ------------------------------------------------------
     def rowCount(self, parent: QModelIndex | None = None) -> int:  # type: ignore[override]
         if parent and parent.isValid():
             return 0
-        return len(self._df.index)
+        return self._loaded
 
     def columnCount(self, parent: QModelIndex | None = None) -> int:  # type: ignore[override]
         if parent and parent.isValid():
             return 0
-        return len(self._df.columns)
+        return len(self._columns)
+
+    def canFetchMore(self, parent: QModelIndex | None = None) -> bool:  # type: ignore[override]
+        if parent and parent.isValid():
+            return False
+        return self._loaded < self._order.shape[0]
+
+    def fetchMore(self, parent: QModelIndex | None = None) -> None:  # type: ignore[override]
+        if parent and parent.isValid():
+            return
+        remaining = int(self._order.shape[0]) - self._loaded
+        if remaining <= 0:
+            return
+        count = min(self._page_size, remaining)
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
 
     def data(self, index: QModelIndex, role: int = Qt.DisplayRole):  # type: ignore[override]
         if not index.isValid() or role not in {Qt.DisplayRole, Qt.EditRole}:
             return None
-        value = self._df.iloc[index.row(), index.column()]
-        if pd.isna(value):
-            return ""
-        return str(value)
+        position = int(self._order[index.row()])
+        text = self._text[index.column()]
+        if text is not None:
+            return text[position]
+        return _format_value(self._columns[index.column()].iat[position])
 
     def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):  # type: ignore[override]
         if role != Qt.DisplayRole:
             return None
         if orientation == Qt.Horizontal:
-            if 0 <= section < len(self._df.columns):
-                return str(self._df.columns[section])
+            if 0 <= section < len(self._headers):
+                return self._headers[section]
         else:
             return str(section + 1)
         return None
 
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:  # type: ignore[override]
+        """مرتب‌سازی پایدار روی مقادیر خام ستون؛ ``column`` منفی ترتیب اصلی را برمی‌گرداند."""
+
+        self._sort_column = int(column)
+        self._sort_order = order
+        self.beginResetModel()
+        self._apply_view()
+        self.endResetModel()
+
 
 class HistoryDialog(QDialog):
     """دیالوگ برای انتخاب اجرا و مشاهدهٔ Snapshot های QA/Trace."""
@@ -88,8 +284,19 @@ class HistoryDialog(QDialog):
         self._trace_view.setEditTriggers(QTableView.NoEditTriggers)
         self._trace_view.horizontalHeader().setStretchLastSection(True)
         self._trace_view.verticalHeader().setVisible(False)
+        # نشانگر -1 یعنی ترتیب اصلی تا کاربر روی سرستونی کلیک کند.
+        self._trace_view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self._trace_view.setSortingEnabled(True)
         self._trace_empty = QLabel("No trace snapshot", self)
         self._trace_empty.setAlignment(Qt.AlignCenter)
+        self._trace_filter = QLineEdit(self)
+        self._trace_filter.setPlaceholderText("Filter trace…")
+        self._trace_filter.setClearButtonEnabled(True)
+        self._trace_filter_timer = QTimer(self)
+        self._trace_filter_timer.setSingleShot(True)
+        self._trace_filter_timer.setInterval(250)
+        self._trace_filter_timer.timeout.connect(self._apply_trace_filter)
+        self._trace_filter.textChanged.connect(self._trace_filter_timer.start)
 
         self._qa_summary_model = DataFrameTableModel()
         self._qa_details_model = DataFrameTableModel()
@@ -121,7 +328,9 @@ class HistoryDialog(QDialog):
 
         right_tabs = QTabWidget(self)
         right_tabs.addTab(self._wrap_widget(self._metrics_view, self._metrics_empty), "Metrics")
-        right_tabs.addTab(self._wrap_widget(self._trace_view, self._trace_empty), "Trace")
+        right_tabs.addTab(
+            self._wrap_widget(self._trace_filter, self._trace_view, self._trace_empty), "Trace"
+        )
         right_tabs.addTab(qa_tabs, "QA")
 
         layout = QHBoxLayout(self)
@@ -131,7 +340,23 @@ class HistoryDialog(QDialog):
         self.resize(1024, 640)
         self._load_runs()
 
+    def done(self, result: int) -> None:  # type: ignore[override]
+        for model in self._models():
+            model.shutdown()
+        super().done(result)
+
     # Helpers -----------------------------------------------------------
+    def _models(self) -> tuple[DataFrameTableModel, ...]:
+        return (
+            self._trace_model,
+            self._qa_summary_model,
+            self._qa_details_model,
+            self._metrics_model,
+        )
+
+    def _apply_trace_filter(self) -> None:
+        self._trace_model.set_filter(self._trace_filter.text())
+
     def _wrap_widget(self, *widgets: QWidget) -> QWidget:
         container = QWidget(self)
         vbox = QVBoxLayout(container)
@@ -174,17 +399,24 @@ class HistoryDialog(QDialog):
         self._update_empty_states()
 
     def _update_empty_states(self) -> None:
-        is_trace_empty = self._trace_model.rowCount() == 0
+        is_trace_empty = self._trace_model.source_row_count() == 0
         self._trace_view.setVisible(not is_trace_empty)
+        self._trace_filter.setVisible(not is_trace_empty)
         self._trace_empty.setVisible(is_trace_empty)
-        is_metrics_empty = self._metrics_model.rowCount() == 0
+        is_metrics_empty = self._metrics_model.source_row_count() == 0
         self._metrics_view.setVisible(not is_metrics_empty)
         self._metrics_empty.setVisible(is_metrics_empty)
 
     def _load_snapshots(
         self, run_id: int
     ) -> tuple[pd.DataFrame | None, pd.DataFrame | None, pd.DataFrame | None]:
-        trace_df, summary_df, history_df = self._db.fetch_trace_snapshot(run_id)
+        available = self._db.fetch_trace_snapshot_columns(run_id)
+        columns = (
+            None
+            if available is None
+            else [name for name in available if name not in TRACE_HIDDEN_COLUMNS]
+        )
+        trace_df, summary_df, history_df = self._db.fetch_trace_snapshot(run_id, columns=columns)
         if trace_df is not None:
             if summary_df is not None:
                 trace_df.attrs["summary_df"] = summary_df
@@ -10,7 +10,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 
-from app.core.policy_loader import PolicyConfig, load_policy
+from app.core.policy_loader import PolicyConfig, load_policy, refresh_policy
 
 
 @lru_cache(maxsize=1)
@@ -24,3 +24,4 @@ def invalidate_policy_cache() -> None:
     """پاک‌سازی کش تا در فراخوانی بعدی policy مجدداً خوانده شود."""
 
     get_cached_policy.cache_clear()
+    refresh_policy()
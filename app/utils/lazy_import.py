@@ -0,0 +1,100 @@
+"""بارگذاری تنبل ماژول‌ها برای کوتاه کردن زمان راه‌اندازی CLI و GUI.
+
+ماژول‌های سنگین (pandas، خروجی‌گیرهای Excel و موتور تخصیص) فقط در اولین
+استفادهٔ واقعی import می‌شوند؛ تا آن لحظه فقط یک شیء نماینده در فضای نام
+ماژول مصرف‌کننده قرار دارد و می‌توان آن را مثل نام اصلی monkeypatch کرد.
+
+مثال::
+
+    >>> pd = lazy_module("pandas")
+    >>> build_matrix = lazy_attr("app.core.build_matrix", "build_matrix")
+    >>> build_matrix(...)  # doctest: +SKIP - اولین فراخوانی ماژول را import می‌کند
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import Any
+
+__all__ = ["LazyAttribute", "LazyModule", "lazy_attr", "lazy_module"]
+
+
+class LazyModule:
+    """نمایندهٔ ماژولی که تا اولین دسترسی به صفت‌هایش import نمی‌شود."""
+
+    __slots__ = ("_lazy_name", "_lazy_target")
+
+    def __init__(self, name: str) -> None:
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_target", None)
+
+    def _resolve(self) -> Any:
+        target = self._lazy_target
+        if target is None:
+            target = import_module(self._lazy_name)
+            object.__setattr__(self, "_lazy_target", target)
+        return target
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._resolve(), item)
+
+    def __dir__(self) -> list[str]:
+        return dir(self._resolve())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_target is not None else "pending"
+        return f"<lazy module {self._lazy_name!r} ({state})>"
+
+
+class LazyAttribute:
+    """نمایندهٔ تابع/کلاسی از یک ماژول که در اولین فراخوانی resolve می‌شود.
+
+    فقط برای نام‌های قابل فراخوانی (توابع، کلاس‌ها و Enumها) مناسب است؛ ثابت‌ها
+    و کلاس‌هایی که در ``isinstance``/``except`` به کار می‌روند باید مستقیم import
+    شوند.
+    """
+
+    __slots__ = ("_lazy_module", "_lazy_name", "_lazy_target")
+
+    def __init__(self, module: str, name: str) -> None:
+        object.__setattr__(self, "_lazy_module", module)
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_target", None)
+
+    def _resolve(self) -> Any:
+        target = self._lazy_target
+        if target is None:
+            target = getattr(import_module(self._lazy_module), self._lazy_name)
+            object.__setattr__(self, "_lazy_target", target)
+        return target
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._resolve(), item)
+
+    def __repr__(self) -> str:
+        return f"<lazy {self._lazy_module}.{self._lazy_name}>"
+
+
+def lazy_module(name: str) -> Any:
+    """ماژول ``name`` را به‌صورت تنبل برمی‌گرداند (اگر قبلاً import شده، خودش را)."""
+
+    import sys
+
+    loaded = sys.modules.get(name)
+    if loaded is not None:
+        return loaded
+    return LazyModule(name)
+
+
+def lazy_attr(module: str, name: str) -> Any:
+    """نام ``name`` از ماژول ``module`` را به‌صورت تنبل برمی‌گرداند."""
+
+    import sys
+
+    loaded = sys.modules.get(module)
+    if loaded is not None and hasattr(loaded, name):
+        return getattr(loaded, name)
+    return LazyAttribute(module, name)
@@ -10,7 +10,7 @@ from app.core.reason.selection_reason import (
     build_selection_reason_rows,
     render_reason,
 )
-from app.core.common.normalization import fa_digitize, safe_truncate
+from app.core.common.normalization import fa_digitize, safe_truncate, sanitize_bidi
 from app.core.common.policy import SelectionReasonLabels, SelectionReasonPolicy
 
 
@@ -205,6 +205,55 @@ def test_fa_digitize_display_only() -> None:
     assert fa_digitize(sample) == "شناسه ۱۲۳ و ظرفیت ۴۵"
 
 
+def test_sanitize_bidi_collapses_zwnj_and_drops_controls() -> None:
+    sample = "پس\u200c\u200e\u200cمدرسه\u200d\u202b ۱\x00\n"
+    assert sanitize_bidi(sample) == "پس\u200cمدرسه ۱\n"
+    assert sanitize_bidi("ساده 12") == "ساده 12"
+
+
+def test_selection_reason_coalesces_fallback_columns() -> None:
+    policy = load_policy()
+    allocations = pd.DataFrame(
+        [
+            {"student_id": "S-1", "mentor_id": "M-1", "student_national_code": "0099"},
+            {"student_id": "S-2", "mentor_id": "M-2", "student_national_code": "0088"},
+            {"student_id": "", "mentor_id": "M-1"},
+        ]
+    )
+    base = {
+        "کدرشته": 1010,
+        "گروه آزمایشی": "ریاضی",
+        "جنسیت": policy.gender_codes.male.value,
+        "دانش آموز فارغ": 0,
+        "مرکز گلستان صدرا": 0,
+        "مالی حکمت بنیاد": 0,
+        "کد مدرسه": 11,
+    }
+    students = pd.DataFrame(
+        [
+            {**base, "student_id": "S-1", "کدملی": None, "نام": "علی", "family_name": "رضایی"},
+            {**base, "student_id": "S-2", "کدملی": "0012", "نام": "  ", "family_name": "نادری"},
+        ]
+    )
+    mentors = pd.DataFrame(
+        [
+            {"mentor_id": "M-1", "mentor_name": None},
+            {"mentor_id": "M-1", "mentor_name": "منتور یک"},
+        ]
+    )
+
+    reasons = build_selection_reason_rows(
+        allocations, students, mentors, policy=policy, logs=None, trace=None
+    )
+
+    assert reasons["student_id"].tolist() == ["S-1", "S-2"]
+    assert reasons["کدملی"].tolist() == ["0099", "0012"]
+    assert reasons["نام"].tolist() == ["علی", ""]
+    assert reasons["نام خانوادگی"].tolist() == ["رضایی", "نادری"]
+    assert "منتور یک" in reasons.iloc[0]["دلیل انتخاب پشتیبان"]
+    assert "M-۲ (M-۲)" in reasons.iloc[1]["دلیل انتخاب پشتیبان"]
+
+
 def test_render_reason_supports_legacy_template_tokens() -> None:
     policy = replace(
         _policy_stub(),
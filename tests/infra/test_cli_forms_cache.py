@@ -101,3 +101,30 @@ def test_cli_sync_forms_missing_client_error(tmp_path: Path):
     db_path = tmp_path / "forms.sqlite"
     args = ["sync-forms", "--local-db", str(db_path)]
     assert cli.main(args) == 2
+
+
+def test_import_students_from_forms_cache_is_incremental(tmp_path: Path, monkeypatch):
+    db_path = tmp_path / "forms.sqlite"
+    policy = load_policy()
+    client = _FakeFormsClient([_sample_entry()])
+    monkeypatch.setattr(cli, "_resolve_forms_client", lambda args: client)
+    sync_args = ["sync-forms", "--local-db", str(db_path)]
+    db = LocalDatabase(db_path)
+
+    assert cli.main(sync_args) == 0
+    first = cli._import_students_from_forms_cache(db=db, policy=policy)
+    assert len(first) == 1
+    assert cli._import_students_from_forms_cache(db=db, policy=policy).empty
+
+    second = _sample_entry()
+    second.update(id="202", date_created="2024-02-02T08:00:00Z")
+    second["fields"] = dict(second["fields"], student_id="ST-2")
+    client.entries = [second]
+    assert cli.main(sync_args) == 0
+
+    delta = cli._import_students_from_forms_cache(db=db, policy=policy)
+    assert list(delta["student_id"]) == ["ST-2"]
+    cached = db.load_students_cache(join_keys=policy.join_keys)
+    assert sorted(cached["student_id"]) == ["ST-1", "ST-2"]
+    for key in policy.join_keys:
+        assert is_integer_dtype(cached[key])
@@ -9,6 +9,7 @@ from app.infra.exporter_archive_repository import (
     ExporterArchiveConfig,
     ExporterArchiveRepository,
 )
+from app.infra import local_database
 from app.infra.local_database import LocalDatabase
 
 
@@ -131,3 +132,87 @@ def test_migration_from_v6_to_v7(tmp_path: Path) -> None:
         assert "is_truncated" in columns
         # existing tables still operable
         conn.execute("INSERT INTO exporter_snapshots (exporter_name, created_at, row_count, row_hash, columns_json, row_limit, is_truncated) VALUES ('x', '2020-01-01T00:00:00Z', 0, 'h', '[]', -1, 0)")
+
+
+def _sabt_rows(count: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "کد ملی": [f"{idx:010d}" for idx in range(count)],
+            "نام": [f"name-{idx}" for idx in range(count)],
+            "کد پستی": [1000 + idx for idx in range(count)],
+        }
+    )
+
+
+def test_compare_reports_modified_rows_by_national_id(tmp_path: Path) -> None:
+    db = LocalDatabase(tmp_path / "local.db")
+    db.initialize()
+    repo = ExporterArchiveRepository(db=db)
+    cfg = ExporterArchiveConfig(enabled=True, row_limit=-1)
+    before = _sabt_rows(5)
+    after = before.drop(index=[0]).copy()
+    after.loc[3, "نام"] = "renamed"
+    after = pd.concat([after, _sabt_rows(6).tail(1)], ignore_index=True)
+
+    snap_a = repo.archive_snapshot(rows_df=before, exporter_version="1", config=cfg)
+    snap_b = repo.archive_snapshot(rows_df=after, exporter_version="1", config=cfg)
+    with db.connect() as conn:
+        stored = conn.execute(
+            "SELECT COUNT(*) FROM exporter_snapshot_rows WHERE snapshot_id = ?", (snap_b,)
+        ).fetchone()[0]
+    assert stored == 5
+
+    result = repo.compare_snapshots(snap_a, snap_b)
+
+    assert result.key_column == "کد ملی"
+    assert result.added_keys == ["0000000005"]
+    assert result.removed_keys == ["0000000000"]
+    assert result.modified_keys == ["0000000003"]
+    assert result.added == [{"کد ملی": "0000000005", "نام": "name-5", "کد پستی": 1005}]
+    assert result.removed[0]["نام"] == "name-0"
+    assert result.modified == [
+        {
+            "key": "0000000003",
+            "before": {"کد ملی": "0000000003", "نام": "name-3", "کد پستی": 1003},
+            "after": {"کد ملی": "0000000003", "نام": "renamed", "کد پستی": 1003},
+        }
+    ]
+
+
+def test_compare_keys_only_skips_payload_decoding(tmp_path: Path, monkeypatch) -> None:
+    db = LocalDatabase(tmp_path / "local.db")
+    db.initialize()
+    repo = ExporterArchiveRepository(db=db)
+    cfg = ExporterArchiveConfig(enabled=True, row_limit=-1)
+    snap_a = repo.archive_snapshot(rows_df=_sabt_rows(3), exporter_version="1", config=cfg)
+    snap_b = repo.archive_snapshot(rows_df=_sabt_rows(4), exporter_version="1", config=cfg)
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("payload should not be decoded")
+
+    monkeypatch.setattr(local_database, "_deserialize_exporter_rows", _fail)
+    result = repo.compare_snapshots(snap_a, snap_b, include_rows=False)
+
+    assert result.added_keys == ["0000000003"]
+    assert result.removed_keys == [] and result.modified_keys == []
+    assert result.added is None
+
+
+def test_compare_backfills_row_hashes_for_legacy_snapshots(tmp_path: Path) -> None:
+    db = LocalDatabase(tmp_path / "local.db")
+    db.initialize()
+    repo = ExporterArchiveRepository(db=db)
+    cfg = ExporterArchiveConfig(enabled=True, row_limit=-1)
+    snap_a = repo.archive_snapshot(rows_df=_sabt_rows(3), exporter_version="1", config=cfg)
+    snap_b = repo.archive_snapshot(rows_df=_sabt_rows(3), exporter_version="1", config=cfg)
+    with db.connect() as conn:
+        conn.execute("DELETE FROM exporter_snapshot_rows WHERE snapshot_id = ?", (snap_a,))
+        conn.execute("UPDATE exporter_snapshots SET row_key_column = NULL WHERE id = ?", (snap_a,))
+        conn.execute("UPDATE exporter_snapshots SET row_hash = 'legacy' WHERE id = ?", (snap_a,))
+        conn.commit()
+
+    result = repo.compare_snapshots(snap_a, snap_b)
+
+    assert db.has_exporter_row_hashes(snap_a)
+    assert result.key_column == "کد ملی"
+    assert result.added == [] and result.removed == [] and result.modified == []
@@ -98,3 +98,56 @@ def test_forms_repository_timestamp_roundtrip_and_privacy_hook(tmp_path: Path):
 
     assert raw[0][0].endswith("Z")
     assert int(version) == _SCHEMA_VERSION
+
+
+def test_forms_repository_incremental_sync_uses_watermark(tmp_path: Path):
+    db = LocalDatabase(tmp_path / "forms.sqlite")
+    db.initialize()
+    client = _FakeFormsClient(_sample_entries())
+    repo = FormsRepository(client=client, db=db)
+    repo.sync_from_wordpress()
+
+    updated = dict(_sample_entries()[1], fields={"student_id": "S2", "کدرشته": 1300, "جنسیت": 0})
+    client.entries = [
+        updated,
+        {
+            "id": "13",
+            "form_id": "1",
+            "date_created": "2024-01-03T00:00:00Z",
+            "fields": {"student_id": "S3", "کدرشته": 1203, "جنسیت": 1, "شهر": "قم"},
+        },
+    ]
+    result = repo.sync_from_wordpress()
+
+    assert client.requested_since == datetime.fromisoformat("2024-01-02T00:00:00+00:00")
+    assert result.changed_count == 2
+    cached = repo.load_entries()
+    assert list(cached["entry_id"]) == ["11", "12", "13"]
+    assert cached.set_index("entry_id").loc["12", "کدرشته"] == 1300
+    assert cached["شهر"].isna().tolist() == [True, True, False]
+    assert db.fetch_forms_watermark("wordpress") == datetime.fromisoformat(
+        "2024-01-03T00:00:00+00:00"
+    )
+
+    unchanged = repo.sync_from_wordpress()
+    assert unchanged.changed_count == 0
+    latest = cached["normalized_at"].max().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    assert db.load_forms_entries(changed_since=latest).empty
+
+
+def test_forms_repository_full_refresh_replaces_table(tmp_path: Path):
+    db = LocalDatabase(tmp_path / "forms.sqlite")
+    db.initialize()
+    client = _FakeFormsClient(_sample_entries())
+    repo = FormsRepository(client=client, db=db)
+    repo.sync_from_wordpress()
+
+    client.entries = _sample_entries()[:1]
+    result = repo.sync_from_wordpress(full_refresh=True)
+
+    assert client.requested_since is None
+    assert result.changed_count == 1
+    assert list(repo.load_entries()["entry_id"]) == ["11"]
+    assert db.fetch_forms_watermark("wordpress") == datetime.fromisoformat(
+        "2024-01-01T00:00:00+00:00"
+    )
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+import struct
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from app.infra.frame_codec import decode_frame, encode_frame, encoded_columns
+
+
+def test_roundtrip_preserves_numpy_nullable_and_categorical_dtypes() -> None:
+    frame = pd.DataFrame(
+        {
+            "count": np.arange(3, dtype=np.int64),
+            "ratio": [1.5, np.nan, 2.0],
+            "flag": [True, False, True],
+            "mentor_id": pd.array([7, None, 9], dtype="Int64"),
+            "passed": pd.array([True, None, False], dtype="boolean"),
+            "name": pd.array(["a", None, "c"], dtype="string"),
+            "stage": pd.Categorical(["type", "group", "type"]),
+            "at": pd.to_datetime(["2024-01-01", None, "2024-03-01"]),
+            "at_tz": pd.to_datetime(["2024-01-01", "2024-02-01", None]).tz_localize(
+                "Asia/Tehran"
+            ),
+        },
+        index=pd.RangeIndex(10, 13),
+    )
+
+    restored = decode_frame(encode_frame(frame))
+
+    assert_frame_equal(restored, frame)
+
+
+def test_object_columns_roundtrip_without_pickle() -> None:
+    frame = pd.DataFrame(
+        {
+            "mixed": ["x", 1, None],
+            "extras": [{"rule": "ok"}, [1, 2], {"nested": {"a": 1}}],
+            "tagged": [pd.Timestamp("2024-01-01"), pd.NA, Decimal("1.5")],
+            "plain": [date(2024, 1, 1), b"raw", 2.5],
+        },
+        index=pd.Index(["r1", "r2", "r3"], name="key"),
+    )
+
+    payload = encode_frame(frame)
+    restored = decode_frame(payload)
+
+    (header_size,) = struct.unpack_from("<I", payload, 4)
+    header = json.loads(payload[8 : 8 + header_size])
+    assert [spec["kind"] for spec in header["columns"]] == ["json"] * 4
+    assert_frame_equal(restored, frame)
+
+
+def test_projection_reads_only_requested_columns() -> None:
+    frame = pd.DataFrame({"a": [1, 2], "b": ["x", "y"], ("t", 1): [0.5, 1.0]})
+    payload = encode_frame(frame)
+
+    assert encoded_columns(payload) == ["a", "b", ("t", 1)]
+    restored = decode_frame(payload, columns=[("t", 1), "b"])
+    assert list(restored.columns) == ["b", ("t", 1)]
+    assert restored["b"].tolist() == ["x", "y"]
+
+
+def test_rejects_foreign_payloads() -> None:
+    with pytest.raises(ValueError):
+        decode_frame(b"MXF1" + b"\x00" * 8)
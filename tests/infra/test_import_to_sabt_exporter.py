@@ -5,7 +5,11 @@ from pathlib import Path
 
 import pandas as pd
 import pytest
-from openpyxl import Workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.formatting.rule import CellIsRule
+from openpyxl.styles import Font, PatternFill
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.worksheet.datavalidation import DataValidation
 
 from app.infra.excel.import_to_sabt import (  # noqa: E402
     apply_alias_rule,
@@ -142,6 +146,64 @@ def test_sheet2_structure_matches_template(tmp_path: Path) -> None:
     assert str(df_result.iloc[0]["کد پستی"]).zfill(10) == "0000054321"
 
 
+def _write_standard_and_streaming(tmp_path: Path, template: Path, cfg) -> dict[bool, Path]:
+    df_alloc = _sample_alloc_frame()
+    df_sheet2 = build_sheet2_frame(df_alloc, cfg, today=datetime(2024, 3, 20))
+    df_sheet2 = apply_alias_rule(df_sheet2, df_alloc)
+    logs_df = pd.DataFrame(
+        [
+            {"student_id": "STD-1", "allocation_status": "success"},
+            {"student_id": "STD-2", "allocation_status": "failed", "error_type": "CAPACITY"},
+        ]
+    )
+    df_errors = build_errors_frame(logs_df, cfg)
+    outputs = {}
+    for streaming in (False, True):
+        df_summary = build_summary_frame(
+            cfg, total_students=5, allocated_count=len(df_sheet2), error_count=1
+        )
+        output = tmp_path / f"sabt_{int(streaming)}.xlsx"
+        write_import_to_sabt_excel(
+            df_sheet2,
+            df_summary,
+            df_errors,
+            build_optional_sheet_frame(cfg, "Sheet5"),
+            build_optional_sheet_frame(cfg, "9394"),
+            template,
+            output,
+            streaming=streaming,
+        )
+        outputs[streaming] = output
+    return outputs
+
+
+def test_streaming_writer_matches_standard_output(tmp_path: Path) -> None:
+    cfg = load_exporter_config("config/SmartAlloc_Exporter_Config_v1.json")
+    template = tmp_path / "template.xlsx"
+    ensure_template_workbook(template, cfg)
+    template_wb = load_workbook(template)
+    template_wb["Sheet2"].column_dimensions["A"].width = 31
+    template_wb["Sheet2"]["A1"].font = Font(bold=True)
+    template_wb["Sheet2"].sheet_view.rightToLeft = True
+    template_wb.save(template)
+
+    outputs = _write_standard_and_streaming(tmp_path, template, cfg)
+
+    standard = pd.read_excel(outputs[False], sheet_name=None, dtype=str)
+    streamed = pd.read_excel(outputs[True], sheet_name=None, dtype=str)
+    assert list(streamed) == list(standard)
+    for name, frame in standard.items():
+        pd.testing.assert_frame_equal(streamed[name], frame)
+
+    ws = load_workbook(outputs[True])["Sheet2"]
+    assert ws.column_dimensions["A"].width == 31
+    assert ws["A1"].font.bold
+    assert ws.sheet_view.rightToLeft
+    headers = [cell.value for cell in ws[1]]
+    mobile_col = headers.index("تلفن همراه") + 1
+    assert ws.cell(row=2, column=mobile_col).number_format == "@"
+
+
 def test_write_import_to_sabt_excel_repairs_mismatched_headers(tmp_path: Path) -> None:
     cfg = load_exporter_config("config/SmartAlloc_Exporter_Config_v1.json")
     df_alloc = _sample_alloc_frame()
@@ -610,3 +672,51 @@ def test_coalesce_duplicate_identifier_rows_handles_non_range_index() -> None:
 
     assert result.shape[0] == 1
     assert list(result["value"]) == ["first"]
+
+
+def test_streaming_writer_keeps_template_sheet_features(tmp_path: Path) -> None:
+    cfg = load_exporter_config("config/SmartAlloc_Exporter_Config_v1.json")
+    template = tmp_path / "template.xlsx"
+    ensure_template_workbook(template, cfg)
+    template_wb = load_workbook(template)
+    sheet2 = template_wb["Sheet2"]
+    validation = DataValidation(type="list", formula1='"0,1"', allow_blank=True)
+    validation.add("B2:B500")
+    sheet2.add_data_validation(validation)
+    sheet2.conditional_formatting.add(
+        "C2:C500",
+        CellIsRule(operator="equal", formula=['""'], fill=PatternFill("solid", fgColor="FFFF00")),
+    )
+    sheet2.row_dimensions[1].height = 28
+    sheet2.page_setup.orientation = "landscape"
+    sheet2.print_title_rows = "1:1"
+    summary = template_wb["Summary"]
+    summary.merge_cells("E1:F1")
+    template_wb.defined_names["sabt_header"] = DefinedName(
+        "sabt_header", attr_text="Sheet2!$A$1:$C$1"
+    )
+    template_wb.save(template)
+
+    outputs = _write_standard_and_streaming(tmp_path, template, cfg)
+
+    def features(path: Path) -> dict[str, object]:
+        workbook = load_workbook(path)
+        ws = workbook["Sheet2"]
+        return {
+            "validations": [
+                (str(dv.sqref), dv.type, dv.formula1) for dv in ws.data_validations.dataValidation
+            ],
+            "conditional": [str(cf.sqref) for cf in ws.conditional_formatting],
+            "row_height": ws.row_dimensions[1].height,
+            "orientation": ws.page_setup.orientation,
+            "title_rows": ws.print_title_rows,
+            "merged": [str(rng) for rng in workbook["Summary"].merged_cells.ranges],
+            "names": {
+                name: defined.attr_text for name, defined in workbook.defined_names.items()
+            },
+        }
+
+    standard = features(outputs[False])
+    assert standard["validations"] == [("B2:B500", "list", '"0,1"')]
+    assert standard["merged"] == ["E1:F1"]
+    assert features(outputs[True]) == standard
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.infra import local_database
+from app.infra.local_database import LocalDatabase
+
+_JOIN_KEYS = ("کدرشته", "جنسیت")
+
+
+def _students() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "student_id": ["S1", "S2", "S3"],
+            "کدرشته": pd.array([1201, 2201, None], dtype="Int64"),
+            "جنسیت": pd.array([0, 1, 1], dtype="Int64"),
+            "نام": ["الف", "ب", "پ"],
+        }
+    )
+
+
+def test_sqlite_cache_projection_keeps_int64(tmp_path: Path) -> None:
+    db = LocalDatabase(tmp_path / "cache.sqlite")
+    db.upsert_students_cache(_students(), join_keys=_JOIN_KEYS)
+
+    loaded = db.load_students_cache(join_keys=_JOIN_KEYS, columns=["student_id", "کدرشته"])
+
+    assert list(loaded.columns) == ["student_id", "کدرشته"]
+    assert str(loaded["کدرشته"].dtype) == "Int64"
+    assert loaded["کدرشته"].isna().tolist() == [False, False, True]
+
+
+def test_unknown_cache_backend_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        LocalDatabase(tmp_path / "cache.sqlite", cache_backend="parquet")  # type: ignore[arg-type]
+
+
+def test_arrow_cache_roundtrip_and_switch_back(tmp_path: Path) -> None:
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "cache.sqlite"
+    db = LocalDatabase(path, cache_backend="arrow")
+    db.upsert_students_cache(_students(), join_keys=_JOIN_KEYS)
+
+    assert db.columnar_store.path_for("students_cache").exists()
+    reader = LocalDatabase(path)
+    loaded = reader.load_students_cache(join_keys=_JOIN_KEYS)
+    pd.testing.assert_frame_equal(loaded, _students())
+    projected = reader.load_students_cache(join_keys=_JOIN_KEYS, columns=["جنسیت"])
+    assert list(projected.columns) == ["جنسیت"]
+
+    reader.upsert_students_cache(_students().head(1), join_keys=_JOIN_KEYS)
+    assert not db.columnar_store.path_for("students_cache").exists()
+    assert len(db.load_students_cache(join_keys=_JOIN_KEYS)) == 1
+
+
+def test_arrow_backend_falls_back_to_sqlite_without_pyarrow(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(local_database, "columnar_backend_available", lambda: False)
+    db = LocalDatabase(tmp_path / "cache.sqlite", cache_backend="arrow")
+
+    assert db.cache_backend == "sqlite"
+    db.upsert_students_cache(_students(), join_keys=_JOIN_KEYS)
+    assert not db.columnar_store.path_for("students_cache").exists()
+    pd.testing.assert_frame_equal(db.load_students_cache(join_keys=_JOIN_KEYS), _students())
+
+
+def test_arrow_cache_falls_back_to_sqlite_for_mixed_object_columns(tmp_path: Path) -> None:
+    pytest.importorskip("pyarrow")
+    db = LocalDatabase(tmp_path / "cache.sqlite", cache_backend="arrow")
+    mixed = _students().assign(کدپستی=[12345, "ندارد", None])
+
+    db.upsert_students_cache(mixed, join_keys=_JOIN_KEYS)
+
+    assert not db.columnar_store.path_for("students_cache").exists()
+    loaded = db.load_students_cache(join_keys=_JOIN_KEYS)
+    assert loaded["کدپستی"].tolist()[:2] == ["12345", "ندارد"]
+
+
+def test_arrow_cache_path_is_stored_relative_to_database(tmp_path: Path) -> None:
+    pytest.importorskip("pyarrow")
+    original = tmp_path / "a" / "cache.sqlite"
+    db = LocalDatabase(original, cache_backend="arrow")
+    db.upsert_students_cache(_students(), join_keys=_JOIN_KEYS)
+    with db.connect() as conn:
+        stored = conn.execute("SELECT file_path FROM columnar_caches").fetchone()[0]
+    assert stored == "cache_columnar/students_cache.arrow"
+
+    moved = tmp_path / "b"
+    shutil.copytree(original.parent, moved)
+    loaded = LocalDatabase(moved / "cache.sqlite").load_students_cache(join_keys=_JOIN_KEYS)
+    pd.testing.assert_frame_equal(loaded, _students())
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.infra import local_database
+from app.infra.local_database import LocalDatabase
+
+
+def test_matrix_fragments_roundtrip_and_prune(tmp_path: Path) -> None:
+    db = LocalDatabase(tmp_path / "fragments.sqlite")
+    db.save_matrix_fragments({"a": b"\x00one", "b": b"two"}, retain={"a", "b"}, context="ctx")
+
+    assert db.load_matrix_fragments(["a", "b", "missing"]) == {"a": b"\x00one", "b": b"two"}
+
+    db.save_matrix_fragments({"c": b"three"}, retain={"b", "c"}, context="ctx")
+    assert db.load_matrix_fragments(["a", "b", "c"]) == {"b": b"two", "c": b"three"}
+    assert db.load_matrix_fragments([]) == {}
+
+
+def test_matrix_fragment_retention_is_scoped_per_context(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(local_database, "_MATRIX_FRAGMENT_CONTEXTS_KEPT", 2)
+    db = LocalDatabase(tmp_path / "fragments.sqlite")
+    db.save_matrix_fragments({"a1": b"1"}, retain={"a1"}, context="a")
+    db.save_matrix_fragments({"b1": b"2"}, retain={"b1"}, context="b")
+
+    assert set(db.load_matrix_fragments(["a1", "b1"])) == {"a1", "b1"}
+
+    db.save_matrix_fragments({}, retain={"a1"}, context="a")
+    db.save_matrix_fragments({"c1": b"3"}, retain={"c1"}, context="c")
+
+    assert set(db.load_matrix_fragments(["a1", "b1", "c1"])) == {"a1", "c1"}
@@ -0,0 +1,69 @@
+"""تست کش محتوامحور خوانندگان Excel."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.infra import io_utils
+from app.infra.parsed_input_cache import configure_parsed_input_cache
+
+
+@pytest.fixture()
+def cache_dir(tmp_path: Path):
+    directory = tmp_path / "cache"
+    cache = configure_parsed_input_cache(directory)
+    yield directory, cache
+    configure_parsed_input_cache(None)
+
+
+def _write_sample(path: Path, value: str) -> None:
+    pd.DataFrame({"کد جایگزین": [value], "نام": ["الف"]}).to_excel(path, index=False)
+
+
+def test_unchanged_file_is_served_from_cache(
+    tmp_path: Path, cache_dir, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    sample = tmp_path / "students.xlsx"
+    _write_sample(sample, "123")
+
+    first = io_utils.read_excel_first_sheet(sample)
+    assert len(list(cache_dir[0].glob("*.mxc"))) == 1
+
+    def _fail(*_args, **_kwargs):  # type: ignore[no-untyped-def]
+        raise AssertionError("Excel نباید دوباره پارس شود")
+
+    monkeypatch.setattr(io_utils, "_read_excel_first_sheet_uncached", _fail)
+    second = io_utils.read_excel_first_sheet(sample)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert second.loc[0, "کد جایگزین"] == "123"
+
+
+def test_changed_content_invalidates_and_lru_evicts(tmp_path: Path, cache_dir) -> None:
+    directory, cache = cache_dir
+    cache.max_entries = 2
+    sample = tmp_path / "students.xlsx"
+
+    for value in ("1", "2", "3"):
+        _write_sample(sample, value)
+        loaded = io_utils.read_excel_first_sheet(sample)
+        assert loaded.loc[0, "کد جایگزین"] == value
+
+    assert len(list(directory.glob("*.mxc"))) == 2
+
+
+def test_crosswalk_cache_keeps_missing_synonyms(tmp_path: Path, cache_dir) -> None:
+    sample = tmp_path / "crosswalk.xlsx"
+    with pd.ExcelWriter(sample) as writer:
+        pd.DataFrame({"کد جایگزین": [111], "گروه": ["الف"]}).to_excel(
+            writer, sheet_name="پایه تحصیلی (گروه آزمایشی)", index=False
+        )
+
+    first_groups, first_synonyms = io_utils.read_crosswalk_workbook(sample)
+    groups, synonyms = io_utils.read_crosswalk_workbook(sample)
+
+    assert first_synonyms is None and synonyms is None
+    pd.testing.assert_frame_equal(first_groups, groups)
@@ -1,8 +1,10 @@
+from dataclasses import replace
 from datetime import datetime, timezone
 
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
+from app.infra import local_database
 from app.infra.local_database import LocalDatabase, RunRecord, _SCHEMA_VERSION
 
 
@@ -137,3 +139,76 @@ def test_deserialize_error_is_handled(tmp_path, caplog) -> None:
         "Failed to deserialize DataFrame payload" in record.getMessage()
         for record in caplog.records
     )
+
+
+def test_trace_snapshot_column_projection_and_dtypes(tmp_path) -> None:
+    db = LocalDatabase(tmp_path / "snap.db")
+    db.initialize()
+    run_id = db.insert_run(_sample_run_record(datetime.now(timezone.utc)))
+    trace_df = pd.DataFrame(
+        {
+            "student_id": ["S1", "S2"],
+            "mentor_id": pd.array([7, None], dtype="Int64"),
+            "stage": ["type", "group"],
+        }
+    )
+    db.insert_trace_snapshot(run_id=run_id, trace_df=trace_df)
+
+    restored, _, _ = db.fetch_trace_snapshot(run_id, columns=["mentor_id"])
+
+    assert list(restored.columns) == ["mentor_id"]
+    assert str(restored["mentor_id"].dtype) == "Int64"
+    with db.connect() as conn:
+        payload = conn.execute(
+            "SELECT trace_json FROM trace_snapshots WHERE run_id = ?", (run_id,)
+        ).fetchone()[0]
+    assert isinstance(payload, bytes)
+
+
+def test_migration_converts_json_snapshots(tmp_path) -> None:
+    db = LocalDatabase(tmp_path / "snap.db")
+    db.initialize()
+    run_id = db.insert_run(_sample_run_record(datetime.now(timezone.utc)))
+    legacy = pd.DataFrame({"student_id": [1, 2], "step": ["type", "group"]})
+    with db.connect() as conn:
+        conn.execute(
+            "INSERT INTO trace_snapshots(run_id, trace_json) VALUES (?, ?)",
+            (run_id, legacy.to_json(orient="split", force_ascii=False)),
+        )
+        conn.execute("UPDATE schema_meta SET schema_version = 9 WHERE id = 1")
+
+    LocalDatabase(tmp_path / "snap.db").initialize()
+
+    with db.connect() as conn:
+        payload = conn.execute(
+            "SELECT trace_json FROM trace_snapshots WHERE run_id = ?", (run_id,)
+        ).fetchone()[0]
+    assert isinstance(payload, bytes)
+    restored, _, _ = db.fetch_trace_snapshot(run_id)
+    assert_frame_equal(restored, legacy)
+
+
+def test_migration_converts_snapshots_in_batches(tmp_path, monkeypatch) -> None:
+    db = LocalDatabase(tmp_path / "snap.db")
+    db.initialize()
+    legacy = pd.DataFrame({"student_id": [1, 2], "step": ["type", "group"]})
+    run_ids = [
+        db.insert_run(
+            replace(_sample_run_record(datetime.now(timezone.utc)), run_uuid=f"run-{idx}")
+        )
+        for idx in range(3)
+    ]
+    with db.connect() as conn:
+        for run_id in run_ids:
+            conn.execute(
+                "INSERT INTO trace_snapshots(run_id, trace_json) VALUES (?, ?)",
+                (run_id, legacy.to_json(orient="split", force_ascii=False)),
+            )
+        conn.execute("UPDATE schema_meta SET schema_version = 9 WHERE id = 1")
+    monkeypatch.setattr(local_database, "_MIGRATION_BATCH_SIZE", 2)
+
+    LocalDatabase(tmp_path / "snap.db").initialize()
+
+    for run_id in run_ids:
+        restored, _, _ = db.fetch_trace_snapshot(run_id)
+        assert_frame_equal(restored, legacy)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pandas.testing as pdt
+
+from app.core.allocate_students import allocate_batch, build_selection_reason_rows
+from app.core.build_matrix import BuildConfig, build_matrix
+from app.core.canonical_frames import canonicalize_allocation_frames, compact_frame_dtypes
+from app.core.common.columns import canonicalize_headers
+from app.core.policy_loader import load_policy
+from app.infra.excel.export_allocations import build_sabt_export_frame, load_sabt_export_profile
+from app.infra.excel.import_to_sabt import (
+    build_sheet2_frame,
+    load_exporter_config,
+    prepare_allocation_export_frame,
+)
+from app.infra.cli import _build_parser
+from app.infra.io_utils import write_xlsx_atomic
+from tests.perf.test_build_matrix_perf import _synthetic_inputs
+from tests.unit.test_allocate_batch_workers import _batch_inputs
+
+
+def _decompacted(frame: pd.DataFrame, reference: pd.DataFrame) -> pd.DataFrame:
+    result = frame.copy()
+    for column in reference.columns:
+        if column in result.columns:
+            result[column] = result[column].astype(reference[column].dtype)
+    return result
+
+
+def _run(compact: bool):
+    policy = load_policy()
+    students, pool = _batch_inputs(8)
+    pool["مدیر"] = "مدیر مرکز"
+    outputs = allocate_batch(students, pool, policy=policy, compact_dtypes=compact)
+    students_base, pool_base = canonicalize_allocation_frames(
+        students, pool, policy=policy, sanitize_pool=False, compact_dtypes=compact
+    )
+    return policy, students_base, pool_base, outputs
+
+
+def test_compact_frame_dtypes_downcasts_keys_and_repeated_text() -> None:
+    policy = load_policy()
+    frame = pd.DataFrame(
+        {
+            "کدرشته": pd.array([1201, 2201, None, 1201], dtype="Int64"),
+            "کد مدرسه": pd.array([0, 0, 120_000, 0], dtype="Int64"),
+            "remaining_capacity": [3, 2, 1, 0],
+            "مدیر": ["الف", "الف", "ب", "الف"],
+            "پشتیبان": ["x1", "x2", "x3", "x4"],
+        }
+    )
+
+    compact = compact_frame_dtypes(frame, policy=policy)
+
+    assert str(compact["کدرشته"].dtype) == "Int16"
+    assert compact["کدرشته"].isna().tolist() == [False, False, True, False]
+    assert str(compact["کد مدرسه"].dtype) == "Int32"
+    assert str(compact["remaining_capacity"].dtype) == "Int32"
+    assert isinstance(compact["مدیر"].dtype, pd.CategoricalDtype)
+    assert compact["پشتیبان"].dtype == object
+    pdt.assert_frame_equal(_decompacted(compact, frame), frame)
+
+
+def test_compact_allocation_matches_default_through_exports(tmp_path: Path) -> None:
+    policy, students_default, pool_default, default = _run(False)
+    _, students_compact, pool_compact, compact = _run(True)
+
+    updated_pool = compact[1]
+    assert str(updated_pool["کدرشته"].dtype) == "Int16"
+    assert str(updated_pool["remaining_capacity"].dtype) == "Int32"
+    assert isinstance(updated_pool["نام مدیر"].dtype, pd.CategoricalDtype)
+    for expected, actual in zip(default, compact):
+        pdt.assert_frame_equal(_decompacted(actual, expected), expected)
+
+    profile = load_sabt_export_profile()
+    pdt.assert_frame_equal(
+        build_sabt_export_frame(compact[0], students_compact, profile),
+        build_sabt_export_frame(default[0], students_default, profile),
+        check_dtype=False,
+    )
+    cfg = load_exporter_config("config/SmartAlloc_Exporter_Config_v1.json")
+    sheets = []
+    for (alloc, _, _, _), students, pool in (
+        (default, students_default, pool_default),
+        (compact, students_compact, pool_compact),
+    ):
+        merged = prepare_allocation_export_frame(alloc, students, pool)
+        sheets.append(build_sheet2_frame(merged, cfg, today=datetime(2024, 3, 20)))
+    pdt.assert_frame_equal(sheets[1], sheets[0])
+
+    reasons = [
+        build_selection_reason_rows(
+            outputs[0], students, pool, policy=policy, logs=outputs[2], trace=outputs[3]
+        )
+        for outputs, students, pool in (
+            (default, students_default, pool_default),
+            (compact, students_compact, pool_compact),
+        )
+    ]
+    pdt.assert_frame_equal(reasons[1], reasons[0], check_dtype=False)
+
+    written = []
+    for name, frame in (("default", default[1]), ("compact", updated_pool)):
+        path = tmp_path / f"{name}.xlsx"
+        write_xlsx_atomic(
+            {"updated_pool": canonicalize_headers(frame, header_mode="fa")},
+            path,
+            header_mode=policy.excel.header_mode_write,
+        )
+        written.append(pd.read_excel(path, dtype=str))
+    pdt.assert_frame_equal(written[1], written[0])
+
+
+def test_build_matrix_compact_dtypes_shrinks_matrix() -> None:
+    insp_df, schools_df, crosswalk_df = _synthetic_inputs(400)
+    outputs = {}
+    for compact in (False, True):
+        outputs[compact] = build_matrix(
+            insp_df.copy(),
+            schools_df.copy(),
+            crosswalk_df.copy(),
+            cfg=BuildConfig(compact_dtypes=compact),
+            progress=lambda *_: None,
+        )[0]
+
+    default, compact = outputs[False], outputs[True]
+    assert str(compact["کدرشته"].dtype) in {"Int16", "Int32"}
+    assert isinstance(compact["مدیر"].dtype, pd.CategoricalDtype)
+    pdt.assert_frame_equal(_decompacted(compact, default), default)
+    assert compact.memory_usage(deep=True).sum() * 2 < default.memory_usage(deep=True).sum()
+
+
+def test_cli_commands_accept_compact_dtypes() -> None:
+    parser = _build_parser()
+    for argv in (
+        ["allocate", "--output", "o.xlsx", "--compact-dtypes"],
+        [
+            "rule-engine",
+            "--matrix",
+            "m.xlsx",
+            "--students",
+            "s.xlsx",
+            "--output",
+            "o.xlsx",
+            "--compact-dtypes",
+        ],
+        ["build-matrix", "--output", "o.xlsx", "--compact-dtypes"],
+    ):
+        assert parser.parse_args(argv).compact_dtypes is True
+    assert parser.parse_args(["allocate", "--output", "o.xlsx"]).compact_dtypes is False
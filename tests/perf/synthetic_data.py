@@ -0,0 +1,230 @@
+"""تولیدکنندهٔ دادهٔ مصنوعی واقع‌گرا برای مجموعهٔ بنچمارک‌ها.
+
+توزیع‌ها عمداً نامتوازن‌اند تا رفتار مسیرهای داغ به دادهٔ واقعی نزدیک باشد:
+
+* گروه‌های آزمایشی/کدرشته با وزن Zipf (چند رشتهٔ پرجمعیت و دنبالهٔ بلند)؛
+* مراکز با سهم نابرابر (اکثر دانش‌آموزان در مرکز صفر)؛
+* مدارس با وزن Zipf و درصدی از پشتیبان‌ها که فقط به یک مدرسه مقیدند؛
+* ظرفیت کل کمتر از تعداد دانش‌آموزان (کمبود ظرفیت) تا مسیر شکست هم سنجیده شود.
+
+همهٔ تولیدکننده‌ها با ``seed`` قطعی‌اند تا baselineها قابل‌مقایسه بمانند.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+#: سطح‌های اندازه (تعداد دانش‌آموز)؛ نام سطح کلید baseline است.
+SIZE_TIERS: dict[str, int] = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "50k": 50_000,
+    "200k": 200_000,
+}
+
+#: نسبت دانش‌آموز به پشتیبان و نسبت ظرفیت کل به دانش‌آموزان.
+STUDENTS_PER_MENTOR = 25
+CAPACITY_RATIO = 0.9
+SCHOOL_BOUND_SHARE = 0.15
+
+_GROUPS: tuple[tuple[int, str], ...] = (
+    (1201, "تجربی"),
+    (2201, "ریاضی"),
+    (3201, "انسانی"),
+    (1202, "تجربی"),
+    (2202, "ریاضی"),
+    (3202, "انسانی"),
+    (1301, "تجربی"),
+    (2301, "ریاضی"),
+    (3301, "انسانی"),
+    (4101, "هنر"),
+    (5101, "زبان"),
+    (6101, "فنی"),
+)
+_CENTERS = (0, 1, 2)
+_CENTER_WEIGHTS = (0.7, 0.2, 0.1)
+_FINANCE = (0, 1, 3)
+_FINANCE_WEIGHTS = (0.8, 0.05, 0.15)
+_MANAGERS = ("شهدخت کشاورز", "آینا هوشمند", "مدیر مرکز", "مدیر گلستان")
+
+
+@dataclass(frozen=True)
+class SyntheticScenario:
+    """ورودی‌های هم‌خوان یک سناریو برای همهٔ بنچمارک‌ها."""
+
+    students: pd.DataFrame
+    pool: pd.DataFrame
+    inspactor: pd.DataFrame
+    schools: pd.DataFrame
+    crosswalk: pd.DataFrame
+    student_report: pd.DataFrame
+
+
+def _zipf_weights(count: int, exponent: float = 1.1) -> np.ndarray:
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _school_codes(count: int) -> np.ndarray:
+    return np.arange(5001, 5001 + count, dtype=np.int64)
+
+
+def _generate_students(
+    rng: np.random.Generator, size: int, school_codes: np.ndarray
+) -> pd.DataFrame:
+    group_idx = rng.choice(len(_GROUPS), size=size, p=_zipf_weights(len(_GROUPS)))
+    school_idx = rng.choice(len(school_codes), size=size, p=_zipf_weights(len(school_codes)))
+    return pd.DataFrame(
+        {
+            "student_id": [f"STD-{idx:07d}" for idx in range(size)],
+            "کدرشته": np.array([_GROUPS[i][0] for i in group_idx], dtype=np.int64),
+            "گروه آزمایشی": [_GROUPS[i][1] for i in group_idx],
+            "جنسیت": rng.choice([0, 1], size=size, p=[0.55, 0.45]),
+            "دانش آموز فارغ": rng.choice([0, 1], size=size, p=[0.85, 0.15]),
+            "مرکز گلستان صدرا": rng.choice(_CENTERS, size=size, p=_CENTER_WEIGHTS),
+            "مالی حکمت بنیاد": rng.choice(_FINANCE, size=size, p=_FINANCE_WEIGHTS),
+            "کد مدرسه": school_codes[school_idx],
+            "نام": [f"نام {idx % 997}" for idx in range(size)],
+            "نام خانوادگی": [f"خانواده {idx % 1499}" for idx in range(size)],
+            "کدملی": [f"{idx:010d}" for idx in range(size)],
+            "تلفن همراه": [f"0912{idx % 10_000_000:07d}" for idx in range(size)],
+            "وضعیت ثبت نام": rng.choice(["0", "1", "3"], size=size, p=[0.8, 0.05, 0.15]),
+        }
+    )
+
+
+def _generate_pool(
+    rng: np.random.Generator, size: int, school_codes: np.ndarray
+) -> pd.DataFrame:
+    mentor_count = max(4, size // STUDENTS_PER_MENTOR)
+    school_bound = rng.random(mentor_count) < SCHOOL_BOUND_SHARE
+    bound_school = school_codes[
+        rng.choice(len(school_codes), size=mentor_count, p=_zipf_weights(len(school_codes)))
+    ]
+    gender = rng.choice([0, 1], size=mentor_count)
+    center = rng.choice(_CENTERS, size=mentor_count, p=_CENTER_WEIGHTS)
+    manager = rng.choice(_MANAGERS, size=mentor_count)
+    mentor_capacity = np.maximum(
+        1,
+        rng.poisson(size * CAPACITY_RATIO / mentor_count, size=mentor_count),
+    )
+
+    rows: list[dict[str, object]] = []
+    group_weights = _zipf_weights(len(_GROUPS))
+    for mentor in range(mentor_count):
+        covered = rng.choice(
+            len(_GROUPS), size=int(rng.integers(1, 4)), replace=False, p=group_weights
+        )
+        for group_idx in covered:
+            for graduate in (0, 1):
+                for finance in _FINANCE:
+                    code, group_name = _GROUPS[group_idx]
+                    rows.append(
+                        {
+                            "پشتیبان": f"پشتیبان {mentor}",
+                            "mentor_name": f"پشتیبان {mentor}",
+                            "مدیر": manager[mentor],
+                            "کد کارمندی پشتیبان": f"EMP-{mentor:06d}",
+                            "جایگزین": f"{1000 + mentor % 9000}",
+                            "عادی مدرسه": "مدرسه‌ای" if school_bound[mentor] else "عادی",
+                            "کدرشته": code,
+                            "گروه آزمایشی": group_name,
+                            "جنسیت": int(gender[mentor]),
+                            "دانش آموز فارغ": graduate,
+                            "مرکز گلستان صدرا": int(center[mentor]),
+                            "مالی حکمت بنیاد": finance,
+                            "کد مدرسه": int(bound_school[mentor]) if school_bound[mentor] else 0,
+                            "remaining_capacity": int(mentor_capacity[mentor]),
+                        }
+                    )
+    return pd.DataFrame(rows)
+
+
+def _generate_inspactor(
+    rng: np.random.Generator, size: int, school_names: list[str]
+) -> pd.DataFrame:
+    mentor_count = max(4, size // STUDENTS_PER_MENTOR)
+    school_bound = rng.random(mentor_count) < SCHOOL_BOUND_SHARE
+    school_pick = rng.choice(len(school_names), size=mentor_count, p=_zipf_weights(len(school_names)))
+    group_idx = rng.choice(len(_GROUPS), size=mentor_count, p=_zipf_weights(len(_GROUPS)))
+    return pd.DataFrame(
+        {
+            "نام پشتیبان": [f"پشتیبان {i}" for i in range(mentor_count)],
+            "نام مدیر": rng.choice(_MANAGERS[:2], size=mentor_count),
+            "کد کارمندی پشتیبان": [f"EMP-{i:06d}" for i in range(mentor_count)],
+            "ردیف پشتیبان": np.arange(1, mentor_count + 1),
+            "گروه آزمایشی": [_GROUPS[i][1] for i in group_idx],
+            "جنسیت": rng.choice(["دختر", "پسر"], size=mentor_count),
+            "دانش آموز فارغ": rng.integers(0, 2, size=mentor_count),
+            "کدپستی": [
+                "" if rng.random() < 0.1 else f"{1000 + i % 9000}" for i in range(mentor_count)
+            ],
+            "تعداد داوطلبان تحت پوشش": rng.integers(0, 10, size=mentor_count),
+            "تعداد تحت پوشش خاص": rng.integers(10, 40, size=mentor_count),
+            "نام مدرسه 1": [
+                school_names[pick] if bound else ""
+                for pick, bound in zip(school_pick, school_bound)
+            ],
+            "تعداد مدارس تحت پوشش": school_bound.astype(int),
+            "امکان جذب دانش آموز": ["بلی"] * mentor_count,
+            "مالی حکمت بنیاد": rng.choice(_FINANCE, size=mentor_count, p=_FINANCE_WEIGHTS),
+            "مرکز گلستان صدرا": [0] * mentor_count,
+        }
+    )
+
+
+def _generate_student_report(
+    students: pd.DataFrame, pool: pd.DataFrame, school_names: dict[int, str]
+) -> pd.DataFrame:
+    mentor_rows = pool.drop_duplicates("کد کارمندی پشتیبان")
+    picks = np.arange(len(students)) % len(mentor_rows)
+    return pd.DataFrame(
+        {
+            "کد پستی": mentor_rows["جایگزین"].to_numpy()[picks],
+            "نام پشتیبان": mentor_rows["پشتیبان"].to_numpy()[picks],
+            "مدیر": mentor_rows["مدیر"].to_numpy()[picks],
+            "نام مدرسه 1": [school_names[int(code)] for code in students["کد مدرسه"]],
+            "کد رشته": students["کدرشته"].astype(str).to_numpy(),
+            "گروه آزمایشی": students["گروه آزمایشی"].to_numpy(),
+            "جنسیت": students["جنسیت"].to_numpy(),
+        }
+    )
+
+
+@lru_cache(maxsize=2)
+def generate_scenario(size: int, *, seed: int = 20240601) -> SyntheticScenario:
+    """ساخت (و کش) سناریوی کامل برای ``size`` دانش‌آموز.
+
+    فریم‌های خروجی مشترک‌اند؛ مصرف‌کننده پیش از تغییر باید ``copy`` بگیرد.
+    """
+
+    rng = np.random.default_rng(seed)
+    school_count = max(20, size // 200)
+    codes = _school_codes(school_count)
+    school_names = {int(code): f"مدرسه نمونه {code}" for code in codes}
+    schools = pd.DataFrame(
+        {"کد مدرسه": [str(code) for code in codes], "نام مدرسه 1": list(school_names.values())}
+    )
+    crosswalk = pd.DataFrame(
+        {
+            "گروه آزمایشی": [name for _, name in _GROUPS],
+            "کد گروه": [code for code, _ in _GROUPS],
+            "مقطع تحصیلی": ["دهم"] * len(_GROUPS),
+        }
+    ).drop_duplicates("گروه آزمایشی")
+    students = _generate_students(rng, size, codes)
+    pool = _generate_pool(rng, size, codes)
+    inspactor = _generate_inspactor(rng, size, list(school_names.values()))
+    student_report = _generate_student_report(students, pool, school_names)
+    return SyntheticScenario(
+        students=students,
+        pool=pool,
+        inspactor=inspactor,
+        schools=schools,
+        crosswalk=crosswalk,
+        student_report=student_report,
+    )
@@ -0,0 +1,178 @@
+"""مجموعهٔ بنچمارک مقیاس‌پذیر با baselineهای JSON و آستانهٔ رگرسیون.
+
+اجرا فقط با ``PERF=1``؛ سطح‌ها با ``PERF_TIERS`` (پیش‌فرض ``1k``، مثلاً
+``PERF_TIERS=1k,10k,50k``) انتخاب می‌شوند. زمان هر بنچمارک با مقدار ثبت‌شده در
+``baselines.json`` مقایسه می‌شود و اگر از ``baseline × tolerance + min_slack``
+بیشتر شود تست شکست می‌خورد. با ``PERF_UPDATE_BASELINE=1`` اندازه‌های جدید به‌جای
+مقایسه در فایل نوشته می‌شوند؛ ``PERF_TOLERANCE`` ضریب مجاز را برای ماشین‌های
+کندتر بازنویسی می‌کند.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+import pandas as pd
+import pytest
+
+from app.core.allocate_students import allocate_batch, build_selection_reason_rows
+from app.core.build_matrix import BuildConfig, build_matrix, validate_with_students
+from app.core.policy_loader import load_policy
+from app.infra.excel.export_allocations import build_sabt_export_frame, load_sabt_export_profile
+from app.infra.local_database import LocalDatabase
+from tests.perf.synthetic_data import SIZE_TIERS, generate_scenario
+
+BASELINE_PATH = Path(__file__).with_name("baselines.json")
+
+_ALLOCATIONS: Dict[str, Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]] = {}
+
+
+def _selected_tiers() -> set[str]:
+    raw = os.getenv("PERF_TIERS", "1k")
+    return {item.strip() for item in raw.split(",") if item.strip()}
+
+
+def _load_baselines() -> dict:
+    if not BASELINE_PATH.exists():
+        return {"tolerance": 1.5, "min_slack_seconds": 0.5, "results": {}}
+    return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+
+def _measure(func: Callable[[], object]) -> float:
+    """بهترین زمان از چند تکرار؛ کارهای بلندتر از یک ثانیه فقط یک بار اجرا می‌شوند."""
+
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        if elapsed > 1.0:
+            break
+    return best
+
+
+def _check_against_baseline(benchmark: str, tier: str, seconds: float) -> None:
+    baselines = _load_baselines()
+    results = baselines.setdefault("results", {})
+    if os.getenv("PERF_UPDATE_BASELINE") == "1":
+        results.setdefault(benchmark, {})[tier] = round(seconds, 4)
+        BASELINE_PATH.write_text(
+            json.dumps(baselines, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+            encoding="utf-8",
+        )
+        return
+    recorded = results.get(benchmark, {}).get(tier)
+    if recorded is None:
+        pytest.skip(f"baseline برای {benchmark}/{tier} ثبت نشده است")
+    tolerance = float(os.getenv("PERF_TOLERANCE", baselines.get("tolerance", 1.5)))
+    ceiling = float(recorded) * tolerance + float(baselines.get("min_slack_seconds", 0.5))
+    assert seconds <= ceiling, (
+        f"{benchmark}/{tier}: {seconds:.3f}s > {ceiling:.3f}s (baseline {recorded}s)"
+    )
+
+
+def _allocation_outputs(tier: str):
+    outputs = _ALLOCATIONS.get(tier)
+    if outputs is None:
+        scenario = generate_scenario(SIZE_TIERS[tier])
+        outputs = allocate_batch(
+            scenario.students.copy(), scenario.pool.copy(), policy=load_policy()
+        )
+        _ALLOCATIONS[tier] = outputs
+    return outputs
+
+
+def _bench_allocate_batch(tier: str) -> Callable[[], object]:
+    scenario = generate_scenario(SIZE_TIERS[tier])
+    policy = load_policy()
+
+    def run() -> None:
+        _ALLOCATIONS[tier] = allocate_batch(
+            scenario.students.copy(), scenario.pool.copy(), policy=policy
+        )
+
+    return run
+
+
+def _bench_build_matrix(tier: str) -> Callable[[], object]:
+    scenario = generate_scenario(SIZE_TIERS[tier])
+    cfg = BuildConfig()
+    return lambda: build_matrix(
+        scenario.inspactor.copy(),
+        scenario.schools.copy(),
+        scenario.crosswalk.copy(),
+        cfg=cfg,
+        progress=lambda *_: None,
+    )
+
+
+def _bench_validate_with_students(tier: str) -> Callable[[], object]:
+    scenario = generate_scenario(SIZE_TIERS[tier])
+    cfg = BuildConfig()
+    return lambda: validate_with_students(
+        scenario.student_report, scenario.pool, scenario.schools, scenario.crosswalk, cfg=cfg
+    )
+
+
+def _bench_sabt_export(tier: str) -> Callable[[], object]:
+    scenario = generate_scenario(SIZE_TIERS[tier])
+    allocations = _allocation_outputs(tier)[0]
+    profile = load_sabt_export_profile()
+    return lambda: build_sabt_export_frame(allocations, scenario.students, profile)
+
+
+def _bench_selection_reasons(tier: str) -> Callable[[], object]:
+    scenario = generate_scenario(SIZE_TIERS[tier])
+    allocations, _, logs, trace = _allocation_outputs(tier)
+    policy = load_policy()
+    return lambda: build_selection_reason_rows(
+        allocations, scenario.students, scenario.pool, policy=policy, logs=logs, trace=trace
+    )
+
+
+def _bench_local_database_caches(tier: str, tmp_path: Path) -> Callable[[], object]:
+    scenario = generate_scenario(SIZE_TIERS[tier])
+    join_keys = load_policy().join_keys
+    mentors = scenario.pool.drop_duplicates("کد کارمندی پشتیبان")
+    mentors = mentors.assign(mentor_id=mentors["کد کارمندی پشتیبان"])
+    db = LocalDatabase(tmp_path / "bench.sqlite")
+
+    def run() -> None:
+        db.upsert_students_cache(scenario.students, join_keys=join_keys)
+        db.upsert_mentor_pool_cache(mentors, join_keys=join_keys)
+        db.load_students_cache(join_keys=join_keys)
+        db.load_mentor_pool_cache(join_keys=join_keys)
+
+    return run
+
+
+_BENCHMARKS = {
+    "allocate_batch": _bench_allocate_batch,
+    "build_matrix": _bench_build_matrix,
+    "validate_with_students": _bench_validate_with_students,
+    "sabt_export": _bench_sabt_export,
+    "selection_reasons": _bench_selection_reasons,
+    "local_database_caches": _bench_local_database_caches,
+}
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("tier", list(SIZE_TIERS))
+@pytest.mark.parametrize("benchmark", list(_BENCHMARKS))
+def test_benchmark_within_baseline(benchmark: str, tier: str, tmp_path: Path) -> None:
+    if os.getenv("PERF") != "1":
+        pytest.skip("PERF environment variable not set")
+    if tier not in _selected_tiers():
+        pytest.skip(f"tier {tier} در PERF_TIERS انتخاب نشده است")
+
+    factory = _BENCHMARKS[benchmark]
+    if benchmark == "local_database_caches":
+        run = factory(tier, tmp_path)
+    else:
+        run = factory(tier)
+    _check_against_baseline(benchmark, tier, _measure(run))
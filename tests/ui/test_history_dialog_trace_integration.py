@@ -2,12 +2,14 @@ import pandas as pd
 import pytest
 
 try:
+    from PySide6.QtCore import QModelIndex, Qt
     from PySide6.QtWidgets import QApplication
 except ImportError as exc:  # pragma: no cover - محیط فاقد وابستگی Qt
     pytest.skip(f"PySide6 unavailable: {exc}", allow_module_level=True)
 
 from app.infra.local_database import LocalDatabase, RunMetricRow, RunRecord
-from app.ui.history_dialog import HistoryDialog
+from app.ui import history_dialog
+from app.ui.history_dialog import DataFrameTableModel, HistoryDialog
 
 
 @pytest.fixture()
@@ -40,7 +42,9 @@ def _insert_run_with_snapshots(db: LocalDatabase) -> None:
     )
     run_id = db.insert_run(record)
 
-    trace_df = pd.DataFrame({"student_id": [1], "step": ["type"], "candidates": [3]})
+    trace_df = pd.DataFrame(
+        {"student_id": [1], "step": ["type"], "candidates": [3], "extras": [{"rule": "ok"}]}
+    )
     summary_df = pd.DataFrame({"allocation_channel": ["SCHOOL"], "students_total": [2]})
     trace_df.attrs["summary_df"] = summary_df
     db.insert_trace_snapshot(
@@ -81,3 +85,76 @@ def test_history_dialog_loads_snapshots(qapp: QApplication, tmp_path) -> None:
     assert dialog.qa_summary_model.rowCount() == 1
     assert dialog.qa_details_model.rowCount() == 1
     assert dialog.metrics_model.rowCount() == 1
+
+
+def test_history_dialog_projects_trace_columns(
+    qapp: QApplication, tmp_path, monkeypatch
+) -> None:
+    db = LocalDatabase(tmp_path / "ui.db")
+    db.initialize()
+    _insert_run_with_snapshots(db)
+    requested: list[object] = []
+    original = db.fetch_trace_snapshot
+
+    def spy(run_id: int, *, columns=None):
+        requested.append(columns)
+        return original(run_id, columns=columns)
+
+    monkeypatch.setattr(db, "fetch_trace_snapshot", spy)
+    dialog = HistoryDialog(db)
+
+    assert requested and all(
+        columns == ["student_id", "step", "candidates"] for columns in requested
+    )
+    model = dialog.trace_model
+    headers = [
+        model.headerData(col, Qt.Horizontal, Qt.DisplayRole) for col in range(model.columnCount())
+    ]
+    assert headers == ["student_id", "step", "candidates"]
+
+
+def test_table_model_pages_sorts_and_filters(qapp: QApplication) -> None:
+    frame = pd.DataFrame(
+        {
+            "student_id": [f"S{idx}" for idx in range(25)],
+            "score": [float(idx % 7) if idx % 5 else None for idx in range(25)],
+        }
+    )
+    model = DataFrameTableModel(frame, page_size=10)
+
+    assert model.rowCount() == 10
+    assert model.source_row_count() == 25
+    assert model.canFetchMore(QModelIndex())
+    model.fetchMore(QModelIndex())
+    model.fetchMore(QModelIndex())
+    assert model.rowCount() == 25
+    assert not model.canFetchMore(QModelIndex())
+    assert model.data(model.index(0, 1)) == ""
+    assert model.data(model.index(1, 1)) == "1.0"
+
+    model.sort(1, Qt.DescendingOrder)
+    assert model.rowCount() == 10
+    assert model.data(model.index(0, 1)) == "6.0"
+    model.sort(-1)
+    assert model.data(model.index(0, 0)) == "S0"
+
+    model.set_filter("s1")
+    assert model.visible_row_count() == 11
+    assert model.data(model.index(0, 0)) == "S1"
+    model.set_filter("")
+    assert model.visible_row_count() == 25
+
+
+def test_table_model_formats_large_frames_in_background(qapp: QApplication, monkeypatch) -> None:
+    monkeypatch.setattr(history_dialog, "_BACKGROUND_FORMAT_MIN_CELLS", 10)
+    frame = pd.DataFrame({"a": range(100), "b": ["x"] * 100})
+    model = DataFrameTableModel(page_size=20)
+    model.update(frame)
+
+    assert model.data(model.index(3, 0)) == "3"
+    model._formatter.wait()  # type: ignore[union-attr]
+    qapp.processEvents()
+    assert all(text is not None for text in model._text)
+    assert model.data(model.index(19, 1)) == "x"
+    model.update(None)
+    assert model.columnCount() == 0
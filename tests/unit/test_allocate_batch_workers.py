@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from app.core import allocate_students
+from app.core.allocate_students import _row_mentor_keys, allocate_batch
+from app.core.common.mentor_state import MentorStateStore
+from app.core.policy_loader import load_policy
+from app.infra.cli import _build_parser
+
+
+def _batch_inputs(seed: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    size = 36
+    mentor_numbers = rng.integers(0, 24, size=size)
+    pool = pd.DataFrame(
+        {
+            "پشتیبان": [f"Mentor-{number}" for number in mentor_numbers],
+            "کد کارمندی پشتیبان": [f"EMP-{number:03d}" for number in mentor_numbers],
+            "کدرشته": rng.choice([1201, 2201, 3301], size=size),
+            "گروه آزمایشی": "تجربی",
+            "جنسیت": rng.choice([0, 1], size=size),
+            "دانش آموز فارغ": 0,
+            "مرکز گلستان صدرا": 1,
+            "مالی حکمت بنیاد": 0,
+            "کد مدرسه": 0,
+            "remaining_capacity": rng.integers(1, 4, size=size),
+        }
+    )
+    students = pd.DataFrame(
+        {
+            "student_id": [f"STD-{idx:03d}" for idx in range(90)],
+            "کدرشته": rng.choice([1201, 2201, 3301, 9999], size=90),
+            "گروه_آزمایشی": "تجربی",
+            "جنسیت": rng.choice([0, 1], size=90),
+            "دانش_آموز_فارغ": 0,
+            "مرکز_گلستان_صدرا": 1,
+            "مالی_حکمت_بنیاد": 0,
+            "کد_مدرسه": 0,
+        }
+    )
+    return students, pool
+
+
+def _school_inputs() -> tuple[pd.DataFrame, pd.DataFrame]:
+    pool = pd.DataFrame(
+        {
+            "پشتیبان": ["M-A", "M-A", "M-B", "M-C", "M-D"],
+            "کد کارمندی پشتیبان": ["EMP-001", "EMP-001", "EMP-002", "EMP-003", "EMP-004"],
+            "کدرشته": [1201, 2201, 3301, 1201, 3301],
+            "گروه آزمایشی": "تجربی",
+            "جنسیت": 1,
+            "دانش آموز فارغ": 0,
+            "مرکز گلستان صدرا": 1,
+            "مالی حکمت بنیاد": 0,
+            "کد مدرسه": [5001, 5001, 5001, 0, 0],
+            "remaining_capacity": 5,
+        }
+    )
+    students = pd.DataFrame(
+        {
+            "student_id": ["S1", "S2", "S3", "S4", "S5"],
+            "کدرشته": [1201, 2201, 3301, 1201, 3301],
+            "گروه_آزمایشی": "تجربی",
+            "جنسیت": 1,
+            "دانش_آموز_فارغ": 0,
+            "مرکز_گلستان_صدرا": 1,
+            "مالی_حکمت_بنیاد": 0,
+            "کد_مدرسه": [5001, 5001, 5001, 0, 0],
+        }
+    )
+    return students, pool
+
+
+@pytest.fixture
+def executors(monkeypatch) -> list[object]:
+    """اجرای موازی حتی برای ورودی کوچک و روی میزبان تک‌CPU؛ شمارش poolهای ساخته‌شده."""
+
+    created: list[object] = []
+
+    class _CountingExecutor(ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs) -> None:
+            created.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(allocate_students, "_PARALLEL_MIN_STUDENTS", 0)
+    monkeypatch.setattr(allocate_students, "_available_cpus", lambda: 4)
+    monkeypatch.setattr(allocate_students, "ProcessPoolExecutor", _CountingExecutor)
+    return created
+
+
+def _assert_outputs_equal(left, right) -> None:
+    for left_frame, right_frame in zip(left, right):
+        pdt.assert_frame_equal(left_frame, right_frame)
+
+
+def test_allocate_batch_workers_match_sequential(monkeypatch, executors) -> None:
+    policy = load_policy()
+    students, pool = _batch_inputs(8)
+    sequential = allocate_batch(students.copy(), pool.copy(), policy=policy)
+
+    partition_sizes: list[int] = []
+    original = allocate_students._partition_batch_students
+
+    def _spy(*args, **kwargs):
+        components = original(*args, **kwargs)
+        partition_sizes.append(len(components))
+        return components
+
+    monkeypatch.setattr(allocate_students, "_partition_batch_students", _spy)
+    parallel = allocate_batch(students.copy(), pool.copy(), policy=policy, workers=2)
+
+    assert partition_sizes and max(partition_sizes) > 1
+    assert len(executors) == 1
+    _assert_outputs_equal(parallel, sequential)
+
+
+def test_school_phase_partitions_by_mentor_state_key(monkeypatch, executors) -> None:
+    policy = load_policy()
+    students, pool = _school_inputs()
+    sequential = allocate_batch(students.copy(), pool.copy(), policy=policy)
+
+    phases: list[tuple[bool, list[list[str]]]] = []
+    original = allocate_students._partition_batch_students
+
+    def _spy(context, phase, group):
+        components = original(context, phase, group)
+        ids = [sorted(str(group[offset]["student_id"]) for offset in part) for part in components]
+        phases.append((phase.enforce_center_manager, sorted(ids)))
+        return components
+
+    monkeypatch.setattr(allocate_students, "_partition_batch_students", _spy)
+    parallel = allocate_batch(students.copy(), pool.copy(), policy=policy, workers=2)
+
+    # S1 و S2 کلید join متفاوت ولی پشتیبان مشترک دارند و باید هم‌مؤلفه باشند.
+    assert phases == [
+        (False, [["S1", "S2"], ["S3"]]),
+        (True, [["S4"], ["S5"]]),
+    ]
+    assert len(executors) == 1
+    _assert_outputs_equal(parallel, sequential)
+
+
+def test_row_mentor_keys_follow_mentor_state_resolution() -> None:
+    store = MentorStateStore.from_state(
+        {7: {"initial": 1, "remaining": 1}, "EMP-2": {"initial": 1, "remaining": 1}}
+    )
+    pool = pd.DataFrame({"کد کارمندی پشتیبان": [7, "007", " EMP-2 ", "EMP-404"]})
+
+    assert _row_mentor_keys(pool, store) == [0, 0, 1, ("row", 3)]
+
+
+def test_unpicklable_stage_rules_fall_back_to_sequential(monkeypatch, executors) -> None:
+    policy = load_policy()
+    students, pool = _batch_inputs(8)
+    sequential = allocate_batch(students.copy(), pool.copy(), policy=policy)
+    default_rules = allocate_students.default_stage_rule_map
+
+    def _custom_rules():
+        return {
+            stage: (lambda context, rule=rule: rule(context))
+            for stage, rule in default_rules().items()
+        }
+
+    monkeypatch.setattr(allocate_students, "default_stage_rule_map", _custom_rules)
+    with pytest.warns(UserWarning, match="not picklable"):
+        parallel = allocate_batch(students.copy(), pool.copy(), policy=policy, workers=2)
+
+    assert executors == []
+    _assert_outputs_equal(parallel, sequential)
+
+
+def test_cli_allocate_accepts_workers() -> None:
+    parser = _build_parser()
+    args = parser.parse_args(
+        ["allocate", "--output", "out.xlsx", "--workers", "4"]
+    )
+    assert args.workers == 4
+    rule_args = parser.parse_args(
+        ["rule-engine", "--matrix", "m.xlsx", "--students", "s.xlsx", "--output", "o.xlsx"]
+    )
+    assert rule_args.workers == 1
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from app.core.allocate_students import allocate_batch
+from app.core.allocation.accumulators import ColumnAccumulator
+from app.core.policy_loader import load_policy
+from tests.unit.test_allocation_profiler import _inputs
+
+
+def test_accumulator_matches_record_constructor_with_growth() -> None:
+    records = []
+    for idx in range(150):
+        record: dict[str, object] = {
+            "student_id": f"S{idx}",
+            "count": idx,
+            "ratio": None if idx % 7 == 0 else idx / 3,
+            "flag": idx % 2 == 0,
+            "payload": {"idx": idx},
+        }
+        if idx >= 100:
+            record["late"] = "x"
+        records.append(record)
+
+    acc = ColumnAccumulator(capacity=8)
+    for record in records:
+        acc.append(record)
+
+    assert len(acc) == 150
+    assert_frame_equal(acc.to_frame(), pd.DataFrame(records))
+
+
+def test_categorical_columns_use_codes_and_keep_missing() -> None:
+    acc = ColumnAccumulator(categorical=("stage",))
+    acc.append({"stage": "type", "value": 1})
+    acc.append({"value": 2})
+    acc.append({"stage": "type", "value": 3})
+
+    frame = acc.to_frame()
+
+    assert isinstance(frame["stage"].dtype, pd.CategoricalDtype)
+    assert list(frame["stage"].cat.categories) == ["type"]
+    assert frame["stage"].isna().tolist() == [False, True, False]
+    assert frame["value"].dtype == np.int64
+
+
+def test_repeated_strings_are_interned_and_constants_applied() -> None:
+    acc = ColumnAccumulator()
+    for idx in range(3):
+        acc.append({"reason": "".join(["no ", "capacity"]), "alias": 0, "idx": idx})
+    acc.set_constant("alias", 5)
+
+    frame = acc.to_frame()
+
+    assert frame["reason"].iloc[0] is frame["reason"].iloc[2]
+    assert frame["alias"].tolist() == [5, 5, 5]
+    assert ColumnAccumulator().to_frame().shape == (0, 0)
+
+
+def test_allocate_batch_trace_uses_categorical_stage_codes() -> None:
+    students, pool = _inputs()
+    _, _, logs_df, trace_df = allocate_batch(students, pool, policy=load_policy())
+
+    assert isinstance(trace_df["stage"].dtype, pd.CategoricalDtype)
+    assert trace_df["total_before"].dtype == np.int64
+    assert trace_df["student_id"].iloc[0] == "STD-1"
+    assert logs_df["student_id"].tolist() == ["STD-1", "STD-2", "STD-3"]
+    assert (logs_df["alias_autofill"] == 0).all()
+    summary = trace_df.attrs["summary_df"]
+    assert summary["passed_type"].dtype == bool
+    assert summary["student_id"].tolist() == ["STD-1", "STD-2", "STD-3"]
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.core.allocate_students import allocate_batch
+from app.core.allocation.digest import (
+    DecisionDigest,
+    compare_run_digests,
+    decision_entries,
+    frame_digest,
+)
+from app.core.policy_loader import load_policy
+from app.infra import cli
+from app.infra.local_database import LocalDatabase, RunRecord
+from tests.unit.test_allocation_profiler import _inputs
+
+
+def _allocate(students: pd.DataFrame, pool: pd.DataFrame):
+    return allocate_batch(students.copy(), pool.copy(), policy=load_policy())
+
+
+def _insert_run(db: LocalDatabase, run_uuid: str) -> int:
+    now = datetime.now(timezone.utc)
+    return db.insert_run(
+        RunRecord(
+            run_uuid=run_uuid,
+            started_at=now,
+            finished_at=now,
+            policy_version="1.0.3",
+            ssot_version="1.0.2",
+            entrypoint="allocate",
+            cli_args=None,
+            db_path=None,
+            input_files_json="{}",
+            input_hashes_json="{}",
+            total_students=3,
+            total_allocated=2,
+            total_unallocated=1,
+            history_metrics_json=None,
+            qa_summary_json=None,
+            status="success",
+            message=None,
+        )
+    )
+
+
+def test_decision_digest_is_stable_and_order_sensitive() -> None:
+    first = DecisionDigest()
+    second = DecisionDigest()
+    logs = [
+        {"student_id": "S1", "allocation_status": "success", "mentor_id": 7},
+        {"student_id": "S2", "allocation_status": "failed", "mentor_id": None},
+    ]
+    for log in logs:
+        first.update(log)
+    for log in reversed(logs):
+        second.update(log)
+
+    assert first.decision_count == 2
+    assert first.hexdigest() != second.hexdigest()
+    assert [sid for sid, _ in decision_entries(first.report()["decisions"])] == ["S1", "S2"]
+
+
+def test_allocate_batch_attaches_matching_digests_across_runs() -> None:
+    students, pool = _inputs()
+    run_a = _allocate(students, pool)
+    run_b = _allocate(students, pool)
+
+    digest_a = run_a[3].attrs["decision_digest"]
+    digest_b = run_b[3].attrs["decision_digest"]
+    assert digest_a["decision_count"] == len(students)
+    assert digest_a["decision_digest"] == digest_b["decision_digest"]
+    assert frame_digest(run_a[0]) == frame_digest(run_b[0])
+    assert compare_run_digests(digest_a, digest_b).matches
+
+
+def test_compare_reports_first_diverging_student() -> None:
+    students, pool = _inputs()
+    baseline = _allocate(students, pool)[3].attrs["decision_digest"]
+    changed_pool = pool.assign(remaining_capacity=[1, 1])
+    changed = _allocate(students, changed_pool)[3].attrs["decision_digest"]
+
+    report = compare_run_digests(changed, baseline)
+
+    assert not report.matches
+    assert report.first_divergence["student_id"] == "STD-1"
+    assert "STD-1" in report.describe()
+
+
+def test_sampled_rerun_matches_decision_prefix() -> None:
+    students, pool = _inputs()
+    full = _allocate(students, pool)[3].attrs["decision_digest"]
+    sample_ids = [sid for sid, _ in decision_entries(full["decisions"])[:2]]
+    sample = _allocate(students[students["student_id"].isin(sample_ids)], pool)
+
+    report = compare_run_digests(
+        sample[3].attrs["decision_digest"], full, prefix_only=True, frames=()
+    )
+    assert report.matches
+    assert report.compared_decisions == 2
+
+
+def test_run_digest_roundtrip_in_local_database(tmp_path: Path) -> None:
+    db = LocalDatabase(tmp_path / "digest.db")
+    db.initialize()
+    digest = {
+        "inputs_digest": "abc",
+        "decision_digest": "d1",
+        "decision_count": 2,
+        "decisions": "S1\t00\nS2\t11",
+        "frames": {"allocations": "f1"},
+    }
+    first_id = _insert_run(db, "run-1")
+    second_id = _insert_run(db, "run-2")
+    db.insert_run_digest(run_id=first_id, digest=digest)
+    db.insert_run_digest(run_id=second_id, digest={**digest, "decision_digest": "d2"})
+
+    latest = db.fetch_latest_run_digest("abc")
+    assert latest is not None
+    assert latest["run_id"] == second_id
+    assert latest["decisions"] == digest["decisions"]
+    assert latest["frames"] == {"allocations": "f1"}
+    assert db.fetch_latest_run_digest("missing") is None
+    assert db.fetch_run_digest(first_id)["decision_digest"] == "d1"
+
+
+def test_verify_determinism_uses_previous_digest_then_samples(tmp_path: Path) -> None:
+    students, pool = _inputs()
+    db = LocalDatabase(tmp_path / "digest.db")
+    reruns: list[int] = []
+
+    def rerun(frame: pd.DataFrame):
+        reruns.append(len(frame))
+        return _allocate(frame, pool)
+
+    outputs = _allocate(students, pool)
+    run_digest = cli._build_run_digest(outputs, inputs_digest="inputs")
+    cli._verify_determinism(
+        "digest",
+        run_digest,
+        rerun=rerun,
+        students_base=students,
+        sample_size=2,
+        db=db,
+        progress=lambda *_: None,
+    )
+    assert reruns == [2]
+
+    db.insert_run_digest(run_id=_insert_run(db, "run-1"), digest=run_digest)
+    cli._verify_determinism(
+        "digest",
+        run_digest,
+        rerun=rerun,
+        students_base=students,
+        sample_size=2,
+        db=db,
+        progress=lambda *_: None,
+    )
+    assert reruns == [2]
+
+    tampered = dict(run_digest)
+    entries = decision_entries(run_digest["decisions"])
+    entries[1] = (entries[1][0], "0" * 16)
+    tampered["decisions"] = "\n".join(f"{sid}\t{value}" for sid, value in entries)
+    with pytest.raises(RuntimeError, match=entries[1][0]):
+        cli._verify_determinism(
+            "digest",
+            tampered,
+            rerun=rerun,
+            students_base=students,
+            sample_size=2,
+            db=db,
+            progress=lambda *_: None,
+        )
+
+
+def test_cli_determinism_check_modes() -> None:
+    parser = cli._build_parser()
+    args = parser.parse_args(["allocate", "--output", "out.xlsx", "--determinism-check"])
+    assert cli._resolve_determinism_mode(args) == "digest"
+    args = parser.parse_args(
+        ["allocate", "--output", "out.xlsx", "--determinism-check", "rerun"]
+    )
+    assert cli._resolve_determinism_mode(args) == "rerun"
+    args = parser.parse_args(["allocate", "--output", "out.xlsx"])
+    assert cli._resolve_determinism_mode(args) is None
+    assert args.determinism_sample == cli._DEFAULT_DETERMINISM_SAMPLE
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from app.core.allocate_students import allocate_batch
+from app.core.allocation.profiler import (
+    NULL_PROFILER,
+    PROFILE_ENV,
+    StageProfiler,
+    profiler_from_env,
+)
+from app.core.policy_loader import load_policy
+from app.infra.history_store import _build_profile_metric_rows
+
+
+def _inputs() -> tuple[pd.DataFrame, pd.DataFrame]:
+    pool = pd.DataFrame(
+        {
+            "پشتیبان": ["Mentor-1", "Mentor-2"],
+            "کد کارمندی پشتیبان": ["EMP-001", "EMP-002"],
+            "کدرشته": [1201, 1201],
+            "گروه آزمایشی": "تجربی",
+            "جنسیت": [1, 0],
+            "دانش آموز فارغ": 0,
+            "مرکز گلستان صدرا": 1,
+            "مالی حکمت بنیاد": 0,
+            "کد مدرسه": 0,
+            "remaining_capacity": [2, 1],
+        }
+    )
+    students = pd.DataFrame(
+        {
+            "student_id": ["STD-1", "STD-2", "STD-3"],
+            "کدرشته": [1201, 1201, 9999],
+            "گروه_آزمایشی": "تجربی",
+            "جنسیت": [1, 0, 1],
+            "دانش_آموز_فارغ": 0,
+            "مرکز_گلستان_صدرا": 1,
+            "مالی_حکمت_بنیاد": 0,
+            "کد_مدرسه": 0,
+        }
+    )
+    return students, pool
+
+
+def test_null_profiler_records_nothing() -> None:
+    started = NULL_PROFILER.start()
+    NULL_PROFILER.lap("prefilter", started)
+    assert NULL_PROFILER.report()["stages"] == {}
+    assert not NULL_PROFILER.enabled
+
+
+def test_profiler_env_switch(monkeypatch) -> None:
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    assert profiler_from_env() is NULL_PROFILER
+    monkeypatch.setenv(PROFILE_ENV, "1")
+    assert profiler_from_env().enabled
+
+
+def test_profiler_merge_accumulates_histograms() -> None:
+    first = StageProfiler()
+    first.lap("ranking", first.start())
+    second = StageProfiler()
+    second.merge(first.report())
+    second.merge(first.report())
+
+    stats = second.report()["stages"]["ranking"]
+    assert stats["count"] == 2
+    assert sum(stats["histogram"]) == 2
+
+
+def test_allocate_batch_reports_stage_profile() -> None:
+    students, pool = _inputs()
+    profiler = StageProfiler()
+
+    _, _, _, trace_df = allocate_batch(
+        students, pool, policy=load_policy(), profiler=profiler
+    )
+
+    report = trace_df.attrs["stage_profile"]
+    stages = report["stages"]
+    assert stages["prefilter"]["count"] == 3
+    assert stages["trace_summary"]["count"] == 3
+    assert stages["ranking"]["count"] == 2
+    assert {"capacity_gate", "consume", "phase_rules", "state_sync"} <= set(stages)
+
+    rows = _build_profile_metric_rows(7, report)
+    keys = {row.metric_key for row in rows}
+    assert "PROFILE.ranking.total_seconds" in keys
+    assert all(row.run_id == 7 for row in rows)
+
+
+def test_allocate_batch_without_profiler_has_no_report(monkeypatch) -> None:
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    students, pool = _inputs()
+    _, _, _, trace_df = allocate_batch(students, pool, policy=load_policy())
+    assert "stage_profile" not in trace_df.attrs
+
+
+def test_cli_profile_stages_flag_defaults_to_output_sibling() -> None:
+    from app.infra.cli import _build_parser
+
+    parser = _build_parser()
+    args = parser.parse_args(["allocate", "--output", "out.xlsx", "--profile-stages"])
+    assert args.profile_stages == ""
+    args = parser.parse_args(["allocate", "--output", "out.xlsx"])
+    assert args.profile_stages is None
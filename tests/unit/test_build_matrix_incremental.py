@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+from typing import Collection, Mapping, Sequence
+
+import pandas.testing as pdt
+
+from app.core.build_matrix import BuildConfig, _load_fragment, build_matrix
+from tests.perf.test_build_matrix_perf import _synthetic_inputs
+
+
+class _MemoryFragmentStore:
+    def __init__(self) -> None:
+        self.fragments: dict[str, bytes] = {}
+        self.contexts: dict[str, str] = {}
+
+    def load_matrix_fragments(self, fingerprints: Sequence[str]) -> Mapping[str, bytes]:
+        return {key: self.fragments[key] for key in fingerprints if key in self.fragments}
+
+    def save_matrix_fragments(
+        self, fragments: Mapping[str, bytes], *, retain: Collection[str], context: str
+    ) -> None:
+        for key in [key for key, owner in self.contexts.items() if owner == context]:
+            if key not in retain:
+                del self.fragments[key], self.contexts[key]
+        self.fragments.update(fragments)
+        self.contexts.update(dict.fromkeys(fragments, context))
+
+
+def _build(insp, schools, crosswalk, cfg, store=None):
+    messages: list[str] = []
+    outputs = build_matrix(
+        insp,
+        schools,
+        crosswalk,
+        cfg=cfg,
+        progress=lambda _, message: messages.append(message),
+        fragment_store=store,
+    )
+    incremental = [message for message in messages if message.startswith("incremental matrix")]
+    return outputs, incremental
+
+
+def _assert_outputs_equal(left, right) -> None:
+    for expected, actual in zip(left, right, strict=True):
+        pdt.assert_frame_equal(expected, actual)
+
+
+def test_incremental_build_matches_full_build_and_reuses_fragments() -> None:
+    insp, schools, crosswalk = _synthetic_inputs(120)
+    cfg = BuildConfig()
+    store = _MemoryFragmentStore()
+
+    full, _ = _build(insp, schools, crosswalk, cfg)
+    cold, cold_messages = _build(insp, schools, crosswalk, cfg, store)
+    warm, warm_messages = _build(insp, schools, crosswalk, cfg, store)
+    _assert_outputs_equal(full, cold)
+    _assert_outputs_equal(full, warm)
+    assert cold_messages == ["incremental matrix: rebuilt 120/120 mentor rows"]
+    assert warm_messages == ["incremental matrix: rebuilt 0/120 mentor rows"]
+    assert len(store.fragments) == 120
+
+    changed = insp.copy()
+    changed.loc[changed.index[:3], "ردیف پشتیبان"] += 1000
+    changed = changed.drop(index=changed.index[-1])
+    expected, _ = _build(changed, schools, crosswalk, cfg)
+    actual, messages = _build(changed, schools, crosswalk, cfg, store)
+    _assert_outputs_equal(expected, actual)
+    assert messages == ["incremental matrix: rebuilt 3/119 mentor rows"]
+    assert len(store.fragments) == 119
+
+
+def test_incremental_build_invalidates_on_crosswalk_change() -> None:
+    insp, schools, crosswalk = _synthetic_inputs(40)
+    cfg = BuildConfig()
+    store = _MemoryFragmentStore()
+    _build(insp, schools, crosswalk, cfg, store)
+
+    renamed = crosswalk.copy()
+    renamed.loc[0, "کد گروه"] = 1299
+    expected, _ = _build(insp, schools, renamed, cfg)
+    actual, messages = _build(insp, schools, renamed, cfg, store)
+    _assert_outputs_equal(expected, actual)
+    assert messages == ["incremental matrix: rebuilt 40/40 mentor rows"]
+
+    _, messages = _build(insp, schools, crosswalk, cfg, store)
+    assert messages == ["incremental matrix: rebuilt 0/40 mentor rows"]
+
+
+def test_fragment_payloads_are_json_and_keep_tuples() -> None:
+    insp, schools, crosswalk = _synthetic_inputs(5)
+    store = _MemoryFragmentStore()
+    _build(insp, schools, crosswalk, BuildConfig(), store)
+
+    payload = next(iter(store.fragments.values()))
+    data = json.loads(payload)
+    assert "__tuple__" in data["base"]["group_pairs"][0]
+    fragment = _load_fragment(payload)
+    assert fragment is not None
+    assert isinstance(fragment.base["group_pairs"][0], tuple)
+    assert _load_fragment(b"\x80\x05not-json") is None
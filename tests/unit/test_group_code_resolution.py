@@ -137,3 +137,53 @@ def test_validate_with_students_marks_unresolved_group_code() -> None:
     assert pd.isna(stud_df.loc[0, "group_code"])
     assert stud_df.loc[0, "reason"] == "دانش‌آموز فاقد «کد رشته» و «گروه آزمایشی» معتبر است"
     assert breakdown.loc[0, "reason"] == "دانش‌آموز فاقد «کد رشته» و «گروه آزمایشی» معتبر است"
+
+
+def test_validate_with_students_reports_first_failing_stage() -> None:
+    students_df = pd.DataFrame(
+        {
+            "کد پستی": ["1234", "1234", "4321", "20000", "0005"],
+            "نام پشتیبان": ["الف"] * 5,
+            "مدیر": ["شهدخت کشاورز"] * 5,
+            "نام مدرسه 1": ["نمونه"] * 5,
+            "کد رشته": ["3", "3", "3", "3", "7"],
+            "گروه آزمایشی": ["تجربی"] * 5,
+            "جنسیت": [1, 0, 1, 1, 1],
+        }
+    )
+    matrix_df = pd.DataFrame(
+        {
+            "جایگزین": ["1234", "20000", "0"],
+            "عادی مدرسه": ["عادی", "مدرسه‌ای", "مدرسه‌ای"],
+            "کدرشته": [3, 3, 3],
+            "گروه آزمایشی": ["تجربی"] * 3,
+            "جنسیت": [1, 0, 1],
+            "دانش آموز فارغ": [1, 1, 1],
+            "مرکز گلستان صدرا": [1, 1, 1],
+            "مالی حکمت بنیاد": [0, 0, 0],
+            "کد مدرسه": [0, 1001, 1001],
+            "remaining_capacity": [1, 1, 1],
+        }
+    )
+    schools_df = pd.DataFrame({"کد مدرسه": [1001], "نام مدرسه": ["نمونه"]})
+    crosswalk_df = pd.DataFrame(
+        {"گروه آزمایشی": ["تجربی"], "کد گروه": [3], "مقطع تحصیلی": ["دوازدهم"]}
+    )
+
+    stud_df, breakdown, summary = validate_with_students(
+        students_df,
+        matrix_df,
+        schools_df,
+        crosswalk_df,
+        cfg=BuildConfig(),
+    )
+
+    assert stud_df["reason"].tolist() == [
+        "MATCHED",
+        "gender mismatch",
+        "no normal alias match",
+        "gender mismatch",
+        "group_code mismatch",
+    ]
+    assert summary == {"total": 5, "matched": 1, "unmatched": 4}
+    assert int(breakdown.set_index("reason").loc["gender mismatch", "count"]) == 2
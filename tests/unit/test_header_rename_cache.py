@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from app.core.common.columns import (
+    CANON_EN_TO_FA,
+    CanonicalFrameView,
+    canonical_header,
+    canonicalize_headers,
+    header_rename_map,
+)
+
+
+def test_header_rename_map_matches_canonicalize_headers() -> None:
+    columns = ["کدرشته", "mentor_id", "جنسیت | gender", "remaining capacity", "ستون آزاد"]
+    frame = pd.DataFrame([[1, "EMP-1", 0, 2, "x"]], columns=columns)
+    for mode in ("fa", "en", "fa_en"):
+        rename = header_rename_map(frame.columns, mode)
+        assert list(canonicalize_headers(frame, mode).columns) == [
+            rename.get(column, column) for column in columns
+        ]
+    assert "ستون آزاد" not in header_rename_map(columns, "en")
+
+
+def test_header_rename_map_returns_independent_copies() -> None:
+    columns = ("کدرشته", "جنسیت")
+    first = header_rename_map(columns, "en")
+    first["کدرشته"] = "mutated"
+    assert header_rename_map(columns, "en")["کدرشته"] == "group_code"
+
+
+def test_header_rename_map_rejects_unknown_mode() -> None:
+    with pytest.raises(ValueError):
+        header_rename_map(["کدرشته"], "de")  # type: ignore[arg-type]
+
+
+def test_canonical_header_single_column() -> None:
+    assert canonical_header(CANON_EN_TO_FA["mentor_id"], "en") == "mentor_id"
+    assert canonical_header("unknown column", "en") == "unknown column"
+
+
+def test_canonical_frame_view_is_live_for_canonical_frame() -> None:
+    frame = pd.DataFrame({"mentor_id": ["EMP-1"], "remaining_capacity": [2]})
+    view = CanonicalFrameView.build(frame)
+    assert view.frame is frame
+    frame.loc[0, "remaining_capacity"] = 0
+    assert int(view.frame.loc[0, "remaining_capacity"]) == 0
+
+
+def test_canonical_frame_view_renames_and_dedupes_once() -> None:
+    frame = pd.DataFrame(
+        [["EMP-1", "EMP-9", 2]],
+        columns=[CANON_EN_TO_FA["mentor_id"], "mentor_id", "remaining_capacity"],
+    )
+    view = CanonicalFrameView.build(frame)
+    assert view.frame is not frame
+    assert list(view.frame.columns) == ["mentor_id", "remaining_capacity"]
+    assert view.frame.loc[0, "mentor_id"] == "EMP-1"
@@ -255,6 +255,46 @@ def test_read_inspactor_workbook_handles_missing_alt_code_column(tmp_path: Path)
     assert loaded.loc[0, COL_MANAGER_NAME] == "ب"
 
 
+@pytest.mark.skipif(not _HAS_OPENPYXL, reason="openpyxl لازم است برای خواندن .xlsx")
+def test_read_inspactor_workbook_parses_only_selected_sheet(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    partial = pd.DataFrame({COL_MENTOR_ID: ["3001"] * 5, COL_MENTOR_NAME: ["ج"] * 5})
+    complete = pd.DataFrame(
+        {
+            COL_MENTOR_NAME: ["الف"],
+            COL_MANAGER_NAME: ["ب"],
+            COL_MENTOR_ID: ["2001"],
+            COL_POSTAL: ["54321"],
+            COL_SCHOOL_COUNT: [2],
+            CAPACITY_CURRENT_COL: [7],
+            CAPACITY_SPECIAL_COL: [1],
+            COL_GROUP: ["ریاضی"],
+        }
+    )
+    sample = tmp_path / "inspactor_select.xlsx"
+    with pd.ExcelWriter(sample) as writer:
+        partial.to_excel(writer, sheet_name="Extra", index=False)
+        complete.to_excel(writer, sheet_name="Mentors", index=False)
+        partial.to_excel(writer, sheet_name="Tail", index=False)
+
+    full_parses: list[str] = []
+    original_parse = pd.ExcelFile.parse
+
+    def _recording_parse(self, sheet_name=0, *args, **kwargs):  # type: ignore[no-untyped-def]
+        if kwargs.get("nrows") != 0:
+            full_parses.append(sheet_name)
+        return original_parse(self, sheet_name, *args, **kwargs)
+
+    monkeypatch.setattr(pd.ExcelFile, "parse", _recording_parse)
+    monkeypatch.setattr(io_utils, "_fast_excel_engine", lambda: None)
+
+    loaded = io_utils.read_inspactor_workbook(sample)
+
+    assert full_parses == ["Mentors"]
+    assert loaded.loc[0, COL_MENTOR_NAME] == "الف"
+
+
 @pytest.mark.skipif(not _HAS_OPENPYXL, reason="openpyxl لازم است برای خواندن .xlsx")
 def test_read_crosswalk_workbook_coerces_alt_code_in_all_sheets(tmp_path: Path) -> None:
     groups = pd.DataFrame({ALT_CODE_COLUMN: [111222], "گروه": ["الف"]})
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.allocate_students import allocate_student
+from app.core.common.filters import apply_join_filters
+from app.core.common.join_index import JoinKeyIndex
+from app.core.common.trace import build_allocation_trace, evaluate_allocation_stages
+from app.core.common.types import CANONICAL_TRACE_ORDER
+from app.core.policy_loader import load_policy
+
+
+def _random_pool(seed: int, *, size: int = 120, with_constraint: bool = True) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    school = rng.choice([0, 3581, 4001, 5001], size=size)
+    frame = pd.DataFrame(
+        {
+            "پشتیبان": [f"Mentor-{idx}" for idx in range(size)],
+            "کد کارمندی پشتیبان": [f"EMP-{idx:03d}" for idx in range(size)],
+            "کدرشته": pd.array(rng.choice([1201, 1202, 2201], size=size), dtype="Int64"),
+            "جنسیت": pd.array(rng.choice([0, 1], size=size), dtype="Int64"),
+            "دانش آموز فارغ": pd.array(rng.choice([0, 1], size=size), dtype="Int64"),
+            "مرکز گلستان صدرا": pd.array(rng.choice([0, 1, 2], size=size), dtype="Int64"),
+            "مالی حکمت بنیاد": pd.array(rng.choice([0, 1, 3], size=size), dtype="Int64"),
+            "کد مدرسه": pd.array(school, dtype="Int64"),
+            "remaining_capacity": rng.integers(0, 3, size=size),
+        }
+    )
+    frame.loc[::17, "جنسیت"] = pd.NA
+    if with_constraint:
+        frame["has_school_constraint"] = school > 0
+    return frame
+
+
+def _students() -> list[dict[str, object]]:
+    students: list[dict[str, object]] = []
+    for idx, (code, gender, status, center, finance, school) in enumerate(
+        itertools.product(
+            [1201, 2201, 9999],
+            [0, 1],
+            [0, 1],
+            [0, 1, 2, None],
+            [0, 3],
+            [0, 3581, 7000],
+        )
+    ):
+        students.append(
+            {
+                "student_id": f"STU-{idx}",
+                "کدرشته": code,
+                "جنسیت": gender,
+                "دانش_آموز_فارغ": status,
+                "مرکز_گلستان_صدرا": center,
+                "مالی_حکمت_بنیاد": finance,
+                "کد_مدرسه": school,
+            }
+        )
+    return students
+
+
+@pytest.mark.parametrize("with_constraint", [True, False])
+def test_join_index_matches_apply_join_filters(with_constraint: bool) -> None:
+    policy = load_policy()
+    pool = _random_pool(7, with_constraint=with_constraint)
+    index = JoinKeyIndex.build(pool, policy=policy)
+
+    for student in _students():
+        expected_counts: dict[str, int] = {}
+        actual_counts: dict[str, int] = {}
+        expected = apply_join_filters(
+            pool,
+            student,
+            policy=policy,
+            tracker=lambda stage, count: expected_counts.__setitem__(stage, count),
+        )
+        actual = index.select(
+            student,
+            tracker=lambda stage, count: actual_counts.__setitem__(stage, count),
+        )
+        assert actual_counts == expected_counts
+        assert list(actual.index) == list(expected.index)
+
+
+def test_join_index_subset_matches_filtered_view() -> None:
+    policy = load_policy()
+    pool = _random_pool(11)
+    labels = pool.index[pool["مرکز گلستان صدرا"].eq(1).fillna(False).to_numpy(dtype=bool)]
+    view = pool.loc[labels]
+    index = JoinKeyIndex.build(pool, policy=policy).subset_labels(labels)
+
+    for student in _students():
+        expected = apply_join_filters(view, student, policy=policy)
+        actual = index.select(student)
+        assert list(actual.index) == list(expected.index)
+
+
+def test_join_index_reads_current_capacity_values() -> None:
+    policy = load_policy()
+    pool = _random_pool(3)
+    probe = _students()[0]
+    pool.loc[0, ["کدرشته", "جنسیت", "دانش آموز فارغ", "مرکز گلستان صدرا", "مالی حکمت بنیاد"]] = [
+        probe["کدرشته"],
+        probe["جنسیت"],
+        probe["دانش_آموز_فارغ"],
+        probe["مرکز_گلستان_صدرا"],
+        probe["مالی_حکمت_بنیاد"],
+    ]
+    pool.loc[0, "کد مدرسه"] = 0
+    pool.loc[0, "has_school_constraint"] = False
+    index = JoinKeyIndex.build(pool, policy=policy)
+
+    before = index.select(probe)
+    assert 0 in before.index
+    pool.loc[0, "remaining_capacity"] = 99
+    after = index.select(probe)
+    assert int(after.loc[0, "remaining_capacity"]) == 99
+
+
+def test_join_index_subset_labels_rejects_unknown_labels() -> None:
+    policy = load_policy()
+    pool = _random_pool(3)
+    index = JoinKeyIndex.build(pool, policy=policy)
+    with pytest.raises(KeyError):
+        index.subset_labels(pd.Index([0, 10_000]))
+
+
+def test_allocate_student_with_join_index_matches_default() -> None:
+    policy = load_policy()
+    pool = _random_pool(5)
+    pool["allocations_new"] = 0
+    pool["occupancy_ratio"] = 0.0
+    index = JoinKeyIndex.build(pool, policy=policy)
+    for student in _students()[:48]:
+        baseline = allocate_student(student, pool, policy=policy)
+        indexed = allocate_student(student, pool, policy=policy, join_index=index)
+        assert indexed.log["stage_candidate_counts"] == baseline.log["stage_candidate_counts"]
+        assert indexed.log["mentor_id"] == baseline.log["mentor_id"]
+
+
+@pytest.mark.parametrize("with_constraint", [True, False])
+def test_trace_with_join_index_follows_eligible_positions(with_constraint: bool) -> None:
+    policy = load_policy()
+    pool = _random_pool(17, with_constraint=with_constraint)
+    labels = pool.index[pool["مالی حکمت بنیاد"].ne(1).fillna(True).to_numpy(dtype=bool)]
+    view = pool.loc[labels]
+    index = JoinKeyIndex.build(pool, policy=policy).subset_labels(labels)
+
+    for student in _students():
+        counts: dict[str, int] = {}
+        eligible = apply_join_filters(
+            view,
+            student,
+            policy=policy,
+            tracker=lambda stage, count: counts.__setitem__(stage, count),
+        )
+        full_scan = build_allocation_trace(student, view, policy=policy)
+        evaluation = evaluate_allocation_stages(student, index, policy=policy)
+        trace = evaluation.trace
+
+        assert [record["stage"] for record in trace] == list(CANONICAL_TRACE_ORDER)
+        before = view.shape[0]
+        for record in trace[:-1]:
+            assert record["total_before"] == before
+            assert record["total_after"] == counts[record["stage"]]
+            before = record["total_after"]
+        for record, expected in zip(trace[:4], full_scan[:4]):
+            assert record["expected_value"] == expected["expected_value"]
+        capacity = trace[-1]
+        assert capacity["total_before"] == eligible.shape[0]
+        assert capacity["total_after"] == int((eligible["remaining_capacity"] > 0).sum())
+        assert list(evaluation.eligible.index) == list(eligible.index)
+
+
+def test_allocate_student_rejects_pool_other_than_index_frame() -> None:
+    policy = load_policy()
+    pool = _random_pool(5)
+    index = JoinKeyIndex.build(pool, policy=policy)
+    with pytest.raises(ValueError, match="join_index.frame"):
+        allocate_student(_students()[0], pool.copy(), policy=policy, join_index=index)
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from app.core.build_matrix import _cartesian_positions, _ListCells
+
+
+def test_cartesian_positions_match_chained_explode() -> None:
+    frame = pd.DataFrame(
+        {
+            "group": [[("تجربی", 1201), ("ریاضی", 2201)], [("انسانی", 3201)], []],
+            "gender": [[0, 1], [], 1],
+            "status": [[1], [0, 1], [0]],
+            "school": [["0"], [" ", "5001", "5002"], [None]],
+            "finance": [[0, 1, 3], [0], [0, 3]],
+        },
+        index=[10, 20, 30],
+    )
+    expected = frame
+    for column in frame.columns:
+        expected = expected.explode(column)
+
+    cells = [_ListCells.from_series(frame[column]) for column in frame.columns]
+    row_ids, positions = _cartesian_positions(cells)
+
+    assert list(frame.index.take(row_ids)) == list(expected.index)
+    for column, cell, position in zip(frame.columns, cells, positions):
+        actual = [cell.values[item] for item in position]
+        for got, want in zip(actual, expected[column].tolist(), strict=True):
+            assert got == want or (pd.isna(got) and pd.isna(want))
+
+
+def test_cartesian_positions_empty_input() -> None:
+    cells = [_ListCells.from_series(pd.Series([], dtype=object))]
+    row_ids, positions = _cartesian_positions(cells)
+    assert row_ids.size == 0
+    assert positions[0].dtype == np.int64
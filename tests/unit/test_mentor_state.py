@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.common.mentor_state import MentorStateStore
+from app.core.common.ranking import build_mentor_state, consume_capacity
+from app.core.policy_loader import load_policy
+
+
+def _pool() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "کد کارمندی پشتیبان": ["EMP-1", "EMP-2", "EMP-2", "EMP-3"],
+            "remaining_capacity": [2, 3, 3, 0],
+            "allocations_new": [0, 0, 0, 0],
+            "occupancy_ratio": [0.0, 0.0, 0.0, 0.0],
+        }
+    )
+
+
+def test_store_consume_matches_dict_state() -> None:
+    state = build_mentor_state(_pool(), policy=load_policy())
+    reference = copy.deepcopy(state)
+    store = MentorStateStore.from_state(state)
+
+    for mentor in ["EMP-2", "EMP-1", "EMP-2", "EMP-2", "EMP-1"]:
+        assert consume_capacity(store, mentor) == consume_capacity(reference, mentor)
+        assert dict(store[mentor]) == reference[mentor]
+
+    with pytest.raises(ValueError, match="CAPACITY_UNDERFLOW"):
+        consume_capacity(store, "EMP-3")
+    with pytest.raises(KeyError):
+        consume_capacity(store, "EMP-404")
+
+
+def test_store_entries_are_writable_views() -> None:
+    store = MentorStateStore.from_state({"EMP-1": {"initial": 4, "remaining": 4}})
+    entry = store.get("EMP-1")
+    entry["remaining"] = 1
+    assert int(store.remaining[0]) == 1
+    assert store["EMP-1"]["remaining_capacity"] == 1
+    assert store.get("EMP-404") is None
+    assert list(store) == ["EMP-1"]
+    assert store.remaining.dtype == np.int32
+
+
+def test_store_materializes_recorded_rows_once() -> None:
+    pool = _pool()
+    store = MentorStateStore.from_state(build_mentor_state(pool, policy=load_policy()))
+    store.bind_rows(pool["remaining_capacity"], pool["remaining_capacity"])
+
+    store.consume("EMP-2")
+    store.record_allocation(2, "EMP-2")
+    assert store.gate_capacity(np.array([1, 2])).tolist() == [3.0, 2.0]
+    assert int(pool.loc[2, "remaining_capacity"]) == 3
+
+    store.materialize(pool, capacity_columns=["remaining_capacity"])
+    assert pool["remaining_capacity"].tolist() == [2, 3, 2, 0]
+    assert pool["allocations_new"].tolist() == [0, 0, 1, 0]
+    assert pool.loc[2, "occupancy_ratio"] == pytest.approx(1 / 3)
+
+
+def test_store_snapshot_restores_arrays_in_place() -> None:
+    pool = _pool()
+    store = MentorStateStore.from_state(build_mentor_state(pool, policy=load_policy()))
+    store.bind_rows(pool["remaining_capacity"], pool["remaining_capacity"])
+    remaining = store.remaining
+    snapshot = store.snapshot()
+
+    store.consume("EMP-1")
+    store.record_allocation(0, "EMP-1")
+    store.restore(snapshot)
+
+    assert store.remaining is remaining
+    assert store["EMP-1"]["remaining"] == 2
+    assert store["EMP-1"]["alloc_new"] == 0
+    assert store.gate_capacity(np.array([0])).tolist() == [2.0]
@@ -10,6 +10,7 @@ import pytest
 
 from app.core.policy_loader import (
     PolicyConfig,
+    PolicyRegistry,
     load_policy,
     parse_policy_dict,
 )
@@ -367,3 +368,34 @@ def test_load_policy_cache_invalidates_on_mtime(tmp_path: Path) -> None:
     second = load_policy(config_path)
     assert first is not second
     assert second.normal_statuses == [1, 1]
+
+
+def test_policy_registry_without_polling_keeps_handle_until_refresh(tmp_path: Path) -> None:
+    config_path = tmp_path / "policy.json"
+    config_path.write_text(json.dumps(_valid_payload(), ensure_ascii=False), encoding="utf-8")
+    registry = PolicyRegistry(poll_interval=None)
+
+    first = registry.get(config_path)
+    payload = _valid_payload()
+    payload["normal_statuses"] = [1, 1]
+    config_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+    assert registry.get(config_path) is first
+    registry.refresh(config_path)
+    second = registry.get(config_path)
+    assert second is not first
+    assert second.normal_statuses == [1, 1]
+
+
+def test_policy_precomputed_lookups(tmp_path: Path) -> None:
+    config_path = tmp_path / "policy.json"
+    config_path.write_text(json.dumps(_valid_payload(), ensure_ascii=False), encoding="utf-8")
+    policy = load_policy(config_path)
+
+    columns, ascending = policy.ranking_sort_spec
+    assert columns == tuple(rule.column for rule in policy.ranking_rules)
+    assert ascending == (True, True, True, True)
+    assert policy.join_key_tuple == tuple(policy.join_keys)
+    assert policy.stage_column("gender") == policy.stage_columns["gender"]
+    with pytest.raises(KeyError):
+        policy.stage_column("missing-stage")
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from app.core.allocate_students import allocate_batch
+from app.core.common import ranking
+from app.core.common.ranking import (
+    MentorRankingQueue,
+    apply_ranking_policy,
+    build_mentor_state,
+    consume_capacity,
+)
+from app.core.policy_loader import load_policy
+
+
+def _mentor_frame(size: int = 40, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    mentor_numbers = rng.integers(1, 25, size=size)
+    return pd.DataFrame(
+        {
+            "پشتیبان": [f"Mentor-{number}" for number in mentor_numbers],
+            "کد کارمندی پشتیبان": [f"EMP-{number}" for number in mentor_numbers],
+            "remaining_capacity": rng.integers(0, 4, size=size),
+            "allocations_new": 0,
+            "occupancy_ratio": 0.0,
+        }
+    )
+
+
+def test_queue_top_matches_full_ranking_while_consuming() -> None:
+    policy = load_policy()
+    frame = _mentor_frame()
+    state = build_mentor_state(frame, policy=policy)
+    queue = MentorRankingQueue.from_frame(frame, state=state, policy=policy)
+    assert queue is not None
+    rng = np.random.default_rng(11)
+    groups = [np.sort(rng.choice(len(frame), size=15, replace=False)) for _ in range(4)]
+
+    for step in range(60):
+        group = groups[step % len(groups)]
+        mentors = frame["کد کارمندی پشتیبان"].iloc[group]
+        allowed = np.array(
+            [int(state[mentor]["remaining"]) > 0 for mentor in mentors], dtype=bool
+        )
+        chosen = queue.select(group, allowed)
+        if not allowed.any():
+            assert chosen is None
+            continue
+        candidates = frame.iloc[group[allowed]]
+        ranked = apply_ranking_policy(candidates, state=state, policy=policy)
+        expected_mentor = ranked.iloc[0]["mentor_id_en"]
+        assert chosen is not None
+        assert frame.iloc[chosen]["کد کارمندی پشتیبان"] == expected_mentor
+        consume_capacity(state, expected_mentor)
+
+
+def test_queue_disabled_for_fairness_strategies() -> None:
+    policy = replace(load_policy(), fairness_strategy="round_robin")
+    frame = _mentor_frame()
+    state = build_mentor_state(frame, policy=policy)
+    assert MentorRankingQueue.from_frame(frame, state=state, policy=policy) is None
+
+
+def _batch_inputs(seed: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    size = 30
+    pool = pd.DataFrame(
+        {
+            "پشتیبان": [f"Mentor-{idx}" for idx in range(size)],
+            "کد کارمندی پشتیبان": [f"EMP-{idx:03d}" for idx in range(size)],
+            "کدرشته": rng.choice([1201, 2201], size=size),
+            "گروه آزمایشی": "تجربی",
+            "جنسیت": rng.choice([0, 1], size=size),
+            "دانش آموز فارغ": 0,
+            "مرکز گلستان صدرا": 1,
+            "مالی حکمت بنیاد": 0,
+            "کد مدرسه": 0,
+            "remaining_capacity": rng.integers(1, 4, size=size),
+        }
+    )
+    students = pd.DataFrame(
+        {
+            "student_id": [f"STD-{idx:03d}" for idx in range(80)],
+            "کدرشته": rng.choice([1201, 2201], size=80),
+            "گروه_آزمایشی": "تجربی",
+            "جنسیت": rng.choice([0, 1], size=80),
+            "دانش_آموز_فارغ": 0,
+            "مرکز_گلستان_صدرا": 1,
+            "مالی_حکمت_بنیاد": 0,
+            "کد_مدرسه": 0,
+        }
+    )
+    return students, pool
+
+
+def test_allocate_batch_with_queue_matches_full_ranking(monkeypatch) -> None:
+    policy = load_policy()
+    students, pool = _batch_inputs(5)
+    with_queue = allocate_batch(students.copy(), pool.copy(), policy=policy)
+
+    monkeypatch.setattr(
+        ranking.MentorRankingQueue, "from_frame", classmethod(lambda cls, *a, **k: None)
+    )
+    without_queue = allocate_batch(students.copy(), pool.copy(), policy=policy)
+
+    pdt.assert_frame_equal(with_queue[0], without_queue[0])
+    pdt.assert_frame_equal(with_queue[1], without_queue[1])
+    assert list(with_queue[2]["mentor_id"]) == list(without_queue[2]["mentor_id"])
@@ -0,0 +1,69 @@
+"""بودجهٔ import در راه‌اندازی CLI و ماژول فونت."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from app.utils.lazy_import import LazyAttribute, lazy_attr
+
+_REPO_ROOT = Path(__file__).resolve().parents[2]
+
+_HEAVY_MODULES = (
+    "pandas",
+    "openpyxl",
+    "app.core.allocate_students",
+    "app.core.build_matrix",
+    "app.infra.excel.import_to_sabt",
+    "app.ui.assets.font_data_vazirmatn",
+)
+
+
+def _loaded_after_import(statement: str) -> list[str]:
+    code = (
+        "import json, sys\n"
+        f"{statement}\n"
+        f"print(json.dumps([m for m in {list(_HEAVY_MODULES)!r} if m in sys.modules]))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=_REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_cli_import_does_not_load_heavy_modules() -> None:
+    assert _loaded_after_import("import app.infra.cli") == []
+
+
+def test_ui_fonts_import_defers_embedded_payload() -> None:
+    assert _loaded_after_import("import app.ui.fonts") == []
+
+
+def test_cli_help_within_time_budget() -> None:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "app.infra.cli", "--help"],
+        cwd=_REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+
+    assert result.returncode == 0
+    assert "build-matrix" in result.stdout
+    assert elapsed < 5.0
+
+
+def test_lazy_attr_resolves_on_first_call() -> None:
+    proxy = LazyAttribute("os.path", "join")
+    assert proxy("a", "b") == os.path.join("a", "b")
+    assert proxy.__name__ == "join"
+    assert lazy_attr("os.path", "join") is os.path.join